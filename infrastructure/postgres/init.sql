@@ -4,6 +4,8 @@
 -- Create extensions
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp" SCHEMA public;
 CREATE EXTENSION IF NOT EXISTS "pgcrypto" SCHEMA public;
+CREATE EXTENSION IF NOT EXISTS "pg_trgm" SCHEMA public;
+CREATE EXTENSION IF NOT EXISTS "unaccent" SCHEMA public;
 
 -- Create public schema if not exists
 CREATE SCHEMA IF NOT EXISTS public;
@@ -0,0 +1,210 @@
+"""
+Batch endpoint support for the API Gateway
+Validates a list of sub-requests, resolves {{id.body.field}} references between
+them and runs them concurrently under a per-batch cap, each sub-request
+starting as soon as the ones it depends on have finished
+"""
+
+import os
+import re
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Batch configuration
+BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", 20))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 6))
+
+ALLOWED_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE"}
+
+# {{<id>.<status|headers|body>[.<key>...]}}
+REFERENCE_PATTERN = re.compile(r"\{\{\s*([A-Za-z0-9_\-]+)((?:\.[A-Za-z0-9_\-]+)*)\s*\}\}")
+
+
+class BatchError(ValueError):
+    """Raised for an invalid batch; reported to the client as 400"""
+
+
+class SubRequest:
+    """One entry of a batch"""
+
+    def __init__(self, index: int, spec: Dict[str, Any]):
+        if not isinstance(spec, dict):
+            raise BatchError(f"Request {index} must be an object")
+        self.index = index
+        self.id = str(spec.get("id") or index)
+        self.method = str(spec.get("method", "GET")).upper()
+        self.path = spec.get("path")
+        self.query = spec.get("query") or {}
+        self.headers = spec.get("headers") or {}
+        self.body = spec.get("body")
+        self.depends_on: Set[str] = _dependency_ids(self.id, spec.get("depends_on"))
+
+        if self.method not in ALLOWED_METHODS:
+            raise BatchError(f"Request {self.id}: unsupported method {self.method}")
+        if not isinstance(self.path, str) or not self.path.startswith("/"):
+            raise BatchError(f"Request {self.id}: path must be an absolute path")
+        if not isinstance(self.query, dict) or not isinstance(self.headers, dict):
+            raise BatchError(f"Request {self.id}: query and headers must be objects")
+
+        # References imply dependencies
+        self.depends_on |= find_references([self.path, self.query, self.body])
+
+
+def _dependency_ids(request_id: str, value: Any) -> Set[str]:
+    """depends_on as a set of ids; a single id may be given without a list"""
+    if value is None:
+        return set()
+    if isinstance(value, (str, int)) and not isinstance(value, bool):
+        value = [value]
+    if not isinstance(value, list) or not all(
+        isinstance(item, (str, int)) and not isinstance(item, bool) for item in value
+    ):
+        raise BatchError(f"Request {request_id}: depends_on must be a list of request ids")
+    return {str(item) for item in value}
+
+
+def find_references(value: Any) -> Set[str]:
+    """Collect the sub-request ids referenced anywhere inside a value"""
+    if isinstance(value, str):
+        return {match.group(1) for match in REFERENCE_PATTERN.finditer(value)}
+    if isinstance(value, dict):
+        return set().union(*(find_references(item) for item in value.values())) if value else set()
+    if isinstance(value, list):
+        return set().union(*(find_references(item) for item in value)) if value else set()
+    return set()
+
+
+def _lookup(result: Dict[str, Any], path: str) -> Any:
+    value: Any = result
+    for key in [part for part in path.split(".") if part]:
+        if isinstance(value, dict):
+            value = value.get(key)
+        elif isinstance(value, list) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        else:
+            return None
+    return value
+
+
+def resolve_references(value: Any, results: Dict[str, Dict[str, Any]]) -> Any:
+    """
+    Substitute {{id.path}} references with values from earlier results
+
+    A string consisting of a single reference is replaced by the referenced
+    value itself (keeping numbers, objects and lists intact); references
+    embedded in longer strings are interpolated as text.
+    """
+    if isinstance(value, str):
+        whole = REFERENCE_PATTERN.fullmatch(value.strip())
+        if whole:
+            return _lookup(results.get(whole.group(1), {}), whole.group(2))
+        return REFERENCE_PATTERN.sub(
+            lambda match: "" if (found := _lookup(results.get(match.group(1), {}), match.group(2))) is None
+            else str(found),
+            value
+        )
+    if isinstance(value, dict):
+        return {key: resolve_references(item, results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_references(item, results) for item in value]
+    return value
+
+
+def parse_batch(payload: Any, max_requests: int = BATCH_MAX_REQUESTS) -> List[SubRequest]:
+    """
+    Validate a batch payload
+
+    Args:
+        payload: {"requests": [...]} or a bare list of sub-requests
+
+    Returns:
+        Sub-requests in input order
+
+    Raises:
+        BatchError: malformed entries, duplicate ids, unknown references or cycles
+    """
+    items = payload.get("requests") if isinstance(payload, dict) else payload
+    if not isinstance(items, list) or not items:
+        raise BatchError("Batch must contain a non-empty list of requests")
+    if len(items) > max_requests:
+        raise BatchError(f"Batch contains {len(items)} requests; the maximum is {max_requests}")
+
+    requests = [SubRequest(index, spec) for index, spec in enumerate(items)]
+    ids = {request.id for request in requests}
+    if len(ids) != len(requests):
+        raise BatchError("Request ids must be unique")
+    for request in requests:
+        unknown = request.depends_on - ids
+        if unknown:
+            raise BatchError(f"Request {request.id} depends on unknown requests: {', '.join(sorted(unknown))}")
+        if request.id in request.depends_on:
+            raise BatchError(f"Request {request.id} depends on itself")
+
+    _check_acyclic(requests)
+    return requests
+
+
+def _check_acyclic(requests: List[SubRequest]):
+    remaining = {request.id: set(request.depends_on) for request in requests}
+    while remaining:
+        ready = [request_id for request_id, deps in remaining.items() if not deps]
+        if not ready:
+            raise BatchError(f"Dependency cycle between requests: {', '.join(sorted(remaining))}")
+        for request_id in ready:
+            del remaining[request_id]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+
+async def run_batch(
+    requests: List[SubRequest],
+    execute: Callable[[SubRequest, Dict[str, Dict[str, Any]]], Awaitable[Dict[str, Any]]],
+    concurrency: int = BATCH_CONCURRENCY,
+) -> List[Dict[str, Any]]:
+    """
+    Run sub-requests concurrently, respecting dependencies
+
+    Args:
+        requests: Validated sub-requests
+        execute: Coroutine returning {"status", "headers", "body"} for one
+            sub-request, given the results finished so far
+        concurrency: Maximum sub-requests in flight at once
+
+    Returns:
+        One result per sub-request, in input order. Sub-requests whose
+        dependencies failed (status >= 400) are not sent and get 424.
+    """
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    results: Dict[str, Dict[str, Any]] = {}
+    done: Dict[str, asyncio.Event] = {request.id: asyncio.Event() for request in requests}
+
+    async def run_one(request: SubRequest):
+        try:
+            for dependency in request.depends_on:
+                await done[dependency].wait()
+
+            failed = [
+                dependency for dependency in sorted(request.depends_on)
+                if results[dependency]["status"] >= 400
+            ]
+            if failed:
+                results[request.id] = {
+                    "status": 424,
+                    "headers": {},
+                    "body": {"detail": f"Dependency failed: {', '.join(failed)}"},
+                }
+                return
+
+            async with semaphore:
+                results[request.id] = await execute(request, results)
+        except Exception as e:
+            logger.error(f"Batch request {request.id} failed: {str(e)}")
+            results[request.id] = {"status": 500, "headers": {}, "body": {"detail": "Internal server error"}}
+        finally:
+            done[request.id].set()
+
+    await asyncio.gather(*(run_one(request) for request in requests))
+    return [{"id": request.id, **results[request.id]} for request in requests]
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+API Gateway benchmark harness
+Runs the gateway app against a stub upstream with configurable latency and
+payload sizes, drives it with a concurrent async load generator and reports
+throughput, latency percentiles and memory per scenario. Results are written
+as JSON (tagged with the git commit) so runs can be compared across commits.
+
+Usage:
+    python benchmark.py                              # all scenarios, in-process
+    python benchmark.py --scenarios small_json large_list --concurrency 100
+    python benchmark.py --uvicorn                    # over real sockets
+    python benchmark.py --compare benchmark-results/<older run>.json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import platform
+import resource
+import subprocess
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+GATEWAY_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(GATEWAY_DIR))
+
+# Features that need Redis or would hide the proxy path are off unless set explicitly
+BENCHMARK_ENV_DEFAULTS = {
+    "RATE_LIMIT_ENABLED": "false",
+    "RESPONSE_CACHE_ENABLED": "false",
+    "COALESCE_ENABLED": "false",
+    "ADAPTIVE_CONCURRENCY_ENABLED": "false",
+    "HEALTH_CHECK_INTERVAL": "3600",
+}
+
+SERVICE_URL_VARIABLES = [
+    "AUTH_SERVICE_URL",
+    "TENANT_SERVICE_URL",
+    "BOOKING_SERVICE_URL",
+    "COMMUNICATION_SERVICE_URL",
+    "CRM_SERVICE_URL",
+    "FINANCIAL_SERVICE_URL",
+    "SYSTEM_SERVICE_URL",
+]
+
+
+@dataclass
+class Scenario:
+    """One request shape to drive through the gateway"""
+    name: str
+    method: str
+    path: str
+    auth: bool = True
+    body: bool = False
+
+
+SCENARIOS = [
+    Scenario("small_json", "GET", "/api/v1/crm/customers/42"),
+    Scenario("small_json_noauth", "GET", "/api/v1/crm/customers/42", auth=False),
+    Scenario("large_list", "GET", "/api/v1/bookings/bookings"),
+    Scenario("post_body", "POST", "/api/v1/crm/customers", body=True),
+    Scenario("post_body_noauth", "POST", "/api/v1/crm/customers", auth=False, body=True),
+]
+
+
+class StubUpstream:
+    """
+    Minimal ASGI upstream answering every path
+
+    GETs ending in /bookings return the large list payload, other GETs a small
+    JSON object, and writes report how many body bytes they received.
+    """
+
+    def __init__(self, latency: float, large_items: int):
+        self.latency = latency
+        self.small_body = json.dumps({"id": 42, "name": "Benchmark Customer", "status": "active"}).encode()
+        self.large_body = json.dumps({
+            "items": [
+                {"id": index, "reference": f"BK-{index:06d}", "status": "confirmed", "guests": 2, "total": "199.00"}
+                for index in range(large_items)
+            ],
+            "total": large_items,
+        }).encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        received = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            received += len(message.get("body", b""))
+            more_body = message.get("more_body", False)
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if scope["method"] != "GET":
+            body = json.dumps({"received": received}).encode()
+        elif scope["path"].rstrip("/").endswith("/bookings"):
+            body = self.large_body
+        else:
+            body = self.small_body
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def current_rss_mb() -> Optional[float]:
+    """Resident set size of this process (Linux only)"""
+    try:
+        with open("/proc/self/statm") as handle:
+            pages = int(handle.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError):
+        return None
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=GATEWAY_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_scenario(client, scenario: Scenario, args, token: str) -> Dict[str, Any]:
+    """Send args.requests requests with args.concurrency workers and summarize them"""
+    headers = {"content-type": "application/json"}
+    if scenario.auth:
+        headers["authorization"] = f"Bearer {token}"
+    body = json.dumps({"notes": "x" * args.post_bytes}).encode() if scenario.body else None
+
+    async def send_one() -> int:
+        response = await client.request(scenario.method, scenario.path, headers=headers, content=body)
+        return response.status_code
+
+    for _ in range(args.warmup):
+        await send_one()
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = args.requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                status = await send_one()
+            except Exception:
+                status = 599
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors += 1
+
+    if args.trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    traced_peak = None
+    if args.trace_memory:
+        traced_peak = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        tracemalloc.stop()
+
+    ordered = sorted(latencies)
+    return {
+        "scenario": scenario.name,
+        "method": scenario.method,
+        "path": scenario.path,
+        "auth": scenario.auth,
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+            "p50": round(percentile(ordered, 0.50) * 1000, 3),
+            "p95": round(percentile(ordered, 0.95) * 1000, 3),
+            "p99": round(percentile(ordered, 0.99) * 1000, 3),
+            "max": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        },
+        "memory_mb": {
+            "rss": current_rss_mb(),
+            "peak_rss": peak_rss_mb(),
+            "traced_peak": traced_peak,
+        },
+    }
+
+
+def free_port() -> int:
+    import socket
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def start_server(app, port: int):
+    """Serve an ASGI app with uvicorn inside this event loop"""
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="off"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    return server, task
+
+
+async def run(args) -> Dict[str, Any]:
+    import httpx
+    from jose import jwt
+
+    stub = StubUpstream(args.latency_ms / 1000, args.large_items)
+    servers = []
+    if args.uvicorn:
+        stub_port = free_port()
+        servers.append(await start_server(stub, stub_port))
+        for variable in SERVICE_URL_VARIABLES:
+            os.environ[variable] = f"http://127.0.0.1:{stub_port}"
+
+    # The gateway reads its configuration at import time
+    import main
+
+    # Per-request INFO logs (httpx, proxy) would dominate the measurement
+    logging.getLogger().setLevel(logging.WARNING)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if not args.uvicorn:
+        for service_name in main.upstream_clients.services:
+            main.upstream_clients._clients[service_name] = httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=stub), base_url=main.upstream_clients.services[service_name]
+            )
+
+    if args.uvicorn:
+        gateway_port = free_port()
+        servers.append(await start_server(main.app, gateway_port))
+        client = httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{gateway_port}",
+            timeout=30,
+            limits=httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        )
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://gateway", timeout=30)
+
+    token = jwt.encode(
+        {"sub": "benchmark", "tenant_slug": "benchmark", "role": "tenant_admin", "exp": int(time.time()) + 3600},
+        main.SECRET_KEY,
+        algorithm="HS256"
+    )
+
+    selected = [scenario for scenario in SCENARIOS if not args.scenarios or scenario.name in args.scenarios]
+    results = []
+    try:
+        for scenario in selected:
+            result = await run_scenario(client, scenario, args, token)
+            results.append(result)
+            latency = result["latency_ms"]
+            print(
+                f"{scenario.name:<20} {result['throughput_rps']:>9.1f} req/s  "
+                f"p50 {latency['p50']:>8.2f} ms  p95 {latency['p95']:>8.2f} ms  p99 {latency['p99']:>8.2f} ms  "
+                f"errors {result['errors']}  rss {result['memory_mb']['rss']} MB"
+            )
+    finally:
+        await client.aclose()
+        await main.upstream_clients.close()
+        for server, task in servers:
+            server.should_exit = True
+            await task
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mode": "uvicorn" if args.uvicorn else "asgi",
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "upstream_latency_ms": args.latency_ms,
+            "large_items": args.large_items,
+            "post_bytes": args.post_bytes,
+        },
+        "scenarios": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline_path: str):
+    """Print throughput and p99 changes against an earlier result file"""
+    with open(baseline_path) as handle:
+        baseline = json.load(handle)
+    previous = {result["scenario"]: result for result in baseline.get("scenarios", [])}
+    print(f"\nCompared with {baseline_path} (commit {baseline.get('meta', {}).get('commit')}):")
+    for result in current["scenarios"]:
+        old = previous.get(result["scenario"])
+        if old is None:
+            continue
+        rps_change = (result["throughput_rps"] - old["throughput_rps"]) / old["throughput_rps"] * 100 \
+            if old["throughput_rps"] else 0.0
+        p99_change = (result["latency_ms"]["p99"] - old["latency_ms"]["p99"]) / old["latency_ms"]["p99"] * 100 \
+            if old["latency_ms"]["p99"] else 0.0
+        print(f"{result['scenario']:<20} throughput {rps_change:+7.1f}%  p99 {p99_change:+7.1f}%")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the API gateway against stub upstreams")
+    parser.add_argument("--scenarios", nargs="*", choices=[scenario.name for scenario in SCENARIOS],
+                        help="Scenarios to run (default: all)")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=50, help="Concurrent clients")
+    parser.add_argument("--warmup", type=int, default=100, help="Unmeasured requests before each scenario")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Stub upstream latency")
+    parser.add_argument("--large-items", type=int, default=2000, help="Items in the large list payload")
+    parser.add_argument("--post-bytes", type=int, default=16384, help="Size of POST bodies")
+    parser.add_argument("--uvicorn", action="store_true",
+                        help="Serve the gateway and stub with uvicorn over loopback instead of in-process ASGI")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Also report tracemalloc peaks (slows the run down)")
+    parser.add_argument("--output", help="Result file (default: benchmark-results/gateway-<time>-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    return parser.parse_args(argv)
+
+
+def main_cli(argv=None):
+    args = parse_args(argv)
+    for key, value in BENCHMARK_ENV_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+
+    results = asyncio.run(run(args))
+
+    output = args.output or str(
+        GATEWAY_DIR / "benchmark-results"
+        / f"gateway-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}-{results['meta']['commit'] or 'unknown'}.json"
+    )
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w") as handle:
+        json.dump(results, handle, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main_cli()
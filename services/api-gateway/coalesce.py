@@ -0,0 +1,87 @@
+"""
+Request coalescing (single-flight) for the API Gateway
+Concurrent identical GETs for whitelisted routes (dashboard aggregates such as
+statistics and summaries) share one upstream call whose buffered response is
+fanned out to every waiter
+"""
+
+import os
+import asyncio
+import logging
+from fnmatch import fnmatch
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Coalescing configuration
+COALESCE_ENABLED = os.getenv("COALESCE_ENABLED", "true").lower() == "true"
+# Comma-separated gateway path globs eligible for coalescing
+COALESCE_ROUTES = os.getenv("COALESCE_ROUTES", "*/statistics,*/summary,*/stats,*/dashboard")
+
+
+def parse_coalesce_routes(spec: str) -> List[str]:
+    """Parse the COALESCE_ROUTES specification into path globs"""
+    return [pattern.strip() for pattern in spec.split(",") if pattern.strip()]
+
+
+class RequestCoalescer:
+    """
+    Single-flight registry keyed by tenant, auth scope, path and query
+
+    The first caller for a key (the leader) starts the upstream call as a task;
+    callers arriving while it is in flight await the same task. The task is
+    shielded, so a leader whose client disconnects does not cancel the call for
+    everyone else. Nothing is kept once the call completes.
+    """
+
+    def __init__(self, routes: List[str] = None, enabled: bool = COALESCE_ENABLED):
+        self.routes = routes if routes is not None else parse_coalesce_routes(COALESCE_ROUTES)
+        self.enabled = enabled
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.collapsed = 0
+        self.errors = 0
+
+    def matches(self, method: str, path: str) -> bool:
+        """Check whether a request is eligible for coalescing"""
+        if not self.enabled or method != "GET":
+            return False
+        return any(fnmatch(path, pattern) for pattern in self.routes)
+
+    @staticmethod
+    def build_key(tenant: str, scope: str, path: str, query_items: List[Tuple[str, str]]) -> str:
+        query = "&".join(f"{key}={value}" for key, value in sorted(query_items))
+        return f"{tenant}|{scope}|{path}?{query}"
+
+    async def run(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Return the result of fetch(), sharing it with identical concurrent calls
+
+        Exceptions raised by fetch() are re-raised to every waiter.
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fetch())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.collapsed += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.leaders + self.collapsed
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._in_flight),
+            "upstream_calls": self.leaders,
+            "collapsed": self.collapsed,
+            "errors": self.errors,
+            "collapse_ratio": round(self.collapsed / total, 4) if total else 0.0,
+        }
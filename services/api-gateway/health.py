@@ -0,0 +1,178 @@
+"""
+Background upstream health monitoring for the API Gateway
+Probes every upstream's /health endpoint on a jittered interval and keeps a
+rolling state per service, so the gateway's health endpoints answer from
+memory instead of fanning out to the whole mesh on every poll
+"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from upstream import UpstreamClients
+
+logger = logging.getLogger(__name__)
+
+# Probe configuration
+HEALTH_CHECK_INTERVAL = float(os.getenv("HEALTH_CHECK_INTERVAL", 10.0))
+# Fraction of the interval added or removed at random so probes do not synchronise
+HEALTH_CHECK_JITTER = float(os.getenv("HEALTH_CHECK_JITTER", 0.2))
+HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", 5.0))
+HEALTH_CHECK_EWMA_ALPHA = float(os.getenv("HEALTH_CHECK_EWMA_ALPHA", 0.3))
+# Consecutive failed probes before a service is reported as down
+HEALTH_CHECK_FAILURE_THRESHOLD = int(os.getenv("HEALTH_CHECK_FAILURE_THRESHOLD", 3))
+
+
+class ServiceHealth:
+    """Rolling health state of one upstream"""
+
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.url = url
+        self.status = "unknown"
+        self.last_latency_ms: Optional[float] = None
+        self.ewma_latency_ms: Optional[float] = None
+        self.consecutive_failures = 0
+        self.consecutive_successes = 0
+        self.checks = 0
+        self.failures = 0
+        self.last_checked: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def available(self) -> bool:
+        """False once the failure threshold is reached; unknown services count as available"""
+        return self.consecutive_failures < HEALTH_CHECK_FAILURE_THRESHOLD
+
+    def record(self, status: str, latency: float, error: Optional[str] = None):
+        latency_ms = round(latency * 1000, 2)
+        self.status = status
+        self.checks += 1
+        self.last_latency_ms = latency_ms
+        self.last_checked = datetime.utcnow().isoformat()
+        if self.ewma_latency_ms is None:
+            self.ewma_latency_ms = latency_ms
+        else:
+            self.ewma_latency_ms = round(
+                HEALTH_CHECK_EWMA_ALPHA * latency_ms + (1 - HEALTH_CHECK_EWMA_ALPHA) * self.ewma_latency_ms, 2
+            )
+        if status == "healthy":
+            self.consecutive_failures = 0
+            self.consecutive_successes += 1
+            self.last_error = None
+        else:
+            self.consecutive_successes = 0
+            self.consecutive_failures += 1
+            self.failures += 1
+            self.last_error = error
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            "name": self.name,
+            "status": self.status,
+            "url": self.url,
+            "available": self.available,
+            "last_checked": self.last_checked,
+            "last_latency_ms": self.last_latency_ms,
+            "ewma_latency_ms": self.ewma_latency_ms,
+            "consecutive_failures": self.consecutive_failures,
+            "checks": self.checks,
+            "failures": self.failures,
+        }
+        if self.last_error:
+            result["error"] = self.last_error
+        return result
+
+
+class HealthMonitor:
+    """
+    Periodic prober for all upstream services
+
+    Listeners registered with add_listener() are called as
+    listener(service_name, state) after every probe, which lets circuit
+    breakers and load balancers react to health changes.
+    """
+
+    def __init__(
+        self,
+        clients: UpstreamClients,
+        interval: float = HEALTH_CHECK_INTERVAL,
+        jitter: float = HEALTH_CHECK_JITTER,
+        timeout: float = HEALTH_CHECK_TIMEOUT,
+    ):
+        self.clients = clients
+        self.interval = interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self._states: Dict[str, ServiceHealth] = {
+            name: ServiceHealth(name, url) for name, url in clients.services.items()
+        }
+        self._listeners: List[Callable[[str, ServiceHealth], None]] = []
+        self._tasks: List[asyncio.Task] = []
+
+    def add_listener(self, listener: Callable[[str, ServiceHealth], None]):
+        self._listeners.append(listener)
+
+    def register(self, name: str, url: str) -> ServiceHealth:
+        """Track an additional upstream (probed once the monitor is started)"""
+        if name not in self._states:
+            self._states[name] = ServiceHealth(name, url)
+            if self._tasks:
+                self._tasks.append(asyncio.create_task(self._run(self._states[name])))
+        return self._states[name]
+
+    async def start(self):
+        """Start one probe loop per upstream (called from the application lifespan)"""
+        self._tasks = [asyncio.create_task(self._run(state)) for state in self._states.values()]
+        logger.info(f"Health monitor probing {len(self._tasks)} services every {self.interval}s")
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _next_delay(self) -> float:
+        spread = self.interval * self.jitter
+        return max(self.interval + random.uniform(-spread, spread), 0.1)
+
+    async def _run(self, state: ServiceHealth):
+        # Stagger the first probes as well so services are not hit in lockstep
+        await asyncio.sleep(random.uniform(0, self.interval * self.jitter))
+        while True:
+            await self.probe(state)
+            await asyncio.sleep(self._next_delay())
+
+    async def probe(self, state: ServiceHealth):
+        """Probe one upstream's /health endpoint and update its state"""
+        started = time.monotonic()
+        try:
+            client = self.clients.get(state.name)
+            response = await client.get(f"{state.url}/health", timeout=self.timeout)
+            status = "healthy" if response.status_code == 200 else "unhealthy"
+            state.record(status, time.monotonic() - started, None if status == "healthy" else f"HTTP {response.status_code}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            state.record("error", time.monotonic() - started, str(e) or e.__class__.__name__)
+
+        for listener in self._listeners:
+            try:
+                listener(state.name, state)
+            except Exception as e:
+                logger.warning(f"Health listener failed for {state.name}: {str(e)}")
+
+    def get(self, name: str) -> Optional[ServiceHealth]:
+        return self._states.get(name)
+
+    def is_available(self, name: str) -> bool:
+        state = self._states.get(name)
+        return state is None or state.available
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Current state of every upstream"""
+        return [state.to_dict() for state in self._states.values()]
@@ -1,35 +1,49 @@
-from fastapi import FastAPI, Request, HTTPException, Depends, status
+from fastapi import FastAPI, Request, HTTPException, Depends, WebSocket, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import httpx
 import os
+import json
+import time
 import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
 from jose import JWTError, jwt
 import logging
 
+from upstream import UpstreamClients, UPSTREAM_CONNECT_TIMEOUT
+from shared_metrics import setup_metrics, timed, set_request_labels, observe_upstream
+from token_cache import (
+    VerifiedTokenCache,
+    sign_claims,
+    VERIFIED_CLAIMS_HEADER,
+    VERIFIED_CLAIMS_SIGNATURE_HEADER,
+)
+from response_cache import ResponseCache, CachedResponse, etag_matches
+from rate_limit import (
+    RateLimiter, RateLimitDecision, RATE_LIMIT_TRUSTED_PROXIES, client_address, parse_trusted_proxies
+)
+from resilience import UpstreamGuards, UpstreamUnavailable
+from coalesce import RequestCoalescer
+from health import HealthMonitor
+from routing import load_route_table
+from retry import (
+    RetryBudget, RetryPolicies, LatencyTracker, RETRYABLE_STATUS_CODES, backoff_delay, is_idempotent
+)
+from batch import BatchError, SubRequest, parse_batch, resolve_references, run_batch
+from realtime import (
+    ConnectionTracker, ConnectionLimitExceeded, REALTIME_ENABLED, REALTIME_IDLE_TIMEOUT,
+    WEBSOCKET_HANDSHAKE_HEADERS, CLOSE_POLICY_VIOLATION, CLOSE_TRY_AGAIN_LATER,
+    connect_upstream_websocket, is_event_stream, iterate_with_idle_timeout, relay_websocket, websocket_url
+)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(
-    title="Multi-Tenant API Gateway",
-    description="Central API Gateway for Multi-Tenant Platform",
-    version="1.0.0"
-)
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-    expose_headers=["*"],
-)
-
 # JWT Configuration
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
@@ -38,6 +52,9 @@ SERVICE_TOKEN_EXPIRE_HOURS = 24
 # Security scheme
 security = HTTPBearer(auto_error=False)
 
+# Cache of verified token claims, keyed by token digest
+verified_token_cache = VerifiedTokenCache()
+
 # Service URLs
 AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://auth-service:8001")
 TENANT_SERVICE_URL = os.getenv("TENANT_SERVICE_URL", "http://tenant-service:8002")
@@ -47,6 +64,85 @@ CRM_SERVICE_URL = os.getenv("CRM_SERVICE_URL", "http://crm-service:8006")
 FINANCIAL_SERVICE_URL = os.getenv("FINANCIAL_SERVICE_URL", "http://financial-service:8007")
 SYSTEM_SERVICE_URL = os.getenv("SYSTEM_SERVICE_URL", "http://system-service:8008")
 
+SERVICE_URLS = {
+    "auth-service": AUTH_SERVICE_URL,
+    "tenant-service": TENANT_SERVICE_URL,
+    "booking-operations-service": BOOKING_SERVICE_URL,
+    "communication-service": COMMUNICATION_SERVICE_URL,
+    "crm-service": CRM_SERVICE_URL,
+    "financial-service": FINANCIAL_SERVICE_URL,
+    "system-service": SYSTEM_SERVICE_URL,
+}
+
+# Path prefix -> upstream pool routing; each *_SERVICE_URL may list several replicas
+route_table = load_route_table(SERVICE_URLS)
+
+# Long-lived connection pools, one per upstream replica
+upstream_clients = UpstreamClients(route_table.replica_urls())
+
+# Response cache for whitelisted reference-data GETs
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+response_cache = ResponseCache()
+
+# Per-tenant token buckets and daily quotas
+rate_limiter = RateLimiter()
+trusted_proxies = parse_trusted_proxies(RATE_LIMIT_TRUSTED_PROXIES)
+
+# Circuit breakers and adaptive concurrency limits, one per upstream
+upstream_guards = UpstreamGuards()
+
+# Retries and hedging for idempotent calls, bounded by a global budget
+retry_policies = RetryPolicies(route_table)
+retry_budget = RetryBudget()
+latency_tracker = LatencyTracker()
+
+# Single-flight sharing of identical concurrent aggregate GETs
+request_coalescer = RequestCoalescer()
+
+# Open WebSocket and SSE connections, limited per tenant
+realtime_connections = ConnectionTracker()
+
+# Background upstream health probes; breakers open when a service keeps failing them
+health_monitor = HealthMonitor(upstream_clients)
+health_monitor.add_listener(upstream_guards.on_health_change)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Manage application lifecycle
+    """
+    await upstream_clients.start()
+    await rate_limiter.start(REDIS_URL)
+    await health_monitor.start()
+    invalidation_listener = asyncio.create_task(response_cache.listen_for_invalidations(REDIS_URL))
+    yield
+    invalidation_listener.cancel()
+    await health_monitor.close()
+    await rate_limiter.close()
+    await upstream_clients.close()
+
+
+app = FastAPI(
+    title="Multi-Tenant API Gateway",
+    description="Central API Gateway for Multi-Tenant Platform",
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# CORS middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["*"],
+)
+
+# Request metrics (/metrics) and Server-Timing headers
+setup_metrics(app, "api-gateway")
+
 def create_service_token() -> str:
     """Create a token for service-to-service communication"""
     data = {
@@ -61,8 +157,13 @@ def create_service_token() -> str:
 
 def verify_user_token(token: str) -> Dict[str, Any]:
     """Verify and decode a user JWT token"""
+    cached = verified_token_cache.get(token)
+    if cached is not None:
+        return cached
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        verified_token_cache.set(token, payload)
         return payload
     except JWTError as e:
         logger.error(f"Token verification failed: {str(e)}")
@@ -92,19 +193,6 @@ async def get_current_user(
     except HTTPException:
         return None
 
-# Health check for dependent services
-async def check_service_health(service_url: str, service_name: str) -> Dict[str, Any]:
-    """Check if a service is healthy"""
-    try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(f"{service_url}/health")
-            if response.status_code == 200:
-                return {"name": service_name, "status": "healthy", "url": service_url}
-            else:
-                return {"name": service_name, "status": "unhealthy", "url": service_url}
-    except Exception as e:
-        return {"name": service_name, "status": "error", "url": service_url, "error": str(e)}
-
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
@@ -138,211 +226,779 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    services_health = await asyncio.gather(
-        check_service_health(AUTH_SERVICE_URL, "auth-service"),
-        check_service_health(TENANT_SERVICE_URL, "tenant-service"),
-        check_service_health(BOOKING_SERVICE_URL, "booking-operations-service"),
-        check_service_health(COMMUNICATION_SERVICE_URL, "communication-service"),
-        check_service_health(CRM_SERVICE_URL, "crm-service"),
-        check_service_health(FINANCIAL_SERVICE_URL, "financial-service"),
-        check_service_health(SYSTEM_SERVICE_URL, "system-service"),
-        return_exceptions=True
-    )
+    """Health check endpoint, served from the background health monitor"""
+    services_health = health_monitor.snapshot()
 
-    all_healthy = all(
-        service.get("status") == "healthy"
-        for service in services_health
-        if isinstance(service, dict)
-    )
+    all_healthy = all(service.get("status") == "healthy" for service in services_health)
 
     return {
         "status": "healthy" if all_healthy else "degraded",
         "service": "api-gateway",
         "timestamp": datetime.utcnow().isoformat(),
-        "dependencies": services_health
+        "dependencies": services_health,
+        "upstream_pools": upstream_clients.stats(),
+        "token_cache": verified_token_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "coalescing": request_coalescer.stats(),
+        "routing": route_table.stats(),
+        "retries": {"budget": retry_budget.stats(), "routes": retry_policies.stats()},
+        "realtime": realtime_connections.stats()
     }
 
 @app.get("/api/v1/services/status")
 async def services_status():
     """Get status of all services"""
-    import asyncio
-
-    services_health = await asyncio.gather(
-        check_service_health(AUTH_SERVICE_URL, "auth-service"),
-        check_service_health(TENANT_SERVICE_URL, "tenant-service"),
-        check_service_health(BOOKING_SERVICE_URL, "booking-operations-service"),
-        check_service_health(COMMUNICATION_SERVICE_URL, "communication-service"),
-        check_service_health(CRM_SERVICE_URL, "crm-service"),
-        check_service_health(FINANCIAL_SERVICE_URL, "financial-service"),
-        check_service_health(SYSTEM_SERVICE_URL, "system-service"),
-        return_exceptions=True
-    )
+    services_health = health_monitor.snapshot()
+
+    # Circuit breaker and concurrency limit state alongside each health result
+    for service in services_health:
+        service.update(upstream_guards.get(service["name"]).stats())
 
     return {
         "timestamp": datetime.utcnow().isoformat(),
         "services": services_health
     }
 
-# Auth Service Routes
-@app.api_route("/api/v1/auth", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
-async def proxy_auth_base(request: Request):
-    """Proxy requests to auth service base"""
-    return await proxy_request(request, AUTH_SERVICE_URL, "/api/v1/auth")
-
-@app.api_route("/api/v1/auth/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
-async def proxy_auth(request: Request, path: str):
-    """Proxy requests to auth service"""
-    return await proxy_request(request, AUTH_SERVICE_URL, f"/api/v1/auth/{path}")
-
-# Tenant Service Routes
-@app.api_route("/api/v1/tenants", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
-async def proxy_tenants_base(request: Request):
-    """Proxy requests to tenant service base"""
-    return await proxy_request(request, TENANT_SERVICE_URL, "/api/v1/tenants")
-
-@app.api_route("/api/v1/tenants/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
-async def proxy_tenants(request: Request, path: str):
-    """Proxy requests to tenant service"""
-    return await proxy_request(request, TENANT_SERVICE_URL, f"/api/v1/tenants/{path}")
-
-# Booking Operations Service Routes
-@app.api_route("/api/v1/bookings", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
-async def proxy_bookings_base(request: Request):
-    """Proxy requests to booking operations service base"""
-    return await proxy_request(request, BOOKING_SERVICE_URL, "/api/v1/bookings")
-
-@app.api_route("/api/v1/bookings/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
-async def proxy_bookings(request: Request, path: str):
-    """Proxy requests to booking operations service"""
-    return await proxy_request(request, BOOKING_SERVICE_URL, f"/api/v1/bookings/{path}")
-
-# Communication Service Routes
-@app.api_route("/api/v1/communications", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
-async def proxy_communications_base(request: Request):
-    """Proxy requests to communication service base"""
-    return await proxy_request(request, COMMUNICATION_SERVICE_URL, "/api/v1/communications")
-
-@app.api_route("/api/v1/communications/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
-async def proxy_communications(request: Request, path: str):
-    """Proxy requests to communication service"""
-    return await proxy_request(request, COMMUNICATION_SERVICE_URL, f"/api/v1/communications/{path}")
-
-# CRM Service Routes
-@app.api_route("/api/v1/crm", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
-async def proxy_crm_base(request: Request):
-    """Proxy requests to CRM service base"""
-    return await proxy_request(request, CRM_SERVICE_URL, "/api/v1/crm")
-
-@app.api_route("/api/v1/crm/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
-async def proxy_crm(request: Request, path: str):
-    """Proxy requests to CRM service"""
-    return await proxy_request(request, CRM_SERVICE_URL, f"/api/v1/crm/{path}")
-
-# Financial Service Routes
-@app.api_route("/api/v1/financial", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
-async def proxy_financial_base(request: Request):
-    """Proxy requests to financial service base"""
-    return await proxy_request(request, FINANCIAL_SERVICE_URL, "/api/v1/financial")
-
-@app.api_route("/api/v1/financial/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
-async def proxy_financial(request: Request, path: str):
-    """Proxy requests to financial service"""
-    return await proxy_request(request, FINANCIAL_SERVICE_URL, f"/api/v1/financial/{path}")
-
-# System Service Routes
-@app.api_route("/api/v1/system", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
-async def proxy_system_base(request: Request):
-    """Proxy requests to system service base"""
-    return await proxy_request(request, SYSTEM_SERVICE_URL, "/api/v1/system")
-
-@app.api_route("/api/v1/system/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
-async def proxy_system(request: Request, path: str):
-    """Proxy requests to system service"""
-    return await proxy_request(request, SYSTEM_SERVICE_URL, f"/api/v1/system/{path}")
-
-# Generic proxy function
-async def proxy_request(
-    request: Request,
-    service_url: str,
-    path: str,
-    headers: Optional[Dict[str, str]] = None
-):
-    """Generic proxy function for forwarding requests to services"""
-    # Build the full URL
-    url = f"{service_url}{path}"
+# Hop-by-hop headers are connection-specific and must not be forwarded (RFC 7230, section 6.1)
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+}
+
+
+def filter_headers(items) -> list:
+    """Drop hop-by-hop headers (including any listed in Connection) from header pairs"""
+    items = list(items)
+    excluded = set(HOP_BY_HOP_HEADERS)
+    for key, value in items:
+        if key.lower() == "connection":
+            excluded.update(token.strip().lower() for token in value.split(","))
+    return [(key, value) for key, value in items if key.lower() not in excluded]
+
+
+async def stream_upstream_body(response: httpx.Response):
+    """Yield the raw upstream body chunk by chunk and release the connection afterwards"""
+    try:
+        async for chunk in response.aiter_raw():
+            yield chunk
+    finally:
+        await response.aclose()
+
+
+def build_streaming_response(response: httpx.Response, body=None) -> StreamingResponse:
+    """
+    Wrap an upstream response opened with stream=True without decoding it
+
+    Status, headers (minus hop-by-hop) and the raw, still-encoded byte stream
+    are passed through unchanged, so bodies of any size or content type are
+    forwarded with flat memory use. body replaces the default chunk iterator.
+    """
+    proxied = StreamingResponse(body or stream_upstream_body(response), status_code=response.status_code)
+    proxied.raw_headers = [
+        (key.encode("latin-1"), value.encode("latin-1"))
+        for key, value in filter_headers(response.headers.multi_items())
+    ]
+    return proxied
+
+
+def authenticate_request(headers: Dict[str, str]) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Verify the bearer token once at the gateway
+
+    Returns (token, claims), or (None, None) when the request carries no valid
+    token. Invalid tokens are forwarded untouched so the service returns its
+    usual 401.
+    """
+    authorization = next((value for key, value in headers.items() if key.lower() == "authorization"), "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None, None
 
-    # Get query parameters
-    query_params = dict(request.query_params)
+    try:
+        return token, verify_user_token(token)
+    except HTTPException:
+        return None, None
+
+
+def path_tenant(path: str) -> Optional[str]:
+    """The /tenants/{slug}/ segment of a path, if any"""
+    segments = path.strip("/").split("/")
+    if "tenants" in segments:
+        index = segments.index("tenants")
+        if index + 1 < len(segments) and segments[index + 1]:
+            return segments[index + 1]
+    return None
+
+
+def resolve_tenant(path: str, claims: Dict[str, Any], headers: Dict[str, str]) -> str:
+    """Tenant scope of a request: the /tenants/{slug}/ path segment, the token's tenant or X-Tenant-ID"""
+    tenant = path_tenant(path) or claims.get("tenant_slug") or claims.get("tenant_id")
+    if tenant:
+        return str(tenant)
+    return next((value for key, value in headers.items() if key.lower() == "x-tenant-id"), "shared")
+
+
+def shared_response_tenant(path: str, claims: Dict[str, Any], headers: Dict[str, str]) -> Optional[str]:
+    """
+    Tenant a response may be shared within, from the verified token
+
+    Returns None when the request names a tenant other than the caller's (in
+    the path or X-Tenant-ID), so it bypasses shared responses and the service
+    runs its own access check. Super admins and service tokens may read any
+    tenant and share by the requested one.
+    """
+    requested = path_tenant(path) or next(
+        (value for key, value in headers.items() if key.lower() == "x-tenant-id"), None
+    )
+    if claims.get("role") == "super_admin" or claims.get("type") == "service":
+        return requested or "shared"
 
-    # Use provided headers or get from request
-    if headers is None:
-        headers = dict(request.headers)
+    own = {str(value) for value in (claims.get("tenant_slug"), claims.get("tenant_id")) if value}
+    if not own or (requested is not None and requested not in own):
+        return None
+    return str(claims.get("tenant_slug") or claims.get("tenant_id"))
 
-    # Remove host header as it will be set by httpx
-    headers.pop("host", None)
 
-    # Get body for POST/PUT requests
-    body = None
-    if request.method in ["POST", "PUT", "PATCH"]:
-        body = await request.body()
+async def send_upstream(
+    service_url: str,
+    method: str,
+    url: str,
+    params,
+    headers: Dict[str, str],
+    body=None,
+    stream: bool = True,
+    timeout=httpx.USE_CLIENT_DEFAULT
+) -> httpx.Response:
+    """
+    Send a request over the upstream's pooled client, mapping transport errors to HTTP errors
+
+    The call is admitted by the upstream's circuit breaker and concurrency
+    limiter first; shed requests fail fast with 503 and Retry-After. The
+    outcome is recorded once response headers arrive, so streamed bodies do
+    not hold a concurrency slot. timeout overrides the pool's timeouts.
+    """
+    service_name = upstream_clients.name_for_url(service_url)
+    try:
+        permit = upstream_guards.acquire(service_name)
+    except UpstreamUnavailable as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Service unavailable: {service_name} is shedding load ({e.reason})",
+            headers={"Retry-After": str(e.retry_after)}
+        )
 
+    route_table.begin(service_url)
+    started = time.perf_counter()
     try:
-        # Make the request to the microservice
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.request(
-                method=request.method,
-                url=url,
-                params=query_params,
-                headers=headers,
-                content=body
-            )
-
-        # Return the response
-        return JSONResponse(
-            content=response.json() if response.headers.get("content-type", "").startswith("application/json") else response.text,
-            status_code=response.status_code,
-            headers=dict(response.headers)
+        client = upstream_clients.get(service_name)
+        upstream_request = client.build_request(
+            method=method,
+            url=url,
+            params=params,
+            headers=headers,
+            content=body,
+            timeout=timeout
         )
+        response = await client.send(upstream_request, stream=stream)
+        observe_upstream(service_name, time.perf_counter() - started, response.status_code)
+        permit.release(failed=response.status_code >= 500)
+        return response
 
     except httpx.ConnectError:
+        observe_upstream(service_name, time.perf_counter() - started, "connect_error")
+        permit.release(failed=True)
         raise HTTPException(
             status_code=503,
             detail=f"Service unavailable: Cannot connect to {service_url}"
         )
     except httpx.TimeoutException:
+        observe_upstream(service_name, time.perf_counter() - started, "timeout")
+        permit.release(failed=True)
         raise HTTPException(
             status_code=504,
             detail=f"Service timeout: Request to {service_url} timed out"
         )
     except Exception as e:
+        permit.release(failed=True)
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
         )
+    finally:
+        # Cancelled requests (client disconnects) free their slot without a sample
+        permit.release(failed=None)
+        route_table.end(service_url)
 
-# Catch-all route for undefined endpoints
-@app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
-async def catch_all(request: Request, path: str):
-    """Catch all undefined routes"""
-    return JSONResponse(
-        status_code=404,
-        content={
-            "detail": "Route not found",
-            "path": f"/{path}",
-            "method": request.method,
-            "available_endpoints": [
-                "/api/v1/auth",
-                "/api/v1/tenants",
-                "/api/v1/bookings",
-                "/api/v1/communications",
-                "/api/v1/crm",
-                "/api/v1/financial",
-                "/api/v1/system"
-            ],
-            "documentation": "/docs"
-        }
+
+async def send_tracked(pool_name: str, service_url: str, *args, **kwargs) -> httpx.Response:
+    """send_upstream, recording time-to-headers for the pool's hedge delay"""
+    started = time.perf_counter()
+    response = await send_upstream(service_url, *args, **kwargs)
+    latency_tracker.record(pool_name, time.perf_counter() - started)
+    return response
+
+
+async def send_hedged(
+    pool,
+    hedge: bool,
+    service_url: str,
+    method: str,
+    path: str,
+    params,
+    headers: Dict[str, str],
+    body=None,
+    stream: bool = True
+) -> httpx.Response:
+    """
+    Send one attempt, hedging to a second replica if it is slower than the pool's p95
+
+    The first usable response (not a retryable 5xx) wins; the other call is
+    cancelled or its response closed. Hedges draw from the retry budget.
+    """
+    delay = latency_tracker.hedge_delay(pool.name) if hedge and len(pool.replicas) > 1 else None
+    if delay is None:
+        return await send_tracked(pool.name, service_url, method, f"{service_url}{path}", params, headers, body, stream)
+
+    primary = asyncio.create_task(
+        send_tracked(pool.name, service_url, method, f"{service_url}{path}", params, headers, body, stream)
     )
+    tasks = [primary]
+    winner = None
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not retry_budget.try_withdraw("hedge"):
+            return await primary
+
+        hedge_url = pool.choose(replica_available, exclude=[service_url])
+        secondary = asyncio.create_task(
+            send_tracked(pool.name, hedge_url, method, f"{hedge_url}{path}", params, headers, body, stream)
+        )
+        tasks.append(secondary)
+        pending = set(tasks)
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None and task.result().status_code not in RETRYABLE_STATUS_CODES:
+                    winner = task
+                    break
+    finally:
+        # Also runs when the client disconnects mid-wait
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+    # Close the losing response; with no winner the primary's outcome is reported
+    winner = winner or primary
+    loser = secondary if winner is primary else primary
+    if loser.done() and not loser.cancelled() and loser.exception() is None:
+        await loser.result().aclose()
+    return winner.result()
+
+
+async def send_upstream_with_retries(
+    service_url: str,
+    method: str,
+    url: str,
+    params,
+    headers: Dict[str, str],
+    body=None,
+    stream: bool = True
+) -> httpx.Response:
+    """
+    send_upstream with the route's retry and hedging policy
+
+    Only idempotent calls (GET/HEAD) are retried or hedged; writes go out once.
+    Connection failures, timeouts, shed requests and 502/503/504 responses are
+    retried on another replica after an exponential backoff with full jitter,
+    while the global retry budget lasts.
+    """
+    pool = route_table.pool_for_url(service_url)
+    path = url[len(service_url):]
+    resolved = route_table.resolve(path)
+    policy = retry_policies.for_route(resolved[0] if resolved else None)
+    replayable = body is None or isinstance(body, (bytes, str))
+    if pool is None or not policy.enabled or not replayable or not is_idempotent(method):
+        return await send_upstream(service_url, method, url, params, headers, body, stream)
+
+    retry_budget.record_request()
+    tried = [service_url]
+    attempt = 1
+    while True:
+        try:
+            response = await send_hedged(pool, policy.hedge, service_url, method, path, params, headers, body, stream)
+        except HTTPException as e:
+            if e.status_code not in RETRYABLE_STATUS_CODES or attempt >= policy.max_attempts:
+                raise
+            if not retry_budget.try_withdraw("retry"):
+                raise
+            logger.warning(f"Retrying {method} {path} after {e.status_code} from {service_url}")
+        else:
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= policy.max_attempts:
+                return response
+            if not retry_budget.try_withdraw("retry"):
+                return response
+            logger.warning(f"Retrying {method} {path} after {response.status_code} from {service_url}")
+            await response.aclose()
+
+        await asyncio.sleep(backoff_delay(attempt))
+        attempt += 1
+        service_url = pool.choose(replica_available, exclude=tried)
+        tried.append(service_url)
+
+
+def build_cached_response(entry: CachedResponse, request: Request, cache_status: str, ttl: int) -> Response:
+    """Serve a cached entry, answering 304 when the client already holds the current ETag"""
+    cache_headers = {
+        "ETag": entry.etag,
+        "Cache-Control": f"private, max-age={ttl}",
+        "Age": str(entry.age),
+        "X-Cache": cache_status,
+    }
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        response_cache.record_not_modified()
+        return Response(status_code=304, headers=cache_headers)
+
+    response = Response(content=entry.body, status_code=entry.status_code)
+    response.raw_headers = [
+        (key.encode("latin-1"), value.encode("latin-1")) for key, value in entry.headers
+    ] + [
+        (key.lower().encode("latin-1"), value.encode("latin-1")) for key, value in cache_headers.items()
+    ] + [(b"content-length", str(len(entry.body)).encode("latin-1"))]
+    return response
+
+
+async def proxy_cached_request(
+    request: Request,
+    service_url: str,
+    url: str,
+    headers: Dict[str, str],
+    claims: Dict[str, Any],
+    ttl: int
+) -> Response:
+    """
+    Serve a whitelisted GET from the response cache, filling it from the upstream on a miss
+
+    Entries are keyed on the token's tenant; requests for another tenant's data
+    skip the cache so the service's tenant access check always runs.
+    """
+    path = request.url.path
+    tenant = shared_response_tenant(path, claims, headers)
+    if tenant is None:
+        return build_streaming_response(await send_upstream_with_retries(
+            service_url, "GET", url, request.query_params.multi_items(), headers
+        ))
+    key = response_cache.build_key(tenant, str(claims.get("role", "")), path, request.query_params.multi_items())
+
+    entry = response_cache.get(key)
+    if entry is not None:
+        return build_cached_response(entry, request, "HIT", ttl)
+
+    response = await send_upstream_with_retries(
+        service_url, "GET", url, request.query_params.multi_items(), headers, stream=False
+    )
+    cache_control = response.headers.get("cache-control", "").lower()
+    if response.status_code == 200 and "no-store" not in cache_control:
+        # The body is stored decoded, so encoding and length headers are recomputed on the way out
+        stored_headers = [
+            (key, value) for key, value in filter_headers(response.headers.multi_items())
+            if key not in ("content-encoding", "content-length", "etag", "cache-control", "age")
+        ]
+        entry = response_cache.set(
+            key, tenant, path, response.status_code, stored_headers, response.content, ttl,
+            etag=response.headers.get("etag")
+        )
+        if entry is not None:
+            return build_cached_response(entry, request, "MISS", ttl)
+
+    return build_buffered_response(response)
+
+
+def build_buffered_response(response: httpx.Response) -> Response:
+    """Pass a fully read upstream response through; its body is already decoded"""
+    passthrough = Response(content=response.content, status_code=response.status_code)
+    passthrough.raw_headers = [
+        (key.encode("latin-1"), value.encode("latin-1"))
+        for key, value in filter_headers(response.headers.multi_items())
+        if key not in ("content-encoding", "content-length")
+    ] + [(b"content-length", str(len(response.content)).encode("latin-1"))]
+    return passthrough
+
+
+async def proxy_coalesced_request(
+    request: Request,
+    service_url: str,
+    url: str,
+    headers: Dict[str, str],
+    claims: Dict[str, Any]
+) -> Response:
+    """
+    Serve a whitelisted GET through the single-flight layer
+
+    Identical concurrent requests (same token tenant, role, path and query)
+    share one buffered upstream call. Requests for another tenant's data are
+    sent on their own so the service's tenant access check always runs.
+    """
+    path = request.url.path
+    query_items = request.query_params.multi_items()
+    tenant = shared_response_tenant(path, claims, headers)
+    if tenant is None:
+        return build_streaming_response(await send_upstream_with_retries(service_url, "GET", url, query_items, headers))
+    key = request_coalescer.build_key(tenant, str(claims.get("role", "")), path, query_items)
+
+    async def fetch() -> httpx.Response:
+        return await send_upstream_with_retries(service_url, "GET", url, query_items, headers, stream=False)
+
+    return build_buffered_response(await request_coalescer.run(key, fetch))
+
+
+async def check_rate_limit(
+    request: Request,
+    claims: Optional[Dict[str, Any]],
+    path: Optional[str] = None
+) -> Optional[RateLimitDecision]:
+    """
+    Apply the caller's token buckets
+
+    Tenants are limited by their subscription plan, unauthenticated callers per
+    client IP, and service tokens are exempt. path overrides the request path
+    (used for batch sub-requests).
+    """
+    path = path or request.url.path
+    if claims is None:
+        peer = request.client.host if request.client else None
+        client_ip = client_address(peer, request.headers.get("x-real-ip"), trusted_proxies)
+        return await rate_limiter.check(f"ip:{client_ip}", None, "anonymous", path)
+
+    if claims.get("type") == "service":
+        return None
+
+    tenant_slug = claims.get("tenant_slug")
+    tenant_id = claims.get("tenant_id")
+    if tenant_slug or tenant_id:
+        plan = await rate_limiter.resolve_plan(tenant_slug, claims)
+        tenant_key = str(tenant_slug or tenant_id)
+    else:
+        # Platform users without a tenant (e.g. super admins)
+        plan = "enterprise" if claims.get("role") == "super_admin" else await rate_limiter.resolve_plan(None, claims)
+        tenant_key = f"user:{claims.get('sub')}"
+    return await rate_limiter.check(tenant_key, tenant_id, plan, path)
+
+
+# Headers a batch sub-request may not set itself
+BATCH_PROTECTED_HEADERS = {
+    "host",
+    "content-length",
+    "authorization",
+    VERIFIED_CLAIMS_HEADER.lower(),
+    VERIFIED_CLAIMS_SIGNATURE_HEADER.lower(),
+}
+
+
+async def execute_batch_request(
+    request: Request,
+    sub_request: SubRequest,
+    results: Dict[str, Dict[str, Any]],
+    headers: Dict[str, str],
+    claims: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Route and send one batch sub-request, returning its buffered result"""
+    path, _, query_string = resolve_references(sub_request.path, results).partition("?")
+    pool = route_table.match(path)
+    if pool is None or path.rstrip("/") == "/api/v1/batch":
+        return {"status": 404, "headers": {}, "body": {"detail": "Route not found", "path": path}}
+
+    rate_limit = await check_rate_limit(request, claims, path)
+    if rate_limit is not None and not rate_limit.allowed:
+        return {
+            "status": 429,
+            "headers": rate_limit.headers(),
+            "body": {"detail": "Rate limit exceeded", "retry_after": rate_limit.retry_after}
+        }
+
+    sub_headers = dict(headers)
+    sub_headers.update({
+        key.lower(): str(value) for key, value in sub_request.headers.items()
+        if key.lower() not in BATCH_PROTECTED_HEADERS
+    })
+    body = None
+    if sub_request.body is not None:
+        body = json.dumps(resolve_references(sub_request.body, results)).encode("utf-8")
+        sub_headers["content-type"] = "application/json"
+
+    query = resolve_references(sub_request.query, results)
+    params = parse_qsl(query_string, keep_blank_values=True) + [
+        (key, str(item))
+        for key, value in query.items()
+        for item in (value if isinstance(value, list) else [value])
+    ]
+
+    service_url = pool.choose(replica_available)
+    try:
+        response = await send_upstream_with_retries(
+            service_url, sub_request.method, f"{service_url}{path}", params, sub_headers, body, stream=False
+        )
+    except HTTPException as e:
+        return {"status": e.status_code, "headers": dict(e.headers or {}), "body": {"detail": e.detail}}
+
+    content_type = response.headers.get("content-type", "")
+    if "json" in content_type:
+        try:
+            response_body = response.json()
+        except ValueError:
+            response_body = response.text
+    else:
+        response_body = response.text
+    return {"status": response.status_code, "headers": {"content-type": content_type}, "body": response_body}
+
+
+async def proxy_event_stream(
+    request: Request,
+    service_url: str,
+    url: str,
+    headers: Dict[str, str],
+    claims: Optional[Dict[str, Any]]
+) -> Response:
+    """
+    Relay a Server-Sent Events stream
+
+    The stream holds one of the tenant's realtime connection slots until it
+    ends. The upstream read timeout is lifted; instead the stream is closed
+    after REALTIME_IDLE_TIMEOUT seconds without data.
+    """
+    tenant = resolve_tenant(request.url.path, claims or {}, headers)
+    try:
+        connection = realtime_connections.acquire(tenant, "sse")
+    except ConnectionLimitExceeded as e:
+        return JSONResponse(status_code=429, content={"detail": str(e)})
+
+    try:
+        response = await send_upstream(
+            service_url, "GET", url, request.query_params.multi_items(), headers,
+            timeout=httpx.Timeout(UPSTREAM_CONNECT_TIMEOUT, read=None)
+        )
+    except BaseException:
+        connection.release()
+        raise
+
+    async def body():
+        try:
+            async for chunk in iterate_with_idle_timeout(response.aiter_raw(), REALTIME_IDLE_TIMEOUT, connection):
+                yield chunk
+        finally:
+            await response.aclose()
+            connection.release()
+
+    return build_streaming_response(response, body())
+
+
+def replica_available(replica_name: str) -> bool:
+    """Load balancing skips replicas failing health checks or with an open breaker"""
+    return health_monitor.is_available(replica_name) and upstream_guards.is_available(replica_name)
+
+
+# Generic proxy function
+async def proxy_request(
+    request: Request,
+    service_url: str,
+    path: str,
+    headers: Optional[Dict[str, str]] = None
+):
+    """Generic proxy function for forwarding requests to services"""
+    # Build the full URL
+    url = f"{service_url}{path}"
+
+    # Use provided headers or get from request
+    if headers is None:
+        headers = dict(filter_headers(request.headers.items()))
+
+    # Remove host header as it will be set by httpx
+    headers.pop("host", None)
+
+    # Never forward client-supplied claims; only the gateway may set them
+    headers = {
+        key: value for key, value in headers.items()
+        if key.lower() not in (VERIFIED_CLAIMS_HEADER.lower(), VERIFIED_CLAIMS_SIGNATURE_HEADER.lower())
+    }
+    with timed("auth"):
+        token, claims = authenticate_request(headers)
+        if claims is not None:
+            headers.update(sign_claims(token, claims))
+            set_request_labels(tenant=resolve_tenant(request.url.path, claims, headers))
+
+    # Enforce per-tenant rate limits and quotas before touching any backend
+    with timed("ratelimit"):
+        rate_limit = await check_rate_limit(request, claims)
+    if rate_limit is not None and not rate_limit.allowed:
+        return JSONResponse(
+            status_code=429,
+            content={
+                "detail": "Daily API quota exceeded" if rate_limit.reason == "quota" else "Rate limit exceeded",
+                "retry_after": rate_limit.retry_after
+            },
+            headers=rate_limit.headers()
+        )
+
+    # Whitelisted reference-data reads are served from the response cache
+    cache_ttl = response_cache.ttl_for(request.method, request.url.path) if claims is not None else None
+    if REALTIME_ENABLED and is_event_stream(request.method, headers):
+        # Long-lived event streams bypass caching, coalescing and retries
+        response = await proxy_event_stream(request, service_url, url, headers, claims)
+    elif cache_ttl:
+        response = await proxy_cached_request(request, service_url, url, headers, claims, cache_ttl)
+    elif claims is not None and request_coalescer.matches(request.method, request.url.path):
+        # Identical concurrent aggregate reads share a single upstream call
+        response = await proxy_coalesced_request(request, service_url, url, headers, claims)
+    else:
+        # Stream request bodies through instead of buffering them; writes are
+        # never replayed, so the body is only read once
+        body = None
+        if request.method in ["POST", "PUT", "PATCH"]:
+            body = request.stream()
+
+        # Make the request to the microservice over its pooled client
+        upstream_response = await send_upstream_with_retries(
+            service_url, request.method, url, request.query_params.multi_items(), headers, body
+        )
+        response = build_streaming_response(upstream_response)
+
+    # Return the response
+    if rate_limit is not None:
+        response.headers.update(rate_limit.headers())
+    return response
+
+@app.post("/api/v1/batch")
+async def batch_requests(request: Request):
+    """
+    Run several sub-requests in one round trip
+
+    Body: {"requests": [{"id", "method", "path", "query", "headers", "body", "depends_on"}]}.
+    The caller is authenticated once; sub-requests run concurrently (bounded by
+    BATCH_CONCURRENCY) and may reference earlier results with
+    {{<id>.body.<field>}}, which also makes them wait for that request.
+    """
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Batch body must be valid JSON")
+    try:
+        sub_requests = parse_batch(payload)
+    except BatchError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {
+        key: value for key, value in filter_headers(request.headers.items())
+        if key not in BATCH_PROTECTED_HEADERS - {"authorization"} and key != "content-type"
+    }
+    with timed("auth"):
+        token, claims = authenticate_request(headers)
+        if claims is not None:
+            headers.update(sign_claims(token, claims))
+
+    async def execute(sub_request: SubRequest, results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        return await execute_batch_request(request, sub_request, results, headers, claims)
+
+    return {"responses": await run_batch(sub_requests, execute)}
+
+# Every other path is resolved through the route table
+@app.api_route("/{path:path}", methods=["GET", "HEAD", "POST", "PUT", "DELETE", "PATCH"])
+async def route_request(request: Request, path: str):
+    """Proxy a request to a replica of the upstream pool owning its path prefix"""
+    resolved = route_table.resolve(f"/{path}")
+    if resolved is None:
+        return JSONResponse(
+            status_code=404,
+            content={
+                "detail": "Route not found",
+                "path": f"/{path}",
+                "method": request.method,
+                "available_endpoints": [prefix for prefix, _ in route_table.routes],
+                "documentation": "/docs"
+            }
+        )
+
+    prefix, pool = resolved
+    set_request_labels(route=prefix)
+    service_url = pool.choose(replica_available)
+    return await proxy_request(request, service_url, f"/{path}")
+
+# WebSockets are relayed to the same upstream pools as HTTP routes
+@app.websocket("/{path:path}")
+async def route_websocket(websocket: WebSocket, path: str):
+    """
+    Authenticate a WebSocket handshake once and relay its frames to the owning service
+
+    Browsers cannot set an Authorization header on WebSockets, so the token
+    may also be passed as the access_token query parameter.
+    """
+    resolved = route_table.resolve(f"/{path}")
+    if not REALTIME_ENABLED or resolved is None:
+        await websocket.close(code=CLOSE_POLICY_VIOLATION)
+        return
+    prefix, pool = resolved
+    set_request_labels(route=prefix)
+
+    headers = {
+        key: value for key, value in filter_headers(websocket.headers.items())
+        if key not in WEBSOCKET_HANDSHAKE_HEADERS
+        and key not in (VERIFIED_CLAIMS_HEADER.lower(), VERIFIED_CLAIMS_SIGNATURE_HEADER.lower())
+    }
+    access_token = websocket.query_params.get("access_token")
+    if access_token and "authorization" not in headers:
+        headers["authorization"] = f"Bearer {access_token}"
+
+    token, claims = authenticate_request(headers)
+    if claims is None:
+        await websocket.close(code=CLOSE_POLICY_VIOLATION)
+        return
+    headers.update(sign_claims(token, claims))
+
+    rate_limit = await check_rate_limit(websocket, claims)
+    if rate_limit is not None and not rate_limit.allowed:
+        await websocket.close(code=CLOSE_TRY_AGAIN_LATER)
+        return
+
+    tenant = resolve_tenant(f"/{path}", claims, headers)
+    try:
+        connection = realtime_connections.acquire(tenant, "websocket")
+    except ConnectionLimitExceeded as e:
+        logger.warning(str(e))
+        await websocket.close(code=CLOSE_TRY_AGAIN_LATER)
+        return
+
+    service_url = pool.choose(replica_available)
+    service_name = upstream_clients.name_for_url(service_url)
+    query = urlencode([item for item in websocket.query_params.multi_items() if item[0] != "access_token"])
+    try:
+        permit = upstream_guards.acquire(service_name)
+    except UpstreamUnavailable:
+        connection.release()
+        await websocket.close(code=CLOSE_TRY_AGAIN_LATER)
+        return
+
+    route_table.begin(service_url)
+    try:
+        upstream = await connect_upstream_websocket(
+            websocket_url(service_url, f"/{path}", query), headers, websocket.scope.get("subprotocols", [])
+        )
+        # Only the handshake counts towards the breaker; the session itself may last hours
+        permit.release(failed=upstream is None)
+        if upstream is None:
+            connection.release()
+            await websocket.close(code=CLOSE_TRY_AGAIN_LATER)
+            return
+        await relay_websocket(websocket, upstream, connection)
+    finally:
+        permit.release(failed=None)
+        connection.release()
+        route_table.end(service_url)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,444 @@
+"""
+Per-tenant rate limiting and quota enforcement for the API Gateway
+
+Token buckets live in Redis and are updated by an atomic Lua script. Each
+gateway process leases small batches of tokens from the shared bucket into a
+local bucket, so bursts are absorbed in-process without a Redis round trip
+per request. Limits come from the tenant's subscription plan.
+"""
+
+import os
+import json
+import time
+import logging
+import ipaddress
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from fnmatch import fnmatch
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+
+# Plan limits as "<plan>=<requests per second>/<burst>/<daily quota>" (quota 0 = unlimited)
+RATE_LIMIT_PLANS = os.getenv(
+    "RATE_LIMIT_PLANS",
+    "anonymous=5/20/0,free=10/20/1000,starter=50/100/10000,professional=200/400/10000,enterprise=1000/2000/10000"
+)
+RATE_LIMIT_DEFAULT_PLAN = os.getenv("RATE_LIMIT_DEFAULT_PLAN", "free")
+
+# Per-tenant, per-route buckets for expensive endpoints as "<path glob>=<rate>/<burst>"
+RATE_LIMIT_ROUTES = os.getenv(
+    "RATE_LIMIT_ROUTES",
+    "*/statistics=2/5,*/summary=2/5,*/stats=2/5"
+)
+
+# Fraction of a bucket's per-second rate leased into the local bucket at once
+RATE_LIMIT_LEASE_FRACTION = float(os.getenv("RATE_LIMIT_LEASE_FRACTION", 0.1))
+# Unused leased tokens are dropped after this many seconds so processes cannot hoard them
+RATE_LIMIT_LEASE_TTL = float(os.getenv("RATE_LIMIT_LEASE_TTL", 1.0))
+# How long a tenant's plan lookup is cached in-process
+RATE_LIMIT_PLAN_CACHE_TTL = float(os.getenv("RATE_LIMIT_PLAN_CACHE_TTL", 60.0))
+# After a Redis error, enforce limits locally for this many seconds before retrying Redis
+RATE_LIMIT_REDIS_RETRY_INTERVAL = float(os.getenv("RATE_LIMIT_REDIS_RETRY_INTERVAL", 5.0))
+# Most local buckets and cached plans kept per process; the least recently used are dropped
+RATE_LIMIT_MAX_BUCKETS = int(os.getenv("RATE_LIMIT_MAX_BUCKETS", 10000))
+RATE_LIMIT_PLAN_CACHE_MAX_SIZE = int(os.getenv("RATE_LIMIT_PLAN_CACHE_MAX_SIZE", 10000))
+# Proxies (addresses or CIDRs, comma separated) whose X-Real-IP header names the caller
+RATE_LIMIT_TRUSTED_PROXIES = os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "")
+
+
+# KEYS[1] bucket key, KEYS[2] daily quota key (may be empty)
+# ARGV: rate, burst, tokens requested, quota usage to record, quota limit, quota ttl
+# Returns {tokens granted, tokens left, quota used}
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local usage = tonumber(ARGV[4])
+local quota = tonumber(ARGV[5])
+local quota_ttl = tonumber(ARGV[6])
+
+local quota_used = 0
+if KEYS[2] ~= "" then
+    if usage > 0 then
+        quota_used = redis.call("INCRBY", KEYS[2], usage)
+        if quota_used == usage then
+            redis.call("EXPIRE", KEYS[2], quota_ttl)
+        end
+    else
+        quota_used = tonumber(redis.call("GET", KEYS[2]) or "0")
+    end
+    if quota > 0 and quota_used >= quota then
+        return {0, "0", quota_used}
+    end
+end
+
+local time = redis.call("TIME")
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+
+local granted = math.min(requested, math.floor(tokens))
+tokens = tokens - granted
+redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+redis.call("EXPIRE", KEYS[1], math.ceil(burst / rate) + 1)
+return {granted, tostring(tokens), quota_used}
+"""
+
+
+@dataclass
+class BucketLimits:
+    rate: float
+    burst: int
+    quota: int = 0
+
+
+@dataclass
+class RateLimitDecision:
+    """Outcome of a rate limit check, rendered into RateLimit-* headers"""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int
+    policy: str
+    retry_after: int = 0
+    reason: str = ""
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(max(self.remaining, 0)),
+            "RateLimit-Reset": str(max(self.reset, 0)),
+            "RateLimit-Policy": self.policy,
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(self.retry_after, 1))
+        return headers
+
+
+def parse_plan_limits(spec: str) -> Dict[str, BucketLimits]:
+    """Parse RATE_LIMIT_PLANS into plan -> limits"""
+    plans = {}
+    for item in spec.split(","):
+        name, _, values = item.strip().partition("=")
+        parts = values.split("/")
+        try:
+            plans[name.strip().lower()] = BucketLimits(
+                rate=float(parts[0]),
+                burst=int(parts[1]) if len(parts) > 1 else int(float(parts[0])),
+                quota=int(parts[2]) if len(parts) > 2 else 0,
+            )
+        except (ValueError, IndexError):
+            logger.warning(f"Ignoring invalid rate limit plan: {item}")
+    return plans
+
+
+def parse_route_limits(spec: str) -> List[Tuple[str, BucketLimits]]:
+    """Parse RATE_LIMIT_ROUTES into (path glob, limits) pairs"""
+    routes = []
+    for item in spec.split(","):
+        pattern, _, values = item.strip().partition("=")
+        if not pattern:
+            continue
+        parts = values.split("/")
+        try:
+            routes.append((pattern.strip(), BucketLimits(rate=float(parts[0]), burst=int(parts[1]))))
+        except (ValueError, IndexError):
+            logger.warning(f"Ignoring invalid rate limit route: {item}")
+    return routes
+
+
+def parse_trusted_proxies(spec: str) -> List[Any]:
+    """Parse RATE_LIMIT_TRUSTED_PROXIES into networks"""
+    networks = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(item, strict=False))
+        except ValueError:
+            logger.warning(f"Ignoring invalid trusted proxy: {item}")
+    return networks
+
+
+def client_address(peer: Optional[str], real_ip: Optional[str], trusted_proxies: List[Any]) -> str:
+    """
+    Caller address used to bucket unauthenticated requests
+
+    Args:
+        peer: Address of the connection's peer
+        real_ip: X-Real-IP header, if any
+        trusted_proxies: Networks of proxies allowed to set X-Real-IP
+
+    Returns:
+        real_ip when the peer is a trusted proxy, otherwise the peer itself,
+        so callers cannot pick their own bucket by sending the header.
+    """
+    if not peer:
+        return "unknown"
+    if real_ip and trusted_proxies:
+        try:
+            address = ipaddress.ip_address(peer)
+        except ValueError:
+            return peer
+        if any(address in network for network in trusted_proxies):
+            return real_ip.strip()
+    return peer
+
+
+class LocalBucket:
+    """
+    In-process token bucket
+
+    Used for leased tokens, and as a standalone limiter when Redis is unavailable.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+        # Leasing state (tokens borrowed from the shared Redis bucket)
+        self.leased = 0
+        self.lease_expires = 0.0
+        self.shared_remaining = burst
+        self.pending_usage = 0
+        self.quota_used = 0
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def take_leased(self) -> bool:
+        if self.leased > 0 and time.monotonic() < self.lease_expires:
+            self.leased -= 1
+            return True
+        self.leased = 0
+        return False
+
+    def retry_after(self) -> int:
+        return int(max(1.0 - self.tokens, 0) / self.rate) + 1 if self.rate > 0 else 60
+
+
+class RateLimiter:
+    """Tenant and route token-bucket rate limiter with daily quotas"""
+
+    def __init__(
+        self,
+        plans: Optional[Dict[str, BucketLimits]] = None,
+        routes: Optional[List[Tuple[str, BucketLimits]]] = None,
+        enabled: bool = RATE_LIMIT_ENABLED,
+        max_buckets: int = RATE_LIMIT_MAX_BUCKETS,
+        plan_cache_max_size: int = RATE_LIMIT_PLAN_CACHE_MAX_SIZE,
+    ):
+        self.plans = plans if plans is not None else parse_plan_limits(RATE_LIMIT_PLANS)
+        self.routes = routes if routes is not None else parse_route_limits(RATE_LIMIT_ROUTES)
+        self.enabled = enabled
+        self.max_buckets = max_buckets
+        self.plan_cache_max_size = plan_cache_max_size
+        self.redis = None
+        self._script = None
+        # Keyed by tenant, user or client IP, so both are LRU-bounded
+        self._buckets: "OrderedDict[str, LocalBucket]" = OrderedDict()
+        self._plan_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._redis_retry_at = 0.0
+        self.allowed = 0
+        self.limited = 0
+        self.redis_errors = 0
+        self.evictions = 0
+
+    async def start(self, redis_url: str):
+        """Connect to Redis; without it each process enforces the limits locally"""
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            logger.warning("redis package not installed; rate limits are enforced per gateway process")
+            return
+        self.redis = aioredis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._script = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+
+    @property
+    def redis_available(self) -> bool:
+        return self._script is not None and time.monotonic() >= self._redis_retry_at
+
+    def _redis_failed(self, error: Exception, context: str):
+        self.redis_errors += 1
+        self._redis_retry_at = time.monotonic() + RATE_LIMIT_REDIS_RETRY_INTERVAL
+        logger.warning(f"Rate limiter Redis error ({context}), enforcing locally: {str(error)}")
+
+    def plan_limits(self, plan: str) -> BucketLimits:
+        return self.plans.get(plan) or self.plans.get(RATE_LIMIT_DEFAULT_PLAN) or BucketLimits(rate=10, burst=20)
+
+    async def resolve_plan(self, tenant_slug: Optional[str], claims: Dict[str, Any]) -> str:
+        """
+        Determine a tenant's subscription plan
+
+        Order: token claim, in-process cache, the tenant:{slug} record that
+        tenant-service keeps in Redis, then the default plan.
+        """
+        plan = claims.get("subscription_plan")
+        if plan:
+            return str(plan).lower()
+        if not tenant_slug:
+            return RATE_LIMIT_DEFAULT_PLAN
+
+        cached = self._plan_cache.get(tenant_slug)
+        if cached and cached[0] > time.monotonic():
+            self._plan_cache.move_to_end(tenant_slug)
+            return cached[1]
+
+        plan = RATE_LIMIT_DEFAULT_PLAN
+        if self.redis_available:
+            try:
+                raw = await self.redis.get(f"tenant:{tenant_slug}")
+                if raw:
+                    plan = str(json.loads(raw).get("subscription_plan") or plan).lower()
+            except Exception as e:
+                self._redis_failed(e, f"plan lookup for {tenant_slug}")
+        self._plan_cache[tenant_slug] = (time.monotonic() + RATE_LIMIT_PLAN_CACHE_TTL, plan)
+        self._plan_cache.move_to_end(tenant_slug)
+        while len(self._plan_cache) > self.plan_cache_max_size:
+            self._plan_cache.popitem(last=False)
+        return plan
+
+    def route_limits(self, path: str) -> Optional[Tuple[str, BucketLimits]]:
+        for pattern, limits in self.routes:
+            if fnmatch(path, pattern):
+                return pattern, limits
+        return None
+
+    def _bucket(self, key: str, limits: BucketLimits) -> LocalBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket.rate != limits.rate or bucket.burst != limits.burst:
+            bucket = LocalBucket(limits.rate, limits.burst)
+            self._buckets[key] = bucket
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+            self.evictions += 1
+        return bucket
+
+    async def _acquire(self, key: str, limits: BucketLimits, quota_key: Optional[str] = None) -> Tuple[bool, LocalBucket, str]:
+        """Take one token for a bucket; returns (allowed, bucket, reason)"""
+        bucket = self._bucket(key, limits)
+        allowed, reason = await self._take(bucket, key, limits, quota_key)
+        if allowed and quota_key:
+            # Recorded against the daily quota with the next Redis lease
+            bucket.pending_usage += 1
+        return allowed, bucket, reason
+
+    async def _take(self, bucket: LocalBucket, key: str, limits: BucketLimits, quota_key: Optional[str]) -> Tuple[bool, str]:
+        if bucket.take_leased():
+            return True, ""
+
+        if not self.redis_available:
+            allowed = bucket.take()
+            return allowed, "" if allowed else "rate"
+
+        lease = max(1, int(limits.rate * RATE_LIMIT_LEASE_FRACTION))
+        usage = bucket.pending_usage
+        try:
+            granted, remaining, quota_used = await self._script(
+                keys=[f"ratelimit:{key}", quota_key or ""],
+                args=[limits.rate, limits.burst, lease, usage, limits.quota, 2 * 24 * 3600],
+            )
+        except Exception as e:
+            # Redis unavailable: fall back to the local bucket instead of failing requests
+            self._redis_failed(e, key)
+            allowed = bucket.take()
+            return allowed, "" if allowed else "rate"
+
+        bucket.pending_usage -= usage
+        bucket.quota_used = int(quota_used)
+        bucket.shared_remaining = int(float(remaining))
+        if quota_key and limits.quota and bucket.quota_used >= limits.quota:
+            return False, "quota"
+        if int(granted) <= 0:
+            bucket.tokens = float(remaining)
+            return False, "rate"
+
+        bucket.leased = int(granted) - 1
+        bucket.lease_expires = time.monotonic() + RATE_LIMIT_LEASE_TTL
+        return True, ""
+
+    async def check(self, tenant_key: str, tenant_id: Optional[str], plan: str, path: str) -> Optional[RateLimitDecision]:
+        """
+        Consume a token from the tenant bucket and, if the route is listed, its route bucket
+
+        Returns None when rate limiting is disabled.
+        """
+        if not self.enabled:
+            return None
+
+        limits = self.plan_limits(plan)
+        quota_key = f"api_calls:{tenant_id}:{datetime.utcnow().date()}" if tenant_id and limits.quota else None
+        allowed, bucket, reason = await self._acquire(f"tenant:{tenant_key}", limits, quota_key)
+        policy = f"{limits.burst};w={max(int(limits.burst / limits.rate), 1)}"
+
+        remaining = bucket.leased + bucket.shared_remaining if self.redis_available else int(bucket.tokens)
+        decision = RateLimitDecision(
+            allowed=allowed,
+            limit=limits.burst,
+            remaining=remaining,
+            reset=int(max(limits.burst - remaining, 0) / limits.rate) if limits.rate else 0,
+            policy=policy,
+            reason=reason,
+        )
+
+        if allowed:
+            route = self.route_limits(path)
+            if route is not None:
+                pattern, route_limit = route
+                route_allowed, route_bucket, _ = await self._acquire(f"route:{tenant_key}:{pattern}", route_limit)
+                if not route_allowed:
+                    decision = RateLimitDecision(
+                        allowed=False,
+                        limit=route_limit.burst,
+                        remaining=0,
+                        reset=route_bucket.retry_after(),
+                        policy=f"{route_limit.burst};w={max(int(route_limit.burst / route_limit.rate), 1)}",
+                        retry_after=route_bucket.retry_after(),
+                        reason="route",
+                    )
+
+        if not decision.allowed:
+            if decision.reason == "quota":
+                tomorrow = datetime.utcnow().date() + timedelta(days=1)
+                decision.retry_after = int((datetime.combine(tomorrow, datetime.min.time()) - datetime.utcnow()).total_seconds())
+                decision.reset = decision.retry_after
+            elif not decision.retry_after:
+                decision.retry_after = bucket.retry_after()
+            self.limited += 1
+        else:
+            self.allowed += 1
+        return decision
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "backend": "redis" if self.redis_available else "local",
+            "buckets": len(self._buckets),
+            "max_buckets": self.max_buckets,
+            "evictions": self.evictions,
+            "plans_cached": len(self._plan_cache),
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "redis_errors": self.redis_errors,
+        }
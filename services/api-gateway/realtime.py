@@ -0,0 +1,296 @@
+"""
+WebSocket and Server-Sent Events passthrough for the API Gateway
+Long-lived connections are authenticated once at the handshake, counted
+against per-tenant connection limits and closed after a period without
+traffic. Frames are relayed one at a time in each direction, so a slow reader
+on either side pauses the other instead of growing a buffer in the gateway.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Realtime connection configuration
+REALTIME_ENABLED = os.getenv("REALTIME_ENABLED", "true").lower() == "true"
+REALTIME_MAX_CONNECTIONS = int(os.getenv("REALTIME_MAX_CONNECTIONS", 10000))
+REALTIME_MAX_CONNECTIONS_PER_TENANT = int(os.getenv("REALTIME_MAX_CONNECTIONS_PER_TENANT", 200))
+REALTIME_IDLE_TIMEOUT = float(os.getenv("REALTIME_IDLE_TIMEOUT", 300))
+WEBSOCKET_MAX_MESSAGE_SIZE = int(os.getenv("WEBSOCKET_MAX_MESSAGE_SIZE", 1024 * 1024))
+# Frames the upstream client may buffer before it stops reading from the socket
+WEBSOCKET_MAX_QUEUE = int(os.getenv("WEBSOCKET_MAX_QUEUE", 16))
+WEBSOCKET_CONNECT_TIMEOUT = float(os.getenv("WEBSOCKET_CONNECT_TIMEOUT", 5))
+
+# Close codes (RFC 6455, section 7.4)
+CLOSE_NORMAL = 1000
+CLOSE_GOING_AWAY = 1001
+CLOSE_POLICY_VIOLATION = 1008
+CLOSE_INTERNAL_ERROR = 1011
+CLOSE_TRY_AGAIN_LATER = 1013
+
+# Handshake headers owned by each hop; the upstream client sets its own
+WEBSOCKET_HANDSHAKE_HEADERS = {
+    "host",
+    "sec-websocket-key",
+    "sec-websocket-version",
+    "sec-websocket-extensions",
+    "sec-websocket-protocol",
+    "sec-websocket-accept",
+}
+
+
+class ConnectionLimitExceeded(Exception):
+    """Raised when a tenant (or the gateway) has no realtime connection slots left"""
+
+    def __init__(self, tenant: str, limit: int):
+        super().__init__(f"Realtime connection limit of {limit} reached for {tenant}")
+        self.tenant = tenant
+        self.limit = limit
+
+
+class RealtimeConnection:
+    """Slot held by one open WebSocket or SSE connection; release() is idempotent"""
+
+    def __init__(self, tracker: "ConnectionTracker", tenant: str, kind: str):
+        self.tracker = tracker
+        self.tenant = tenant
+        self.kind = kind
+        self.opened_at = time.monotonic()
+        self._released = False
+
+    def release(self, reason: str = "closed"):
+        if self._released:
+            return
+        self._released = True
+        self.tracker._release(self, reason)
+
+
+class ConnectionTracker:
+    """Counts open realtime connections per tenant and enforces the limits"""
+
+    def __init__(
+        self,
+        max_connections: int = REALTIME_MAX_CONNECTIONS,
+        max_per_tenant: int = REALTIME_MAX_CONNECTIONS_PER_TENANT
+    ):
+        self.max_connections = max_connections
+        self.max_per_tenant = max_per_tenant
+        self.by_tenant: Dict[str, int] = {}
+        self.by_kind: Dict[str, int] = {"websocket": 0, "sse": 0}
+        self.total = 0
+        self.opened = 0
+        self.rejected = 0
+        self.idle_closed = 0
+
+    def acquire(self, tenant: str, kind: str) -> RealtimeConnection:
+        """
+        Reserve a connection slot
+
+        Raises:
+            ConnectionLimitExceeded: the tenant or the gateway is at its limit
+        """
+        if self.total >= self.max_connections:
+            self.rejected += 1
+            raise ConnectionLimitExceeded("gateway", self.max_connections)
+        if self.by_tenant.get(tenant, 0) >= self.max_per_tenant:
+            self.rejected += 1
+            raise ConnectionLimitExceeded(tenant, self.max_per_tenant)
+
+        self.by_tenant[tenant] = self.by_tenant.get(tenant, 0) + 1
+        self.by_kind[kind] = self.by_kind.get(kind, 0) + 1
+        self.total += 1
+        self.opened += 1
+        return RealtimeConnection(self, tenant, kind)
+
+    def _release(self, connection: RealtimeConnection, reason: str):
+        remaining = self.by_tenant.get(connection.tenant, 0) - 1
+        if remaining > 0:
+            self.by_tenant[connection.tenant] = remaining
+        else:
+            self.by_tenant.pop(connection.tenant, None)
+        self.by_kind[connection.kind] = max(self.by_kind.get(connection.kind, 0) - 1, 0)
+        self.total = max(self.total - 1, 0)
+        if reason == "idle":
+            self.idle_closed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        busiest = sorted(self.by_tenant.items(), key=lambda item: item[1], reverse=True)[:10]
+        return {
+            "open": self.total,
+            "websocket": self.by_kind.get("websocket", 0),
+            "sse": self.by_kind.get("sse", 0),
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "idle_closed": self.idle_closed,
+            "max_per_tenant": self.max_per_tenant,
+            "busiest_tenants": dict(busiest),
+        }
+
+
+def is_event_stream(method: str, headers: Dict[str, str]) -> bool:
+    """Whether a request asks for a Server-Sent Events stream"""
+    if method.upper() != "GET":
+        return False
+    accept = next((value for key, value in headers.items() if key.lower() == "accept"), "")
+    return "text/event-stream" in accept.lower()
+
+
+def websocket_url(service_url: str, path: str, query: str = "") -> str:
+    """Upstream ws:// or wss:// URL for a replica base URL"""
+    if service_url.startswith("https://"):
+        base = "wss://" + service_url[len("https://"):]
+    else:
+        base = "ws://" + service_url.split("://", 1)[-1]
+    return f"{base}{path}?{query}" if query else f"{base}{path}"
+
+
+async def iterate_with_idle_timeout(
+    chunks: AsyncIterator[bytes],
+    idle_timeout: float,
+    connection: Optional[RealtimeConnection] = None
+) -> AsyncIterator[bytes]:
+    """
+    Yield chunks until the stream ends or stays silent for idle_timeout seconds
+
+    Upstream services are expected to send periodic comments (": keep-alive")
+    on quiet event streams.
+    """
+    iterator = chunks.__aiter__()
+    while True:
+        try:
+            chunk = await asyncio.wait_for(iterator.__anext__(), timeout=idle_timeout)
+        except StopAsyncIteration:
+            return
+        except asyncio.TimeoutError:
+            logger.info(f"Closing idle event stream after {idle_timeout}s")
+            if connection is not None:
+                connection.release("idle")
+            return
+        yield chunk
+
+
+def close_code(code: Optional[int]) -> int:
+    """A close code that may be sent on the wire (1005/1006 are reserved for local use)"""
+    if code is None or code in (1005, 1006, 1015) or not (1000 <= code < 5000):
+        return CLOSE_NORMAL
+    return code
+
+
+async def connect_upstream_websocket(upstream_url: str, headers: Dict[str, str], subprotocols: List[str]):
+    """
+    Open the WebSocket to the chosen replica
+
+    Returns:
+        The upstream connection, or None when the handshake failed
+    """
+    try:
+        import websockets
+        from websockets.exceptions import InvalidHandshake
+    except ImportError:
+        raise RuntimeError("WebSocket passthrough requires the websockets package")
+
+    try:
+        return await websockets.connect(
+            upstream_url,
+            extra_headers=headers,
+            subprotocols=subprotocols or None,
+            max_size=WEBSOCKET_MAX_MESSAGE_SIZE,
+            max_queue=WEBSOCKET_MAX_QUEUE,
+            open_timeout=WEBSOCKET_CONNECT_TIMEOUT,
+        )
+    except (OSError, InvalidHandshake, asyncio.TimeoutError) as e:
+        logger.warning(f"WebSocket handshake with {upstream_url} failed: {str(e)}")
+        return None
+
+
+async def relay_websocket(
+    client,
+    upstream,
+    connection: RealtimeConnection,
+    idle_timeout: float = REALTIME_IDLE_TIMEOUT
+):
+    """
+    Accept the client and pump frames both ways until either side closes
+
+    Args:
+        client: Starlette WebSocket, not yet accepted
+        upstream: Open upstream connection from connect_upstream_websocket();
+            its negotiated subprotocol is echoed back to the client
+        connection: Slot released when the relay ends
+        idle_timeout: Close both sides after this long without a frame
+
+    Each pump awaits the send on the other side before reading the next
+    frame, so backpressure propagates end to end.
+    """
+    from websockets.exceptions import ConnectionClosed
+
+    last_activity = time.monotonic()
+    reason = "closed"
+
+    async def client_to_upstream():
+        nonlocal last_activity
+        while True:
+            message = await client.receive()
+            if message["type"] == "websocket.disconnect":
+                await upstream.close(code=close_code(message.get("code")))
+                return
+            last_activity = time.monotonic()
+            if message.get("text") is not None:
+                await upstream.send(message["text"])
+            elif message.get("bytes") is not None:
+                await upstream.send(message["bytes"])
+
+    async def upstream_to_client():
+        nonlocal last_activity
+        try:
+            async for frame in upstream:
+                last_activity = time.monotonic()
+                if isinstance(frame, bytes):
+                    await client.send_bytes(frame)
+                else:
+                    await client.send_text(frame)
+        except ConnectionClosed:
+            pass
+        await client.close(code=close_code(upstream.close_code))
+
+    async def idle_watchdog():
+        nonlocal reason
+        while True:
+            remaining = last_activity + idle_timeout - time.monotonic()
+            if remaining <= 0:
+                reason = "idle"
+                return
+            await asyncio.sleep(remaining)
+
+    try:
+        await client.accept(subprotocol=upstream.subprotocol)
+        tasks = [
+            asyncio.create_task(client_to_upstream()),
+            asyncio.create_task(upstream_to_client()),
+            asyncio.create_task(idle_watchdog()),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in tasks:
+                task.cancel()
+        for task in done:
+            error = None if task.cancelled() else task.exception()
+            if error is not None and not isinstance(error, ConnectionClosed):
+                reason = "error"
+                logger.error(f"WebSocket relay failed: {str(error)}")
+    finally:
+        if reason in ("idle", "error"):
+            code = CLOSE_GOING_AWAY if reason == "idle" else CLOSE_INTERNAL_ERROR
+            await upstream.close(code=code)
+            try:
+                await client.close(code=code)
+            except RuntimeError:
+                # The client side already completed its close handshake
+                pass
+        else:
+            await upstream.close()
+        connection.release(reason)
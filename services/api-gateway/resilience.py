@@ -0,0 +1,421 @@
+"""
+Circuit breakers and adaptive concurrency limits for the API Gateway
+Each upstream gets a breaker that opens on a high error or slow-call rate and
+an AIMD concurrency limit, so a struggling backend is answered with a fast 503
+instead of piling gateway coroutines up behind the upstream timeout
+"""
+
+import os
+import time
+import logging
+from collections import deque
+from typing import Any, Dict, Optional
+
+from upstream import service_setting, UPSTREAM_MAX_CONNECTIONS
+
+logger = logging.getLogger(__name__)
+
+# Circuit breaker configuration (shared defaults, overridable per upstream)
+CIRCUIT_BREAKER_ENABLED = os.getenv("CIRCUIT_BREAKER_ENABLED", "true").lower() == "true"
+CIRCUIT_BREAKER_WINDOW = float(os.getenv("CIRCUIT_BREAKER_WINDOW", 30.0))
+CIRCUIT_BREAKER_MIN_REQUESTS = int(os.getenv("CIRCUIT_BREAKER_MIN_REQUESTS", 20))
+CIRCUIT_BREAKER_ERROR_THRESHOLD = float(os.getenv("CIRCUIT_BREAKER_ERROR_THRESHOLD", 0.5))
+CIRCUIT_BREAKER_SLOW_CALL_DURATION = float(os.getenv("CIRCUIT_BREAKER_SLOW_CALL_DURATION", 5.0))
+CIRCUIT_BREAKER_SLOW_CALL_THRESHOLD = float(os.getenv("CIRCUIT_BREAKER_SLOW_CALL_THRESHOLD", 0.8))
+CIRCUIT_BREAKER_OPEN_SECONDS = float(os.getenv("CIRCUIT_BREAKER_OPEN_SECONDS", 30.0))
+CIRCUIT_BREAKER_HALF_OPEN_CALLS = int(os.getenv("CIRCUIT_BREAKER_HALF_OPEN_CALLS", 3))
+
+# Adaptive concurrency configuration; the ceiling defaults to the upstream pool size
+# so requests are shed before they queue inside the connection pool
+ADAPTIVE_CONCURRENCY_ENABLED = os.getenv("ADAPTIVE_CONCURRENCY_ENABLED", "true").lower() == "true"
+ADAPTIVE_CONCURRENCY_INITIAL = int(os.getenv("ADAPTIVE_CONCURRENCY_INITIAL", 20))
+ADAPTIVE_CONCURRENCY_MIN = int(os.getenv("ADAPTIVE_CONCURRENCY_MIN", 2))
+ADAPTIVE_CONCURRENCY_MAX = int(os.getenv("ADAPTIVE_CONCURRENCY_MAX", UPSTREAM_MAX_CONNECTIONS))
+ADAPTIVE_CONCURRENCY_LATENCY_THRESHOLD = float(os.getenv("ADAPTIVE_CONCURRENCY_LATENCY_THRESHOLD", 2.0))
+ADAPTIVE_CONCURRENCY_BACKOFF = float(os.getenv("ADAPTIVE_CONCURRENCY_BACKOFF", 0.7))
+ADAPTIVE_CONCURRENCY_RETRY_AFTER = int(os.getenv("ADAPTIVE_CONCURRENCY_RETRY_AFTER", 1))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Number of buckets the rolling breaker window is split into
+_WINDOW_BUCKETS = 10
+
+
+class UpstreamUnavailable(Exception):
+    """Raised when a request is shed before it reaches the upstream"""
+
+    def __init__(self, service_name: str, reason: str, retry_after: int):
+        super().__init__(f"{service_name} unavailable ({reason})")
+        self.service_name = service_name
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class RollingWindow:
+    """
+    Call outcomes over the last `window` seconds, kept in fixed time buckets
+
+    Memory stays constant regardless of request rate.
+    """
+
+    def __init__(self, window: float):
+        self.bucket_width = max(window / _WINDOW_BUCKETS, 0.001)
+        self._buckets: "deque[list]" = deque()
+
+    def _expire(self, now: float):
+        horizon = now - self.bucket_width * _WINDOW_BUCKETS
+        while self._buckets and self._buckets[0][0] <= horizon:
+            self._buckets.popleft()
+
+    def add(self, now: float, failed: bool, slow: bool):
+        self._expire(now)
+        start = now - (now % self.bucket_width)
+        if not self._buckets or self._buckets[-1][0] != start:
+            self._buckets.append([start, 0, 0, 0])
+        bucket = self._buckets[-1]
+        bucket[1] += 1
+        bucket[2] += int(failed)
+        bucket[3] += int(slow)
+
+    def totals(self, now: float):
+        """Return (calls, failures, slow calls) within the window"""
+        self._expire(now)
+        calls = sum(bucket[1] for bucket in self._buckets)
+        failures = sum(bucket[2] for bucket in self._buckets)
+        slow = sum(bucket[3] for bucket in self._buckets)
+        return calls, failures, slow
+
+    def clear(self):
+        self._buckets.clear()
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker driven by error rate and slow-call rate
+
+    Closed: calls flow and outcomes are recorded in a rolling window; once at
+    least min_requests were seen and either rate crosses its threshold the
+    breaker opens. Open: calls are rejected for open_seconds. Half-open: up to
+    half_open_calls probes are let through; if all succeed the breaker closes,
+    any failure or slow call opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: float = CIRCUIT_BREAKER_WINDOW,
+        min_requests: int = CIRCUIT_BREAKER_MIN_REQUESTS,
+        error_threshold: float = CIRCUIT_BREAKER_ERROR_THRESHOLD,
+        slow_call_duration: float = CIRCUIT_BREAKER_SLOW_CALL_DURATION,
+        slow_call_threshold: float = CIRCUIT_BREAKER_SLOW_CALL_THRESHOLD,
+        open_seconds: float = CIRCUIT_BREAKER_OPEN_SECONDS,
+        half_open_calls: int = CIRCUIT_BREAKER_HALF_OPEN_CALLS,
+    ):
+        self.name = name
+        self.min_requests = min_requests
+        self.error_threshold = error_threshold
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_threshold = slow_call_threshold
+        self.open_seconds = open_seconds
+        self.half_open_calls = max(half_open_calls, 1)
+        self.state = CLOSED
+        self._window = RollingWindow(window)
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self.last_trip_reason: Optional[str] = None
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self) -> Optional[str]:
+        """
+        Admit a call
+
+        Returns:
+            None if rejected, otherwise the state the call was admitted in
+            (half-open admissions are probes and must be reported as such)
+        """
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now - self._opened_at < self.open_seconds:
+                self.rejected += 1
+                return None
+            self._transition(HALF_OPEN)
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+
+        if self.state == HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_calls:
+                self.rejected += 1
+                return None
+            self._probes_in_flight += 1
+            return HALF_OPEN
+
+        return CLOSED
+
+    def retry_after(self) -> int:
+        """Seconds until the breaker lets probes through again"""
+        if self.state != OPEN:
+            return 1
+        return max(1, int(self.open_seconds - (time.monotonic() - self._opened_at) + 0.999))
+
+    def release_probe(self):
+        """Return a half-open probe slot without reporting an outcome"""
+        self._probes_in_flight = max(self._probes_in_flight - 1, 0)
+
+    def record(self, admitted_in: str, failed: bool, latency: float):
+        """Record the outcome of a call admitted by allow()"""
+        now = time.monotonic()
+        slow = latency >= self.slow_call_duration
+
+        if admitted_in == HALF_OPEN:
+            self.release_probe()
+            if self.state != HALF_OPEN:
+                return
+            if failed or slow:
+                self._open(now, "probe failed" if failed else "probe slow")
+                return
+            self._probe_successes += 1
+            if self._probe_successes >= self.half_open_calls:
+                self._window.clear()
+                self._transition(CLOSED)
+            return
+
+        if self.state != CLOSED:
+            # Late completions from before the breaker opened
+            return
+
+        self._window.add(now, failed, slow)
+        calls, failures, slow_calls = self._window.totals(now)
+        if calls < self.min_requests:
+            return
+        if failures / calls >= self.error_threshold:
+            self._open(now, f"error rate {failures}/{calls}")
+        elif slow_calls / calls >= self.slow_call_threshold:
+            self._open(now, f"slow call rate {slow_calls}/{calls}")
+
+    def trip(self, reason: str):
+        """Open the breaker from an external signal such as failing health checks"""
+        if self.state == CLOSED:
+            self._open(time.monotonic(), reason)
+
+    def _open(self, now: float, reason: str):
+        self._opened_at = now
+        self.last_trip_reason = reason
+        self.times_opened += 1
+        self._transition(OPEN)
+        logger.warning(f"Circuit breaker for {self.name} opened: {reason}")
+
+    def _transition(self, state: str):
+        if state != self.state:
+            logger.info(f"Circuit breaker for {self.name}: {self.state} -> {state}")
+            self.state = state
+
+    def stats(self) -> Dict[str, Any]:
+        calls, failures, slow_calls = self._window.totals(time.monotonic())
+        return {
+            "state": self.state,
+            "window_calls": calls,
+            "window_failures": failures,
+            "window_slow_calls": slow_calls,
+            "error_rate": round(failures / calls, 4) if calls else 0.0,
+            "times_opened": self.times_opened,
+            "last_trip_reason": self.last_trip_reason,
+            "rejected": self.rejected,
+            "retry_after": self.retry_after() if self.state == OPEN else None,
+        }
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limit on in-flight requests to one upstream
+
+    Fast successes raise the limit by roughly one per limit's worth of calls
+    (additive increase); errors and calls slower than latency_threshold cut it
+    by the backoff ratio (multiplicative decrease), at most once per
+    latency_threshold so a burst of slow completions only counts once.
+    Requests beyond the limit are rejected immediately rather than queued.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = ADAPTIVE_CONCURRENCY_INITIAL,
+        min_limit: int = ADAPTIVE_CONCURRENCY_MIN,
+        max_limit: int = ADAPTIVE_CONCURRENCY_MAX,
+        latency_threshold: float = ADAPTIVE_CONCURRENCY_LATENCY_THRESHOLD,
+        backoff: float = ADAPTIVE_CONCURRENCY_BACKOFF,
+    ):
+        self.name = name
+        self.min_limit = max(min_limit, 1)
+        self.max_limit = max(max_limit, self.min_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.latency_threshold = latency_threshold
+        self.backoff = backoff
+        self.in_flight = 0
+        self.rejected = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, failed: Optional[bool], latency: float):
+        """
+        Free a slot and adapt the limit
+
+        failed=None frees the slot without a sample (e.g. the client went away).
+        """
+        in_flight = self.in_flight
+        self.in_flight = max(self.in_flight - 1, 0)
+        if failed is None:
+            return
+
+        now = time.monotonic()
+        if failed or latency > self.latency_threshold:
+            if now - self._last_decrease >= self.latency_threshold:
+                self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                self._last_decrease = now
+                self.decreases += 1
+        elif in_flight * 2 >= self.limit:
+            # Only grow while the limit is actually being used
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "rejected": self.rejected,
+            "decreases": self.decreases,
+        }
+
+
+class UpstreamPermit:
+    """Admission for one upstream call; release() must be called exactly once"""
+
+    def __init__(self, guard: "UpstreamGuard", breaker_state: Optional[str], holds_slot: bool):
+        self.guard = guard
+        self.breaker_state = breaker_state
+        self.holds_slot = holds_slot
+        self.started_at = time.monotonic()
+        self._released = False
+
+    def release(self, failed: Optional[bool]):
+        """Report the outcome (None when there is none to report) and free the slot"""
+        if self._released:
+            return
+        self._released = True
+        latency = time.monotonic() - self.started_at
+        if self.breaker_state is not None:
+            if failed is None:
+                # No outcome, but a half-open probe slot still has to be returned
+                if self.breaker_state == HALF_OPEN:
+                    self.guard.breaker.release_probe()
+            else:
+                self.guard.breaker.record(self.breaker_state, failed, latency)
+        if self.holds_slot:
+            self.guard.limiter.release(failed, latency)
+
+
+class UpstreamGuard:
+    """Circuit breaker and concurrency limiter for one upstream service"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(
+            name,
+            window=service_setting(name, "CIRCUIT_BREAKER_WINDOW", CIRCUIT_BREAKER_WINDOW),
+            min_requests=service_setting(name, "CIRCUIT_BREAKER_MIN_REQUESTS", CIRCUIT_BREAKER_MIN_REQUESTS, int),
+            error_threshold=service_setting(name, "CIRCUIT_BREAKER_ERROR_THRESHOLD", CIRCUIT_BREAKER_ERROR_THRESHOLD),
+            slow_call_duration=service_setting(
+                name, "CIRCUIT_BREAKER_SLOW_CALL_DURATION", CIRCUIT_BREAKER_SLOW_CALL_DURATION
+            ),
+            slow_call_threshold=service_setting(
+                name, "CIRCUIT_BREAKER_SLOW_CALL_THRESHOLD", CIRCUIT_BREAKER_SLOW_CALL_THRESHOLD
+            ),
+            open_seconds=service_setting(name, "CIRCUIT_BREAKER_OPEN_SECONDS", CIRCUIT_BREAKER_OPEN_SECONDS),
+            half_open_calls=service_setting(
+                name, "CIRCUIT_BREAKER_HALF_OPEN_CALLS", CIRCUIT_BREAKER_HALF_OPEN_CALLS, int
+            ),
+        )
+        max_limit = service_setting(name, "MAX_CONNECTIONS", ADAPTIVE_CONCURRENCY_MAX, int)
+        self.limiter = AdaptiveConcurrencyLimiter(
+            name,
+            initial=service_setting(name, "CONCURRENCY_INITIAL", ADAPTIVE_CONCURRENCY_INITIAL, int),
+            min_limit=service_setting(name, "CONCURRENCY_MIN", ADAPTIVE_CONCURRENCY_MIN, int),
+            max_limit=service_setting(name, "CONCURRENCY_MAX", max_limit, int),
+            latency_threshold=service_setting(
+                name, "CONCURRENCY_LATENCY_THRESHOLD", ADAPTIVE_CONCURRENCY_LATENCY_THRESHOLD
+            ),
+        )
+
+    def acquire(self) -> UpstreamPermit:
+        """
+        Admit a call or shed it
+
+        Raises:
+            UpstreamUnavailable: breaker open or concurrency limit reached
+        """
+        breaker_state = None
+        if CIRCUIT_BREAKER_ENABLED:
+            breaker_state = self.breaker.allow()
+            if breaker_state is None:
+                raise UpstreamUnavailable(self.name, "circuit_open", self.breaker.retry_after())
+
+        holds_slot = False
+        if ADAPTIVE_CONCURRENCY_ENABLED:
+            if not self.limiter.try_acquire():
+                if breaker_state == HALF_OPEN:
+                    self.breaker.release_probe()
+                raise UpstreamUnavailable(self.name, "concurrency_limit", ADAPTIVE_CONCURRENCY_RETRY_AFTER)
+            holds_slot = True
+
+        return UpstreamPermit(self, breaker_state, holds_slot)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "circuit_breaker": self.breaker.stats() if CIRCUIT_BREAKER_ENABLED else {"state": "disabled"},
+            "concurrency": self.limiter.stats() if ADAPTIVE_CONCURRENCY_ENABLED else {"limit": None},
+        }
+
+
+class UpstreamGuards:
+    """Registry of per-upstream guards, created on first use"""
+
+    def __init__(self):
+        self._guards: Dict[str, UpstreamGuard] = {}
+
+    def get(self, service_name: str) -> UpstreamGuard:
+        guard = self._guards.get(service_name)
+        if guard is None:
+            guard = UpstreamGuard(service_name)
+            self._guards[service_name] = guard
+        return guard
+
+    def acquire(self, service_name: str) -> UpstreamPermit:
+        return self.get(service_name).acquire()
+
+    def is_available(self, service_name: str) -> bool:
+        """False while the upstream's breaker is open (used to steer load balancing)"""
+        guard = self._guards.get(service_name)
+        return guard is None or not CIRCUIT_BREAKER_ENABLED or guard.breaker.state != OPEN
+
+    def on_health_change(self, service_name: str, health: Any):
+        """
+        Health monitor listener: open a closed breaker once probes keep failing
+
+        The breaker then recovers through its usual half-open probes.
+        """
+        if CIRCUIT_BREAKER_ENABLED and not health.available:
+            self.get(service_name).breaker.trip(f"{health.consecutive_failures} failed health checks")
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: guard.stats() for name, guard in self._guards.items()}
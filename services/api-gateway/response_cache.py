@@ -0,0 +1,267 @@
+"""
+Tenant-aware response cache for the API Gateway
+Caches whitelisted idempotent GET responses (reference data such as countries
+and destinations) with TTLs, size-bounded LRU eviction and strong ETags.
+Services invalidate entries by publishing to a Redis pub/sub channel.
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cache configuration
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 5000))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+RESPONSE_CACHE_MAX_BODY_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BODY_BYTES", 1024 * 1024))
+RESPONSE_CACHE_INVALIDATION_CHANNEL = os.getenv("RESPONSE_CACHE_INVALIDATION_CHANNEL", "gateway:cache:invalidate")
+
+# Whitelisted routes as comma-separated "<path glob>=<ttl seconds>" pairs
+# (first match wins, so list more specific patterns first)
+RESPONSE_CACHE_ROUTES = os.getenv(
+    "RESPONSE_CACHE_ROUTES",
+    "*/countries/continents=3600,*/countries=300,*/countries/*=300,*/destinations=300,*/destinations/*=300"
+)
+
+
+def parse_cache_routes(spec: str) -> List[Tuple[str, int]]:
+    """Parse the RESPONSE_CACHE_ROUTES specification into (pattern, ttl) pairs"""
+    routes = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        pattern, _, ttl = item.partition("=")
+        try:
+            routes.append((pattern.strip(), int(ttl)))
+        except ValueError:
+            logger.warning(f"Ignoring invalid response cache route: {item}")
+    return routes
+
+
+@dataclass
+class CachedResponse:
+    """A cached upstream response"""
+    status_code: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+    etag: str
+    tenant: str
+    path: str
+    stored_at: float = field(default_factory=time.time)
+    expires_at: float = 0.0
+
+    @property
+    def age(self) -> int:
+        return int(time.time() - self.stored_at)
+
+
+def compute_etag(body: bytes) -> str:
+    """Strong ETag derived from the response body"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+class ResponseCache:
+    """
+    In-process LRU response cache keyed by tenant, role, path and query
+
+    Bounded both by entry count and total body bytes.
+    """
+
+    def __init__(
+        self,
+        routes: Optional[List[Tuple[str, int]]] = None,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES,
+        max_body_bytes: int = RESPONSE_CACHE_MAX_BODY_BYTES,
+        enabled: bool = RESPONSE_CACHE_ENABLED,
+    ):
+        self.routes = routes if routes is not None else parse_cache_routes(RESPONSE_CACHE_ROUTES)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_body_bytes = max_body_bytes
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def ttl_for(self, method: str, path: str) -> Optional[int]:
+        """Return the TTL for a whitelisted GET route, or None if it is not cacheable"""
+        if not self.enabled or method != "GET":
+            return None
+        for pattern, ttl in self.routes:
+            if fnmatch(path, pattern):
+                return ttl if ttl > 0 else None
+        return None
+
+    @staticmethod
+    def build_key(tenant: str, role: str, path: str, query_items: List[Tuple[str, str]]) -> str:
+        query = "&".join(f"{key}={value}" for key, value in sorted(query_items))
+        return f"{tenant}|{role}|{path}?{query}"
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at <= now:
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(
+        self,
+        key: str,
+        tenant: str,
+        path: str,
+        status_code: int,
+        headers: List[Tuple[str, str]],
+        body: bytes,
+        ttl: int,
+        etag: Optional[str] = None,
+    ) -> Optional[CachedResponse]:
+        """Store a response; bodies larger than max_body_bytes are not cached"""
+        if len(body) > self.max_body_bytes:
+            return None
+
+        entry = CachedResponse(
+            status_code=status_code,
+            headers=headers,
+            body=body,
+            etag=etag or compute_etag(body),
+            tenant=tenant,
+            path=path,
+        )
+        entry.expires_at = entry.stored_at + ttl
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._bytes += len(body)
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+        return entry
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry.body)
+
+    def invalidate(self, tenant: Optional[str] = None, pattern: Optional[str] = None) -> int:
+        """
+        Drop entries for a tenant and/or gateway path glob
+
+        With neither argument the whole cache is cleared.
+        """
+        with self._lock:
+            keys = [
+                key for key, entry in self._entries.items()
+                if (tenant in (None, "*") or entry.tenant == tenant)
+                and (not pattern or fnmatch(entry.path, pattern))
+            ]
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+        return len(keys)
+
+    def record_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def handle_invalidation_message(self, data: Any) -> int:
+        """
+        Apply an invalidation message published by a service
+
+        Expected payload: {"tenant": "<slug or *>", "pattern": "<gateway path glob>"}
+        """
+        try:
+            message = json.loads(data) if isinstance(data, (str, bytes)) else dict(data)
+        except (ValueError, TypeError):
+            logger.warning(f"Ignoring malformed cache invalidation message: {data!r}")
+            return 0
+        removed = self.invalidate(message.get("tenant"), message.get("pattern"))
+        logger.info(f"Response cache invalidation {message}: {removed} entries removed")
+        return removed
+
+    async def listen_for_invalidations(self, redis_url: str, channel: str = RESPONSE_CACHE_INVALIDATION_CHANNEL):
+        """
+        Subscribe to the invalidation channel until cancelled
+
+        Reconnects with backoff when Redis is unavailable. Without the redis
+        package the cache still works, relying on TTLs alone.
+        """
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            logger.warning("redis package not installed; response cache invalidation relies on TTLs only")
+            return
+
+        backoff = 1.0
+        while True:
+            client = aioredis.from_url(redis_url)
+            pubsub = client.pubsub()
+            try:
+                await pubsub.subscribe(channel)
+                logger.info(f"Listening for response cache invalidations on {channel}")
+                backoff = 1.0
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.handle_invalidation_message(message.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Response cache invalidation listener error: {str(e)}")
+                # Entries may have gone stale while disconnected
+                self.invalidate()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                try:
+                    await pubsub.close()
+                    await client.close()
+                except Exception:
+                    pass
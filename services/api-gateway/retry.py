@@ -0,0 +1,186 @@
+"""
+Retry and hedging policies for the API Gateway
+Idempotent upstream calls (GET/HEAD) are retried with exponential backoff and
+full jitter, and may be hedged to a second replica after a p95-based delay. All
+extra attempts draw from a global retry budget so retries can never multiply load
+during an outage.
+"""
+
+import os
+import time
+import random
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from routing import RouteTable
+
+logger = logging.getLogger(__name__)
+
+# Retry configuration (attempts include the first call)
+RETRY_ENABLED = os.getenv("RETRY_ENABLED", "true").lower() == "true"
+RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", 2))
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", 0.05))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", 1.0))
+# Per-route attempts as comma-separated "<prefix>=<attempts>" pairs
+RETRY_ROUTES = os.getenv("RETRY_ROUTES", "")
+
+# Budget: extra attempts may add at most RETRY_BUDGET_RATIO of the request rate,
+# plus a small floor so low-traffic routes can still retry
+RETRY_BUDGET_RATIO = float(os.getenv("RETRY_BUDGET_RATIO", 0.1))
+RETRY_BUDGET_MIN_PER_SECOND = float(os.getenv("RETRY_BUDGET_MIN_PER_SECOND", 1.0))
+RETRY_BUDGET_MAX_TOKENS = float(os.getenv("RETRY_BUDGET_MAX_TOKENS", 100.0))
+
+# Hedging: comma-separated route prefixes (off unless listed or set in the route file)
+HEDGE_ROUTES = os.getenv("HEDGE_ROUTES", "")
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", 0.95))
+HEDGE_MIN_DELAY = float(os.getenv("HEDGE_MIN_DELAY", 0.05))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", 20))
+
+RETRYABLE_STATUS_CODES = {502, 503, 504}
+# Only safe methods are replayed: no service deduplicates on an Idempotency-Key,
+# so retrying or hedging a write could apply it twice
+IDEMPOTENT_METHODS = {"GET", "HEAD"}
+
+
+@dataclass
+class RetryPolicy:
+    """Retry and hedging settings for one route"""
+    max_attempts: int = RETRY_MAX_ATTEMPTS
+    hedge: bool = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_attempts > 1 or self.hedge
+
+
+def is_idempotent(method: str) -> bool:
+    """Only GET/HEAD requests may be retried or hedged"""
+    return method.upper() in IDEMPOTENT_METHODS
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY) -> float:
+    """Exponential backoff with full jitter for the given retry number (1 = first retry)"""
+    return random.uniform(0, min(cap, base * (2 ** (attempt - 1))))
+
+
+class RetryPolicies:
+    """Per-route retry policies from RETRY_ROUTES, HEDGE_ROUTES and the route file"""
+
+    def __init__(self, route_table: RouteTable):
+        self._policies: Dict[str, RetryPolicy] = {}
+        attempts: Dict[str, int] = {}
+        for item in RETRY_ROUTES.split(","):
+            prefix, _, value = item.strip().partition("=")
+            if not prefix:
+                continue
+            try:
+                attempts[RouteTable.normalize(prefix)] = int(value)
+            except ValueError:
+                logger.warning(f"Ignoring invalid retry route: {item}")
+        hedged = {RouteTable.normalize(prefix) for prefix in HEDGE_ROUTES.split(",") if prefix.strip()}
+
+        for prefix, _ in route_table.routes:
+            prefix = RouteTable.normalize(prefix)
+            options = route_table.route_options.get(prefix, {})
+            self._policies[prefix] = RetryPolicy(
+                max_attempts=max(int(options.get("retries", attempts.get(prefix, RETRY_MAX_ATTEMPTS))), 1),
+                hedge=bool(options.get("hedge", prefix in hedged)),
+            )
+
+    def for_route(self, prefix: Optional[str]) -> RetryPolicy:
+        if not RETRY_ENABLED or prefix is None:
+            return RetryPolicy(max_attempts=1, hedge=False)
+        return self._policies.get(prefix) or RetryPolicy()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            prefix: {"max_attempts": policy.max_attempts, "hedge": policy.hedge}
+            for prefix, policy in self._policies.items()
+        }
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries and hedges to a fraction of request volume
+
+    Every original request deposits `ratio` tokens and the bucket also refills
+    at min_per_second; every extra attempt withdraws one token.
+    """
+
+    def __init__(
+        self,
+        ratio: float = RETRY_BUDGET_RATIO,
+        min_per_second: float = RETRY_BUDGET_MIN_PER_SECOND,
+        max_tokens: float = RETRY_BUDGET_MAX_TOKENS,
+    ):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._updated_at = time.monotonic()
+        self.requests = 0
+        self.retries = 0
+        self.hedges = 0
+        self.exhausted = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.max_tokens, self.tokens + (now - self._updated_at) * self.min_per_second)
+        self._updated_at = now
+
+    def record_request(self):
+        self._refill()
+        self.requests += 1
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_withdraw(self, kind: str = "retry") -> bool:
+        self._refill()
+        if self.tokens < 1.0:
+            self.exhausted += 1
+            return False
+        self.tokens -= 1.0
+        if kind == "hedge":
+            self.hedges += 1
+        else:
+            self.retries += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "tokens": round(self.tokens, 2),
+            "ratio": self.ratio,
+            "requests": self.requests,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "exhausted": self.exhausted,
+        }
+
+
+class LatencyTracker:
+    """Recent time-to-headers samples per upstream pool, used to pick the hedge delay"""
+
+    def __init__(self, size: int = 200):
+        self.size = size
+        self._samples: Dict[str, "deque[float]"] = {}
+
+    def record(self, pool: str, seconds: float):
+        samples = self._samples.get(pool)
+        if samples is None:
+            samples = deque(maxlen=self.size)
+            self._samples[pool] = samples
+        samples.append(seconds)
+
+    def percentile(self, pool: str, percentile: float = HEDGE_PERCENTILE) -> Optional[float]:
+        samples = self._samples.get(pool)
+        if not samples or len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(int(len(ordered) * percentile), len(ordered) - 1)]
+
+    def hedge_delay(self, pool: str) -> Optional[float]:
+        """Delay before hedging, or None until enough samples were seen"""
+        value = self.percentile(pool)
+        return max(value, HEDGE_MIN_DELAY) if value is not None else None
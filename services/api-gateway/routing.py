@@ -0,0 +1,303 @@
+"""
+Declarative route table for the API Gateway
+Maps path prefixes to upstream pools through a precompiled segment trie and
+balances each pool's replicas with round-robin, least-outstanding-requests or
+power-of-two-choices selection
+"""
+
+import os
+import random
+import logging
+from itertools import count
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Route configuration: a YAML file, or comma-separated "<prefix>=<pool>" pairs
+GATEWAY_ROUTES_FILE = os.getenv("GATEWAY_ROUTES_FILE", "")
+GATEWAY_ROUTES = os.getenv(
+    "GATEWAY_ROUTES",
+    "/api/v1/auth=auth-service,"
+    "/api/v1/tenants=tenant-service,"
+    "/api/v1/bookings=booking-operations-service,"
+    "/api/v1/communications=communication-service,"
+    "/api/v1/crm=crm-service,"
+    "/api/v1/financial=financial-service,"
+    "/api/v1/system=system-service"
+)
+LOAD_BALANCING_STRATEGY = os.getenv("LOAD_BALANCING_STRATEGY", "round_robin")
+
+ROUND_ROBIN = "round_robin"
+LEAST_OUTSTANDING = "least_outstanding"
+POWER_OF_TWO = "power_of_two"
+STRATEGIES = (ROUND_ROBIN, LEAST_OUTSTANDING, POWER_OF_TWO)
+
+
+def split_urls(value: str) -> List[str]:
+    """Split a comma-separated replica list, e.g. BOOKING_SERVICE_URL=http://b1:8004,http://b2:8004"""
+    return [url.strip().rstrip("/") for url in value.split(",") if url.strip()]
+
+
+class UpstreamPool:
+    """
+    Replicas of one upstream service and the strategy used to pick between them
+
+    Outstanding counts are maintained by the caller through begin()/end().
+    A replica is named after its pool when it is the only one, otherwise
+    "<pool>#<n>", which keeps per-service env overrides and health names stable.
+    """
+
+    def __init__(self, name: str, replicas: List[str], strategy: str = LOAD_BALANCING_STRATEGY):
+        if not replicas:
+            raise ValueError(f"Upstream pool {name} has no replicas")
+        if strategy not in STRATEGIES:
+            logger.warning(f"Unknown load balancing strategy {strategy!r} for {name}; using {ROUND_ROBIN}")
+            strategy = ROUND_ROBIN
+        self.name = name
+        self.strategy = strategy
+        self.replicas = [url.rstrip("/") for url in replicas]
+        self.replica_names = (
+            [name] if len(self.replicas) == 1
+            else [f"{name}#{index}" for index in range(1, len(self.replicas) + 1)]
+        )
+        self.outstanding: Dict[str, int] = {url: 0 for url in self.replicas}
+        self.selected: Dict[str, int] = {url: 0 for url in self.replicas}
+        self._counter = count()
+
+    def choose(
+        self,
+        is_available: Optional[Callable[[str], bool]] = None,
+        exclude: Optional[List[str]] = None
+    ) -> str:
+        """
+        Pick a replica URL
+
+        Args:
+            is_available: Predicate on replica names; unavailable replicas are
+                skipped unless none are left, in which case all are candidates
+            exclude: Replica URLs to avoid if any other replica is left
+                (e.g. the one a retry or hedge is moving away from)
+
+        Returns:
+            Base URL of the chosen replica
+        """
+        candidates = self.replicas
+        if exclude and len(self.replicas) > 1:
+            candidates = [url for url in self.replicas if url not in exclude] or self.replicas
+        if is_available is not None and len(candidates) > 1:
+            names = dict(zip(self.replicas, self.replica_names))
+            healthy = [url for url in candidates if is_available(names[url])]
+            candidates = healthy or candidates
+
+        if len(candidates) == 1:
+            chosen = candidates[0]
+        elif self.strategy == LEAST_OUTSTANDING:
+            # Rotate the starting point so ties are spread evenly
+            offset = next(self._counter) % len(candidates)
+            rotated = candidates[offset:] + candidates[:offset]
+            chosen = min(rotated, key=lambda url: self.outstanding[url])
+        elif self.strategy == POWER_OF_TWO:
+            first, second = random.sample(candidates, 2)
+            chosen = first if self.outstanding[first] <= self.outstanding[second] else second
+        else:
+            chosen = candidates[next(self._counter) % len(candidates)]
+
+        self.selected[chosen] += 1
+        return chosen
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "strategy": self.strategy,
+            "replicas": [
+                {
+                    "name": name,
+                    "url": url,
+                    "outstanding": self.outstanding[url],
+                    "selected": self.selected[url],
+                }
+                for name, url in zip(self.replica_names, self.replicas)
+            ],
+        }
+
+
+class _TrieNode:
+    __slots__ = ("children", "pool")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.pool: Optional[UpstreamPool] = None
+
+
+class RouteTable:
+    """
+    Longest-prefix route lookup over path segments
+
+    "/api/v1/crm" matches "/api/v1/crm" and "/api/v1/crm/leads" but not
+    "/api/v1/crmx". Lookup cost depends on path depth, not on the number of
+    routes.
+    """
+
+    def __init__(
+        self,
+        pools: Dict[str, UpstreamPool],
+        routes: List[Tuple[str, str]],
+        route_options: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        self.pools = pools
+        self.routes = []
+        # Extra per-route settings from the YAML file (e.g. retries, hedge)
+        self.route_options = {
+            self.normalize(prefix): options for prefix, options in (route_options or {}).items()
+        }
+        self._root = _TrieNode()
+        self._by_url: Dict[str, UpstreamPool] = {}
+        for pool in pools.values():
+            for url in pool.replicas:
+                self._by_url[url] = pool
+        for prefix, pool_name in routes:
+            self.add_route(prefix, pool_name)
+
+    @staticmethod
+    def _segments(path: str) -> List[str]:
+        return [segment for segment in path.split("/") if segment]
+
+    @classmethod
+    def normalize(cls, prefix: str) -> str:
+        """Canonical form of a route prefix, as returned by resolve()"""
+        return "/" + "/".join(cls._segments(prefix))
+
+    def add_route(self, prefix: str, pool_name: str):
+        pool = self.pools.get(pool_name)
+        if pool is None:
+            raise ValueError(f"Route {prefix} refers to unknown upstream pool {pool_name}")
+        node = self._root
+        for segment in self._segments(prefix):
+            node = node.children.setdefault(segment, _TrieNode())
+        node.pool = pool
+        self.routes.append((prefix, pool_name))
+
+    def resolve(self, path: str) -> Optional[Tuple[str, UpstreamPool]]:
+        """Return (route prefix, pool) for the longest matching prefix, or None"""
+        node = self._root
+        depth = 0
+        matched = (0, node.pool) if node.pool is not None else None
+        for segment in self._segments(path):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            depth += 1
+            if node.pool is not None:
+                matched = (depth, node.pool)
+        if matched is None:
+            return None
+        return self.normalize("/".join(self._segments(path)[:matched[0]])), matched[1]
+
+    def match(self, path: str) -> Optional[UpstreamPool]:
+        """Return the pool for the longest matching prefix, or None"""
+        resolved = self.resolve(path)
+        return resolved[1] if resolved else None
+
+    def replica_urls(self) -> Dict[str, str]:
+        """Every replica as {replica name: base URL}"""
+        return {
+            name: url
+            for pool in self.pools.values()
+            for name, url in zip(pool.replica_names, pool.replicas)
+        }
+
+    def pool_for_url(self, service_url: str) -> Optional[UpstreamPool]:
+        """The pool a replica URL belongs to"""
+        return self._by_url.get(service_url.rstrip("/"))
+
+    def begin(self, service_url: str):
+        """Count a request as outstanding on a replica"""
+        pool = self._by_url.get(service_url.rstrip("/"))
+        if pool is not None:
+            pool.outstanding[service_url.rstrip("/")] += 1
+
+    def end(self, service_url: str):
+        pool = self._by_url.get(service_url.rstrip("/"))
+        if pool is not None:
+            url = service_url.rstrip("/")
+            pool.outstanding[url] = max(pool.outstanding[url] - 1, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "routes": {prefix: pool_name for prefix, pool_name in self.routes},
+            "pools": {name: pool.stats() for name, pool in self.pools.items()},
+        }
+
+
+def parse_routes(spec: str) -> List[Tuple[str, str]]:
+    """Parse the GATEWAY_ROUTES specification into (prefix, pool) pairs"""
+    routes = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        prefix, _, pool_name = item.partition("=")
+        if not pool_name:
+            logger.warning(f"Ignoring invalid gateway route: {item}")
+            continue
+        routes.append((prefix.strip(), pool_name.strip()))
+    return routes
+
+
+def _load_routes_file(path: str) -> Dict[str, Any]:
+    try:
+        import yaml
+    except ImportError:
+        raise RuntimeError("GATEWAY_ROUTES_FILE is set but PyYAML is not installed")
+    with open(path) as handle:
+        return yaml.safe_load(handle) or {}
+
+
+def load_route_table(service_urls: Dict[str, str]) -> RouteTable:
+    """
+    Build the route table from GATEWAY_ROUTES_FILE or the environment
+
+    Args:
+        service_urls: Service name -> URL or comma-separated replica URLs
+
+    YAML format:
+
+        pools:
+          booking-operations-service:
+            strategy: least_outstanding
+            replicas: [http://booking-1:8004, http://booking-2:8004]
+        routes:
+          - prefix: /api/v1/bookings
+            pool: booking-operations-service
+            retries: 3        # optional per-route settings
+            hedge: true
+
+    Pools not listed in the file fall back to service_urls. Strategies can
+    also be set per pool with <SERVICE_NAME>_LB_STRATEGY.
+    """
+    config: Dict[str, Any] = _load_routes_file(GATEWAY_ROUTES_FILE) if GATEWAY_ROUTES_FILE else {}
+
+    pools: Dict[str, UpstreamPool] = {}
+    pool_config = config.get("pools") or {}
+    for name in list(service_urls) + [name for name in pool_config if name not in service_urls]:
+        settings = pool_config.get(name) or {}
+        replicas = settings.get("replicas") or split_urls(service_urls.get(name, ""))
+        if isinstance(replicas, str):
+            replicas = split_urls(replicas)
+        strategy = settings.get("strategy") or os.getenv(
+            f"{name.upper().replace('-', '_')}_LB_STRATEGY", LOAD_BALANCING_STRATEGY
+        )
+        pools[name] = UpstreamPool(name, replicas, strategy)
+
+    route_options: Dict[str, Dict[str, Any]] = {}
+    if config.get("routes"):
+        routes = [(route["prefix"], route["pool"]) for route in config["routes"]]
+        for route in config["routes"]:
+            options = {key: value for key, value in route.items() if key not in ("prefix", "pool")}
+            if options:
+                route_options[route["prefix"]] = options
+    else:
+        routes = parse_routes(GATEWAY_ROUTES)
+
+    table = RouteTable(pools, routes, route_options)
+    logger.info(f"Route table loaded: {len(routes)} routes, {len(table.replica_urls())} upstream replicas")
+    return table
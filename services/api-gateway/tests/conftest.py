@@ -0,0 +1,10 @@
+"""
+Test Configuration for the API Gateway
+Unit tests import the gateway's modules directly; no upstream services,
+database or Redis are needed.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
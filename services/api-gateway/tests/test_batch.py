@@ -0,0 +1,227 @@
+"""
+Unit Tests for API Gateway Batch Requests
+Tests validation, dependency ordering, cycle detection and reference
+substitution of the gateway's batch module
+"""
+
+import asyncio
+import pytest
+
+from batch import BatchError, parse_batch, resolve_references, run_batch
+
+
+def run(requests, statuses=None, concurrency=6):
+    """Run a batch with a fake executor; returns (results, start order)"""
+    started = []
+
+    async def execute(request, results):
+        started.append(request.id)
+        await asyncio.sleep(0)
+        return {"status": (statuses or {}).get(request.id, 200), "headers": {}, "body": {"id": request.id}}
+
+    results = asyncio.run(run_batch(requests, execute, concurrency))
+    return results, started
+
+
+@pytest.mark.unit
+class TestBatchValidation:
+    """Test parse_batch"""
+
+    def test_accepts_object_or_list(self):
+        """Test both {"requests": [...]} and a bare list"""
+        spec = [{"id": "a", "path": "/api/v1/crm/leads"}]
+        assert [request.id for request in parse_batch({"requests": spec})] == ["a"]
+        assert [request.id for request in parse_batch(spec)] == ["a"]
+
+    def test_ids_default_to_index(self):
+        """Test sub-requests without an id are named by position"""
+        requests = parse_batch([{"path": "/a"}, {"path": "/b", "depends_on": [0]}])
+        assert [request.id for request in requests] == ["0", "1"]
+        assert requests[1].depends_on == {"0"}
+
+    @pytest.mark.parametrize("payload", [[], {}, {"requests": "nope"}, None])
+    def test_rejects_empty_batch(self, payload):
+        """Test an empty or malformed batch is refused"""
+        with pytest.raises(BatchError):
+            parse_batch(payload)
+
+    def test_rejects_oversized_batch(self):
+        """Test max_requests is enforced"""
+        with pytest.raises(BatchError, match="maximum is 2"):
+            parse_batch([{"path": "/a"}] * 3, max_requests=2)
+
+    @pytest.mark.parametrize("spec", [
+        {"path": "relative"},
+        {"path": "/a", "method": "TRACE"},
+        {"path": "/a", "query": ["x"]},
+        "not-an-object",
+    ])
+    def test_rejects_invalid_entry(self, spec):
+        """Test malformed sub-requests are refused"""
+        with pytest.raises(BatchError):
+            parse_batch([spec])
+
+    def test_rejects_duplicate_ids(self):
+        """Test ids must be unique"""
+        with pytest.raises(BatchError, match="unique"):
+            parse_batch([{"id": "a", "path": "/a"}, {"id": "a", "path": "/b"}])
+
+    def test_bare_string_dependency_is_one_id(self):
+        """Test depends_on: "create" is not split into characters"""
+        requests = parse_batch([
+            {"id": "create", "method": "POST", "path": "/a"},
+            {"id": "read", "path": "/b", "depends_on": "create"},
+        ])
+        assert requests[1].depends_on == {"create"}
+
+    @pytest.mark.parametrize("depends_on", [{"id": "a"}, [["a"]], [True], 1.5])
+    def test_rejects_malformed_dependencies(self, depends_on):
+        """Test depends_on must be an id or a list of ids"""
+        with pytest.raises(BatchError, match="depends_on"):
+            parse_batch([{"id": "a", "path": "/a"}, {"id": "b", "path": "/b", "depends_on": depends_on}])
+
+    def test_rejects_unknown_dependency(self):
+        """Test dependencies must name requests of the same batch"""
+        with pytest.raises(BatchError, match="unknown requests: missing"):
+            parse_batch([{"id": "a", "path": "/a", "depends_on": ["missing"]}])
+
+    def test_references_imply_dependencies(self):
+        """Test {{id...}} references in path, query or body add dependencies"""
+        requests = parse_batch([
+            {"id": "lead", "method": "POST", "path": "/leads"},
+            {"id": "account", "method": "POST", "path": "/accounts"},
+            {
+                "id": "convert",
+                "method": "POST",
+                "path": "/leads/{{lead.body.id}}/convert",
+                "body": {"account_id": "{{ account.body.id }}"},
+            },
+        ])
+        assert requests[2].depends_on == {"lead", "account"}
+
+
+@pytest.mark.unit
+class TestBatchCycles:
+    """Test cycle detection"""
+
+    def test_rejects_self_dependency(self):
+        """Test a request cannot wait for itself"""
+        with pytest.raises(BatchError, match="depends on itself"):
+            parse_batch([{"id": "a", "path": "/a/{{a.body.id}}"}])
+
+    def test_rejects_two_request_cycle(self):
+        """Test a -> b -> a is refused"""
+        with pytest.raises(BatchError, match="cycle between requests: a, b"):
+            parse_batch([
+                {"id": "a", "path": "/a", "depends_on": ["b"]},
+                {"id": "b", "path": "/b", "depends_on": ["a"]},
+            ])
+
+    def test_cycle_report_leaves_out_independent_requests(self):
+        """Test only the requests stuck in the cycle are named"""
+        with pytest.raises(BatchError) as error:
+            parse_batch([
+                {"id": "root", "path": "/root"},
+                {"id": "a", "path": "/a", "depends_on": ["root", "c"]},
+                {"id": "b", "path": "/b", "depends_on": ["a"]},
+                {"id": "c", "path": "/c", "depends_on": ["b"]},
+            ])
+        assert str(error.value).endswith("a, b, c")
+
+    def test_accepts_diamond(self):
+        """Test shared dependencies are not mistaken for cycles"""
+        requests = parse_batch([
+            {"id": "a", "path": "/a"},
+            {"id": "b", "path": "/b", "depends_on": ["a"]},
+            {"id": "c", "path": "/c", "depends_on": ["a"]},
+            {"id": "d", "path": "/d", "depends_on": ["b", "c"]},
+        ])
+        assert len(requests) == 4
+
+
+@pytest.mark.unit
+class TestBatchExecution:
+    """Test run_batch ordering and failure propagation"""
+
+    def test_dependencies_run_first(self):
+        """Test a request starts only after everything it depends on"""
+        requests = parse_batch([
+            {"id": "d", "path": "/d", "depends_on": ["b", "c"]},
+            {"id": "c", "path": "/c", "depends_on": ["a"]},
+            {"id": "b", "path": "/b", "depends_on": ["a"]},
+            {"id": "a", "path": "/a"},
+        ])
+        results, started = run(requests)
+        assert started[0] == "a"
+        assert started[-1] == "d"
+        assert [result["id"] for result in results] == ["d", "c", "b", "a"]
+        assert all(result["status"] == 200 for result in results)
+
+    def test_failed_dependency_skips_dependents(self):
+        """Test dependents of a failed request get 424 without being sent"""
+        requests = parse_batch([
+            {"id": "a", "path": "/a"},
+            {"id": "b", "path": "/b", "depends_on": ["a"]},
+            {"id": "c", "path": "/c", "depends_on": ["b"]},
+            {"id": "d", "path": "/d"},
+        ])
+        results, started = run(requests, statuses={"a": 404})
+        assert [result["status"] for result in results] == [404, 424, 424, 200]
+        assert sorted(started) == ["a", "d"]
+        assert results[1]["body"]["detail"] == "Dependency failed: a"
+
+    def test_respects_concurrency(self):
+        """Test no more than concurrency sub-requests are in flight"""
+        in_flight = []
+        peak = []
+
+        async def execute(request, results):
+            in_flight.append(request.id)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(request.id)
+            return {"status": 200, "headers": {}, "body": None}
+
+        requests = parse_batch([{"path": f"/{index}"} for index in range(6)])
+        asyncio.run(run_batch(requests, execute, concurrency=2))
+        assert max(peak) == 2
+
+    def test_executor_error_becomes_500(self):
+        """Test an exception in one sub-request does not fail the batch"""
+        async def execute(request, results):
+            if request.id == "boom":
+                raise RuntimeError("upstream exploded")
+            return {"status": 200, "headers": {}, "body": None}
+
+        requests = parse_batch([{"id": "boom", "path": "/a"}, {"id": "ok", "path": "/b"}])
+        results = asyncio.run(run_batch(requests, execute))
+        assert [result["status"] for result in results] == [500, 200]
+
+
+@pytest.mark.unit
+class TestReferenceResolution:
+    """Test resolve_references"""
+
+    RESULTS = {
+        "lead": {"status": 201, "body": {"id": 42, "tags": ["vip", "new"], "owner": {"name": "Ana"}}},
+    }
+
+    def test_whole_reference_keeps_type(self):
+        """Test a value that is only a reference becomes the referenced value"""
+        assert resolve_references("{{lead.body.id}}", self.RESULTS) == 42
+        assert resolve_references("{{lead.body.owner}}", self.RESULTS) == {"name": "Ana"}
+
+    def test_embedded_reference_is_interpolated(self):
+        """Test references inside longer strings become text"""
+        assert resolve_references("/leads/{{lead.body.id}}/notes", self.RESULTS) == "/leads/42/notes"
+
+    def test_list_index_and_status(self):
+        """Test list positions and the status code can be referenced"""
+        assert resolve_references({"tag": "{{lead.body.tags.1}}", "code": "{{lead.status}}"}, self.RESULTS) == {
+            "tag": "new", "code": 201
+        }
+
+    def test_missing_values(self):
+        """Test unknown fields resolve to None, or nothing when embedded"""
+        assert resolve_references("{{lead.body.missing}}", self.RESULTS) is None
+        assert resolve_references("/leads/{{lead.body.tags.9}}", self.RESULTS) == "/leads/"
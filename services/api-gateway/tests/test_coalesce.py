@@ -0,0 +1,64 @@
+"""
+Unit Tests for API Gateway Request Coalescing
+Tests that only callers of the same verified tenant share an in-flight
+upstream call
+"""
+
+import asyncio
+import httpx
+import pytest
+from starlette.requests import Request
+
+import main
+from coalesce import RequestCoalescer
+
+ACME = {"sub": "u-1", "role": "tenant_admin", "tenant_slug": "acme", "tenant_id": "t-acme"}
+ACME_COLLEAGUE = {"sub": "u-3", "role": "tenant_admin", "tenant_slug": "acme", "tenant_id": "t-acme"}
+GLOBEX = {"sub": "u-2", "role": "tenant_admin", "tenant_slug": "globex", "tenant_id": "t-globex"}
+ACME_STATS = "/api/v1/crm/tenants/t-acme/stats"
+
+
+class SlowUpstream:
+    """Stands in for send_upstream_with_retries, holding every call briefly"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, service_url, method, url, params, headers, body=None, stream=True):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, json={"url": url}, headers={"content-type": "application/json"})
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    fake = SlowUpstream()
+    monkeypatch.setattr(main, "send_upstream_with_retries", fake)
+    monkeypatch.setattr(main, "request_coalescer", RequestCoalescer(routes=["*/stats"], enabled=True))
+    return fake
+
+
+def fetch(path, claims):
+    request = Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []})
+    return main.proxy_coalesced_request(request, "http://crm:8006", f"http://crm:8006{path}", {}, claims)
+
+
+async def concurrently(*calls):
+    return await asyncio.gather(*(fetch(path, claims) for path, claims in calls))
+
+
+@pytest.mark.unit
+class TestTenantScopedCoalescing:
+    """Test proxy_coalesced_request across tenants"""
+
+    def test_same_tenant_shares_call(self, upstream):
+        """Test concurrent callers of one tenant collapse into one upstream call"""
+        asyncio.run(concurrently((ACME_STATS, ACME), (ACME_STATS, ACME_COLLEAGUE)))
+        assert upstream.calls == 1
+        assert main.request_coalescer.collapsed == 1
+
+    def test_other_tenant_cannot_join(self, upstream):
+        """Test a caller from another tenant gets its own call for the first tenant's URL"""
+        asyncio.run(concurrently((ACME_STATS, ACME), (ACME_STATS, GLOBEX)))
+        assert upstream.calls == 2
+        assert main.request_coalescer.collapsed == 0
@@ -0,0 +1,195 @@
+"""
+Unit Tests for API Gateway Rate Limiting
+Tests the local token bucket, plan limits, cache bounds and client addressing
+of the gateway's rate_limit module (without Redis, so limits apply per process)
+"""
+
+import asyncio
+import pytest
+
+import rate_limit
+from rate_limit import (
+    BucketLimits, LocalBucket, RateLimiter, client_address, parse_plan_limits,
+    parse_route_limits, parse_trusted_proxies
+)
+
+
+class FakeClock:
+    """Stands in for time.monotonic in the rate_limit module"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", fake)
+    return fake
+
+
+def limiter(**kwargs) -> RateLimiter:
+    plans = {
+        "free": BucketLimits(rate=1, burst=3, quota=0),
+        "enterprise": BucketLimits(rate=100, burst=200, quota=0),
+    }
+    return RateLimiter(plans=plans, routes=kwargs.pop("routes", []), enabled=True, **kwargs)
+
+
+@pytest.mark.unit
+class TestPlanParsing:
+    """Test RATE_LIMIT_PLANS and RATE_LIMIT_ROUTES parsing"""
+
+    def test_parses_rate_burst_and_quota(self):
+        """Test a full plan spec"""
+        plans = parse_plan_limits("free=10/20/1000, Starter=50/100/10000")
+        assert plans["free"] == BucketLimits(rate=10.0, burst=20, quota=1000)
+        assert plans["starter"] == BucketLimits(rate=50.0, burst=100, quota=10000)
+
+    def test_burst_defaults_to_rate_and_quota_to_unlimited(self):
+        """Test a plan given only its rate"""
+        assert parse_plan_limits("anonymous=5")["anonymous"] == BucketLimits(rate=5.0, burst=5, quota=0)
+
+    def test_skips_invalid_plans(self):
+        """Test a malformed entry does not drop the valid ones"""
+        plans = parse_plan_limits("free=10/20/1000,broken=fast/slow")
+        assert list(plans) == ["free"]
+
+    def test_parses_route_globs(self):
+        """Test route limits keep their glob and order"""
+        routes = parse_route_limits("*/statistics=2/5,,*/summary=1/3,bad=x")
+        assert routes == [
+            ("*/statistics", BucketLimits(rate=2.0, burst=5)),
+            ("*/summary", BucketLimits(rate=1.0, burst=3)),
+        ]
+
+    def test_unknown_plan_falls_back_to_default(self):
+        """Test an unlisted plan gets the default plan's limits"""
+        assert limiter().plan_limits("no-such-plan") == BucketLimits(rate=1, burst=3, quota=0)
+
+
+@pytest.mark.unit
+class TestLocalBucket:
+    """Test the in-process token bucket"""
+
+    def test_allows_burst_then_refuses(self, clock):
+        """Test a full bucket serves exactly burst requests at once"""
+        bucket = LocalBucket(rate=1, burst=3)
+        assert [bucket.take() for _ in range(4)] == [True, True, True, False]
+
+    def test_refills_at_rate(self, clock):
+        """Test tokens come back at rate per second"""
+        bucket = LocalBucket(rate=2, burst=2)
+        assert bucket.take() and bucket.take()
+        assert not bucket.take()
+        clock.now += 0.5
+        assert bucket.take()
+        assert not bucket.take()
+
+    def test_refill_is_capped_at_burst(self, clock):
+        """Test idle time does not bank more than burst tokens"""
+        bucket = LocalBucket(rate=1, burst=2)
+        clock.now += 3600
+        assert [bucket.take() for _ in range(3)] == [True, True, False]
+
+    def test_expired_lease_is_dropped(self, clock):
+        """Test leased tokens cannot be used after the lease expires"""
+        bucket = LocalBucket(rate=10, burst=10)
+        bucket.leased = 5
+        bucket.lease_expires = clock.now + 1
+        assert bucket.take_leased()
+        clock.now += 2
+        assert not bucket.take_leased()
+        assert bucket.leased == 0
+
+
+@pytest.mark.unit
+class TestRateLimiter:
+    """Test RateLimiter.check without Redis"""
+
+    def test_limits_tenant_by_plan(self, clock):
+        """Test a tenant is refused once its plan's burst is spent"""
+        rate_limiter = limiter()
+        decisions = [asyncio.run(rate_limiter.check("acme", None, "free", "/api/v1/bookings")) for _ in range(4)]
+        assert [decision.allowed for decision in decisions] == [True, True, True, False]
+        assert decisions[-1].reason == "rate"
+        assert int(decisions[-1].headers()["Retry-After"]) >= 1
+        assert decisions[0].headers()["RateLimit-Limit"] == "3"
+
+    def test_tenants_have_separate_buckets(self, clock):
+        """Test one tenant's traffic does not use another's tokens"""
+        rate_limiter = limiter()
+        for _ in range(3):
+            asyncio.run(rate_limiter.check("acme", None, "free", "/api/v1/bookings"))
+        assert asyncio.run(rate_limiter.check("globex", None, "free", "/api/v1/bookings")).allowed
+
+    def test_route_bucket_applies_on_top_of_plan(self, clock):
+        """Test an expensive route is refused before the tenant bucket is empty"""
+        rate_limiter = limiter(routes=[("*/statistics", BucketLimits(rate=1, burst=1))])
+        first = asyncio.run(rate_limiter.check("acme", None, "enterprise", "/api/v1/bookings/statistics"))
+        second = asyncio.run(rate_limiter.check("acme", None, "enterprise", "/api/v1/bookings/statistics"))
+        assert first.allowed
+        assert not second.allowed
+        assert second.reason == "route"
+        assert asyncio.run(rate_limiter.check("acme", None, "enterprise", "/api/v1/bookings")).allowed
+
+    def test_disabled_limiter_returns_none(self):
+        """Test no decision (and no headers) when rate limiting is off"""
+        rate_limiter = RateLimiter(plans={}, routes=[], enabled=False)
+        assert asyncio.run(rate_limiter.check("acme", None, "free", "/")) is None
+
+    def test_buckets_are_lru_bounded(self, clock):
+        """Test the least recently used buckets are dropped past max_buckets"""
+        rate_limiter = limiter(max_buckets=2)
+        for key in ("ip:1", "ip:2", "ip:1", "ip:3"):
+            asyncio.run(rate_limiter.check(key, None, "free", "/"))
+        assert list(rate_limiter._buckets) == ["tenant:ip:1", "tenant:ip:3"]
+        assert rate_limiter.stats()["evictions"] == 1
+
+    def test_plan_from_claims_wins(self):
+        """Test the token's subscription_plan is used without a lookup"""
+        plan = asyncio.run(limiter().resolve_plan("acme", {"subscription_plan": "Enterprise"}))
+        assert plan == "enterprise"
+
+    def test_plan_cache_is_lru_bounded(self, clock):
+        """Test cached plans are bounded like buckets"""
+        rate_limiter = limiter(plan_cache_max_size=2)
+        for slug in ("acme", "globex", "initech"):
+            assert asyncio.run(rate_limiter.resolve_plan(slug, {})) == rate_limit.RATE_LIMIT_DEFAULT_PLAN
+        assert list(rate_limiter._plan_cache) == ["globex", "initech"]
+
+
+@pytest.mark.unit
+class TestClientAddress:
+    """Test which address unauthenticated callers are bucketed by"""
+
+    def test_header_ignored_without_trusted_proxies(self):
+        """Test callers cannot choose their bucket by sending X-Real-IP"""
+        assert client_address("203.0.113.7", "198.51.100.1", []) == "203.0.113.7"
+
+    def test_header_used_from_trusted_proxy(self):
+        """Test X-Real-IP set by a trusted proxy names the caller"""
+        proxies = parse_trusted_proxies("10.0.0.0/8, 127.0.0.1")
+        assert client_address("10.1.2.3", "198.51.100.1", proxies) == "198.51.100.1"
+        assert client_address("127.0.0.1", "198.51.100.1", proxies) == "198.51.100.1"
+
+    def test_header_ignored_from_untrusted_peer(self):
+        """Test a peer outside the trusted networks is used as is"""
+        proxies = parse_trusted_proxies("10.0.0.0/8")
+        assert client_address("203.0.113.7", "198.51.100.1", proxies) == "203.0.113.7"
+
+    def test_trusted_proxy_without_header(self):
+        """Test a proxy that sends no X-Real-IP is bucketed by its own address"""
+        proxies = parse_trusted_proxies("10.0.0.0/8")
+        assert client_address("10.1.2.3", None, proxies) == "10.1.2.3"
+
+    def test_missing_peer(self):
+        """Test requests without a peer share the unknown bucket"""
+        assert client_address(None, "198.51.100.1", parse_trusted_proxies("10.0.0.0/8")) == "unknown"
+
+    def test_invalid_proxy_entries_are_skipped(self):
+        """Test malformed RATE_LIMIT_TRUSTED_PROXIES entries are ignored"""
+        assert [str(network) for network in parse_trusted_proxies("nginx, 10.0.0.1,")] == ["10.0.0.1/32"]
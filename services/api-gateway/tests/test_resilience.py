@@ -0,0 +1,249 @@
+"""
+Unit Tests for API Gateway Resilience
+Tests the circuit breaker and the AIMD concurrency limiter of the gateway's
+resilience module
+"""
+
+import pytest
+
+import resilience
+from resilience import (
+    CLOSED, HALF_OPEN, OPEN, AdaptiveConcurrencyLimiter, CircuitBreaker, UpstreamGuard, UpstreamUnavailable
+)
+
+
+class FakeClock:
+    """Stands in for time.monotonic in the resilience module"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(resilience.time, "monotonic", fake)
+    return fake
+
+
+def breaker(**kwargs) -> CircuitBreaker:
+    settings = dict(
+        window=10.0, min_requests=4, error_threshold=0.5, slow_call_duration=1.0,
+        slow_call_threshold=0.8, open_seconds=30.0, half_open_calls=2
+    )
+    settings.update(kwargs)
+    return CircuitBreaker("booking", **settings)
+
+
+def call(circuit: CircuitBreaker, failed: bool = False, latency: float = 0.1):
+    admitted_in = circuit.allow()
+    assert admitted_in is not None
+    circuit.record(admitted_in, failed, latency)
+
+
+def trip(circuit: CircuitBreaker):
+    for _ in range(circuit.min_requests):
+        call(circuit, failed=True)
+    assert circuit.state == OPEN
+
+
+@pytest.mark.unit
+class TestCircuitBreaker:
+    """Test breaker state transitions"""
+
+    def test_stays_closed_below_min_requests(self, clock):
+        """Test a few failures on little traffic do not open the breaker"""
+        circuit = breaker()
+        for _ in range(3):
+            call(circuit, failed=True)
+        assert circuit.state == CLOSED
+
+    def test_opens_on_error_rate(self, clock):
+        """Test the breaker opens once the error rate crosses its threshold"""
+        circuit = breaker()
+        call(circuit)
+        call(circuit)
+        call(circuit, failed=True)
+        assert circuit.state == CLOSED
+        call(circuit, failed=True)
+        assert circuit.state == OPEN
+        assert circuit.last_trip_reason == "error rate 2/4"
+
+    def test_opens_on_slow_call_rate(self, clock):
+        """Test successful but slow calls open the breaker too"""
+        circuit = breaker()
+        for _ in range(4):
+            call(circuit, latency=2.0)
+        assert circuit.state == OPEN
+        assert circuit.last_trip_reason.startswith("slow call rate")
+
+    def test_old_outcomes_leave_the_window(self, clock):
+        """Test failures older than the window no longer count"""
+        circuit = breaker()
+        for _ in range(3):
+            call(circuit, failed=True)
+        clock.now += 11
+        call(circuit, failed=True)
+        assert circuit.state == CLOSED
+
+    def test_open_breaker_rejects_until_open_seconds_pass(self, clock):
+        """Test calls are shed while open and Retry-After counts down"""
+        circuit = breaker()
+        trip(circuit)
+        assert circuit.allow() is None
+        assert circuit.retry_after() == 30
+        clock.now += 20
+        assert circuit.retry_after() == 10
+        assert circuit.allow() is None
+        assert circuit.rejected == 2
+
+    def test_half_open_admits_limited_probes(self, clock):
+        """Test only half_open_calls probes go through after the open period"""
+        circuit = breaker()
+        trip(circuit)
+        clock.now += 30
+        assert circuit.allow() == HALF_OPEN
+        assert circuit.allow() == HALF_OPEN
+        assert circuit.allow() is None
+        assert circuit.state == HALF_OPEN
+
+    def test_successful_probes_close_the_breaker(self, clock):
+        """Test the breaker closes with a clean window once every probe succeeds"""
+        circuit = breaker()
+        trip(circuit)
+        clock.now += 30
+        call(circuit)
+        assert circuit.state == HALF_OPEN
+        call(circuit)
+        assert circuit.state == CLOSED
+        assert circuit.stats()["window_calls"] == 0
+
+    @pytest.mark.parametrize("failed,latency", [(True, 0.1), (False, 5.0)])
+    def test_failed_or_slow_probe_reopens(self, clock, failed, latency):
+        """Test any bad probe opens the breaker for another full period"""
+        circuit = breaker()
+        trip(circuit)
+        clock.now += 30
+        call(circuit, failed=failed, latency=latency)
+        assert circuit.state == OPEN
+        assert circuit.times_opened == 2
+        assert circuit.retry_after() == 30
+
+    def test_released_probe_frees_its_slot(self, clock):
+        """Test a probe without an outcome can be replaced by another"""
+        circuit = breaker(half_open_calls=1)
+        trip(circuit)
+        clock.now += 30
+        assert circuit.allow() == HALF_OPEN
+        assert circuit.allow() is None
+        circuit.release_probe()
+        assert circuit.allow() == HALF_OPEN
+
+    def test_trip_opens_a_closed_breaker(self, clock):
+        """Test external signals (failing health checks) open the breaker"""
+        circuit = breaker()
+        circuit.trip("health check failed")
+        assert circuit.state == OPEN
+        assert circuit.last_trip_reason == "health check failed"
+
+
+@pytest.mark.unit
+class TestAdaptiveConcurrencyLimiter:
+    """Test AIMD limit adaptation"""
+
+    def limiter(self, **kwargs) -> AdaptiveConcurrencyLimiter:
+        settings = dict(initial=4, min_limit=2, max_limit=8, latency_threshold=1.0, backoff=0.5)
+        settings.update(kwargs)
+        return AdaptiveConcurrencyLimiter("booking", **settings)
+
+    def test_rejects_beyond_limit(self, clock):
+        """Test requests over the limit are shed instead of queued"""
+        limiter = self.limiter()
+        assert all(limiter.try_acquire() for _ in range(4))
+        assert not limiter.try_acquire()
+        assert limiter.rejected == 1
+
+    def test_fast_successes_increase_additively(self, clock):
+        """Test a fully used limit grows by about one per limit's worth of calls"""
+        limiter = self.limiter()
+        for _ in range(4):
+            for _ in range(4):
+                limiter.try_acquire()
+            for _ in range(4):
+                limiter.release(False, 0.1)
+        assert 4.5 < limiter.limit < 6
+
+    def test_idle_limit_does_not_grow(self, clock):
+        """Test successes while far below the limit leave it alone"""
+        limiter = self.limiter()
+        for _ in range(10):
+            limiter.try_acquire()
+            limiter.release(False, 0.1)
+        assert limiter.limit == 4.0
+
+    @pytest.mark.parametrize("failed,latency", [(True, 0.1), (False, 2.0)])
+    def test_errors_and_slow_calls_decrease_multiplicatively(self, clock, failed, latency):
+        """Test the limit is cut by the backoff ratio"""
+        limiter = self.limiter(initial=8)
+        limiter.try_acquire()
+        limiter.release(failed, latency)
+        assert limiter.limit == 4.0
+
+    def test_one_decrease_per_latency_threshold(self, clock):
+        """Test a burst of slow completions only counts once"""
+        limiter = self.limiter(initial=8)
+        for _ in range(3):
+            limiter.try_acquire()
+        for _ in range(3):
+            limiter.release(False, 2.0)
+        assert limiter.limit == 4.0
+        clock.now += 1.0
+        limiter.try_acquire()
+        limiter.release(False, 2.0)
+        assert limiter.limit == 2.0
+
+    def test_limit_stays_within_bounds(self, clock):
+        """Test the limit never drops below min_limit or rises above max_limit"""
+        limiter = self.limiter(initial=100)
+        assert limiter.limit == 8.0
+        for _ in range(5):
+            clock.now += 1.0
+            limiter.try_acquire()
+            limiter.release(True, 0.1)
+        assert limiter.limit == 2.0
+
+    def test_release_without_sample_only_frees_the_slot(self, clock):
+        """Test a cancelled call does not move the limit"""
+        limiter = self.limiter()
+        limiter.try_acquire()
+        limiter.release(None, 10.0)
+        assert limiter.in_flight == 0
+        assert limiter.limit == 4.0
+
+
+@pytest.mark.unit
+class TestUpstreamGuard:
+    """Test breaker and limiter combined"""
+
+    def test_open_breaker_sheds_with_retry_after(self, clock):
+        """Test an open breaker raises UpstreamUnavailable with its Retry-After"""
+        guard = UpstreamGuard("booking-service")
+        guard.breaker.trip("health check failed")
+        with pytest.raises(UpstreamUnavailable) as error:
+            guard.acquire()
+        assert error.value.reason == "circuit_open"
+        assert error.value.retry_after == guard.breaker.retry_after()
+
+    def test_permit_releases_its_slot_once(self, clock):
+        """Test releasing a permit twice frees one slot only"""
+        guard = UpstreamGuard("booking-service")
+        first = guard.acquire()
+        second = guard.acquire()
+        first.release(False)
+        first.release(False)
+        assert guard.limiter.in_flight == 1
+        second.release(None)
+        assert guard.limiter.in_flight == 0
@@ -0,0 +1,110 @@
+"""
+Unit Tests for the API Gateway Response Cache
+Tests that cached responses are scoped to the tenant in the verified token, so
+one tenant can never be served another tenant's cached body
+"""
+
+import asyncio
+import httpx
+import pytest
+from starlette.requests import Request
+
+import main
+from response_cache import ResponseCache
+
+ACME = {"sub": "u-1", "role": "tenant_user", "tenant_slug": "acme", "tenant_id": "t-acme"}
+GLOBEX = {"sub": "u-2", "role": "tenant_user", "tenant_slug": "globex", "tenant_id": "t-globex"}
+SUPER_ADMIN = {"sub": "u-0", "role": "super_admin"}
+ACME_COUNTRIES = "/api/v1/bookings/tenants/acme/countries"
+
+
+class FakeUpstream:
+    """Stands in for send_upstream_with_retries, answering with the requested path"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, service_url, method, url, params, headers, body=None, stream=True):
+        self.calls.append(url)
+        return httpx.Response(200, json={"url": url}, headers={"content-type": "application/json"})
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    fake = FakeUpstream()
+    monkeypatch.setattr(main, "send_upstream_with_retries", fake)
+    monkeypatch.setattr(main, "response_cache", ResponseCache(routes=[("*/countries", 300)], enabled=True))
+    return fake
+
+
+def get(path, claims, headers=None):
+    """Send a GET through proxy_cached_request"""
+    request = Request({
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": b"",
+        "headers": [(key.encode(), value.encode()) for key, value in (headers or {}).items()],
+    })
+    url = f"http://booking:8004{path}"
+    return asyncio.run(main.proxy_cached_request(request, "http://booking:8004", url, headers or {}, claims, 300))
+
+
+@pytest.mark.unit
+class TestSharedResponseTenant:
+    """Test which tenant a response may be shared within"""
+
+    def test_own_tenant_by_slug_or_id(self):
+        """Test the token's tenant is used whether the path names its slug or id"""
+        assert main.shared_response_tenant(ACME_COUNTRIES, ACME, {}) == "acme"
+        assert main.shared_response_tenant("/api/v1/crm/tenants/t-acme/stats", ACME, {}) == "acme"
+
+    def test_other_tenant_is_not_shared(self):
+        """Test a path naming another tenant bypasses shared responses"""
+        assert main.shared_response_tenant(ACME_COUNTRIES, GLOBEX, {}) is None
+
+    def test_other_tenant_header_is_not_shared(self):
+        """Test X-Tenant-ID naming another tenant bypasses shared responses"""
+        assert main.shared_response_tenant("/api/v1/bookings/countries", GLOBEX, {"X-Tenant-ID": "acme"}) is None
+
+    def test_path_without_tenant_uses_token(self):
+        """Test requests without a tenant in the path share within the token's tenant"""
+        assert main.shared_response_tenant("/api/v1/bookings/countries", GLOBEX, {}) == "globex"
+
+    def test_user_without_tenant_is_not_shared(self):
+        """Test a non-admin token without a tenant never shares"""
+        assert main.shared_response_tenant(ACME_COUNTRIES, {"role": "tenant_user"}, {}) is None
+
+    def test_super_admin_shares_by_requested_tenant(self):
+        """Test super admins may read any tenant"""
+        assert main.shared_response_tenant(ACME_COUNTRIES, SUPER_ADMIN, {}) == "acme"
+
+
+@pytest.mark.unit
+class TestTenantScopedCache:
+    """Test proxy_cached_request across tenants"""
+
+    def test_same_tenant_hits(self, upstream):
+        """Test a second request from the same tenant is served from the cache"""
+        assert get(ACME_COUNTRIES, ACME).headers["x-cache"] == "MISS"
+        assert get(ACME_COUNTRIES, ACME).headers["x-cache"] == "HIT"
+        assert len(upstream.calls) == 1
+
+    def test_other_tenant_misses_cached_url(self, upstream):
+        """Test another tenant asking for the first tenant's cached URL goes upstream"""
+        get(ACME_COUNTRIES, ACME)
+        response = get(ACME_COUNTRIES, GLOBEX)
+        assert "x-cache" not in response.headers
+        assert len(upstream.calls) == 2
+        assert main.response_cache.stats()["hits"] == 0
+
+    def test_other_tenant_response_is_not_stored(self, upstream):
+        """Test a cross-tenant response does not fill the cache for either tenant"""
+        get(ACME_COUNTRIES, GLOBEX)
+        assert get(ACME_COUNTRIES, ACME).headers["x-cache"] == "MISS"
+
+    def test_super_admin_has_its_own_entry(self, upstream):
+        """Test super admins are cached by role, apart from tenant users"""
+        get(ACME_COUNTRIES, ACME)
+        assert get(ACME_COUNTRIES, SUPER_ADMIN).headers["x-cache"] == "MISS"
+        assert get(ACME_COUNTRIES, SUPER_ADMIN).headers["x-cache"] == "HIT"
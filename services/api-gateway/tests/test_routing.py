@@ -0,0 +1,153 @@
+"""
+Unit Tests for API Gateway Routing
+Tests the longest-prefix route trie and replica selection of the gateway's
+routing module
+"""
+
+import pytest
+
+from routing import (
+    LEAST_OUTSTANDING, ROUND_ROBIN, RouteTable, UpstreamPool, parse_routes, split_urls
+)
+
+
+def route_table(**pool_replicas) -> RouteTable:
+    pools = {
+        name.replace("_", "-"): UpstreamPool(name.replace("_", "-"), replicas)
+        for name, replicas in pool_replicas.items()
+    }
+    routes = [
+        ("/api/v1/crm", "crm-service"),
+        ("/api/v1/crm/reports", "reporting-service"),
+        ("/api/v1/bookings/", "booking-service"),
+    ]
+    return RouteTable(pools, routes, {"/api/v1/bookings/": {"retries": 3}})
+
+
+@pytest.fixture
+def table() -> RouteTable:
+    return route_table(
+        crm_service=["http://crm:8006"],
+        reporting_service=["http://reports:8009"],
+        booking_service=["http://booking-1:8004", "http://booking-2:8004/"],
+    )
+
+
+@pytest.mark.unit
+class TestRouteTrie:
+    """Test RouteTable.resolve and match"""
+
+    def test_exact_prefix(self, table):
+        """Test a path equal to a route prefix"""
+        prefix, pool = table.resolve("/api/v1/crm")
+        assert prefix == "/api/v1/crm"
+        assert pool.name == "crm-service"
+
+    def test_deeper_path_matches_prefix(self, table):
+        """Test sub-paths go to the route's pool"""
+        prefix, pool = table.resolve("/api/v1/crm/tenants/t1/leads")
+        assert (prefix, pool.name) == ("/api/v1/crm", "crm-service")
+
+    def test_longest_prefix_wins(self, table):
+        """Test a nested route takes precedence over its parent"""
+        prefix, pool = table.resolve("/api/v1/crm/reports/monthly")
+        assert (prefix, pool.name) == ("/api/v1/crm/reports", "reporting-service")
+
+    def test_matches_whole_segments_only(self, table):
+        """Test /api/v1/crm does not match /api/v1/crmx"""
+        assert table.resolve("/api/v1/crmx/leads") is None
+
+    def test_unknown_path(self, table):
+        """Test paths under no route resolve to None"""
+        assert table.resolve("/api/v2/crm") is None
+        assert table.match("/") is None
+
+    def test_slashes_are_normalized(self, table):
+        """Test trailing and repeated slashes do not change the route"""
+        prefix, pool = table.resolve("//api/v1//bookings/")
+        assert (prefix, pool.name) == ("/api/v1/bookings", "booking-service")
+
+    def test_route_options_use_normalized_prefix(self, table):
+        """Test per-route settings are found under the prefix resolve() returns"""
+        prefix, _ = table.resolve("/api/v1/bookings/123")
+        assert table.route_options[prefix] == {"retries": 3}
+
+    def test_unknown_pool_is_rejected(self, table):
+        """Test a route to a pool that does not exist fails at load time"""
+        with pytest.raises(ValueError):
+            table.add_route("/api/v1/hr", "hr-service")
+
+    def test_pool_for_replica_url(self, table):
+        """Test replica URLs map back to their pool, trailing slash or not"""
+        assert table.pool_for_url("http://booking-2:8004").name == "booking-service"
+        assert table.pool_for_url("http://booking-1:8004/").name == "booking-service"
+        assert table.pool_for_url("http://elsewhere:80") is None
+
+    def test_replica_names(self, table):
+        """Test single replicas keep the pool name and others are numbered"""
+        assert table.replica_urls() == {
+            "crm-service": "http://crm:8006",
+            "reporting-service": "http://reports:8009",
+            "booking-service#1": "http://booking-1:8004",
+            "booking-service#2": "http://booking-2:8004",
+        }
+
+
+@pytest.mark.unit
+class TestUpstreamPool:
+    """Test replica selection"""
+
+    def test_round_robin_alternates(self):
+        """Test round robin cycles through replicas"""
+        pool = UpstreamPool("booking-service", ["http://b1", "http://b2"], ROUND_ROBIN)
+        assert [pool.choose() for _ in range(4)] == ["http://b1", "http://b2", "http://b1", "http://b2"]
+
+    def test_least_outstanding_prefers_idle_replica(self):
+        """Test the replica with fewer in-flight requests is chosen"""
+        pool = UpstreamPool("booking-service", ["http://b1", "http://b2"], LEAST_OUTSTANDING)
+        table = RouteTable({"booking-service": pool}, [])
+        table.begin("http://b1")
+        assert {pool.choose() for _ in range(4)} == {"http://b2"}
+        table.end("http://b1")
+        assert pool.outstanding["http://b1"] == 0
+
+    def test_unavailable_replicas_are_skipped(self):
+        """Test replicas failing their health check are avoided"""
+        pool = UpstreamPool("booking-service", ["http://b1", "http://b2"])
+        chosen = {pool.choose(is_available=lambda name: name != "booking-service#1") for _ in range(4)}
+        assert chosen == {"http://b2"}
+
+    def test_all_unavailable_falls_back_to_all(self):
+        """Test a pool with no healthy replica still returns one"""
+        pool = UpstreamPool("booking-service", ["http://b1", "http://b2"])
+        assert pool.choose(is_available=lambda name: False) in ("http://b1", "http://b2")
+
+    def test_exclude_moves_away_from_replica(self):
+        """Test retries and hedges avoid the replica they are leaving"""
+        pool = UpstreamPool("booking-service", ["http://b1", "http://b2"])
+        assert {pool.choose(exclude=["http://b1"]) for _ in range(4)} == {"http://b2"}
+
+    def test_unknown_strategy_falls_back_to_round_robin(self):
+        """Test a typo in the strategy does not break the pool"""
+        assert UpstreamPool("crm-service", ["http://crm"], "fastest").strategy == ROUND_ROBIN
+
+    def test_pool_needs_replicas(self):
+        """Test an empty replica list is a configuration error"""
+        with pytest.raises(ValueError):
+            UpstreamPool("crm-service", [])
+
+
+@pytest.mark.unit
+class TestRouteParsing:
+    """Test GATEWAY_ROUTES and replica list parsing"""
+
+    def test_parse_routes(self):
+        """Test invalid and empty entries are skipped"""
+        assert parse_routes("/api/v1/crm=crm-service, ,/broken,/api/v1/auth = auth-service") == [
+            ("/api/v1/crm", "crm-service"),
+            ("/api/v1/auth", "auth-service"),
+        ]
+
+    def test_split_urls(self):
+        """Test replica lists are trimmed and lose trailing slashes"""
+        assert split_urls(" http://b1:8004/ ,http://b2:8004,") == ["http://b1:8004", "http://b2:8004"]
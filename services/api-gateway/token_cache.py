@@ -0,0 +1,120 @@
+"""
+Verified JWT cache for the API Gateway
+Avoids a full jwt.decode on every request and signs the verified claims so
+downstream services can trust them without decoding the token again
+"""
+
+import os
+import json
+import time
+import hmac
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# Cache configuration
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", 10000))
+# Upper bound on how long a verified token stays cached, even if its exp is later
+TOKEN_CACHE_MAX_TTL = int(os.getenv("TOKEN_CACHE_MAX_TTL", 300))
+
+# Pre-verified claims forwarded to services on internal hops
+# (an empty INTERNAL_CLAIMS_SECRET falls back to the JWT key as well)
+INTERNAL_CLAIMS_SECRET = (
+    os.getenv("INTERNAL_CLAIMS_SECRET")
+    or os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
+)
+if not INTERNAL_CLAIMS_SECRET:
+    # An empty HMAC key would let anyone forge X-Verified-Claims
+    raise RuntimeError("INTERNAL_CLAIMS_SECRET or JWT_SECRET_KEY must be set")
+VERIFIED_CLAIMS_HEADER = "X-Verified-Claims"
+VERIFIED_CLAIMS_SIGNATURE_HEADER = "X-Verified-Claims-Signature"
+
+
+def token_digest(token: str) -> str:
+    """Digest used as cache key so raw tokens are never kept in memory"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of verified token claims
+
+    Entries expire at the token's exp claim (capped by max_ttl) and the least
+    recently used entry is evicted once max_size is reached.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_MAX_SIZE, max_ttl: int = TOKEN_CACHE_MAX_TTL):
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return cached claims for a token, or None if absent or expired"""
+        key = token_digest(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def set(self, token: str, claims: Dict[str, Any]):
+        """Cache verified claims until the token expires"""
+        now = time.time()
+        expires_at = now + self.max_ttl
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= now or self.max_size <= 0:
+            return
+
+        key = token_digest(token)
+        with self._lock:
+            self._entries[key] = (expires_at, dict(claims))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+def sign_claims(token: str, claims: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Build the signed pre-verified claims headers for a downstream request
+
+    The payload is bound to the token digest, so the headers are only valid
+    alongside the exact bearer token they were issued for.
+    """
+    payload = json.dumps({"token": token_digest(token), "claims": claims}, separators=(",", ":"), default=str)
+    encoded = base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+    signature = hmac.new(INTERNAL_CLAIMS_SECRET.encode("utf-8"), encoded.encode("ascii"), hashlib.sha256).hexdigest()
+    return {
+        VERIFIED_CLAIMS_HEADER: encoded,
+        VERIFIED_CLAIMS_SIGNATURE_HEADER: signature,
+    }
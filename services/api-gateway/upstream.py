@@ -0,0 +1,147 @@
+"""
+Upstream HTTP client pools for the API Gateway
+Keeps one long-lived httpx.AsyncClient per upstream service so proxied
+requests reuse keep-alive connections instead of opening a new socket each time
+"""
+
+import os
+import logging
+from typing import Any, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Pool configuration (shared defaults, overridable per upstream)
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", 100))
+UPSTREAM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", 20))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", 30.0))
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", 5.0))
+UPSTREAM_TIMEOUT = float(os.getenv("UPSTREAM_TIMEOUT", 30.0))
+UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "false").lower() == "true"
+
+
+def _env_key(service_name: str) -> str:
+    """
+    Convert a service name into its environment variable prefix
+
+    Example: "booking-operations-service" -> "BOOKING_OPERATIONS_SERVICE"
+    Replicas ("booking-operations-service#2") share their service's prefix.
+    """
+    return service_name.split("#", 1)[0].upper().replace("-", "_")
+
+
+def service_setting(service_name: str, name: str, default: Any, cast=float) -> Any:
+    """
+    Read a per-upstream override such as FINANCIAL_SERVICE_TIMEOUT, falling back to a default
+    """
+    value = os.getenv(f"{_env_key(service_name)}_{name}")
+    return cast(value) if value is not None else default
+
+
+def _http2_available() -> bool:
+    """Check whether the optional h2 package needed for HTTP/2 is installed"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class UpstreamClients:
+    """
+    Registry of pooled HTTP clients, one per upstream service
+
+    Per-upstream settings can be overridden with environment variables named
+    after the service, e.g. FINANCIAL_SERVICE_TIMEOUT=60 or
+    BOOKING_OPERATIONS_SERVICE_MAX_CONNECTIONS=200.
+    """
+
+    def __init__(self, services: Dict[str, str]):
+        self.services = dict(services)
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._url_index = {url.rstrip("/"): name for name, url in self.services.items()}
+        self._http2 = UPSTREAM_HTTP2 and _http2_available()
+        if UPSTREAM_HTTP2 and not self._http2:
+            logger.warning("UPSTREAM_HTTP2 is enabled but the h2 package is not installed; using HTTP/1.1")
+
+    def _create_client(self, service_name: str) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=service_setting(service_name, "MAX_CONNECTIONS", UPSTREAM_MAX_CONNECTIONS, int),
+            max_keepalive_connections=service_setting(
+                service_name, "MAX_KEEPALIVE_CONNECTIONS", UPSTREAM_MAX_KEEPALIVE_CONNECTIONS, int
+            ),
+            keepalive_expiry=service_setting(service_name, "KEEPALIVE_EXPIRY", UPSTREAM_KEEPALIVE_EXPIRY),
+        )
+        timeout = httpx.Timeout(
+            service_setting(service_name, "TIMEOUT", UPSTREAM_TIMEOUT),
+            connect=service_setting(service_name, "CONNECT_TIMEOUT", UPSTREAM_CONNECT_TIMEOUT),
+        )
+        return httpx.AsyncClient(limits=limits, timeout=timeout, http2=self._http2)
+
+    async def start(self):
+        """Create the client pools (called from the application lifespan)"""
+        for service_name in self.services:
+            if service_name not in self._clients:
+                self._clients[service_name] = self._create_client(service_name)
+        logger.info(f"Upstream client pools ready for {len(self._clients)} services")
+
+    async def close(self):
+        """Close all client pools and their keep-alive connections"""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        logger.info("Upstream client pools closed")
+
+    def get(self, service_name: str) -> httpx.AsyncClient:
+        """
+        Get the pooled client for a service
+
+        Clients are created lazily if the lifespan hook has not run yet
+        (e.g. when the app is mounted without startup events).
+        """
+        client = self._clients.get(service_name)
+        if client is None or client.is_closed:
+            client = self._create_client(service_name)
+            self._clients[service_name] = client
+        return client
+
+    def name_for_url(self, service_url: str) -> str:
+        """Resolve the upstream name registered for a base URL"""
+        base = service_url.rstrip("/")
+        if base not in self._url_index:
+            self.services[base] = base
+            self._url_index[base] = base
+        return self._url_index[base]
+
+    def get_for_url(self, service_url: str) -> httpx.AsyncClient:
+        """Get the pooled client for a service base URL"""
+        return self.get(self.name_for_url(service_url))
+
+    def _pool_stats(self, client: httpx.AsyncClient) -> Dict[str, Any]:
+        # httpcore does not expose occupancy publicly, so read the pool state defensively
+        pool = getattr(getattr(client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for conn in connections if conn.is_idle())
+        queued = sum(1 for req in (getattr(pool, "_requests", []) or []) if req.is_queued())
+        return {
+            "connections": len(connections),
+            "active": len(connections) - idle,
+            "idle": idle,
+            "queued_requests": queued,
+            "max_connections": getattr(pool, "_max_connections", None),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Report pool occupancy for every upstream"""
+        stats: Dict[str, Any] = {}
+        for service_name in self.services:
+            client: Optional[httpx.AsyncClient] = self._clients.get(service_name)
+            if client is None or client.is_closed:
+                stats[service_name] = {"status": "not_started"}
+                continue
+            try:
+                stats[service_name] = {"status": "open", "http2": self._http2, **self._pool_stats(client)}
+            except Exception as e:
+                stats[service_name] = {"status": "open", "error": str(e)}
+        return stats
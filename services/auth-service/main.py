@@ -17,6 +17,7 @@ import uuid
 from contextlib import asynccontextmanager
 
 from database import get_db, engine, Base
+from shared_metrics import setup_metrics
 from models import User, Tenant, AuditLog
 from schemas import (
     UserCreate, UserResponse, UserLogin, TokenResponse,
@@ -133,6 +134,9 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Request metrics (/metrics) and Server-Timing headers
+setup_metrics(app, "auth-service")
+
 # Models
 class UserCreate(BaseModel):
     email: EmailStr
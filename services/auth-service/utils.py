@@ -240,17 +240,13 @@ def cache_delete(key: str) -> bool:
 def rate_limit_check(key: str, limit: int = 100, window: int = 3600) -> bool:
     """Check rate limit for a key"""
     try:
-        current = redis_client.get(key)
-        if current is None:
-            redis_client.setex(key, window, 1)
-            return True
-
-        current_count = int(current)
-        if current_count >= limit:
-            return False
-
-        redis_client.incr(key)
-        return True
+        # Create the window and count the request in one MULTI/EXEC transaction,
+        # so concurrent callers cannot both read a stale count
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.set(key, 0, ex=window, nx=True)
+        pipe.incr(key)
+        _, current_count = pipe.execute()
+        return int(current_count) <= limit
 
     except Exception as e:
         logger.error(f"Rate limit check error: {str(e)}")
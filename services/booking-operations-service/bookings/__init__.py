@@ -12,6 +12,8 @@ from .schemas import (
     BookingSummary,
     BookingSearch,
     BookingSearchResponse,
+    BookingSearchHit,
+    BookingSearchHitsResponse,
     BookingLineResponse,
     BookingLineCreate,
     BookingLineUpdate,
@@ -39,6 +41,8 @@ __all__ = [
     'BookingSummary',
     'BookingSearch',
     'BookingSearchResponse',
+    'BookingSearchHit',
+    'BookingSearchHitsResponse',
 
     # Booking Line Schemas
     'BookingLineResponse',
@@ -4,19 +4,25 @@ Contains FastAPI endpoints for booking management and operations
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Body
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import select, and_, or_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
-from database import get_tenant_db
+from database import get_async_tenant_db, get_async_tenant_read_db
 from shared_auth import get_current_user, check_tenant_slug_access
+from shared_pagination import PaginationError, CountMode, keyset_paginate, keyset_page, count_rows_async
+from shared_search import SEARCH_MIN_LENGTH, SEARCH_MAX_LENGTH
 from .models import Booking, BookingLine, BookingPassenger
+from passengers.models import Passenger
+from .search import booking_search_hits, search_booking_ids
 from .schemas import (
     BookingCreate,
     BookingUpdate,
     BookingResponse,
     BookingListResponse,
+    BookingSearchHitsResponse,
     BookingLineCreate,
     BookingLineUpdate,
     BookingLineResponse,
@@ -28,6 +34,24 @@ from common.enums import BookingOverallStatus, BookingLineStatus
 
 router = APIRouter()
 
+# Keyset order of the booking list; matches idx_booking_created_id
+BOOKING_LIST_ORDER = (Booking.created_at, Booking.id)
+
+def booking_details():
+    """Eager-load the relationships BookingResponse serializes; async sessions cannot lazy load"""
+    return selectinload(Booking.booking_lines), selectinload(Booking.booking_passengers)
+
+
+async def load_booking(db: AsyncSession, booking_id: int) -> Optional[Booking]:
+    """Fetch a booking with its lines and passengers, refreshing any copy already in the session"""
+    result = await db.execute(
+        select(Booking)
+        .options(*booking_details())
+        .where(Booking.id == booking_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
 
 @router.get("/tenants/{tenant_slug}/bookings", response_model=BookingListResponse)
 async def list_bookings(
@@ -35,41 +59,49 @@ async def list_bookings(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(50, ge=1, le=100, description="Items per page"),
     overall_status: Optional[BookingOverallStatus] = Query(None, description="Filter by overall status"),
-    booking_date_from: Optional[datetime] = Query(None, description="Filter by booking date from"),
-    booking_date_to: Optional[datetime] = Query(None, description="Filter by booking date to"),
-    service_date_from: Optional[datetime] = Query(None, description="Filter by service date from"),
-    service_date_to: Optional[datetime] = Query(None, description="Filter by service date to"),
-    customer_email: Optional[str] = Query(None, description="Filter by customer email"),
-    search: Optional[str] = Query(None, description="Search in booking reference, customer name or email"),
+    booking_date_from: Optional[datetime] = Query(None, description="Filter by booking (creation) date from"),
+    booking_date_to: Optional[datetime] = Query(None, description="Filter by booking (creation) date to"),
+    service_date_from: Optional[datetime] = Query(None, description="Filter by travel start date from"),
+    service_date_to: Optional[datetime] = Query(None, description="Filter by travel end date to"),
+    customer_email: Optional[str] = Query(None, description="Filter by the email of a passenger on the booking"),
+    search: Optional[str] = Query(None, description="Search by booking number or reference, passenger name or email"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces page"),
+    include_total: Optional[bool] = Query(None, description="Count all matching bookings (default: only without a cursor)"),
+    count_mode: CountMode = Query("exact", description="How total is computed: exact, capped or estimate"),
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """
     List bookings with filtering and pagination
 
+    Pages are keyset-paginated on (created_at, id): pass the returned
+    next_cursor to get the following page at constant cost. page still works
+    as an offset for compatibility, but deep offsets scan every skipped row.
+
     Args:
         tenant_slug: Tenant identifier
         page: Page number (default: 1)
         page_size: Items per page (default: 50, max: 100)
         overall_status: Filter by overall status
-        booking_date_from: Filter by booking date from
-        booking_date_to: Filter by booking date to
-        service_date_from: Filter by service date from
-        service_date_to: Filter by service date to
-        customer_email: Filter by customer email
-        search: Search in booking reference, customer name or email
+        booking_date_from: Filter by booking (creation) date from
+        booking_date_to: Filter by booking (creation) date to
+        service_date_from: Filter by travel start date from
+        service_date_to: Filter by travel end date to
+        customer_email: Filter by the email of a passenger on the booking
+        search: Search by booking number or reference, passenger name or email
+        cursor: Cursor of the page to fetch (next_cursor of the previous page)
+        include_total: Whether to count all matches (default: only on the first request)
+        count_mode: exact (count(*)), capped (count up to COUNT_CAP; total is a lower bound)
+            or estimate (planner row estimate)
         current_user: Current authenticated user
         db: Database session
 
     Returns:
-        List of bookings with pagination info
+        List of bookings with pagination info and next_cursor
     """
     # Check tenant access
     check_tenant_slug_access(current_user, tenant_slug)
 
-    # Build query
-    query = db.query(Booking)
-
     # Apply filters
     filters = []
 
@@ -77,50 +109,110 @@ async def list_bookings(
         filters.append(Booking.overall_status == overall_status)
 
     if booking_date_from:
-        filters.append(Booking.booking_date >= booking_date_from)
+        filters.append(Booking.created_at >= booking_date_from)
 
     if booking_date_to:
-        filters.append(Booking.booking_date <= booking_date_to)
+        filters.append(Booking.created_at <= booking_date_to)
 
     if service_date_from:
-        filters.append(Booking.service_date >= service_date_from)
+        filters.append(Booking.travel_start_date >= service_date_from.date())
 
     if service_date_to:
-        filters.append(Booking.service_date <= service_date_to)
+        filters.append(Booking.travel_end_date <= service_date_to.date())
 
     if customer_email:
-        filters.append(Booking.customer_email == customer_email)
+        # Bookings carry no customer email; match their passengers'
+        passenger_bookings = select(BookingPassenger.booking_id).join(
+            Passenger, Passenger.id == BookingPassenger.passenger_id
+        ).where(
+            func.lower(Passenger.email) == customer_email.strip().lower(),
+            BookingPassenger.deleted_at.is_(None),
+            Passenger.deleted_at.is_(None)
+        )
+        filters.append(Booking.id.in_(passenger_bookings))
 
     if search:
-        search_pattern = f"%{search}%"
-        filters.append(
-            or_(
-                Booking.booking_reference.ilike(search_pattern),
-                Booking.external_reference.ilike(search_pattern),
-                Booking.customer_name.ilike(search_pattern),
-                Booking.customer_email.ilike(search_pattern)
-            )
-        )
+        # Same indexed matching as the search endpoint, without its ranking
+        hits = booking_search_hits(search)
+        filters.append(Booking.id.in_(select(hits.c.booking_id)))
 
+    query = select(Booking)
     if filters:
-        query = query.filter(and_(*filters))
+        query = query.where(and_(*filters))
 
-    # Get total count
-    total = query.count()
+    # The total is optional: counting rescans the whole filtered set on every page
+    total = total_mode = None
+    count_total = include_total if include_total is not None else cursor is None
+    if count_total:
+        total, total_mode = await count_rows_async(db, query, count_mode)
 
     # Apply pagination
-    offset = (page - 1) * page_size
-    bookings = query.order_by(Booking.created_at.desc()).offset(offset).limit(page_size).all()
-
-    # Calculate total pages
-    total_pages = (total + page_size - 1) // page_size
+    try:
+        page_query = keyset_paginate(query, BOOKING_LIST_ORDER, "created_at", True, cursor, page_size)
+    except PaginationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not cursor:
+        page_query = page_query.offset((page - 1) * page_size)
+    result = await db.execute(page_query.options(*booking_details()))
+    bookings, next_cursor = keyset_page(result.scalars().all(), BOOKING_LIST_ORDER, "created_at", True, page_size)
 
     return {
         "items": bookings,
         "total": total,
-        "page": page,
+        "page": None if cursor else page,
         "page_size": page_size,
-        "total_pages": total_pages
+        "total_pages": (total + page_size - 1) // page_size if total is not None else None,
+        "count_mode": total_mode,
+        "next_cursor": next_cursor
+    }
+
+
+@router.get("/tenants/{tenant_slug}/bookings/search", response_model=BookingSearchHitsResponse)
+async def search_bookings(
+    tenant_slug: str,
+    q: str = Query(..., min_length=SEARCH_MIN_LENGTH, max_length=SEARCH_MAX_LENGTH, description="Search term"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results"),
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_tenant_read_db)
+):
+    """
+    Ranked booking search
+
+    Booking numbers, external references and passenger emails match by
+    prefix; passenger names match accent-insensitively and tolerate typos.
+    Results are ordered by relevance, exact reference matches first.
+
+    Args:
+        tenant_slug: Tenant identifier
+        q: Search term
+        limit: Maximum number of results (default: 20, max: 100)
+        current_user: Current authenticated user
+        db: Database session (read replica when available)
+
+    Returns:
+        Matching bookings with their score and the field that matched
+    """
+    # Check tenant access
+    check_tenant_slug_access(current_user, tenant_slug)
+
+    hits = await search_booking_ids(db, q, limit)
+    if not hits:
+        return {"query": q, "items": []}
+
+    result = await db.execute(
+        select(Booking)
+        .options(*booking_details())
+        .where(Booking.id.in_([booking_id for booking_id, _, _ in hits]), Booking.deleted_at.is_(None))
+    )
+    bookings = {booking.id: booking for booking in result.scalars().all()}
+
+    return {
+        "query": q,
+        "items": [
+            {"booking": bookings[booking_id], "score": round(score, 4), "matched": matched}
+            for booking_id, score, matched in hits
+            if booking_id in bookings
+        ]
     }
 
 
@@ -129,7 +221,7 @@ async def get_booking(
     tenant_slug: str,
     booking_id: int,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """
     Get a specific booking by ID
@@ -147,7 +239,7 @@ async def get_booking(
     check_tenant_slug_access(current_user, tenant_slug)
 
     # Get booking with related data
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    booking = await load_booking(db, booking_id)
 
     if not booking:
         raise HTTPException(
@@ -163,7 +255,7 @@ async def create_booking(
     tenant_slug: str,
     booking_data: BookingCreate = Body(...),
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """
     Create a new booking
@@ -182,9 +274,9 @@ async def create_booking(
 
     # Check if booking with same reference exists
     if booking_data.booking_reference:
-        existing = db.query(Booking).filter(
-            Booking.booking_reference == booking_data.booking_reference
-        ).first()
+        existing = await db.scalar(
+            select(Booking.id).where(Booking.booking_reference == booking_data.booking_reference)
+        )
 
         if existing:
             raise HTTPException(
@@ -203,16 +295,15 @@ async def create_booking(
     db.add(new_booking)
 
     try:
-        db.commit()
-        db.refresh(new_booking)
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating booking: {str(e)}"
         )
 
-    return new_booking
+    return await load_booking(db, new_booking.id)
 
 
 @router.put("/tenants/{tenant_slug}/bookings/{booking_id}", response_model=BookingResponse)
@@ -221,7 +312,7 @@ async def update_booking(
     booking_id: int,
     booking_update: BookingUpdate = Body(...),
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """
     Update an existing booking
@@ -240,7 +331,7 @@ async def update_booking(
     check_tenant_slug_access(current_user, tenant_slug)
 
     # Get booking
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    booking = await load_booking(db, booking_id)
 
     if not booking:
         raise HTTPException(
@@ -250,10 +341,12 @@ async def update_booking(
 
     # Check if updating reference to an existing one
     if booking_update.booking_reference and booking_update.booking_reference != booking.booking_reference:
-        existing = db.query(Booking).filter(
-            Booking.booking_reference == booking_update.booking_reference,
-            Booking.id != booking_id
-        ).first()
+        existing = await db.scalar(
+            select(Booking.id).where(
+                Booking.booking_reference == booking_update.booking_reference,
+                Booking.id != booking_id
+            )
+        )
 
         if existing:
             raise HTTPException(
@@ -270,16 +363,15 @@ async def update_booking(
     booking.updated_at = datetime.utcnow()
 
     try:
-        db.commit()
-        db.refresh(booking)
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error updating booking: {str(e)}"
         )
 
-    return booking
+    return await load_booking(db, booking_id)
 
 
 @router.delete("/tenants/{tenant_slug}/bookings/{booking_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -287,7 +379,7 @@ async def delete_booking(
     tenant_slug: str,
     booking_id: int,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """
     Delete a booking
@@ -305,7 +397,7 @@ async def delete_booking(
     check_tenant_slug_access(current_user, tenant_slug)
 
     # Get booking
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    booking = await load_booking(db, booking_id)
 
     if not booking:
         raise HTTPException(
@@ -318,9 +410,9 @@ async def delete_booking(
     booking.updated_at = datetime.utcnow()
 
     try:
-        db.commit()
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error deleting booking: {str(e)}"
@@ -335,7 +427,7 @@ async def update_booking_status(
     booking_id: int,
     status_update: Dict[str, Any] = Body(...),
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """
     Update booking status
@@ -354,7 +446,7 @@ async def update_booking_status(
     check_tenant_slug_access(current_user, tenant_slug)
 
     # Get booking
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    booking = await load_booking(db, booking_id)
 
     if not booking:
         raise HTTPException(
@@ -377,10 +469,10 @@ async def update_booking_status(
     booking.updated_at = datetime.utcnow()
 
     try:
-        db.commit()
-        db.refresh(booking)
+        await db.commit()
+        await db.refresh(booking)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error updating booking status: {str(e)}"
@@ -400,7 +492,7 @@ async def cancel_booking(
     booking_id: int,
     cancellation_data: Dict[str, Any] = Body(...),
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """
     Cancel a booking
@@ -419,7 +511,7 @@ async def cancel_booking(
     check_tenant_slug_access(current_user, tenant_slug)
 
     # Get booking
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    booking = await load_booking(db, booking_id)
 
     if not booking:
         raise HTTPException(
@@ -447,10 +539,10 @@ async def cancel_booking(
         line.cancelled_at = datetime.utcnow()
 
     try:
-        db.commit()
-        db.refresh(booking)
+        await db.commit()
+        await db.refresh(booking)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error cancelling booking: {str(e)}"
@@ -471,7 +563,7 @@ async def confirm_booking(
     booking_id: int,
     confirmation_data: Dict[str, Any] = Body(None),
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """
     Confirm a booking
@@ -490,7 +582,7 @@ async def confirm_booking(
     check_tenant_slug_access(current_user, tenant_slug)
 
     # Get booking
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    booking = await load_booking(db, booking_id)
 
     if not booking:
         raise HTTPException(
@@ -517,10 +609,10 @@ async def confirm_booking(
             line.confirmed_at = datetime.utcnow()
 
     try:
-        db.commit()
-        db.refresh(booking)
+        await db.commit()
+        await db.refresh(booking)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error confirming booking: {str(e)}"
@@ -539,7 +631,7 @@ async def get_booking_by_reference(
     tenant_slug: str,
     reference: str,
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """
     Get booking by reference
@@ -557,12 +649,15 @@ async def get_booking_by_reference(
     check_tenant_slug_access(current_user, tenant_slug)
 
     # Get booking
-    booking = db.query(Booking).filter(
-        or_(
-            Booking.booking_reference == reference,
-            Booking.external_reference == reference
+    result = await db.execute(
+        select(Booking).options(*booking_details()).where(
+            or_(
+                Booking.booking_reference == reference,
+                Booking.external_reference == reference
+            )
         )
-    ).first()
+    )
+    booking = result.scalars().first()
 
     if not booking:
         raise HTTPException(
@@ -579,7 +674,7 @@ async def get_bookings_statistics(
     date_from: Optional[datetime] = Query(None, description="Statistics from date"),
     date_to: Optional[datetime] = Query(None, description="Statistics to date"),
     current_user: Dict[str, Any] = Depends(get_current_user),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_read_db)
 ):
     """
     Get bookings statistics
@@ -597,50 +692,46 @@ async def get_bookings_statistics(
     # Check tenant access
     check_tenant_slug_access(current_user, tenant_slug)
 
-    # Build base query
-    query = db.query(Booking)
-
     # Apply date filters
+    filters = []
     if date_from:
-        query = query.filter(Booking.booking_date >= date_from)
+        filters.append(Booking.booking_date >= date_from)
     if date_to:
-        query = query.filter(Booking.booking_date <= date_to)
+        filters.append(Booking.booking_date <= date_to)
 
     # Get statistics
-    total_bookings = query.count()
+    total_bookings = await db.scalar(select(func.count(Booking.id)).where(*filters))
 
     # Count by status
-    status_counts = db.query(
-        Booking.overall_status,
-        func.count(Booking.id)
-    ).group_by(Booking.overall_status)
-
-    if date_from:
-        status_counts = status_counts.filter(Booking.booking_date >= date_from)
-    if date_to:
-        status_counts = status_counts.filter(Booking.booking_date <= date_to)
-
-    status_counts = status_counts.all()
+    status_result = await db.execute(
+        select(Booking.overall_status, func.count(Booking.id))
+        .where(*filters)
+        .group_by(Booking.overall_status)
+    )
+    status_counts = status_result.all()
 
     # Calculate total revenue
-    total_revenue = query.filter(
-        Booking.overall_status != BookingOverallStatus.cancelled
-    ).with_entities(func.sum(Booking.total_amount)).scalar() or 0
+    total_revenue = await db.scalar(
+        select(func.sum(Booking.total_amount)).where(
+            *filters,
+            Booking.overall_status != BookingOverallStatus.cancelled
+        )
+    ) or 0
 
     # Count bookings by month
-    monthly_counts = db.query(
-        func.date_trunc('month', Booking.booking_date).label('month'),
-        func.count(Booking.id).label('count')
-    ).group_by('month').order_by('month')
-
-    if date_from:
-        monthly_counts = monthly_counts.filter(Booking.booking_date >= date_from)
-    if date_to:
-        monthly_counts = monthly_counts.filter(Booking.booking_date <= date_to)
+    monthly_result = await db.execute(
+        select(
+            func.date_trunc('month', Booking.booking_date).label('month'),
+            func.count(Booking.id).label('count')
+        )
+        .where(*filters)
+        .group_by('month')
+        .order_by('month')
+    )
 
     monthly_data = [
         {"month": month.isoformat(), "count": count}
-        for month, count in monthly_counts.all()
+        for month, count in monthly_result.all()
     ]
 
     return {
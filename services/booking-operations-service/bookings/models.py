@@ -5,7 +5,7 @@ Contains booking-related models and database definitions
 
 from sqlalchemy import (
     Column, String, Integer, Boolean, DateTime, Text, ForeignKey,
-    Enum as SQLEnum, Date, JSON, Numeric, Index, UniqueConstraint
+    Enum as SQLEnum, Date, JSON, Numeric, Index, UniqueConstraint, func
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -77,7 +77,7 @@ class Booking(Base):
     booking_metadata = Column(JSON, nullable=True)  # Additional flexible data
 
     # Timestamps
-    created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, server_default=func.now())  # keyset sort key
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
 
@@ -91,6 +91,7 @@ class Booking(Base):
         Index('idx_booking_order_status', 'order_id', 'overall_status'),
         Index('idx_booking_travel_start', 'travel_start_date'),
         Index('idx_booking_travel_end', 'travel_end_date'),
+        Index('idx_booking_created_id', 'created_at', 'id'),
         UniqueConstraint('booking_number', 'deleted_at', name='uq_booking_number_deleted'),
     )
 
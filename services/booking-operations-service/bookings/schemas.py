@@ -288,14 +288,29 @@ class BookingResponse(BookingBase):
 class BookingListResponse(BaseModel):
     """Schema for Booking list response"""
     items: List[BookingResponse]
-    total: int
-    page: int
+    total: Optional[int] = Field(None, description="Matching bookings; omitted unless counted")
+    page: Optional[int] = Field(None, description="Page number; omitted for cursor requests")
     page_size: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    count_mode: Optional[str] = Field(None, description="How total was computed: exact, capped (at least total) or estimate")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page; null on the last page")
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class BookingSearchHit(BaseModel):
+    """Schema for one ranked booking search result"""
+    booking: BookingResponse
+    score: float = Field(..., description="Relevance between 0 and 1")
+    matched: str = Field(..., description="booking_number, external_reference, passenger_name or passenger_email")
+
+
+class BookingSearchHitsResponse(BaseModel):
+    """Schema for ranked booking search response"""
+    query: str
+    items: List[BookingSearchHit]
+
+
 class BookingSummary(BaseModel):
     """Schema for booking summary statistics"""
     total_bookings: int
@@ -0,0 +1,114 @@
+"""
+Bookings search
+Ranked booking lookup by booking number, external reference, passenger name
+or passenger email, served by the trigram indexes in BOOKING_SEARCH_INDEXES,
+and the bookings and passengers documents of global search
+"""
+
+from typing import List, Tuple
+from sqlalchemy import Integer, Float, String, column, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared_search import normalize_term, like_prefix
+
+# Created in every tenant schema by SchemaManager.create_search_indexes.
+# The expressions must stay identical to the ones in BOOKING_SEARCH_HITS_SQL.
+BOOKING_SEARCH_INDEXES = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_booking_number_trgm "
+    "ON bookings USING gin (lower(booking_number) public.gin_trgm_ops)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_booking_external_reference_trgm "
+    "ON bookings USING gin (lower(external_reference) public.gin_trgm_ops)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_passenger_name_trgm "
+    "ON passengers USING gin (public.search_normalize(first_name || ' ' || last_name) public.gin_trgm_ops)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_passenger_email_trgm "
+    "ON passengers USING gin (lower(email) public.gin_trgm_ops)",
+]
+
+# Global search documents (see shared_search.install_search_sources)
+BOOKING_SEARCH_SOURCES = [
+    {
+        "table": "bookings",
+        "entity_type": "booking",
+        "columns": "booking_number, external_reference, overall_status, deleted_at",
+        "title": "booking_number",
+        "subtitle": "external_reference",
+        "category": "overall_status",
+        "search_text": "concat_ws(' ', booking_number, external_reference)",
+        "live": "deleted_at IS NULL",
+    },
+    {
+        "table": "passengers",
+        "entity_type": "passenger",
+        "columns": "first_name, middle_name, last_name, email, phone, document_number, deleted_at",
+        "title": "concat_ws(' ', first_name, middle_name, last_name)",
+        "subtitle": "email",
+        "category": "NULL",
+        "search_text": (
+            "concat_ws(' ', first_name, middle_name, last_name, email, document_number, "
+            "regexp_replace(phone, '[^0-9]', '', 'g'))"
+        ),
+        "live": "deleted_at IS NULL",
+    },
+]
+
+# One row per matching booking with its best score and the field that matched.
+# References and emails match by prefix; names by trigram word similarity on
+# the unaccented name, so "jose garcia" finds "José García" and survives typos.
+BOOKING_SEARCH_HITS_SQL = """
+    SELECT DISTINCT ON (booking_id) booking_id, score, matched
+    FROM (
+        SELECT b.id AS booking_id, 1.0::float8 AS score, 'booking_number' AS matched
+        FROM bookings b
+        WHERE lower(b.booking_number) LIKE :prefix
+          AND b.deleted_at IS NULL
+        UNION ALL
+        SELECT b.id, 0.9, 'external_reference'
+        FROM bookings b
+        WHERE lower(b.external_reference) LIKE :prefix
+          AND b.deleted_at IS NULL
+        UNION ALL
+        SELECT bp.booking_id,
+               public.word_similarity(public.search_normalize(:term),
+                                      public.search_normalize(p.first_name || ' ' || p.last_name)),
+               'passenger_name'
+        FROM passengers p
+        JOIN booking_passengers bp ON bp.passenger_id = p.id AND bp.deleted_at IS NULL
+        WHERE public.search_normalize(:term)
+              OPERATOR(public.<%) public.search_normalize(p.first_name || ' ' || p.last_name)
+          AND p.deleted_at IS NULL
+        UNION ALL
+        SELECT bp.booking_id, 0.8, 'passenger_email'
+        FROM passengers p
+        JOIN booking_passengers bp ON bp.passenger_id = p.id AND bp.deleted_at IS NULL
+        WHERE lower(p.email) LIKE :prefix
+          AND p.deleted_at IS NULL
+    ) hits
+    ORDER BY booking_id, score DESC
+"""
+
+
+def booking_search_hits(term: str):
+    """Matching bookings as a selectable with booking_id, score and matched columns"""
+    term = normalize_term(term)
+    return text(BOOKING_SEARCH_HITS_SQL).bindparams(term=term, prefix=like_prefix(term)).columns(
+        column("booking_id", Integer), column("score", Float), column("matched", String)
+    ).subquery("booking_hits")
+
+
+async def search_booking_ids(db: AsyncSession, term: str, limit: int) -> List[Tuple[int, float, str]]:
+    """
+    Best-scoring bookings for a search term
+
+    Args:
+        db: Tenant session
+        term: Booking number or reference prefix, passenger name or email prefix
+        limit: Maximum number of hits
+
+    Returns:
+        (booking_id, score, matched field) tuples, best first
+    """
+    hits = booking_search_hits(term)
+    result = await db.execute(
+        hits.select().order_by(hits.c.score.desc(), hits.c.booking_id.desc()).limit(limit)
+    )
+    return [(row.booking_id, row.score, row.matched) for row in result]
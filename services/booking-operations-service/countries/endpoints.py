@@ -10,6 +10,8 @@ from typing import List, Dict, Any
 
 from database import get_tenant_db
 from shared_auth import get_current_user, check_tenant_slug_access
+from shared_pagination import CountMode, count_rows
+from utils.cache_invalidation import publish_cache_invalidation
 from .models import Country
 from .schemas import (
     CountryResponse,
@@ -30,6 +32,7 @@ async def list_countries(
     region: str = Query(None, description="Filter by region"),
     is_active: bool = Query(None, description="Filter by active status"),
     search: str = Query(None, description="Search in country name or code"),
+    count_mode: CountMode = Query("exact", description="How total is computed: exact, capped or estimate"),
     current_user: Dict[str, Any] = Depends(get_current_user),
     db: Session = Depends(get_tenant_db)
 ):
@@ -44,6 +47,8 @@ async def list_countries(
         region: Filter by region
         is_active: Filter by active status
         search: Search in country name or code
+        count_mode: exact (count(*)), capped (count up to COUNT_CAP; total is a lower bound)
+            or estimate (planner row estimate)
         current_user: Current authenticated user
         db: Database session
 
@@ -79,7 +84,7 @@ async def list_countries(
         query = query.filter(and_(*filters))
 
     # Get total count
-    total = query.count()
+    total, total_mode = count_rows(db, query, count_mode)
 
     # Apply pagination
     offset = (page - 1) * page_size
@@ -89,11 +94,12 @@ async def list_countries(
     total_pages = (total + page_size - 1) // page_size
 
     return CountryListResponse(
-        countries=countries,
+        items=countries,
         total=total,
         page=page,
         page_size=page_size,
-        total_pages=total_pages
+        total_pages=total_pages,
+        count_mode=total_mode
     )
 
 
@@ -171,6 +177,7 @@ async def create_country(
     db.add(country)
     db.commit()
     db.refresh(country)
+    await publish_cache_invalidation(tenant_slug, "countries")
 
     return country
 
@@ -236,6 +243,7 @@ async def update_country(
 
     db.commit()
     db.refresh(country)
+    await publish_cache_invalidation(tenant_slug, "countries")
 
     return country
 
@@ -281,6 +289,7 @@ async def delete_country(
     # Delete country
     db.delete(country)
     db.commit()
+    await publish_cache_invalidation(tenant_slug, "countries")
 
     return {"message": f"Country {country.name} deleted successfully"}
 
@@ -65,5 +65,6 @@ class CountryListResponse(BaseModel):
     page: int
     page_size: int
     total_pages: int
+    count_mode: str = Field("exact", description="How total was computed: exact, capped (at least total) or estimate")
 
     model_config = ConfigDict(from_attributes=True)
@@ -9,6 +9,7 @@ from typing import List, Dict, Any
 
 from database import get_tenant_db
 from shared_auth import get_current_user, check_tenant_slug_access
+from utils.cache_invalidation import publish_cache_invalidation
 
 router = APIRouter()
 
@@ -103,6 +104,8 @@ async def create_destination(
     # Check tenant access
     check_tenant_slug_access(current_user, tenant_slug)
 
+    await publish_cache_invalidation(tenant_slug, "destinations")
+
     return {
         "message": "Destinations module endpoints - placeholder implementation"
     }
@@ -130,6 +133,8 @@ async def update_destination(
     # Check tenant access
     check_tenant_slug_access(current_user, tenant_slug)
 
+    await publish_cache_invalidation(tenant_slug, "destinations")
+
     return {
         "id": destination_id,
         "message": "Destinations module endpoints - placeholder implementation"
@@ -158,6 +163,8 @@ async def delete_destination(
     # Check tenant access
     check_tenant_slug_access(current_user, tenant_slug)
 
+    await publish_cache_invalidation(tenant_slug, "destinations")
+
     return {
         "message": f"Destination {destination_id} deleted successfully - placeholder implementation"
     }
@@ -11,6 +11,7 @@ from datetime import datetime
 
 from models_base import Base
 from database import DATABASE_URL
+from shared_search import setup_search, create_search_indexes, install_search_sources
 
 # Import all models to register them with Base.metadata
 from countries.models import Country
@@ -26,6 +27,7 @@ from rates.models import (
     PackageRate, PackageRatePassengerPrice
 )
 from passengers.models import Passenger
+from bookings.search import BOOKING_SEARCH_INDEXES, BOOKING_SEARCH_SOURCES
 
 logger = logging.getLogger(__name__)
 
@@ -86,6 +88,11 @@ class SchemaManager:
             # Create all tables
             Base.metadata.create_all(bind=tenant_engine)
 
+            # create_all skips existing tables; add indexes introduced since the schema was created
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(bind=tenant_engine, checkfirst=True)
+
             logger.info(f"Created tables for schema: {schema_name}")
 
             # Dispose of the engine
@@ -97,6 +104,56 @@ class SchemaManager:
             logger.error(f"Error creating tables for schema {schema_name}: {str(e)}")
             return False
 
+    def migrate_sort_keys(self, schema_name: str) -> bool:
+        """
+        One-off migration making created_at (the keyset sort key) NOT NULL
+
+        Schemas created since the column became NOT NULL already have the
+        constraint. Only tables whose column is still nullable in the database
+        are backfilled and altered, so re-running it takes no locks.
+
+        Args:
+            schema_name: Name of the tenant schema
+
+        Returns:
+            True if successful, False otherwise
+        """
+        sort_key_tables = {
+            table.name: table for table in Base.metadata.sorted_tables
+            if "created_at" in table.c
+            and not table.c.created_at.nullable
+            and table.c.created_at.server_default is not None
+        }
+
+        try:
+            with self.engine.begin() as conn:
+                nullable_tables = conn.execute(text("""
+                    SELECT table_name FROM information_schema.columns
+                    WHERE table_schema = :schema_name
+                    AND column_name = 'created_at'
+                    AND is_nullable = 'YES'
+                """), {"schema_name": schema_name}).scalars().all()
+
+                for table_name in nullable_tables:
+                    table = sort_key_tables.get(table_name)
+                    if table is None:
+                        continue
+                    backfill = "coalesce(updated_at, now())" if "updated_at" in table.c else "now()"
+                    conn.execute(text(
+                        f'UPDATE "{schema_name}".{table_name} SET created_at = {backfill} WHERE created_at IS NULL'
+                    ))
+                    conn.execute(text(
+                        f'ALTER TABLE "{schema_name}".{table_name} ALTER COLUMN created_at SET DEFAULT now(), '
+                        f'ALTER COLUMN created_at SET NOT NULL'
+                    ))
+                    logger.info(f"Made {schema_name}.{table_name}.created_at NOT NULL")
+
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to migrate sort keys for schema {schema_name}: {str(e)}")
+            return False
+
     def add_foreign_key_constraints(self, schema_name: str) -> bool:
         """
         Add foreign key constraints that reference other services' tables
@@ -241,6 +298,37 @@ class SchemaManager:
             logger.error(f"Error adding foreign key constraints: {str(e)}")
             return False
 
+    def create_search_indexes(self, schema_name: str) -> bool:
+        """
+        Create the trigram indexes behind booking search and register
+        bookings and passengers with global search
+
+        Built CONCURRENTLY, so re-initializing an existing tenant indexes its
+        bookings and passengers without blocking writes.
+
+        Args:
+            schema_name: Name of the tenant schema
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            with self.engine.connect() as conn:
+                if not setup_search(conn):
+                    return False
+
+                # Set search path
+                conn.execute(text(f"SET search_path TO {schema_name}"))
+
+                created = create_search_indexes(conn, BOOKING_SEARCH_INDEXES)
+                registered = install_search_sources(conn, BOOKING_SEARCH_SOURCES)
+                logger.info(f"Created search indexes for schema: {schema_name}")
+                return created and registered
+
+        except Exception as e:
+            logger.error(f"Error creating search indexes: {str(e)}")
+            return False
+
     def initialize_tenant_schema(self, tenant_id: str, schema_name: str) -> Dict[str, Any]:
         """
         Initialize a complete tenant schema with all tables and constraints
@@ -283,6 +371,10 @@ class SchemaManager:
             # Step 5: Run post-creation tasks
             self.run_post_creation_tasks(schema_name)
 
+            # Step 6: Search extensions and trigram indexes
+            if not self.create_search_indexes(schema_name):
+                logger.warning(f"Search indexes incomplete for schema {schema_name}")
+
             logger.info(f"Successfully initialized schema for tenant {tenant_id}")
 
         except Exception as e:
@@ -457,3 +549,17 @@ class SchemaManager:
             logger.error(f"Error getting schema info: {str(e)}")
 
         return info
+
+
+# CLI interface for one-off migrations
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3 or sys.argv[1] != "migrate":
+        print("Usage: python schema_manager.py migrate <schema_name> [<schema_name> ...]")
+        sys.exit(1)
+
+    manager = SchemaManager()
+    for schema_name in sys.argv[2:]:
+        success = manager.migrate_sort_keys(schema_name)
+        print(f"{schema_name} migrated: {success}")
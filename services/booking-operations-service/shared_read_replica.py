@@ -0,0 +1,167 @@
+"""
+Shared read-replica routing for all microservices
+Read-only handlers (summaries, statistics) may run on a streaming replica
+instead of the primary. A background thread measures replication lag; reads
+are sent to the replica only while it answers and is no further behind than
+the staleness tolerance, and go to the primary otherwise.
+"""
+from typing import Any, Callable, Dict, Optional
+import os
+import time
+import logging
+import threading
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+# Reads tolerate a replica at most this many seconds behind the primary
+REPLICA_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", 5))
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", 5))
+
+# A measurement older than this many check intervals is not trusted
+STALE_CHECKS = 3
+
+# Seconds the replica is behind; 0 once everything received has been replayed,
+# and on a server that is not in recovery (the replica URL points at a primary)
+REPLICATION_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+class ReplicaMonitor:
+    """
+    Replication lag of one replica and the routing decision derived from it
+
+    Without an engine (no replica configured) every read goes to the primary.
+    The lag is only measured by the background thread, so deciding where a
+    request goes never waits on the replica.
+    """
+
+    def __init__(
+        self,
+        engine: Optional[Engine] = None,
+        max_lag: float = REPLICA_MAX_LAG,
+        interval: float = REPLICA_CHECK_INTERVAL,
+        on_lag: Optional[Callable[[Optional[float]], None]] = None,
+        on_route: Optional[Callable[[str, str], None]] = None
+    ):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.interval = interval
+        self.on_lag = on_lag
+        self.on_route = on_route
+        self.lag: Optional[float] = None
+        self.checked_at = 0.0
+        self.last_error: Optional[str] = None
+        self.routed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._monitor: Optional[threading.Thread] = None
+        if engine is not None:
+            self.watch(engine)
+
+    @property
+    def enabled(self) -> bool:
+        return self.engine is not None
+
+    def watch(self, engine: Engine):
+        """Mark the replica down as soon as a connection to it fails (sync engine, or async_engine.sync_engine)"""
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def _handle_error(self, exception_context):
+        # No connection means the connect itself failed
+        if exception_context.is_disconnect or exception_context.connection is None:
+            self.mark_down(str(exception_context.original_exception))
+
+    def measure(self) -> Optional[float]:
+        """Query the replica's lag once; None when it cannot be reached"""
+        try:
+            with self.engine.connect() as conn:
+                lag = float(conn.execute(text(REPLICATION_LAG_SQL)).scalar() or 0.0)
+        except Exception as e:
+            self.mark_down(str(e))
+            return None
+
+        with self._lock:
+            self.lag = lag
+            self.checked_at = time.monotonic()
+            self.last_error = None
+        if self.on_lag:
+            self.on_lag(lag)
+        return lag
+
+    def mark_down(self, reason: str):
+        with self._lock:
+            was_up = self.lag is not None
+            self.lag = None
+            self.last_error = reason
+        if was_up:
+            logger.warning(f"Read replica unavailable, reading from the primary: {reason}")
+        if self.on_lag:
+            self.on_lag(None)
+
+    def use_replica(self, max_lag: Optional[float] = None) -> bool:
+        """
+        Whether a read that tolerates max_lag seconds of staleness may use the replica
+
+        Args:
+            max_lag: Staleness tolerance for this read (default: REPLICA_MAX_LAG)
+
+        Returns:
+            True to read from the replica, False to read from the primary
+        """
+        if not self.enabled:
+            return False
+        self.ensure_monitor()
+
+        with self._lock:
+            lag = self.lag
+            age = time.monotonic() - self.checked_at
+        if lag is None:
+            reason = "unavailable"
+        elif age > self.interval * STALE_CHECKS:
+            reason = "unmeasured"
+        elif lag > (self.max_lag if max_lag is None else max_lag):
+            reason = "lagging"
+        else:
+            reason = "ok"
+
+        target = "replica" if reason == "ok" else "primary"
+        with self._lock:
+            key = f"{target}:{reason}"
+            self.routed[key] = self.routed.get(key, 0) + 1
+        if self.on_route:
+            self.on_route(target, reason)
+        return target == "replica"
+
+    def ensure_monitor(self):
+        """Start the background lag check once per process"""
+        if self._monitor is not None or not self.enabled:
+            return
+        with self._lock:
+            if self._monitor is not None:
+                return
+            self._monitor = threading.Thread(target=self._run, name="replica-lag-monitor", daemon=True)
+        self._monitor.start()
+
+    def _run(self):
+        while True:
+            self.measure()
+            time.sleep(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "lag_seconds": round(self.lag, 3) if self.lag is not None else None,
+                "max_lag": self.max_lag,
+                "checked_seconds_ago": round(time.monotonic() - self.checked_at, 1) if self.checked_at else None,
+                "last_error": self.last_error,
+                "routed": dict(self.routed),
+            }
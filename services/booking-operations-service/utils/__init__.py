@@ -19,6 +19,8 @@ from .audit import (
     get_audit_logger
 )
 
+from .cache_invalidation import publish_cache_invalidation
+
 __all__ = [
     # Validators
     'BookingValidator',
@@ -32,5 +34,8 @@ __all__ = [
     'AuditAction',
     'AuditLog',
     'AuditLogger',
-    'get_audit_logger'
+    'get_audit_logger',
+
+    # Gateway cache invalidation
+    'publish_cache_invalidation'
 ]
@@ -0,0 +1,43 @@
+"""
+Gateway response cache invalidation for Booking Operations Service
+Publishes invalidation messages when cached reference data changes
+"""
+
+import os
+import json
+import logging
+from typing import Optional
+
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+RESPONSE_CACHE_INVALIDATION_CHANNEL = os.getenv("RESPONSE_CACHE_INVALIDATION_CHANNEL", "gateway:cache:invalidate")
+
+_redis_client: Optional[aioredis.Redis] = None
+
+
+def get_redis_client() -> aioredis.Redis:
+    """Get or create the asyncio Redis client used for publishing"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = aioredis.from_url(REDIS_URL, socket_timeout=1.0, socket_connect_timeout=1.0)
+    return _redis_client
+
+
+async def publish_cache_invalidation(tenant_slug: Optional[str], resource: str) -> None:
+    """
+    Tell the API gateway to drop cached responses for a resource
+
+    Args:
+        tenant_slug: Tenant whose entries are stale (None for all tenants)
+        resource: Resource path segment, e.g. "countries" or "destinations"
+
+    Failures are logged and swallowed; cached entries still expire by TTL.
+    """
+    message = json.dumps({"tenant": tenant_slug or "*", "pattern": f"*/{resource}*"})
+    try:
+        await get_redis_client().publish(RESPONSE_CACHE_INVALIDATION_CHANNEL, message)
+    except Exception as e:
+        logger.warning(f"Failed to publish cache invalidation for {resource}: {str(e)}")
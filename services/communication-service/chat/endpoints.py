@@ -4,8 +4,9 @@ API endpoints for chat channels, members, and entries
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, or_, and_, func
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import select, desc, or_, and_, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 from uuid import UUID
@@ -16,6 +17,7 @@ from shared_auth import (
     get_current_user,
     check_tenant_slug_access,
     safe_tenant_session,
+    safe_async_tenant_session,
     validate_tenant_access
 )
 from .models import Channel, ChannelMember, ChatEntry, Mention
@@ -30,6 +32,28 @@ from .schemas import (
 channels_router = APIRouter(prefix="/api/v1/tenants/{tenant_slug}/channels", tags=["Channels"])
 chat_router = APIRouter(prefix="/api/v1/tenants/{tenant_slug}/chat", tags=["Chat"])
 
+
+async def get_active_member(db: AsyncSession, channel_id: int, user_id: UUID) -> Optional[ChannelMember]:
+    """Current membership of a user in a channel, if any"""
+    return await db.scalar(
+        select(ChannelMember).where(
+            ChannelMember.channel_id == channel_id,
+            ChannelMember.user_id == user_id,
+            ChannelMember.left_at.is_(None)
+        )
+    )
+
+
+async def load_chat_entry(db: AsyncSession, entry_id: int) -> Optional[ChatEntry]:
+    """Fetch a chat entry with its mentions (async sessions cannot lazy load them)"""
+    result = await db.execute(
+        select(ChatEntry)
+        .options(selectinload(ChatEntry.mentions))
+        .where(ChatEntry.id == entry_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
 # ============================================
 # CHANNEL ENDPOINTS
 # ============================================
@@ -372,13 +396,9 @@ async def send_message(
     current_user_id = UUID(current_user.get("id"))
 
     # Get database session
-    with safe_tenant_session(tenant_slug) as db:
+    async with safe_async_tenant_session(tenant_slug) as db:
         # Check if user is a member
-        member = db.query(ChannelMember).filter(
-            ChannelMember.channel_id == channel_id,
-            ChannelMember.user_id == current_user_id,
-            ChannelMember.left_at.is_(None)
-        ).first()
+        member = await get_active_member(db, channel_id, current_user_id)
 
         if not member:
             raise HTTPException(status_code=403, detail="Not a member of this channel")
@@ -392,7 +412,7 @@ async def send_message(
             metadata=message_data.metadata or {}
         )
         db.add(chat_entry)
-        db.flush()
+        await db.flush()
 
         # Process mentions
         if message_data.mentions:
@@ -404,13 +424,12 @@ async def send_message(
                 db.add(mention)
 
         # Update channel last activity
-        channel = db.query(Channel).filter(Channel.id == channel_id).first()
+        channel = await db.get(Channel, channel_id)
         channel.last_activity_at = datetime.utcnow()
 
-        db.commit()
-        db.refresh(chat_entry)
+        await db.commit()
 
-        return chat_entry
+        return await load_chat_entry(db, chat_entry.id)
 
 @chat_router.get("/channels/{channel_id}/messages", response_model=List[ChatEntryResponse])
 async def list_messages(
@@ -428,25 +447,25 @@ async def list_messages(
     current_user_id = UUID(current_user.get("id"))
 
     # Get database session
-    with safe_tenant_session(tenant_slug) as db:
+    async with safe_async_tenant_session(tenant_slug) as db:
         # Check if user is a member
-        member = db.query(ChannelMember).filter(
-            ChannelMember.channel_id == channel_id,
-            ChannelMember.user_id == current_user_id,
-            ChannelMember.left_at.is_(None)
-        ).first()
+        member = await get_active_member(db, channel_id, current_user_id)
 
         if not member:
             raise HTTPException(status_code=403, detail="Not a member of this channel")
 
         # Get messages
-        messages = db.query(ChatEntry).filter(
-            ChatEntry.channel_id == channel_id
-        ).order_by(
-            desc(ChatEntry.created_at)
-        ).offset(skip).limit(limit).all()
+        result = await db.execute(
+            select(ChatEntry).options(
+                selectinload(ChatEntry.mentions)
+            ).where(
+                ChatEntry.channel_id == channel_id
+            ).order_by(
+                desc(ChatEntry.created_at)
+            ).offset(skip).limit(limit)
+        )
 
-        return messages
+        return result.scalars().all()
 
 @chat_router.post("/messages/{message_id}/reactions", response_model=dict)
 async def add_reaction(
@@ -463,18 +482,14 @@ async def add_reaction(
     current_user_id = UUID(current_user.get("id"))
 
     # Get database session
-    with safe_tenant_session(tenant_slug) as db:
+    async with safe_async_tenant_session(tenant_slug) as db:
         # Get the message
-        message = db.query(ChatEntry).filter(ChatEntry.id == message_id).first()
+        message = await db.get(ChatEntry, message_id)
         if not message:
             raise HTTPException(status_code=404, detail="Message not found")
 
         # Check if user is a member of the channel
-        member = db.query(ChannelMember).filter(
-            ChannelMember.channel_id == message.channel_id,
-            ChannelMember.user_id == current_user_id,
-            ChannelMember.left_at.is_(None)
-        ).first()
+        member = await get_active_member(db, message.channel_id, current_user_id)
 
         if not member:
             raise HTTPException(status_code=403, detail="Not a member of this channel")
@@ -494,6 +509,6 @@ async def add_reaction(
         if user_id_str not in message.metadata["reactions"][emoji]:
             message.metadata["reactions"][emoji].append(user_id_str)
 
-        db.commit()
+        await db.commit()
 
         return {"success": True, "reactions": message.metadata.get("reactions", {})}
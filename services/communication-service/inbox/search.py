@@ -0,0 +1,20 @@
+"""
+Inbox search
+Conversation document of global search, found by contact name, email or
+phone number
+"""
+
+# Global search document (see shared_search.install_search_sources)
+CONVERSATION_SEARCH_SOURCE = {
+    "table": "inbox_conversations",
+    "entity_type": "conversation",
+    "columns": "contact_name, contact_identifier, channel, is_spam",
+    "title": "coalesce(contact_name, contact_identifier)",
+    "subtitle": "contact_identifier",
+    "category": "channel",
+    "search_text": (
+        "concat_ws(' ', contact_name, contact_identifier, "
+        "regexp_replace(contact_identifier, '[^0-9]', '', 'g'))"
+    ),
+    "live": "is_spam IS NOT TRUE",
+}
@@ -17,6 +17,7 @@ from shared_auth import get_current_user, require_super_admin, check_tenant_slug
 
 # Import database and schema management
 from database import get_tenant_db, verify_connection
+from shared_metrics import setup_metrics
 from schema_manager import SchemaManager
 
 # Import routers from modules
@@ -58,8 +59,9 @@ async def lifespan(app: FastAPI):
 
     # Cleanup
     logger.info("Shutting down Communication Service...")
-    from database import cleanup_engines
+    from database import cleanup_engines, cleanup_async_engines
     cleanup_engines()
+    await cleanup_async_engines()
 
 # Create FastAPI application
 app = FastAPI(
@@ -78,6 +80,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request metrics (/metrics) and Server-Timing headers
+setup_metrics(app, "communication-service")
+
 # ============================================
 # INCLUDE ROUTERS
 # ============================================
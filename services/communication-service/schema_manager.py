@@ -13,6 +13,8 @@ import os
 from inbox.models import Base as InboxBase
 from chat.models import Base as ChatBase
 from sqlalchemy.schema import MetaData
+from shared_search import setup_search, install_search_sources
+from inbox.search import CONVERSATION_SEARCH_SOURCE
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -191,6 +193,35 @@ class SchemaManager:
             logger.error(f"Failed to add foreign key constraints for schema {schema_name}: {str(e)}")
             return False
 
+    def register_search_sources(self, schema_name: str) -> bool:
+        """
+        Register inbox conversations with global search
+
+        Installs the trigger that keeps their search documents current and
+        indexes the existing conversations.
+
+        Args:
+            schema_name: Name of the tenant schema
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                if not setup_search(conn):
+                    return False
+
+                # Set search path
+                conn.execute(text(f"SET search_path TO {schema_name}"))
+
+                registered = install_search_sources(conn, [CONVERSATION_SEARCH_SOURCE])
+                logger.info(f"Registered search sources for schema: {schema_name}")
+                return registered
+
+        except Exception as e:
+            logger.error(f"Failed to register search sources for schema {schema_name}: {str(e)}")
+            return False
+
     def initialize_tenant_schema(self, tenant_id: str, schema_name: str) -> Dict[str, Any]:
         """
         Initialize a complete tenant schema with all communication tables
@@ -232,7 +263,11 @@ class SchemaManager:
             else:
                 logger.warning(f"Some foreign key constraints could not be added for schema {schema_name}")
 
-            # Step 5: Run any post-creation tasks
+            # Step 5: Register with global search
+            if not self.register_search_sources(schema_name):
+                logger.warning(f"Global search sources incomplete for schema {schema_name}")
+
+            # Step 6: Run any post-creation tasks
             self.run_post_creation_tasks(schema_name)
 
             result["status"] = "success"
@@ -5,13 +5,16 @@ API endpoints for account management with authentication
 
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc, asc
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.orm import Session, joinedload, contains_eager
+from sqlalchemy import select, and_, or_, desc, asc, func
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_tenant_db, get_db, get_schema_from_tenant_id
+from database import get_tenant_db, get_db, get_schema_from_tenant_id, get_async_tenant_db_by_id, get_async_tenant_read_db_by_id
 from shared_auth import get_current_user_from_token, check_tenant_access
+from shared_pagination import CountMode, count_rows_async
 from core.models import Actor
+from core.search import actor_search_hits
 from core.enums import ActorType, AccountStatus
 from .models import Account
 from .schemas import (
@@ -109,14 +112,17 @@ async def create_account(
 @router.get("/tenants/{tenant_id}/accounts", response_model=List[AccountResponse])
 async def list_accounts(
     tenant_id: str,
+    response: Response,
     account_status: Optional[List[AccountStatus]] = Query(None),
     search: Optional[str] = Query(None),
+    fuzzy: bool = Query(False, description="Let search also match misspelled names and emails"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     sort_by: str = Query("created_at"),
     sort_order: str = Query("desc"),
+    count_mode: Optional[CountMode] = Query(None, description="Send X-Total-Count, computed as exact, capped or estimate"),
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_db_by_id)
 ):
     """List accounts with filtering and pagination"""
     try:
@@ -127,30 +133,25 @@ async def list_accounts(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Build query
-        query = tenant_db.query(Account).join(Actor).filter(
+        query = select(Account).join(Account.actor).options(contains_eager(Account.actor)).where(
             Account.deleted_at.is_(None),
             Actor.deleted_at.is_(None)
         )
 
         # Apply filters
         if account_status:
-            query = query.filter(Account.account_status.in_(account_status))
+            query = query.where(Account.account_status.in_(account_status))
 
         if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Actor.first_name.ilike(search_term),
-                    Actor.last_name.ilike(search_term),
-                    Actor.company_name.ilike(search_term),
-                    Actor.email.ilike(search_term),
-                    Actor.phone.ilike(search_term)
-                )
-            )
+            hits = actor_search_hits(search, fuzzy)
+            query = query.where(Actor.id.in_(select(hits.c.actor_id)))
+
+        # Optional total; the body is a plain list, so it travels in headers
+        if count_mode:
+            total, total_mode = await count_rows_async(tenant_db, query, count_mode)
+            response.headers["X-Total-Count"] = str(total)
+            response.headers["X-Total-Count-Mode"] = total_mode
 
         # Apply sorting
         if sort_order == "desc":
@@ -160,7 +161,8 @@ async def list_accounts(
 
         # Apply pagination
         offset = (page - 1) * page_size
-        accounts = query.offset(offset).limit(page_size).all()
+        result = await tenant_db.execute(query.offset(offset).limit(page_size))
+        accounts = result.scalars().all()
 
         # Build response
         response_data = []
@@ -394,7 +396,7 @@ async def delete_account(
 async def get_account_stats(
     tenant_id: str,
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_read_db_by_id)
 ):
     """Get account statistics"""
     try:
@@ -405,19 +407,15 @@ async def get_account_stats(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
+        async def count_accounts(*conditions) -> int:
+            return await tenant_db.scalar(
+                select(func.count(Account.id)).where(Account.deleted_at.is_(None), *conditions)
+            )
 
         # Basic counts
-        total_accounts = tenant_db.query(Account).filter(Account.deleted_at.is_(None)).count()
-        active_accounts = tenant_db.query(Account).filter(
-            Account.account_status == AccountStatus.active,
-            Account.deleted_at.is_(None)
-        ).count()
-        customer_accounts = tenant_db.query(Account).filter(
-            Account.account_status == AccountStatus.customer,
-            Account.deleted_at.is_(None)
-        ).count()
+        total_accounts = await count_accounts()
+        active_accounts = await count_accounts(Account.account_status == AccountStatus.active)
+        customer_accounts = await count_accounts(Account.account_status == AccountStatus.customer)
 
         return {
             "total_accounts": total_accounts,
@@ -5,13 +5,16 @@ API endpoints for contact management with authentication
 
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc, asc
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import select, and_, or_, desc, asc, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
 
-from database import get_tenant_db, get_db, get_schema_from_tenant_id
+from database import get_async_tenant_db_by_id, get_async_tenant_read_db_by_id
 from shared_auth import get_current_user_from_token, check_tenant_access
+from shared_pagination import CountMode, count_rows_async
 from core.models import Actor
+from core.search import actor_search_hits
 from core.enums import ActorType, ContactStatus
 from .models import Contact
 from .schemas import (
@@ -30,7 +33,7 @@ async def create_contact(
     tenant_id: str,
     contact_data: ContactCreate,
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_db_by_id)
 ):
     """
     Create a new contact with actor information
@@ -45,9 +48,6 @@ async def create_contact(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Create actor first
         actor_data = {
             "type": ActorType.contact,
@@ -68,7 +68,7 @@ async def create_contact(
 
         actor = Actor(**actor_data)
         tenant_db.add(actor)
-        tenant_db.flush()  # Get actor ID
+        await tenant_db.flush()  # Get actor ID
 
         # Create contact
         contact_dict = contact_data.dict(exclude={
@@ -80,7 +80,7 @@ async def create_contact(
 
         contact = Contact(**contact_dict)
         tenant_db.add(contact)
-        tenant_db.commit()
+        await tenant_db.commit()
 
         # Return response with actor data
         response_data = {
@@ -101,7 +101,7 @@ async def create_contact(
         return response_data
 
     except Exception as e:
-        tenant_db.rollback()
+        await tenant_db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating contact: {str(e)}"
@@ -110,18 +110,21 @@ async def create_contact(
 @router.get("/tenants/{tenant_id}/contacts", response_model=List[ContactResponse])
 async def list_contacts(
     tenant_id: str,
+    response: Response,
     contact_status: Optional[List[ContactStatus]] = Query(None),
     account_id: Optional[int] = Query(None),
     is_primary_contact: Optional[bool] = Query(None),
     department: Optional[str] = Query(None),
     passport_expiring_days: Optional[int] = Query(None),
     search: Optional[str] = Query(None),
+    fuzzy: bool = Query(False, description="Let search also match misspelled names and emails"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     sort_by: str = Query("created_at"),
     sort_order: str = Query("desc"),
+    count_mode: Optional[CountMode] = Query(None, description="Send X-Total-Count, computed as exact, capped or estimate"),
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_db_by_id)
 ):
     """
     List contacts with filtering and pagination
@@ -136,47 +139,41 @@ async def list_contacts(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Build query
-        query = tenant_db.query(Contact).join(Actor).filter(
+        query = select(Contact).join(Contact.actor).options(contains_eager(Contact.actor)).where(
             Contact.deleted_at.is_(None),
             Actor.deleted_at.is_(None)
         )
 
         # Apply filters
         if contact_status:
-            query = query.filter(Contact.contact_status.in_(contact_status))
+            query = query.where(Contact.contact_status.in_(contact_status))
 
         if account_id:
-            query = query.filter(Contact.account_id == account_id)
+            query = query.where(Contact.account_id == account_id)
 
         if is_primary_contact is not None:
-            query = query.filter(Contact.is_primary_contact == is_primary_contact)
+            query = query.where(Contact.is_primary_contact == is_primary_contact)
 
         if department:
-            query = query.filter(Contact.department.ilike(f"%{department}%"))
+            query = query.where(Contact.department.ilike(f"%{department}%"))
 
         if passport_expiring_days is not None:
             expiry_date = date.today() + timedelta(days=passport_expiring_days)
-            query = query.filter(
+            query = query.where(
                 Contact.passport_expiry.is_not(None),
                 Contact.passport_expiry <= expiry_date
             )
 
         if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Actor.first_name.ilike(search_term),
-                    Actor.last_name.ilike(search_term),
-                    Actor.company_name.ilike(search_term),
-                    Actor.email.ilike(search_term),
-                    Actor.phone.ilike(search_term),
-                    Contact.department.ilike(search_term)
-                )
-            )
+            hits = actor_search_hits(search, fuzzy)
+            query = query.where(Actor.id.in_(select(hits.c.actor_id)))
+
+        # Optional total; the body is a plain list, so it travels in headers
+        if count_mode:
+            total, total_mode = await count_rows_async(tenant_db, query, count_mode)
+            response.headers["X-Total-Count"] = str(total)
+            response.headers["X-Total-Count-Mode"] = total_mode
 
         # Apply sorting
         if sort_by in ['first_name', 'last_name', 'company_name']:
@@ -191,19 +188,26 @@ async def list_contacts(
 
         # Apply pagination
         offset = (page - 1) * page_size
-        contacts = query.offset(offset).limit(page_size).all()
+        result = await tenant_db.execute(query.offset(offset).limit(page_size))
+        contacts = result.scalars().all()
+
+        # Get manager names for the whole page in one query
+        manager_ids = {contact.reports_to for contact in contacts if contact.reports_to}
+        manager_names = {}
+        if manager_ids:
+            managers = await tenant_db.execute(
+                select(Contact.id, Actor.first_name, Actor.last_name).join(Contact.actor).where(
+                    Contact.id.in_(manager_ids)
+                )
+            )
+            manager_names = {
+                row.id: f"{row.first_name} {row.last_name}".strip() for row in managers
+            }
 
         # Build response
         response_data = []
         for contact in contacts:
-            # Get manager name if reports_to is set
-            manager_name = None
-            if contact.reports_to:
-                manager_contact = tenant_db.query(Contact).join(Actor).filter(
-                    Contact.id == contact.reports_to
-                ).first()
-                if manager_contact:
-                    manager_name = f"{manager_contact.actor.first_name} {manager_contact.actor.last_name}".strip()
+            manager_name = manager_names.get(contact.reports_to)
 
             contact_data = {
                 "id": contact.id,
@@ -251,7 +255,7 @@ async def get_contact(
     tenant_id: str,
     contact_id: int,
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_db_by_id)
 ):
     """
     Get a specific contact by ID
@@ -266,15 +270,14 @@ async def get_contact(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Find contact
-        contact = tenant_db.query(Contact).join(Actor).filter(
-            Contact.id == contact_id,
-            Contact.deleted_at.is_(None),
-            Actor.deleted_at.is_(None)
-        ).first()
+        contact = await tenant_db.scalar(
+            select(Contact).join(Contact.actor).options(contains_eager(Contact.actor)).where(
+                Contact.id == contact_id,
+                Contact.deleted_at.is_(None),
+                Actor.deleted_at.is_(None)
+            ).execution_options(populate_existing=True)
+        )
 
         if not contact:
             raise HTTPException(
@@ -285,9 +288,11 @@ async def get_contact(
         # Get manager name if reports_to is set
         manager_name = None
         if contact.reports_to:
-            manager_contact = tenant_db.query(Contact).join(Actor).filter(
-                Contact.id == contact.reports_to
-            ).first()
+            manager_contact = await tenant_db.scalar(
+                select(Contact).join(Contact.actor).options(contains_eager(Contact.actor)).where(
+                    Contact.id == contact.reports_to
+                )
+            )
             if manager_contact:
                 manager_name = f"{manager_contact.actor.first_name} {manager_contact.actor.last_name}".strip()
 
@@ -340,7 +345,7 @@ async def update_contact(
     contact_id: int,
     contact_data: ContactUpdate,
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_db_by_id)
 ):
     """
     Update a specific contact
@@ -355,14 +360,11 @@ async def update_contact(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Find contact
-        contact = tenant_db.query(Contact).filter(
+        contact = await tenant_db.scalar(select(Contact).where(
             Contact.id == contact_id,
             Contact.deleted_at.is_(None)
-        ).first()
+        ))
 
         if not contact:
             raise HTTPException(
@@ -376,15 +378,15 @@ async def update_contact(
             setattr(contact, field, value)
 
         contact.updated_at = datetime.utcnow()
-        tenant_db.commit()
+        await tenant_db.commit()
 
         # Return updated contact
-        return await get_contact(tenant_id, contact_id, current_user, db)
+        return await get_contact(tenant_id, contact_id, current_user, tenant_db)
 
     except HTTPException:
         raise
     except Exception as e:
-        tenant_db.rollback()
+        await tenant_db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error updating contact: {str(e)}"
@@ -395,7 +397,7 @@ async def delete_contact(
     tenant_id: str,
     contact_id: int,
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_db_by_id)
 ):
     """
     Soft delete a specific contact
@@ -410,14 +412,11 @@ async def delete_contact(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Find contact
-        contact = tenant_db.query(Contact).filter(
+        contact = await tenant_db.scalar(select(Contact).where(
             Contact.id == contact_id,
             Contact.deleted_at.is_(None)
-        ).first()
+        ))
 
         if not contact:
             raise HTTPException(
@@ -428,14 +427,14 @@ async def delete_contact(
         # Soft delete
         contact.deleted_at = datetime.utcnow()
         contact.updated_at = datetime.utcnow()
-        tenant_db.commit()
+        await tenant_db.commit()
 
         return {"message": "Contact deleted successfully"}
 
     except HTTPException:
         raise
     except Exception as e:
-        tenant_db.rollback()
+        await tenant_db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error deleting contact: {str(e)}"
@@ -450,7 +449,7 @@ async def bulk_action_contacts(
     tenant_id: str,
     bulk_action: ContactBulkAction,
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_db_by_id)
 ):
     """
     Perform bulk actions on multiple contacts
@@ -465,14 +464,11 @@ async def bulk_action_contacts(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Find contacts
-        contacts = tenant_db.query(Contact).filter(
+        contacts = (await tenant_db.scalars(select(Contact).where(
             Contact.id.in_(bulk_action.contact_ids),
             Contact.deleted_at.is_(None)
-        ).all()
+        ))).all()
 
         if not contacts:
             raise HTTPException(
@@ -503,7 +499,7 @@ async def bulk_action_contacts(
 
             contact.updated_at = datetime.utcnow()
 
-        tenant_db.commit()
+        await tenant_db.commit()
 
         return {
             "message": f"Bulk action '{bulk_action.action}' completed",
@@ -514,7 +510,7 @@ async def bulk_action_contacts(
     except HTTPException:
         raise
     except Exception as e:
-        tenant_db.rollback()
+        await tenant_db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error performing bulk action: {str(e)}"
@@ -528,7 +524,7 @@ async def bulk_action_contacts(
 async def get_contact_stats(
     tenant_id: str,
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_read_db_by_id)
 ):
     """
     Get contact statistics
@@ -543,37 +539,26 @@ async def get_contact_stats(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
+        async def count_contacts(*conditions) -> int:
+            return await tenant_db.scalar(
+                select(func.count(Contact.id)).where(Contact.deleted_at.is_(None), *conditions)
+            )
 
         # Basic counts
-        total_contacts = tenant_db.query(Contact).filter(Contact.deleted_at.is_(None)).count()
-        active_contacts = tenant_db.query(Contact).filter(
-            Contact.contact_status == ContactStatus.active,
-            Contact.deleted_at.is_(None)
-        ).count()
-        primary_contacts = tenant_db.query(Contact).filter(
-            Contact.is_primary_contact == True,
-            Contact.deleted_at.is_(None)
-        ).count()
+        total_contacts = await count_contacts()
+        active_contacts = await count_contacts(Contact.contact_status == ContactStatus.active)
+        primary_contacts = await count_contacts(Contact.is_primary_contact == True)
 
         # Communication preferences
-        email_opt_in = tenant_db.query(Contact).filter(
-            Contact.email_opt_in == True,
-            Contact.deleted_at.is_(None)
-        ).count()
-        sms_opt_in = tenant_db.query(Contact).filter(
-            Contact.sms_opt_in == True,
-            Contact.deleted_at.is_(None)
-        ).count()
+        email_opt_in = await count_contacts(Contact.email_opt_in == True)
+        sms_opt_in = await count_contacts(Contact.sms_opt_in == True)
 
         # Passport expiring soon (next 90 days)
         expiry_date = date.today() + timedelta(days=90)
-        passports_expiring = tenant_db.query(Contact).filter(
+        passports_expiring = await count_contacts(
             Contact.passport_expiry.is_not(None),
-            Contact.passport_expiry <= expiry_date,
-            Contact.deleted_at.is_(None)
-        ).count()
+            Contact.passport_expiry <= expiry_date
+        )
 
         return {
             "total_contacts": total_contacts,
@@ -597,7 +582,7 @@ async def get_contacts_with_expiring_passports(
     tenant_id: str,
     days: int = Query(90, ge=1, le=365),
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_db_by_id)
 ):
     """
     Get contacts with passports expiring in specified days
@@ -612,16 +597,16 @@ async def get_contacts_with_expiring_passports(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         expiry_date = date.today() + timedelta(days=days)
 
-        contacts = tenant_db.query(Contact).join(Actor).filter(
-            Contact.passport_expiry.is_not(None),
-            Contact.passport_expiry <= expiry_date,
-            Contact.deleted_at.is_(None)
-        ).order_by(Contact.passport_expiry).all()
+        result = await tenant_db.execute(
+            select(Contact).join(Contact.actor).options(contains_eager(Contact.actor)).where(
+                Contact.passport_expiry.is_not(None),
+                Contact.passport_expiry <= expiry_date,
+                Contact.deleted_at.is_(None)
+            ).order_by(Contact.passport_expiry)
+        )
+        contacts = result.scalars().all()
 
         response_data = []
         for contact in contacts:
@@ -5,7 +5,7 @@ Base models used across multiple modules
 
 from sqlalchemy import (
     Column, String, Integer, Boolean, DateTime, Text, ForeignKey,
-    Enum as SQLEnum, Index, Numeric, JSON
+    Enum as SQLEnum, Index, Numeric, JSON, Computed
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -40,6 +40,18 @@ class Actor(Base):
     mobile = Column(String(50), nullable=True)
     website = Column(String(255), nullable=True, unique=True, index=True)
 
+    # Search keys maintained by Postgres: trimmed lowercase email, and the digits
+    # of phone and mobile ("+34 600-11 22" -> "346001122"), space separated.
+    # Only the search SQL reads them, so they are left out of the mapping (see
+    # __mapper_args__) and tenants that predate them keep loading actors until
+    # SchemaManager.create_search_indexes adds them.
+    email_normalized = Column(String(255), Computed("lower(btrim(email))", persisted=True))
+    phone_normalized = Column(String(101), Computed(
+        "nullif(btrim(regexp_replace(coalesce(phone, ''), '[^0-9]', '', 'g') || ' ' || "
+        "regexp_replace(coalesce(mobile, ''), '[^0-9]', '', 'g')), '')",
+        persisted=True
+    ))
+
     # Address
     street = Column(String(255), nullable=True)
     city = Column(String(100), nullable=True)
@@ -79,6 +91,9 @@ class Actor(Base):
         Index('idx_actor_created_at', 'created_at'),
         Index('idx_actor_deleted_at', 'deleted_at'),
     )
+    __mapper_args__ = {
+        "exclude_properties": ["email_normalized", "phone_normalized"]
+    }
 
     def __repr__(self):
         if self.type == ActorType.lead:
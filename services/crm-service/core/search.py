@@ -0,0 +1,143 @@
+"""
+Actor search for CRM Service
+Ranked lookup of leads, contacts and accounts by name, company, email or
+phone, served by the trigram indexes in ACTOR_SEARCH_INDEXES, and the actors
+document of global search
+"""
+
+from typing import List, Optional, Tuple
+from sqlalchemy import Integer, Float, String, column, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from shared_search import normalize_term, like_contains
+from .models import Actor
+from .enums import ActorType
+
+# Accent-insensitive name and company of an actor. The index and the queries
+# must use this exact expression for the index to apply.
+ACTOR_NAME_SQL = (
+    "public.search_normalize(coalesce(first_name, '') || ' ' || "
+    "coalesce(last_name, '') || ' ' || coalesce(company_name, ''))"
+)
+
+# Created in every tenant schema by SchemaManager.create_search_indexes.
+# Partial on live actors, which every search filters on.
+ACTOR_SEARCH_INDEXES = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_actor_name_trgm "
+    f"ON actors USING gin ({ACTOR_NAME_SQL} public.gin_trgm_ops) WHERE deleted_at IS NULL",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_actor_email_trgm "
+    "ON actors USING gin (email_normalized public.gin_trgm_ops) WHERE deleted_at IS NULL",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_actor_phone_trgm "
+    "ON actors USING gin (phone_normalized public.gin_trgm_ops) WHERE deleted_at IS NULL",
+]
+
+# Global search document (see shared_search.install_search_sources);
+# category is the actor type: lead, contact or account
+ACTOR_SEARCH_SOURCE = {
+    "table": "actors",
+    "entity_type": "actor",
+    "columns": "type, first_name, last_name, company_name, email, phone, mobile, deleted_at",
+    "title": "coalesce(nullif(concat_ws(' ', first_name, last_name), ''), company_name, email)",
+    "subtitle": "coalesce(company_name, email)",
+    "category": "type",
+    "search_text": (
+        "concat_ws(' ', first_name, last_name, company_name, email, "
+        "regexp_replace(phone, '[^0-9]', '', 'g'), regexp_replace(mobile, '[^0-9]', '', 'g'))"
+    ),
+    "live": "deleted_at IS NULL",
+}
+
+# Fewest digits in a term before it is also looked up as a phone number
+PHONE_MIN_DIGITS = 3
+
+
+def _name_hits(fuzzy: bool) -> str:
+    condition = f"{ACTOR_NAME_SQL} LIKE public.search_normalize(:contains)"
+    if fuzzy:
+        condition = f"({condition} OR public.search_normalize(:term) OPERATOR(public.<%) {ACTOR_NAME_SQL})"
+    return f"""
+        SELECT id AS actor_id,
+               public.word_similarity(public.search_normalize(:term), {ACTOR_NAME_SQL})::float8 AS score,
+               'name' AS matched
+        FROM actors
+        WHERE {condition} AND deleted_at IS NULL
+    """
+
+
+def _email_hits(fuzzy: bool) -> str:
+    condition = "email_normalized LIKE :contains"
+    if fuzzy:
+        condition = f"({condition} OR CAST(:term AS text) OPERATOR(public.<%) email_normalized)"
+    return f"""
+        SELECT id,
+               CASE WHEN email_normalized = :term THEN 1.0
+                    ELSE public.word_similarity(:term, email_normalized) END,
+               'email'
+        FROM actors
+        WHERE {condition} AND deleted_at IS NULL
+    """
+
+
+_PHONE_HITS = """
+        SELECT id, 0.9, 'phone'
+        FROM actors
+        WHERE phone_normalized LIKE :phone AND deleted_at IS NULL
+"""
+
+
+def actor_search_hits(term: str, fuzzy: bool = False):
+    """
+    Matching actors as a selectable with actor_id, score and matched columns
+
+    Names, companies and emails match on a substring of the term (accents
+    and case ignored); with fuzzy they also match by trigram word similarity,
+    which tolerates typos. Terms with PHONE_MIN_DIGITS or more digits also
+    match phone and mobile numbers whatever their formatting. The score is
+    the best of the matching fields, 1.0 for an exact word or email.
+    """
+    term = normalize_term(term)
+    digits = "".join(ch for ch in term if ch.isdigit())
+    branches = [_name_hits(fuzzy), _email_hits(fuzzy)]
+    params = {"term": term, "contains": like_contains(term)}
+    if len(digits) >= PHONE_MIN_DIGITS:
+        branches.append(_PHONE_HITS)
+        params["phone"] = like_contains(digits)
+
+    sql = (
+        "SELECT DISTINCT ON (actor_id) actor_id, score, matched FROM ("
+        + " UNION ALL ".join(branches)
+        + ") hits ORDER BY actor_id, score DESC"
+    )
+    return text(sql).bindparams(**params).columns(
+        column("actor_id", Integer), column("score", Float), column("matched", String)
+    ).subquery("actor_hits")
+
+
+async def search_actor_ids(
+    db: AsyncSession,
+    term: str,
+    limit: int,
+    fuzzy: bool = False,
+    actor_type: Optional[ActorType] = None
+) -> List[Tuple[int, float, str]]:
+    """
+    Best-scoring actors for a search term
+
+    Args:
+        db: Tenant session
+        term: Name, company, email or phone fragment
+        limit: Maximum number of hits
+        fuzzy: Also match misspelled names and emails
+        actor_type: Only return leads, contacts or accounts
+
+    Returns:
+        (actor_id, score, matched field) tuples, best first
+    """
+    hits = actor_search_hits(term, fuzzy)
+    query = select(hits.c.actor_id, hits.c.score, hits.c.matched)
+    if actor_type:
+        query = query.join(Actor, Actor.id == hits.c.actor_id).where(Actor.type == actor_type)
+    result = await db.execute(
+        query.order_by(hits.c.score.desc(), hits.c.actor_id.desc()).limit(limit)
+    )
+    return [(row.actor_id, row.score, row.matched) for row in result]
@@ -5,12 +5,14 @@ API endpoints for industry management with authentication
 
 from typing import List, Optional, Dict, Any
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc, asc, func
+from sqlalchemy import select, and_, or_, desc, asc, func
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_tenant_db, get_db, get_schema_from_tenant_id
+from database import get_tenant_db, get_db, get_schema_from_tenant_id, get_async_tenant_db_by_id, get_async_tenant_read_db_by_id
 from shared_auth import get_current_user_from_token, check_tenant_access
+from shared_pagination import CountMode, count_rows_async
 from .models import Industry
 from .schemas import (
     IndustryCreate, IndustryUpdate, IndustryResponse,
@@ -116,6 +118,7 @@ async def create_industry(
 @router.get("/tenants/{tenant_id}/industries", response_model=List[IndustryResponse])
 async def list_industries(
     tenant_id: str,
+    response: Response,
     parent_id: Optional[int] = Query(None),
     is_active: Optional[bool] = Query(None),
     search: Optional[str] = Query(None),
@@ -123,8 +126,9 @@ async def list_industries(
     page_size: int = Query(20, ge=1, le=100),
     sort_by: str = Query("name"),
     sort_order: str = Query("asc"),
+    count_mode: Optional[CountMode] = Query(None, description="Send X-Total-Count, computed as exact, capped or estimate"),
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_db_by_id)
 ):
     """List industries with filtering and pagination"""
     try:
@@ -135,22 +139,19 @@ async def list_industries(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Build query
-        query = tenant_db.query(Industry)
+        query = select(Industry)
 
         # Apply filters
         if parent_id is not None:
-            query = query.filter(Industry.parent_id == parent_id)
+            query = query.where(Industry.parent_id == parent_id)
 
         if is_active is not None:
-            query = query.filter(Industry.is_active == is_active)
+            query = query.where(Industry.is_active == is_active)
 
         if search:
             search_term = f"%{search}%"
-            query = query.filter(
+            query = query.where(
                 or_(
                     Industry.name.ilike(search_term),
                     Industry.code.ilike(search_term),
@@ -158,6 +159,12 @@ async def list_industries(
                 )
             )
 
+        # Optional total; the body is a plain list, so it travels in headers
+        if count_mode:
+            total, total_mode = await count_rows_async(tenant_db, query, count_mode)
+            response.headers["X-Total-Count"] = str(total)
+            response.headers["X-Total-Count-Mode"] = total_mode
+
         # Apply sorting
         if sort_order == "desc":
             query = query.order_by(desc(getattr(Industry, sort_by)))
@@ -166,24 +173,30 @@ async def list_industries(
 
         # Apply pagination
         offset = (page - 1) * page_size
-        industries = query.offset(offset).limit(page_size).all()
+        result = await tenant_db.execute(query.offset(offset).limit(page_size))
+        industries = result.scalars().all()
+
+        # Children counts and parent names for the whole page
+        industry_ids = [industry.id for industry in industries]
+        parent_ids = {industry.parent_id for industry in industries if industry.parent_id}
+        children_counts = dict((await tenant_db.execute(
+            select(Industry.parent_id, func.count(Industry.id))
+            .where(Industry.parent_id.in_(industry_ids))
+            .group_by(Industry.parent_id)
+        )).all()) if industry_ids else {}
+        parent_names = dict((await tenant_db.execute(
+            select(Industry.id, Industry.name).where(Industry.id.in_(parent_ids))
+        )).all()) if parent_ids else {}
 
         # Build response with additional data
         response_data = []
         for industry in industries:
-            # Get children count
-            children_count = tenant_db.query(Industry).filter(
-                Industry.parent_id == industry.id
-            ).count()
+            children_count = children_counts.get(industry.id, 0)
 
             # Get accounts count (would need Account model imported)
             accounts_count = 0  # Placeholder
 
-            # Get parent name
-            parent_name = None
-            if industry.parent_id:
-                parent = tenant_db.query(Industry).filter(Industry.id == industry.parent_id).first()
-                parent_name = parent.name if parent else None
+            parent_name = parent_names.get(industry.parent_id)
 
             industry_data = {
                 "id": industry.id,
@@ -518,7 +531,7 @@ async def get_industry_hierarchy(
 async def get_industry_stats(
     tenant_id: str,
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_read_db_by_id)
 ):
     """Get industry statistics"""
     try:
@@ -529,14 +542,15 @@ async def get_industry_stats(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Basic counts
-        total_industries = tenant_db.query(Industry).count()
-        active_industries = tenant_db.query(Industry).filter(Industry.is_active == True).count()
+        total_industries = await tenant_db.scalar(select(func.count(Industry.id)))
+        active_industries = await tenant_db.scalar(
+            select(func.count(Industry.id)).where(Industry.is_active == True)
+        )
         inactive_industries = total_industries - active_industries
-        root_industries = tenant_db.query(Industry).filter(Industry.parent_id.is_(None)).count()
+        root_industries = await tenant_db.scalar(
+            select(func.count(Industry.id)).where(Industry.parent_id.is_(None))
+        )
 
         # Industries with accounts
         industries_with_accounts = 0  # Placeholder
@@ -5,13 +5,16 @@ API endpoints for lead management with authentication
 
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc, asc
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import select, and_, or_, desc, asc, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
 
-from database import get_tenant_db, get_db, get_schema_from_tenant_id
+from database import get_async_tenant_db_by_id, get_async_tenant_read_db_by_id
 from shared_auth import get_current_user_from_token, check_tenant_access
+from shared_pagination import CountMode, count_rows_async
 from core.models import Actor
+from core.search import actor_search_hits
 from core.enums import ActorType, LeadStatus
 from .models import Lead
 from .schemas import (
@@ -30,7 +33,7 @@ async def create_lead(
     tenant_id: str,
     lead_data: LeadCreate,
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_db_by_id)
 ):
     """
     Create a new lead with actor information
@@ -45,9 +48,6 @@ async def create_lead(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Create actor first
         actor_data = {
             "type": ActorType.lead,
@@ -68,7 +68,7 @@ async def create_lead(
 
         actor = Actor(**actor_data)
         tenant_db.add(actor)
-        tenant_db.flush()  # Get actor ID
+        await tenant_db.flush()  # Get actor ID
 
         # Create lead
         lead_dict = lead_data.dict(exclude={
@@ -81,7 +81,7 @@ async def create_lead(
 
         lead = Lead(**lead_dict)
         tenant_db.add(lead)
-        tenant_db.commit()
+        await tenant_db.commit()
 
         # Return response with actor data
         response_data = {
@@ -101,7 +101,7 @@ async def create_lead(
         return response_data
 
     except Exception as e:
-        tenant_db.rollback()
+        await tenant_db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating lead: {str(e)}"
@@ -110,14 +110,17 @@ async def create_lead(
 @router.get("/tenants/{tenant_id}/leads", response_model=List[LeadResponse])
 async def list_leads(
     tenant_id: str,
+    response: Response,
     lead_status: Optional[List[LeadStatus]] = Query(None),
     search: Optional[str] = Query(None),
+    fuzzy: bool = Query(False, description="Let search also match misspelled names and emails"),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     sort_by: str = Query("created_at"),
     sort_order: str = Query("desc"),
+    count_mode: Optional[CountMode] = Query(None, description="Send X-Total-Count, computed as exact, capped or estimate"),
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_db_by_id)
 ):
     """
     List leads with filtering and pagination
@@ -132,30 +135,25 @@ async def list_leads(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Build query
-        query = tenant_db.query(Lead).join(Actor).filter(
+        query = select(Lead).join(Lead.actor).options(contains_eager(Lead.actor)).where(
             Lead.deleted_at.is_(None),
             Actor.deleted_at.is_(None)
         )
 
         # Apply filters
         if lead_status:
-            query = query.filter(Lead.lead_status.in_(lead_status))
+            query = query.where(Lead.lead_status.in_(lead_status))
 
         if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Actor.first_name.ilike(search_term),
-                    Actor.last_name.ilike(search_term),
-                    Actor.company_name.ilike(search_term),
-                    Actor.email.ilike(search_term),
-                    Actor.phone.ilike(search_term)
-                )
-            )
+            hits = actor_search_hits(search, fuzzy)
+            query = query.where(Actor.id.in_(select(hits.c.actor_id)))
+
+        # Optional total; the body is a plain list, so it travels in headers
+        if count_mode:
+            total, total_mode = await count_rows_async(tenant_db, query, count_mode)
+            response.headers["X-Total-Count"] = str(total)
+            response.headers["X-Total-Count-Mode"] = total_mode
 
         # Apply sorting
         if sort_order == "desc":
@@ -165,7 +163,8 @@ async def list_leads(
 
         # Apply pagination
         offset = (page - 1) * page_size
-        leads = query.offset(offset).limit(page_size).all()
+        result = await tenant_db.execute(query.offset(offset).limit(page_size))
+        leads = result.scalars().all()
 
         # Build response
         response_data = []
@@ -222,7 +221,7 @@ async def get_lead(
     tenant_id: str,
     lead_id: int,
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_db_by_id)
 ):
     """
     Get a specific lead by ID
@@ -237,15 +236,14 @@ async def get_lead(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Find lead
-        lead = tenant_db.query(Lead).join(Actor).filter(
-            Lead.id == lead_id,
-            Lead.deleted_at.is_(None),
-            Actor.deleted_at.is_(None)
-        ).first()
+        lead = await tenant_db.scalar(
+            select(Lead).join(Lead.actor).options(contains_eager(Lead.actor)).where(
+                Lead.id == lead_id,
+                Lead.deleted_at.is_(None),
+                Actor.deleted_at.is_(None)
+            ).execution_options(populate_existing=True)
+        )
 
         if not lead:
             raise HTTPException(
@@ -308,7 +306,7 @@ async def update_lead(
     lead_id: int,
     lead_data: LeadUpdate,
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_db_by_id)
 ):
     """
     Update a specific lead
@@ -323,14 +321,11 @@ async def update_lead(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Find lead
-        lead = tenant_db.query(Lead).filter(
+        lead = await tenant_db.scalar(select(Lead).where(
             Lead.id == lead_id,
             Lead.deleted_at.is_(None)
-        ).first()
+        ))
 
         if not lead:
             raise HTTPException(
@@ -344,15 +339,15 @@ async def update_lead(
             setattr(lead, field, value)
 
         lead.updated_at = datetime.utcnow()
-        tenant_db.commit()
+        await tenant_db.commit()
 
         # Return updated lead
-        return await get_lead(tenant_id, lead_id, current_user, db)
+        return await get_lead(tenant_id, lead_id, current_user, tenant_db)
 
     except HTTPException:
         raise
     except Exception as e:
-        tenant_db.rollback()
+        await tenant_db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error updating lead: {str(e)}"
@@ -363,7 +358,7 @@ async def delete_lead(
     tenant_id: str,
     lead_id: int,
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_db_by_id)
 ):
     """
     Soft delete a specific lead
@@ -378,14 +373,11 @@ async def delete_lead(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Find lead
-        lead = tenant_db.query(Lead).filter(
+        lead = await tenant_db.scalar(select(Lead).where(
             Lead.id == lead_id,
             Lead.deleted_at.is_(None)
-        ).first()
+        ))
 
         if not lead:
             raise HTTPException(
@@ -396,14 +388,14 @@ async def delete_lead(
         # Soft delete
         lead.deleted_at = datetime.utcnow()
         lead.updated_at = datetime.utcnow()
-        tenant_db.commit()
+        await tenant_db.commit()
 
         return {"message": "Lead deleted successfully"}
 
     except HTTPException:
         raise
     except Exception as e:
-        tenant_db.rollback()
+        await tenant_db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error deleting lead: {str(e)}"
@@ -419,7 +411,7 @@ async def convert_lead(
     lead_id: int,
     convert_data: LeadConvert,
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_db_by_id)
 ):
     """
     Convert a lead to contact/account/opportunity
@@ -434,14 +426,11 @@ async def convert_lead(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Find lead
-        lead = tenant_db.query(Lead).join(Actor).filter(
+        lead = await tenant_db.scalar(select(Lead).join(Actor).where(
             Lead.id == lead_id,
             Lead.deleted_at.is_(None)
-        ).first()
+        ))
 
         if not lead:
             raise HTTPException(
@@ -478,14 +467,14 @@ async def convert_lead(
         if convert_data.create_opportunity:
             conversion_result["created_entities"].append("opportunity")
 
-        tenant_db.commit()
+        await tenant_db.commit()
 
         return conversion_result
 
     except HTTPException:
         raise
     except Exception as e:
-        tenant_db.rollback()
+        await tenant_db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error converting lead: {str(e)}"
@@ -500,7 +489,7 @@ async def bulk_action_leads(
     tenant_id: str,
     bulk_action: LeadBulkAction,
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_db_by_id)
 ):
     """
     Perform bulk actions on multiple leads
@@ -515,14 +504,11 @@ async def bulk_action_leads(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Find leads
-        leads = tenant_db.query(Lead).filter(
+        leads = (await tenant_db.scalars(select(Lead).where(
             Lead.id.in_(bulk_action.lead_ids),
             Lead.deleted_at.is_(None)
-        ).all()
+        ))).all()
 
         if not leads:
             raise HTTPException(
@@ -549,7 +535,7 @@ async def bulk_action_leads(
 
             lead.updated_at = datetime.utcnow()
 
-        tenant_db.commit()
+        await tenant_db.commit()
 
         return {
             "message": f"Bulk action '{bulk_action.action}' completed",
@@ -560,7 +546,7 @@ async def bulk_action_leads(
     except HTTPException:
         raise
     except Exception as e:
-        tenant_db.rollback()
+        await tenant_db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error performing bulk action: {str(e)}"
@@ -574,7 +560,7 @@ async def bulk_action_leads(
 async def get_lead_stats(
     tenant_id: str,
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_read_db_by_id)
 ):
     """
     Get lead statistics
@@ -589,23 +575,16 @@ async def get_lead_stats(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
+        async def count_leads(*conditions) -> int:
+            return await tenant_db.scalar(
+                select(func.count(Lead.id)).where(Lead.deleted_at.is_(None), *conditions)
+            )
 
         # Basic counts
-        total_leads = tenant_db.query(Lead).filter(Lead.deleted_at.is_(None)).count()
-        new_leads = tenant_db.query(Lead).filter(
-            Lead.lead_status == LeadStatus.new,
-            Lead.deleted_at.is_(None)
-        ).count()
-        qualified_leads = tenant_db.query(Lead).filter(
-            Lead.is_qualified == True,
-            Lead.deleted_at.is_(None)
-        ).count()
-        converted_leads = tenant_db.query(Lead).filter(
-            Lead.lead_status == LeadStatus.converted,
-            Lead.deleted_at.is_(None)
-        ).count()
+        total_leads = await count_leads()
+        new_leads = await count_leads(Lead.lead_status == LeadStatus.new)
+        qualified_leads = await count_leads(Lead.is_qualified == True)
+        converted_leads = await count_leads(Lead.lead_status == LeadStatus.converted)
 
         # Calculate conversion rate
         conversion_rate = (converted_leads / total_leads * 100) if total_leads > 0 else 0
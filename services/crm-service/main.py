@@ -14,7 +14,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
 
-from database import get_db, get_tenant_db, cleanup_engines, get_schema_from_tenant_id
+from database import get_db, get_tenant_db, cleanup_engines, cleanup_async_engines, get_schema_from_tenant_id
+from shared_metrics import setup_metrics
 from schema_manager import SchemaManager
 from shared_auth import get_current_user_from_token, check_tenant_access
 from sqlalchemy.orm import Session
@@ -34,6 +35,7 @@ try:
     from opportunities.endpoints import router as opportunities_router
     from quotes.endpoints import router as quotes_router
     from industries.endpoints import router as industries_router
+    from search.endpoints import router as search_router
     logger.info("All module routers imported successfully")
 except ImportError as e:
     logger.error(f"Error importing module routers: {str(e)}")
@@ -45,6 +47,7 @@ except ImportError as e:
     opportunities_router = APIRouter()
     quotes_router = APIRouter()
     industries_router = APIRouter()
+    search_router = APIRouter()
     logger.warning("Using placeholder routers due to import errors")
 
 # Initialize schema manager
@@ -84,6 +87,7 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down CRM Service...")
     cleanup_engines()
+    await cleanup_async_engines()
     logger.info("CRM Service stopped")
 
 
@@ -104,6 +108,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request metrics (/metrics) and Server-Timing headers
+setup_metrics(app, "crm-service")
+
 # Include modular routers
 try:
     app.include_router(leads_router, prefix="/api/v1", tags=["Leads"])
@@ -112,6 +119,7 @@ try:
     app.include_router(opportunities_router, prefix="/api/v1", tags=["Opportunities"])
     app.include_router(quotes_router, prefix="/api/v1", tags=["Quotes"])
     app.include_router(industries_router, prefix="/api/v1", tags=["Industries"])
+    app.include_router(search_router, prefix="/api/v1", tags=["Search"])
     logger.info("All module routers included successfully")
 except Exception as e:
     logger.error(f"Error including module routers: {str(e)}")
@@ -132,7 +140,7 @@ async def root():
         "status": "healthy",
         "modules": [
             "core", "leads", "contacts", "accounts",
-            "opportunities", "quotes", "industries"
+            "opportunities", "quotes", "industries", "search"
         ],
         "timestamp": datetime.utcnow().isoformat()
     }
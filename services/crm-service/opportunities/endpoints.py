@@ -5,12 +5,14 @@ API endpoints for opportunity management with authentication
 
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc, asc, func
+from sqlalchemy import select, and_, or_, desc, asc, func
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_tenant_db, get_db, get_schema_from_tenant_id
+from database import get_tenant_db, get_db, get_schema_from_tenant_id, get_async_tenant_db_by_id, get_async_tenant_read_db_by_id
 from shared_auth import get_current_user_from_token, check_tenant_access
+from shared_pagination import CountMode, count_rows_async
 from core.enums import OpportunityStage
 from .models import Opportunity
 from .schemas import (
@@ -75,6 +77,7 @@ async def create_opportunity(
 @router.get("/tenants/{tenant_id}/opportunities", response_model=List[OpportunityResponse])
 async def list_opportunities(
     tenant_id: str,
+    response: Response,
     stage: Optional[List[OpportunityStage]] = Query(None),
     owner_id: Optional[str] = Query(None),
     account_id: Optional[int] = Query(None),
@@ -83,8 +86,9 @@ async def list_opportunities(
     page_size: int = Query(20, ge=1, le=100),
     sort_by: str = Query("created_at"),
     sort_order: str = Query("desc"),
+    count_mode: Optional[CountMode] = Query(None, description="Send X-Total-Count, computed as exact, capped or estimate"),
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_db_by_id)
 ):
     """List opportunities with filtering and pagination"""
     try:
@@ -95,27 +99,30 @@ async def list_opportunities(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Build query
-        query = tenant_db.query(Opportunity).filter(
+        query = select(Opportunity).where(
             Opportunity.deleted_at.is_(None)
         )
 
         # Apply filters
         if stage:
-            query = query.filter(Opportunity.stage.in_(stage))
+            query = query.where(Opportunity.stage.in_(stage))
 
         if owner_id:
-            query = query.filter(Opportunity.owner_id == owner_id)
+            query = query.where(Opportunity.owner_id == owner_id)
 
         if account_id:
-            query = query.filter(Opportunity.account_id == account_id)
+            query = query.where(Opportunity.account_id == account_id)
 
         if search:
             search_term = f"%{search}%"
-            query = query.filter(Opportunity.name.ilike(search_term))
+            query = query.where(Opportunity.name.ilike(search_term))
+
+        # Optional total; the body is a plain list, so it travels in headers
+        if count_mode:
+            total, total_mode = await count_rows_async(tenant_db, query, count_mode)
+            response.headers["X-Total-Count"] = str(total)
+            response.headers["X-Total-Count-Mode"] = total_mode
 
         # Apply sorting
         if sort_order == "desc":
@@ -125,7 +132,8 @@ async def list_opportunities(
 
         # Apply pagination
         offset = (page - 1) * page_size
-        opportunities = query.offset(offset).limit(page_size).all()
+        result = await tenant_db.execute(query.offset(offset).limit(page_size))
+        opportunities = result.scalars().all()
 
         # Build response
         response_data = []
@@ -427,7 +435,7 @@ async def convert_opportunity(
 async def get_opportunity_stats(
     tenant_id: str,
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_read_db_by_id)
 ):
     """Get opportunity statistics"""
     try:
@@ -438,35 +446,25 @@ async def get_opportunity_stats(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
+        async def count_opportunities(*conditions) -> int:
+            return await tenant_db.scalar(
+                select(func.count(Opportunity.id)).where(Opportunity.deleted_at.is_(None), *conditions)
+            )
 
         # Basic counts
-        total_opportunities = tenant_db.query(Opportunity).filter(
-            Opportunity.deleted_at.is_(None)
-        ).count()
-
-        open_opportunities = tenant_db.query(Opportunity).filter(
-            Opportunity.is_closed == False,
-            Opportunity.deleted_at.is_(None)
-        ).count()
-
-        closed_won = tenant_db.query(Opportunity).filter(
-            Opportunity.stage == OpportunityStage.closed_won,
-            Opportunity.deleted_at.is_(None)
-        ).count()
-
-        closed_lost = tenant_db.query(Opportunity).filter(
-            Opportunity.stage == OpportunityStage.closed_lost,
-            Opportunity.deleted_at.is_(None)
-        ).count()
+        total_opportunities = await count_opportunities()
+        open_opportunities = await count_opportunities(Opportunity.is_closed == False)
+        closed_won = await count_opportunities(Opportunity.stage == OpportunityStage.closed_won)
+        closed_lost = await count_opportunities(Opportunity.stage == OpportunityStage.closed_lost)
 
         # Calculate pipeline value
-        pipeline_value = tenant_db.query(func.sum(Opportunity.amount)).filter(
-            Opportunity.is_closed == False,
-            Opportunity.deleted_at.is_(None),
-            Opportunity.amount.is_not(None)
-        ).scalar() or 0
+        pipeline_value = await tenant_db.scalar(
+            select(func.sum(Opportunity.amount)).where(
+                Opportunity.is_closed == False,
+                Opportunity.deleted_at.is_(None),
+                Opportunity.amount.is_not(None)
+            )
+        ) or 0
 
         # Calculate win rate
         total_closed = closed_won + closed_lost
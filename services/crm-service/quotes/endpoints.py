@@ -5,12 +5,14 @@ API endpoints for quote management with authentication
 
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc, asc, func
+from sqlalchemy import select, and_, or_, desc, asc, func
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_tenant_db, get_db, get_schema_from_tenant_id
+from database import get_tenant_db, get_db, get_schema_from_tenant_id, get_async_tenant_db_by_id, get_async_tenant_read_db_by_id
 from shared_auth import get_current_user_from_token, check_tenant_access
+from shared_pagination import CountMode, count_rows_async
 from core.enums import QuoteStatus
 from .models import Quote, QuoteLine
 from .schemas import (
@@ -80,15 +82,17 @@ async def create_quote(
 @router.get("/tenants/{tenant_id}/quotes", response_model=List[QuoteResponse])
 async def list_quotes(
     tenant_id: str,
-    status: Optional[List[QuoteStatus]] = Query(None),
+    response: Response,
+    quote_status: Optional[List[QuoteStatus]] = Query(None, alias="status"),
     opportunity_id: Optional[int] = Query(None),
     search: Optional[str] = Query(None),
     page: int = Query(1, ge=1),
     page_size: int = Query(20, ge=1, le=100),
     sort_by: str = Query("created_at"),
     sort_order: str = Query("desc"),
+    count_mode: Optional[CountMode] = Query(None, description="Send X-Total-Count, computed as exact, capped or estimate"),
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_db_by_id)
 ):
     """List quotes with filtering and pagination"""
     try:
@@ -99,30 +103,33 @@ async def list_quotes(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Build query
-        query = tenant_db.query(Quote).filter(
+        query = select(Quote).where(
             Quote.deleted_at.is_(None)
         )
 
         # Apply filters
-        if status:
-            query = query.filter(Quote.status.in_(status))
+        if quote_status:
+            query = query.where(Quote.status.in_(quote_status))
 
         if opportunity_id:
-            query = query.filter(Quote.opportunity_id == opportunity_id)
+            query = query.where(Quote.opportunity_id == opportunity_id)
 
         if search:
             search_term = f"%{search}%"
-            query = query.filter(
+            query = query.where(
                 or_(
                     Quote.name.ilike(search_term),
                     Quote.quote_number.ilike(search_term)
                 )
             )
 
+        # Optional total; the body is a plain list, so it travels in headers
+        if count_mode:
+            total, total_mode = await count_rows_async(tenant_db, query, count_mode)
+            response.headers["X-Total-Count"] = str(total)
+            response.headers["X-Total-Count-Mode"] = total_mode
+
         # Apply sorting
         if sort_order == "desc":
             query = query.order_by(desc(getattr(Quote, sort_by)))
@@ -131,7 +138,8 @@ async def list_quotes(
 
         # Apply pagination
         offset = (page - 1) * page_size
-        quotes = query.offset(offset).limit(page_size).all()
+        result = await tenant_db.execute(query.offset(offset).limit(page_size))
+        quotes = result.scalars().all()
 
         # Build response
         response_data = []
@@ -513,7 +521,7 @@ async def accept_quote(
 async def get_quote_stats(
     tenant_id: str,
     current_user: Dict[str, Any] = Depends(get_current_user_from_token),
-    db: Session = Depends(get_db)
+    tenant_db: AsyncSession = Depends(get_async_tenant_read_db_by_id)
 ):
     """Get quote statistics"""
     try:
@@ -524,22 +532,25 @@ async def get_quote_stats(
                 detail="Access denied for this tenant"
             )
 
-        # Get tenant database session
-        tenant_db = get_tenant_db(tenant_id, db)
-
         # Basic counts
-        total_quotes = tenant_db.query(Quote).filter(Quote.deleted_at.is_(None)).count()
+        total_quotes = await tenant_db.scalar(
+            select(func.count(Quote.id)).where(Quote.deleted_at.is_(None))
+        )
 
-        accepted_quotes = tenant_db.query(Quote).filter(
-            Quote.status == QuoteStatus.accepted,
-            Quote.deleted_at.is_(None)
-        ).count()
+        accepted_quotes = await tenant_db.scalar(
+            select(func.count(Quote.id)).where(
+                Quote.status == QuoteStatus.accepted,
+                Quote.deleted_at.is_(None)
+            )
+        )
 
         # Calculate total value
-        total_value = tenant_db.query(func.sum(Quote.total_amount)).filter(
-            Quote.deleted_at.is_(None),
-            Quote.total_amount.is_not(None)
-        ).scalar() or 0
+        total_value = await tenant_db.scalar(
+            select(func.sum(Quote.total_amount)).where(
+                Quote.deleted_at.is_(None),
+                Quote.total_amount.is_not(None)
+            )
+        ) or 0
 
         # Calculate acceptance rate
         acceptance_rate = (accepted_quotes / total_quotes * 100) if total_quotes > 0 else 0
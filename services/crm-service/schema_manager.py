@@ -7,9 +7,12 @@ import logging
 from typing import Optional, List, Dict, Any
 from sqlalchemy import create_engine, text, inspect
 from sqlalchemy.pool import NullPool
+from sqlalchemy.schema import CreateColumn
 import os
 
-from core.models import Base
+from shared_search import setup_search, create_search_indexes, install_search_sources
+from core.models import Base, Actor
+from core.search import ACTOR_SEARCH_INDEXES, ACTOR_SEARCH_SOURCE
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -172,6 +175,43 @@ class SchemaManager:
             logger.error(f"Failed to add foreign key constraints for schema {schema_name}: {str(e)}")
             return False
 
+    def create_search_indexes(self, schema_name: str) -> bool:
+        """
+        Create the normalized search columns and trigram indexes behind actor
+        search, and register actors with global search
+
+        Tenants created before actor search get the generated email and phone
+        columns added (a one-off rewrite of actors); the indexes are built
+        CONCURRENTLY so they do not block writes.
+
+        Args:
+            schema_name: Name of the tenant schema
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+            with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                if not setup_search(conn):
+                    return False
+
+                # Set search path
+                conn.execute(text(f"SET search_path TO {schema_name}"))
+
+                for column in (Actor.__table__.c.email_normalized, Actor.__table__.c.phone_normalized):
+                    column_ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                    conn.exec_driver_sql(f"ALTER TABLE actors ADD COLUMN IF NOT EXISTS {column_ddl}")
+
+                created = create_search_indexes(conn, ACTOR_SEARCH_INDEXES)
+                registered = install_search_sources(conn, [ACTOR_SEARCH_SOURCE])
+                logger.info(f"Created search indexes for schema: {schema_name}")
+                return created and registered
+
+        except Exception as e:
+            logger.error(f"Failed to create search indexes for schema {schema_name}: {str(e)}")
+            return False
+
     def initialize_tenant_schema(self, tenant_id: str, schema_name: str) -> Dict[str, Any]:
         """
         Initialize a complete tenant schema with all CRM tables
@@ -213,7 +253,11 @@ class SchemaManager:
             else:
                 logger.warning(f"Some foreign key constraints could not be added for schema {schema_name}")
 
-            # Step 5: Run any post-creation tasks
+            # Step 5: Create search columns and indexes
+            if not self.create_search_indexes(schema_name):
+                logger.warning(f"Search indexes could not be created for schema {schema_name}")
+
+            # Step 6: Run any post-creation tasks
             self.run_post_creation_tasks(schema_name)
 
             result["status"] = "success"
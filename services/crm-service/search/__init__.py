@@ -0,0 +1,13 @@
+"""
+Search Module for CRM Service
+Handles ranked, typo-tolerant search across leads, contacts and accounts
+"""
+
+from .schemas import ActorSearchHit, ActorSearchResponse
+from .endpoints import router
+
+__all__ = [
+    'ActorSearchHit',
+    'ActorSearchResponse',
+    'router'
+]
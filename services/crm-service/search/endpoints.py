@@ -0,0 +1,97 @@
+"""
+Search Endpoints for CRM Service
+API endpoints for searching leads, contacts and accounts with authentication
+"""
+
+from typing import Optional, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_tenant_read_db_by_id
+from shared_auth import get_current_user_from_token, check_tenant_access
+from shared_search import SEARCH_MIN_LENGTH, SEARCH_MAX_LENGTH
+from core.models import Actor
+from core.enums import ActorType
+from core.search import search_actor_ids
+from leads.models import Lead
+from contacts.models import Contact
+from accounts.models import Account
+from .schemas import ActorSearchResponse
+
+router = APIRouter()
+
+# ============================================
+# ACTOR SEARCH
+# ============================================
+
+@router.get("/tenants/{tenant_id}/actors/search", response_model=ActorSearchResponse)
+async def search_actors(
+    tenant_id: str,
+    q: str = Query(..., min_length=SEARCH_MIN_LENGTH, max_length=SEARCH_MAX_LENGTH, description="Search term"),
+    fuzzy: bool = Query(False, description="Also match misspelled names and emails"),
+    actor_type: Optional[ActorType] = Query(None, alias="type", description="Only leads, contacts or accounts"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results"),
+    current_user: Dict[str, Any] = Depends(get_current_user_from_token),
+    tenant_db: AsyncSession = Depends(get_async_tenant_read_db_by_id)
+):
+    """
+    Ranked search across leads, contacts and accounts
+
+    Names and companies match accent- and case-insensitively, emails by
+    substring and phone numbers by their digits, whatever their formatting.
+    With fuzzy, names and emails also match despite typos. Results are
+    ordered by relevance.
+
+    Requires authentication and tenant access
+    """
+    # Check tenant access
+    if not check_tenant_access(current_user, tenant_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied for this tenant"
+        )
+
+    try:
+        hits = await search_actor_ids(tenant_db, q, limit, fuzzy=fuzzy, actor_type=actor_type)
+        if not hits:
+            return {"query": q, "fuzzy": fuzzy, "items": []}
+
+        # Actors with the lead, contact or account built on them
+        result = await tenant_db.execute(
+            select(Actor, Lead.id, Contact.id, Account.id)
+            .outerjoin(Lead, and_(Lead.actor_id == Actor.id, Lead.deleted_at.is_(None)))
+            .outerjoin(Contact, and_(Contact.actor_id == Actor.id, Contact.deleted_at.is_(None)))
+            .outerjoin(Account, and_(Account.actor_id == Actor.id, Account.deleted_at.is_(None)))
+            .where(Actor.id.in_([actor_id for actor_id, _, _ in hits]))
+        )
+        actors = {actor.id: (actor, lead_id, contact_id, account_id) for actor, lead_id, contact_id, account_id in result}
+
+        items = []
+        for actor_id, score, matched in hits:
+            if actor_id not in actors:
+                continue
+            actor, lead_id, contact_id, account_id = actors[actor_id]
+            items.append({
+                "actor_id": actor.id,
+                "type": actor.type,
+                "lead_id": lead_id,
+                "contact_id": contact_id,
+                "account_id": account_id,
+                "first_name": actor.first_name,
+                "last_name": actor.last_name,
+                "company_name": actor.company_name,
+                "email": actor.email,
+                "phone": actor.phone,
+                "mobile": actor.mobile,
+                "score": round(score, 4),
+                "matched": matched
+            })
+
+        return {"query": q, "fuzzy": fuzzy, "items": items}
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error searching actors: {str(e)}"
+        )
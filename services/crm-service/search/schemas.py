@@ -0,0 +1,37 @@
+"""
+Search Schemas for CRM Service
+Pydantic models for actor search responses
+"""
+
+from typing import Optional, List
+from pydantic import BaseModel, Field
+
+from core.enums import ActorType
+
+# ============================================
+# SEARCH SCHEMAS
+# ============================================
+
+class ActorSearchHit(BaseModel):
+    """Schema for one ranked actor search result"""
+    actor_id: int
+    type: ActorType
+    lead_id: Optional[int] = None
+    contact_id: Optional[int] = None
+    account_id: Optional[int] = None
+
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    company_name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    mobile: Optional[str] = None
+
+    score: float = Field(..., description="Relevance between 0 and 1")
+    matched: str = Field(..., description="name, email or phone")
+
+class ActorSearchResponse(BaseModel):
+    """Schema for actor search response"""
+    query: str
+    fuzzy: bool
+    items: List[ActorSearchHit]
@@ -6,11 +6,13 @@ API endpoints for invoice management
 from typing import List, Optional
 from datetime import datetime, date
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc, func
+from sqlalchemy import select, and_, or_, desc, asc, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from database import get_tenant_db, get_db, get_schema_from_tenant_id
+from database import get_async_tenant_db, get_async_tenant_read_db
 from shared_auth import get_current_user, get_current_tenant, require_permission
+from shared_pagination import PaginationError, sort_columns, keyset_paginate, keyset_page
 from .models import Invoice, InvoiceLine, AccountsReceivable, AccountsPayable
 from .schemas import (
     InvoiceCreate, InvoiceUpdate, InvoiceResponse, InvoiceListResponse,
@@ -30,6 +32,29 @@ from common.enums import (
 
 router = APIRouter()
 
+# Keyset sort keys of the invoice list; each has an index on (column, id)
+INVOICE_SORT_KEYS = {"invoice_date": Invoice.invoice_date, "created_at": Invoice.created_at}
+
+
+async def get_active_invoice(db: AsyncSession, invoice_id: int) -> Optional[Invoice]:
+    """Fetch a non-deleted invoice with its lines (async sessions cannot lazy load them)"""
+    result = await db.execute(
+        select(Invoice)
+        .options(selectinload(Invoice.invoice_lines))
+        .where(and_(Invoice.id == invoice_id, Invoice.deleted_at.is_(None)))
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+
+async def get_active_receivable(db: AsyncSession, ar_id: int) -> Optional[AccountsReceivable]:
+    """Fetch a non-deleted accounts receivable record"""
+    return await db.scalar(
+        select(AccountsReceivable).where(
+            and_(AccountsReceivable.id == ar_id, AccountsReceivable.deleted_at.is_(None))
+        )
+    )
+
 # ============================================
 # INVOICE ENDPOINTS
 # ============================================
@@ -39,7 +64,7 @@ async def create_invoice(
     invoice_data: InvoiceCreate,
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """Create a new invoice"""
     # Check permissions
@@ -52,7 +77,7 @@ async def create_invoice(
             created_by=current_user.get("user_id")
         )
         db.add(invoice)
-        db.flush()  # Get the invoice ID
+        await db.flush()  # Get the invoice ID
 
         # Create invoice lines if provided
         if invoice_data.invoice_lines:
@@ -63,12 +88,11 @@ async def create_invoice(
                 )
                 db.add(invoice_line)
 
-        db.commit()
-        db.refresh(invoice)
+        await db.commit()
 
-        return invoice
+        return await get_active_invoice(db, invoice.id)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating invoice: {str(e)}"
@@ -85,9 +109,13 @@ async def list_invoices(
     start_date: Optional[date] = Query(None, description="Filter invoices from this date"),
     end_date: Optional[date] = Query(None, description="Filter invoices to this date"),
     overdue_only: bool = Query(False, description="Show only overdue invoices"),
+    sort_by: str = Query("invoice_date", description="Sort key: invoice_date, created_at"),
+    sort_order: str = Query("desc", description="asc or desc"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces skip"),
+    include_total: Optional[bool] = Query(None, description="Count all matching invoices (default: only without a cursor)"),
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """List invoices with filtering and pagination"""
     # Check permissions
@@ -95,45 +123,54 @@ async def list_invoices(
 
     try:
         # Build query
-        query = db.query(Invoice).filter(Invoice.deleted_at.is_(None))
+        query = select(Invoice).where(Invoice.deleted_at.is_(None))
 
         # Apply filters
         if status_filter:
-            query = query.filter(Invoice.status == status_filter)
+            query = query.where(Invoice.status == status_filter)
         if invoice_number:
-            query = query.filter(Invoice.invoice_number.ilike(f"%{invoice_number}%"))
+            query = query.where(Invoice.invoice_number.ilike(f"%{invoice_number}%"))
         if account_id:
-            query = query.filter(Invoice.account_id == account_id)
+            query = query.where(Invoice.account_id == account_id)
         if order_id:
-            query = query.filter(Invoice.order_id == order_id)
+            query = query.where(Invoice.order_id == order_id)
         if start_date:
-            query = query.filter(Invoice.invoice_date >= start_date)
+            query = query.where(Invoice.invoice_date >= start_date)
         if end_date:
-            query = query.filter(Invoice.invoice_date <= end_date)
+            query = query.where(Invoice.invoice_date <= end_date)
         if overdue_only:
-            query = query.filter(
+            query = query.where(
                 and_(
                     Invoice.due_date < date.today(),
                     Invoice.balance_due > 0
                 )
             )
 
-        # Get total count
-        total = query.count()
-
-        # Apply pagination and ordering
-        invoices = query.order_by(desc(Invoice.invoice_date)).offset(skip).limit(limit).all()
-
-        # Calculate pagination info
-        pages = (total + limit - 1) // limit
+        # The total is optional: counting rescans the whole filtered set on every page
+        total = None
+        count_total = include_total if include_total is not None else cursor is None
+        if count_total:
+            total = await db.scalar(select(func.count()).select_from(query.subquery()))
+
+        # Apply keyset pagination; without a cursor, skip still works as an offset
+        order, descending = sort_columns(INVOICE_SORT_KEYS, sort_by, sort_order, Invoice.id)
+        page_query = keyset_paginate(query, order, sort_by, descending, cursor, limit)
+        if not cursor:
+            page_query = page_query.offset(skip)
+        result = await db.execute(page_query.options(selectinload(Invoice.invoice_lines)))
+        rows = result.scalars().all()
+        invoices, next_cursor = keyset_page(rows, order, sort_by, descending, limit)
 
         return InvoiceListResponse(
             invoices=invoices,
             total=total,
-            page=(skip // limit) + 1,
+            page=None if cursor else (skip // limit) + 1,
             size=limit,
-            pages=pages
+            pages=(total + limit - 1) // limit if total is not None else None,
+            next_cursor=next_cursor
         )
+    except PaginationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -145,15 +182,13 @@ async def get_invoice(
     invoice_id: int,
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """Get a specific invoice by ID"""
     # Check permissions
     await require_permission(current_user, "invoices:read")
 
-    invoice = db.query(Invoice).filter(
-        and_(Invoice.id == invoice_id, Invoice.deleted_at.is_(None))
-    ).first()
+    invoice = await get_active_invoice(db, invoice_id)
 
     if not invoice:
         raise HTTPException(
@@ -169,15 +204,13 @@ async def update_invoice(
     invoice_data: InvoiceUpdate,
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """Update an existing invoice"""
     # Check permissions
     await require_permission(current_user, "invoices:update")
 
-    invoice = db.query(Invoice).filter(
-        and_(Invoice.id == invoice_id, Invoice.deleted_at.is_(None))
-    ).first()
+    invoice = await get_active_invoice(db, invoice_id)
 
     if not invoice:
         raise HTTPException(
@@ -199,12 +232,11 @@ async def update_invoice(
             setattr(invoice, field, value)
 
         invoice.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(invoice)
+        await db.commit()
 
-        return invoice
+        return await get_active_invoice(db, invoice.id)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error updating invoice: {str(e)}"
@@ -215,15 +247,13 @@ async def delete_invoice(
     invoice_id: int,
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """Soft delete an invoice"""
     # Check permissions
     await require_permission(current_user, "invoices:delete")
 
-    invoice = db.query(Invoice).filter(
-        and_(Invoice.id == invoice_id, Invoice.deleted_at.is_(None))
-    ).first()
+    invoice = await get_active_invoice(db, invoice_id)
 
     if not invoice:
         raise HTTPException(
@@ -240,11 +270,11 @@ async def delete_invoice(
 
     try:
         invoice.deleted_at = datetime.utcnow()
-        db.commit()
+        await db.commit()
 
         return {"message": "Invoice deleted successfully"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error deleting invoice: {str(e)}"
@@ -260,15 +290,13 @@ async def send_invoice(
     send_data: InvoiceSendRequest,
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """Send an invoice via email"""
     # Check permissions
     await require_permission(current_user, "invoices:send")
 
-    invoice = db.query(Invoice).filter(
-        and_(Invoice.id == invoice_id, Invoice.deleted_at.is_(None))
-    ).first()
+    invoice = await get_active_invoice(db, invoice_id)
 
     if not invoice:
         raise HTTPException(
@@ -291,7 +319,7 @@ async def send_invoice(
         # Here you would implement actual email sending logic
         # For now, we'll just simulate it
 
-        db.commit()
+        await db.commit()
 
         return InvoiceSendResponse(
             invoice_id=invoice.id,
@@ -301,7 +329,7 @@ async def send_invoice(
             pdf_attached=send_data.send_pdf
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error sending invoice: {str(e)}"
@@ -313,15 +341,13 @@ async def record_invoice_payment(
     payment_data: InvoicePaymentRequest,
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """Record a payment for an invoice"""
     # Check permissions
     await require_permission(current_user, "invoices:payment")
 
-    invoice = db.query(Invoice).filter(
-        and_(Invoice.id == invoice_id, Invoice.deleted_at.is_(None))
-    ).first()
+    invoice = await get_active_invoice(db, invoice_id)
 
     if not invoice:
         raise HTTPException(
@@ -356,9 +382,9 @@ async def record_invoice_payment(
         invoice.updated_at = datetime.utcnow()
 
         # Update related AR if exists
-        ar_record = db.query(AccountsReceivable).filter(
-            AccountsReceivable.invoice_id == invoice_id
-        ).first()
+        ar_record = await db.scalar(
+            select(AccountsReceivable).where(AccountsReceivable.invoice_id == invoice_id)
+        )
 
         if ar_record:
             ar_record.paid_amount += payment_data.amount
@@ -366,7 +392,7 @@ async def record_invoice_payment(
             if ar_record.balance == 0:
                 ar_record.status = AccountsReceivableStatus.paid
 
-        db.commit()
+        await db.commit()
 
         return InvoicePaymentResponse(
             invoice_id=invoice.id,
@@ -379,7 +405,7 @@ async def record_invoice_payment(
             is_fully_paid=(invoice.balance_due == 0)
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error recording payment: {str(e)}"
@@ -394,7 +420,7 @@ async def create_accounts_receivable(
     ar_data: AccountsReceivableCreate,
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """Create a new accounts receivable record"""
     # Check permissions
@@ -403,12 +429,12 @@ async def create_accounts_receivable(
     try:
         ar_record = AccountsReceivable(**ar_data.model_dump())
         db.add(ar_record)
-        db.commit()
-        db.refresh(ar_record)
+        await db.commit()
+        await db.refresh(ar_record)
 
         return ar_record
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating accounts receivable: {str(e)}"
@@ -425,7 +451,7 @@ async def list_accounts_receivable(
     credit_hold_only: bool = Query(False, description="Show only credit hold records"),
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """List accounts receivable records"""
     # Check permissions
@@ -433,25 +459,26 @@ async def list_accounts_receivable(
 
     try:
         # Build query
-        query = db.query(AccountsReceivable).filter(AccountsReceivable.deleted_at.is_(None))
+        query = select(AccountsReceivable).where(AccountsReceivable.deleted_at.is_(None))
 
         # Apply filters
         if account_id:
-            query = query.filter(AccountsReceivable.account_id == account_id)
+            query = query.where(AccountsReceivable.account_id == account_id)
         if status_filter:
-            query = query.filter(AccountsReceivable.status == status_filter)
+            query = query.where(AccountsReceivable.status == status_filter)
         if aging_bucket:
-            query = query.filter(AccountsReceivable.aging_bucket == aging_bucket)
+            query = query.where(AccountsReceivable.aging_bucket == aging_bucket)
         if overdue_only:
-            query = query.filter(AccountsReceivable.days_overdue > 0)
+            query = query.where(AccountsReceivable.days_overdue > 0)
         if credit_hold_only:
-            query = query.filter(AccountsReceivable.is_on_credit_hold == True)
+            query = query.where(AccountsReceivable.is_on_credit_hold == True)
 
         # Get total count
-        total = query.count()
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
 
         # Apply pagination and ordering
-        ar_records = query.order_by(desc(AccountsReceivable.due_date)).offset(skip).limit(limit).all()
+        result = await db.execute(query.order_by(desc(AccountsReceivable.due_date)).offset(skip).limit(limit))
+        ar_records = result.scalars().all()
 
         # Calculate pagination info
         pages = (total + limit - 1) // limit
@@ -475,15 +502,13 @@ async def write_off_receivable(
     write_off_data: WriteOffRequest,
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """Write off an accounts receivable"""
     # Check permissions
     await require_permission(current_user, "invoices:write_off")
 
-    ar_record = db.query(AccountsReceivable).filter(
-        and_(AccountsReceivable.id == ar_id, AccountsReceivable.deleted_at.is_(None))
-    ).first()
+    ar_record = await get_active_receivable(db, ar_id)
 
     if not ar_record:
         raise HTTPException(
@@ -518,7 +543,7 @@ async def write_off_receivable(
             ar_record.status = AccountsReceivableStatus.written_off
 
         ar_record.updated_at = current_time
-        db.commit()
+        await db.commit()
 
         return WriteOffResponse(
             ar_id=ar_record.id,
@@ -529,7 +554,7 @@ async def write_off_receivable(
             written_off_at=current_time
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error writing off receivable: {str(e)}"
@@ -541,15 +566,13 @@ async def place_credit_hold(
     credit_hold_data: CreditHoldRequest,
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """Place an account on credit hold"""
     # Check permissions
     await require_permission(current_user, "invoices:credit_hold")
 
-    ar_record = db.query(AccountsReceivable).filter(
-        and_(AccountsReceivable.id == ar_id, AccountsReceivable.deleted_at.is_(None))
-    ).first()
+    ar_record = await get_active_receivable(db, ar_id)
 
     if not ar_record:
         raise HTTPException(
@@ -573,7 +596,7 @@ async def place_credit_hold(
         ar_record.credit_hold_by = user_id
         ar_record.updated_at = current_time
 
-        db.commit()
+        await db.commit()
 
         return CreditHoldResponse(
             ar_id=ar_record.id,
@@ -583,7 +606,7 @@ async def place_credit_hold(
             credit_hold_at=current_time
         )
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error placing credit hold: {str(e)}"
@@ -595,15 +618,13 @@ async def release_credit_hold(
     release_data: CreditHoldReleaseRequest,
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """Release an account from credit hold"""
     # Check permissions
     await require_permission(current_user, "invoices:credit_hold")
 
-    ar_record = db.query(AccountsReceivable).filter(
-        and_(AccountsReceivable.id == ar_id, AccountsReceivable.deleted_at.is_(None))
-    ).first()
+    ar_record = await get_active_receivable(db, ar_id)
 
     if not ar_record:
         raise HTTPException(
@@ -624,11 +645,11 @@ async def release_credit_hold(
         ar_record.credit_hold_by = None
         ar_record.updated_at = datetime.utcnow()
 
-        db.commit()
+        await db.commit()
 
         return {"message": "Credit hold released successfully"}
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error releasing credit hold: {str(e)}"
@@ -643,7 +664,7 @@ async def create_accounts_payable(
     ap_data: AccountsPayableCreate,
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """Create a new accounts payable record"""
     # Check permissions
@@ -652,12 +673,12 @@ async def create_accounts_payable(
     try:
         ap_record = AccountsPayable(**ap_data.model_dump())
         db.add(ap_record)
-        db.commit()
-        db.refresh(ap_record)
+        await db.commit()
+        await db.refresh(ap_record)
 
         return ap_record
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating accounts payable: {str(e)}"
@@ -674,7 +695,7 @@ async def list_accounts_payable(
     disputed_only: bool = Query(False, description="Show only disputed records"),
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """List accounts payable records"""
     # Check permissions
@@ -682,25 +703,26 @@ async def list_accounts_payable(
 
     try:
         # Build query
-        query = db.query(AccountsPayable).filter(AccountsPayable.deleted_at.is_(None))
+        query = select(AccountsPayable).where(AccountsPayable.deleted_at.is_(None))
 
         # Apply filters
         if supplier_id:
-            query = query.filter(AccountsPayable.supplier_id == supplier_id)
+            query = query.where(AccountsPayable.supplier_id == supplier_id)
         if status_filter:
-            query = query.filter(AccountsPayable.status == status_filter)
+            query = query.where(AccountsPayable.status == status_filter)
         if overdue_only:
-            query = query.filter(AccountsPayable.days_overdue > 0)
+            query = query.where(AccountsPayable.days_overdue > 0)
         if pending_approval:
-            query = query.filter(AccountsPayable.is_approved == False)
+            query = query.where(AccountsPayable.is_approved == False)
         if disputed_only:
-            query = query.filter(AccountsPayable.is_disputed == True)
+            query = query.where(AccountsPayable.is_disputed == True)
 
         # Get total count
-        total = query.count()
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
 
         # Apply pagination and ordering
-        ap_records = query.order_by(desc(AccountsPayable.due_date)).offset(skip).limit(limit).all()
+        result = await db.execute(query.order_by(desc(AccountsPayable.due_date)).offset(skip).limit(limit))
+        ap_records = result.scalars().all()
 
         # Calculate pagination info
         pages = (total + limit - 1) // limit
@@ -728,28 +750,33 @@ async def get_invoice_summary(
     end_date: Optional[date] = Query(None, description="End date for summary"),
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_read_db)
 ):
     """Get invoice summary and statistics"""
     # Check permissions
     await require_permission(current_user, "invoices:read")
 
     try:
-        # Build base query
-        query = db.query(Invoice).filter(Invoice.deleted_at.is_(None))
+        # Build base filters
+        filters = [Invoice.deleted_at.is_(None)]
 
         if start_date:
-            query = query.filter(Invoice.invoice_date >= start_date)
+            filters.append(Invoice.invoice_date >= start_date)
         if end_date:
-            query = query.filter(Invoice.invoice_date <= end_date)
+            filters.append(Invoice.invoice_date <= end_date)
+
+        async def count_invoices(*conditions) -> int:
+            return await db.scalar(select(func.count(Invoice.id)).where(*filters, *conditions))
 
         # Get total invoices and amounts
-        total_result = query.with_entities(
-            func.count(Invoice.id).label('count'),
-            func.sum(Invoice.total_amount).label('total_amount'),
-            func.sum(Invoice.paid_amount).label('total_paid'),
-            func.sum(Invoice.balance_due).label('total_outstanding')
-        ).first()
+        total_result = (await db.execute(
+            select(
+                func.count(Invoice.id).label('count'),
+                func.sum(Invoice.total_amount).label('total_amount'),
+                func.sum(Invoice.paid_amount).label('total_paid'),
+                func.sum(Invoice.balance_due).label('total_outstanding')
+            ).where(*filters)
+        )).first()
 
         total_invoices = total_result.count or 0
         total_amount = total_result.total_amount or 0
@@ -757,12 +784,14 @@ async def get_invoice_summary(
         total_outstanding = total_result.total_outstanding or 0
 
         # Summary by status
-        status_summary = query.with_entities(
-            Invoice.status,
-            func.sum(Invoice.total_amount).label('total_amount'),
-            func.count(Invoice.id).label('count'),
-            func.avg(Invoice.total_amount).label('avg_amount')
-        ).group_by(Invoice.status).all()
+        status_summary = (await db.execute(
+            select(
+                Invoice.status,
+                func.sum(Invoice.total_amount).label('total_amount'),
+                func.count(Invoice.id).label('count'),
+                func.avg(Invoice.total_amount).label('avg_amount')
+            ).where(*filters).group_by(Invoice.status)
+        )).all()
 
         by_status = [
             InvoiceSummaryByStatus(
@@ -775,14 +804,14 @@ async def get_invoice_summary(
 
         # Summary by age (simplified)
         today = date.today()
-        current_invoices = query.filter(Invoice.due_date >= today).count()
-        overdue_1_30 = query.filter(
+        current_invoices = await count_invoices(Invoice.due_date >= today)
+        overdue_1_30 = await count_invoices(
             and_(Invoice.due_date < today, Invoice.due_date >= today.replace(day=today.day-30))
-        ).count()
-        overdue_31_60 = query.filter(
+        )
+        overdue_31_60 = await count_invoices(
             and_(Invoice.due_date < today.replace(day=today.day-30),
                  Invoice.due_date >= today.replace(day=today.day-60))
-        ).count()
+        )
 
         by_age = [
             InvoiceSummaryByAge(age_bucket="current", total_amount=0, count=current_invoices),
@@ -791,12 +820,12 @@ async def get_invoice_summary(
         ]
 
         # Overdue invoices
-        overdue_result = query.filter(
-            and_(Invoice.due_date < today, Invoice.balance_due > 0)
-        ).with_entities(
-            func.count(Invoice.id).label('count'),
-            func.sum(Invoice.balance_due).label('amount')
-        ).first()
+        overdue_result = (await db.execute(
+            select(
+                func.count(Invoice.id).label('count'),
+                func.sum(Invoice.balance_due).label('amount')
+            ).where(*filters, and_(Invoice.due_date < today, Invoice.balance_due > 0))
+        )).first()
 
         overdue_invoices_count = overdue_result.count or 0
         overdue_amount = overdue_result.amount or 0
@@ -5,7 +5,7 @@ Invoice and accounts receivable/payable models for financial service
 
 from sqlalchemy import (
     Column, String, Integer, Boolean, DateTime, Text, ForeignKey,
-    Enum as SQLEnum, Date, JSON, Numeric, UniqueConstraint, Index
+    Enum as SQLEnum, Date, JSON, Numeric, UniqueConstraint, Index, func
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -67,7 +67,7 @@ class Invoice(Base):
     billing_country = Column(String(100), nullable=True)
 
     # Timestamps
-    created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, server_default=func.now())  # keyset sort key
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
 
@@ -84,6 +84,8 @@ class Invoice(Base):
         Index('idx_invoice_total', 'total_amount'),
         Index('idx_invoice_order', 'order_id'),
         Index('idx_invoice_account', 'account_id'),
+        Index('idx_invoice_date_id', 'invoice_date', 'id'),
+        Index('idx_invoice_created_id', 'created_at', 'id'),
     )
 
 # ============================================
@@ -348,10 +348,11 @@ class CreditHoldReleaseRequest(BaseModel):
 class InvoiceListResponse(BaseModel):
     """Schema for invoice list responses"""
     invoices: List[InvoiceResponse]
-    total: int
-    page: int
+    total: Optional[int] = Field(None, description="Matching invoices; omitted unless counted")
+    page: Optional[int] = Field(None, description="Page number; omitted for cursor requests")
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page; null on the last page")
 
 class InvoiceLineListResponse(BaseModel):
     """Schema for invoice line list responses"""
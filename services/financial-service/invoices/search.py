@@ -0,0 +1,16 @@
+"""
+Invoices search
+Invoice document of global search, found by invoice number or billing name
+"""
+
+# Global search document (see shared_search.install_search_sources)
+INVOICE_SEARCH_SOURCE = {
+    "table": "invoices",
+    "entity_type": "invoice",
+    "columns": "invoice_number, billing_name, status, deleted_at",
+    "title": "invoice_number",
+    "subtitle": "billing_name",
+    "category": "status",
+    "search_text": "concat_ws(' ', invoice_number, billing_name)",
+    "live": "deleted_at IS NULL",
+}
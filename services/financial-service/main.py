@@ -14,7 +14,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import uvicorn
 
-from database import get_db, get_tenant_db, cleanup_engines, get_schema_from_tenant_id
+from database import get_db, get_tenant_db, cleanup_engines, cleanup_async_engines, get_schema_from_tenant_id
+from shared_metrics import setup_metrics
 from schema_manager import SchemaManager
 from shared_auth import get_current_user, get_current_tenant, require_permission
 from sqlalchemy.orm import Session
@@ -76,6 +77,7 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("Shutting down Financial Service...")
     cleanup_engines()
+    await cleanup_async_engines()
     logger.info("Financial Service stopped")
 
 
@@ -98,6 +100,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request metrics (/metrics) and Server-Timing headers
+setup_metrics(app, "financial-service")
+
 # ============================================
 # MODULE ROUTERS INTEGRATION
 # ============================================
@@ -6,11 +6,12 @@ API endpoints for payment management
 from typing import List, Optional
 from datetime import datetime, date
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc, func
+from sqlalchemy import select, and_, or_, desc, asc, func
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_tenant_db, get_db, get_schema_from_tenant_id
+from database import get_async_tenant_db, get_async_tenant_read_db
 from shared_auth import get_current_user, get_current_tenant, require_permission
+from shared_pagination import PaginationError, sort_columns, keyset_paginate, keyset_page
 from .models import Payment, PaymentGateway, PaymentAttempt
 from .schemas import (
     PaymentCreate, PaymentUpdate, PaymentResponse, PaymentListResponse,
@@ -24,6 +25,16 @@ from common.enums import PaymentMethod, PaymentType, TransactionType
 
 router = APIRouter()
 
+# Keyset sort keys of the payment list; each has an index on (column, id)
+PAYMENT_SORT_KEYS = {"payment_date": Payment.payment_date, "created_at": Payment.created_at}
+
+
+async def get_active_payment(db: AsyncSession, payment_id: int) -> Optional[Payment]:
+    """Fetch a non-deleted payment"""
+    return await db.scalar(
+        select(Payment).where(and_(Payment.id == payment_id, Payment.deleted_at.is_(None)))
+    )
+
 # ============================================
 # PAYMENT ENDPOINTS
 # ============================================
@@ -33,7 +44,7 @@ async def create_payment(
     payment_data: PaymentCreate,
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """Create a new payment record"""
     # Check permissions
@@ -45,12 +56,12 @@ async def create_payment(
             processed_by=current_user.get("user_id")
         )
         db.add(payment)
-        db.commit()
-        db.refresh(payment)
+        await db.commit()
+        await db.refresh(payment)
 
         return payment
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating payment: {str(e)}"
@@ -72,9 +83,13 @@ async def list_payments(
     is_refund: Optional[bool] = Query(None, description="Filter by refund status"),
     is_disputed: Optional[bool] = Query(None, description="Filter by dispute status"),
     gateway_code: Optional[str] = Query(None, description="Filter by gateway code"),
+    sort_by: str = Query("payment_date", description="Sort key: payment_date, created_at"),
+    sort_order: str = Query("desc", description="asc or desc"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces skip"),
+    include_total: Optional[bool] = Query(None, description="Count all matching payments (default: only without a cursor)"),
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """List payments with filtering and pagination"""
     # Check permissions
@@ -82,48 +97,57 @@ async def list_payments(
 
     try:
         # Build query
-        query = db.query(Payment).filter(Payment.deleted_at.is_(None))
+        query = select(Payment).where(Payment.deleted_at.is_(None))
 
         # Apply filters
         if payment_method:
-            query = query.filter(Payment.payment_method == payment_method)
+            query = query.where(Payment.payment_method == payment_method)
         if payment_type:
-            query = query.filter(Payment.payment_type == payment_type)
+            query = query.where(Payment.payment_type == payment_type)
         if transaction_type:
-            query = query.filter(Payment.transaction_type == transaction_type)
+            query = query.where(Payment.transaction_type == transaction_type)
         if status_filter:
-            query = query.filter(Payment.status == status_filter)
+            query = query.where(Payment.status == status_filter)
         if invoice_id:
-            query = query.filter(Payment.invoice_id == invoice_id)
+            query = query.where(Payment.invoice_id == invoice_id)
         if order_id:
-            query = query.filter(Payment.order_id == order_id)
+            query = query.where(Payment.order_id == order_id)
         if account_id:
-            query = query.filter(Payment.account_id == account_id)
+            query = query.where(Payment.account_id == account_id)
         if start_date:
-            query = query.filter(Payment.payment_date >= start_date)
+            query = query.where(Payment.payment_date >= start_date)
         if end_date:
-            query = query.filter(Payment.payment_date <= end_date)
+            query = query.where(Payment.payment_date <= end_date)
         if is_refund is not None:
-            query = query.filter(Payment.is_refund == is_refund)
+            query = query.where(Payment.is_refund == is_refund)
         if is_disputed is not None:
-            query = query.filter(Payment.is_disputed == is_disputed)
-
-        # Get total count
-        total = query.count()
-
-        # Apply pagination and ordering
-        payments = query.order_by(desc(Payment.payment_date)).offset(skip).limit(limit).all()
-
-        # Calculate pagination info
-        pages = (total + limit - 1) // limit
+            query = query.where(Payment.is_disputed == is_disputed)
+
+        # The total is optional: counting rescans the whole filtered set on every page
+        total = None
+        count_total = include_total if include_total is not None else cursor is None
+        if count_total:
+            total = await db.scalar(select(func.count()).select_from(query.subquery()))
+
+        # Apply keyset pagination; without a cursor, skip still works as an offset
+        order, descending = sort_columns(PAYMENT_SORT_KEYS, sort_by, sort_order, Payment.id)
+        page_query = keyset_paginate(query, order, sort_by, descending, cursor, limit)
+        if not cursor:
+            page_query = page_query.offset(skip)
+        result = await db.execute(page_query)
+        rows = result.scalars().all()
+        payments, next_cursor = keyset_page(rows, order, sort_by, descending, limit)
 
         return PaymentListResponse(
             payments=payments,
             total=total,
-            page=(skip // limit) + 1,
+            page=None if cursor else (skip // limit) + 1,
             size=limit,
-            pages=pages
+            pages=(total + limit - 1) // limit if total is not None else None,
+            next_cursor=next_cursor
         )
+    except PaginationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -135,15 +159,13 @@ async def get_payment(
     payment_id: int,
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """Get a specific payment by ID"""
     # Check permissions
     await require_permission(current_user, "payments:read")
 
-    payment = db.query(Payment).filter(
-        and_(Payment.id == payment_id, Payment.deleted_at.is_(None))
-    ).first()
+    payment = await get_active_payment(db, payment_id)
 
     if not payment:
         raise HTTPException(
@@ -159,15 +181,13 @@ async def update_payment(
     payment_data: PaymentUpdate,
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """Update an existing payment"""
     # Check permissions
     await require_permission(current_user, "payments:update")
 
-    payment = db.query(Payment).filter(
-        and_(Payment.id == payment_id, Payment.deleted_at.is_(None))
-    ).first()
+    payment = await get_active_payment(db, payment_id)
 
     if not payment:
         raise HTTPException(
@@ -189,12 +209,12 @@ async def update_payment(
             setattr(payment, field, value)
 
         payment.updated_at = datetime.utcnow()
-        db.commit()
-        db.refresh(payment)
+        await db.commit()
+        await db.refresh(payment)
 
         return payment
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error updating payment: {str(e)}"
@@ -209,7 +229,7 @@ async def process_payment(
     payment_request: PaymentProcessRequest,
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """Process a new payment"""
     # Check permissions
@@ -217,7 +237,7 @@ async def process_payment(
 
     try:
         # Select gateway
-        gateway_query = db.query(PaymentGateway).filter(
+        gateway_query = select(PaymentGateway).where(
             and_(
                 PaymentGateway.is_active == True,
                 PaymentGateway.deleted_at.is_(None)
@@ -225,11 +245,11 @@ async def process_payment(
         )
 
         if payment_request.gateway_code:
-            gateway = gateway_query.filter(
+            gateway = await db.scalar(gateway_query.where(
                 PaymentGateway.gateway_code == payment_request.gateway_code
-            ).first()
+            ))
         else:
-            gateway = gateway_query.order_by(asc(PaymentGateway.priority)).first()
+            gateway = await db.scalar(gateway_query.order_by(asc(PaymentGateway.priority)))
 
         if not gateway:
             raise HTTPException(
@@ -285,7 +305,7 @@ async def process_payment(
         )
 
         db.add(payment)
-        db.flush()  # Get payment ID
+        await db.flush()  # Get payment ID
 
         # Create payment attempt record
         attempt = PaymentAttempt(
@@ -336,7 +356,7 @@ async def process_payment(
             attempt.gateway_response_message = "Transaction successful"
             attempt.processing_time_ms = processing_time_ms
 
-            db.commit()
+            await db.commit()
 
             return PaymentProcessResponse(
                 payment_id=payment.id,
@@ -376,7 +396,7 @@ async def process_payment(
             attempt.processing_time_ms = processing_time_ms
             attempt.retry_eligible = True
 
-            db.commit()
+            await db.commit()
 
             return PaymentProcessResponse(
                 payment_id=payment.id,
@@ -393,7 +413,7 @@ async def process_payment(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error processing payment: {str(e)}"
@@ -405,15 +425,13 @@ async def refund_payment(
     refund_request: RefundRequest,
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """Process a payment refund"""
     # Check permissions
     await require_permission(current_user, "payments:refund")
 
-    payment = db.query(Payment).filter(
-        and_(Payment.id == payment_id, Payment.deleted_at.is_(None))
-    ).first()
+    payment = await get_active_payment(db, payment_id)
 
     if not payment:
         raise HTTPException(
@@ -447,9 +465,11 @@ async def refund_payment(
         refund_payment_number = f"REF-{payment.payment_number}-{datetime.now().microsecond}"
 
         # Get gateway info for fees
-        gateway = db.query(PaymentGateway).join(PaymentAttempt).filter(
-            PaymentAttempt.payment_id == payment_id
-        ).first()
+        gateway = await db.scalar(
+            select(PaymentGateway).join(PaymentAttempt).where(
+                PaymentAttempt.payment_id == payment_id
+            )
+        )
 
         refund_fee = 0
         if gateway:
@@ -476,8 +496,8 @@ async def refund_payment(
         )
 
         db.add(refund_payment)
-        db.commit()
-        db.refresh(refund_payment)
+        await db.commit()
+        await db.refresh(refund_payment)
 
         return RefundResponse(
             refund_payment_id=refund_payment.id,
@@ -490,7 +510,7 @@ async def refund_payment(
         )
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error processing refund: {str(e)}"
@@ -505,7 +525,7 @@ async def create_payment_gateway(
     gateway_data: PaymentGatewayCreate,
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """Create a new payment gateway configuration"""
     # Check permissions
@@ -515,12 +535,12 @@ async def create_payment_gateway(
         # Note: In production, sensitive fields like api_key, api_secret should be encrypted
         gateway = PaymentGateway(**gateway_data.model_dump())
         db.add(gateway)
-        db.commit()
-        db.refresh(gateway)
+        await db.commit()
+        await db.refresh(gateway)
 
         return gateway
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating payment gateway: {str(e)}"
@@ -534,7 +554,7 @@ async def list_payment_gateways(
     gateway_type: Optional[str] = Query(None, description="Filter by gateway type"),
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """List payment gateways"""
     # Check permissions
@@ -542,19 +562,20 @@ async def list_payment_gateways(
 
     try:
         # Build query
-        query = db.query(PaymentGateway).filter(PaymentGateway.deleted_at.is_(None))
+        query = select(PaymentGateway).where(PaymentGateway.deleted_at.is_(None))
 
         # Apply filters
         if active_only:
-            query = query.filter(PaymentGateway.is_active == True)
+            query = query.where(PaymentGateway.is_active == True)
         if gateway_type:
-            query = query.filter(PaymentGateway.gateway_type == gateway_type)
+            query = query.where(PaymentGateway.gateway_type == gateway_type)
 
         # Get total count
-        total = query.count()
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
 
         # Apply pagination and ordering
-        gateways = query.order_by(asc(PaymentGateway.priority)).offset(skip).limit(limit).all()
+        result = await db.execute(query.order_by(asc(PaymentGateway.priority)).offset(skip).limit(limit))
+        gateways = result.scalars().all()
 
         # Calculate pagination info
         pages = (total + limit - 1) // limit
@@ -582,15 +603,13 @@ async def create_dispute(
     dispute_data: DisputeCreateRequest,
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_db)
 ):
     """Create a dispute for a payment"""
     # Check permissions
     await require_permission(current_user, "payments:dispute")
 
-    payment = db.query(Payment).filter(
-        and_(Payment.id == payment_id, Payment.deleted_at.is_(None))
-    ).first()
+    payment = await get_active_payment(db, payment_id)
 
     if not payment:
         raise HTTPException(
@@ -613,7 +632,7 @@ async def create_dispute(
         payment.dispute_status = "open"
         payment.updated_at = datetime.utcnow()
 
-        db.commit()
+        await db.commit()
 
         return DisputeResponse(
             payment_id=payment_id,
@@ -626,7 +645,7 @@ async def create_dispute(
         )
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error creating dispute: {str(e)}"
@@ -642,29 +661,32 @@ async def get_payment_summary(
     end_date: Optional[date] = Query(None, description="End date for summary"),
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: AsyncSession = Depends(get_async_tenant_read_db)
 ):
     """Get payment summary and statistics"""
     # Check permissions
     await require_permission(current_user, "payments:read")
 
     try:
-        # Build base query
-        query = db.query(Payment).filter(Payment.deleted_at.is_(None))
+        # Build base filters
+        filters = [Payment.deleted_at.is_(None)]
 
         if start_date:
-            query = query.filter(Payment.payment_date >= start_date)
+            filters.append(Payment.payment_date >= start_date)
         if end_date:
-            query = query.filter(Payment.payment_date <= end_date)
+            filters.append(Payment.payment_date <= end_date)
+
+        async def count_payments(*conditions) -> int:
+            return await db.scalar(select(func.count(Payment.id)).where(*filters, *conditions))
 
         # Get total metrics
-        total_result = query.with_entities(
+        total_result = (await db.execute(select(
             func.count(Payment.id).label('count'),
             func.sum(Payment.amount).label('total_amount'),
             func.sum(func.case([(Payment.is_refund == True, Payment.amount)], else_=0)).label('total_refunds'),
             func.sum(func.coalesce(Payment.gateway_fee, 0)).label('total_fees'),
             func.sum(func.coalesce(Payment.net_amount, Payment.amount)).label('net_amount')
-        ).first()
+        ).where(*filters))).first()
 
         total_payments = total_result.count or 0
         total_amount = total_result.total_amount or 0
@@ -673,17 +695,17 @@ async def get_payment_summary(
         net_amount = total_result.net_amount or 0
 
         # Success rate
-        successful_payments = query.filter(Payment.status == 'completed').count()
+        successful_payments = await count_payments(Payment.status == 'completed')
         success_rate = (successful_payments / total_payments * 100) if total_payments > 0 else 0
 
         # Summary by payment method
-        method_summary = query.with_entities(
+        method_summary = (await db.execute(select(
             Payment.payment_method,
             func.sum(Payment.amount).label('total_amount'),
             func.count(Payment.id).label('count'),
             func.avg(Payment.amount).label('avg_amount'),
             func.count(func.case([(Payment.status == 'completed', 1)])).label('success_count')
-        ).group_by(Payment.payment_method).all()
+        ).where(*filters).group_by(Payment.payment_method))).all()
 
         by_method = [
             PaymentSummaryByMethod(
@@ -696,11 +718,11 @@ async def get_payment_summary(
         ]
 
         # Summary by status
-        status_summary = query.with_entities(
+        status_summary = (await db.execute(select(
             Payment.status,
             func.sum(Payment.amount).label('total_amount'),
             func.count(Payment.id).label('count')
-        ).group_by(Payment.status).all()
+        ).where(*filters).group_by(Payment.status))).all()
 
         by_status = [
             PaymentSummaryByStatus(
@@ -711,14 +733,16 @@ async def get_payment_summary(
         ]
 
         # Summary by gateway (simplified)
-        gateway_summary = query.join(PaymentAttempt).join(PaymentGateway).with_entities(
+        gateway_summary = (await db.execute(select(
             PaymentGateway.gateway_name,
             PaymentGateway.gateway_code,
             func.sum(Payment.amount).label('total_amount'),
             func.count(Payment.id).label('count'),
             func.count(func.case([(Payment.status == 'completed', 1)])).label('success_count'),
             func.avg(PaymentAttempt.processing_time_ms).label('avg_processing_time')
-        ).group_by(PaymentGateway.gateway_name, PaymentGateway.gateway_code).all()
+        ).select_from(Payment).join(PaymentAttempt).join(PaymentGateway).where(*filters).group_by(
+            PaymentGateway.gateway_name, PaymentGateway.gateway_code
+        ))).all()
 
         by_gateway = [
             PaymentSummaryByGateway(
@@ -732,16 +756,16 @@ async def get_payment_summary(
         ]
 
         # Dispute metrics
-        dispute_result = query.filter(Payment.is_disputed == True).with_entities(
+        dispute_result = (await db.execute(select(
             func.count(Payment.id).label('count'),
             func.sum(Payment.dispute_amount).label('amount')
-        ).first()
+        ).where(*filters, Payment.is_disputed == True))).first()
 
         dispute_count = dispute_result.count or 0
         dispute_amount = dispute_result.amount or 0
 
         # Failed payment metrics
-        failed_payment_count = query.filter(Payment.status == 'failed').count()
+        failed_payment_count = await count_payments(Payment.status == 'failed')
 
         return PaymentSummaryResponse(
             total_payments=total_payments,
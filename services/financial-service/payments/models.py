@@ -5,7 +5,7 @@ Payment processing models for financial service
 
 from sqlalchemy import (
     Column, String, Integer, Boolean, DateTime, Text, ForeignKey,
-    Enum as SQLEnum, Date, JSON, Numeric, UniqueConstraint, Index
+    Enum as SQLEnum, Date, JSON, Numeric, UniqueConstraint, Index, func
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -132,7 +132,7 @@ class Payment(Base):
     tax_jurisdiction = Column(String(100), nullable=True)
 
     # Timestamps
-    created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, server_default=func.now())  # keyset sort key
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
 
@@ -143,7 +143,8 @@ class Payment(Base):
     __table_args__ = (
         Index('idx_payment_invoice_id', 'invoice_id'),
         Index('idx_payment_order_id', 'order_id'),
-        Index('idx_payment_date', 'payment_date'),
+        Index('idx_payment_date_id', 'payment_date', 'id'),
+        Index('idx_payment_created_id', 'created_at', 'id'),
         Index('idx_payment_method', 'payment_method'),
         Index('idx_payment_status', 'status'),
         Index('idx_payment_transaction_id', 'transaction_id'),
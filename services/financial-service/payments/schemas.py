@@ -377,10 +377,11 @@ class DisputeResponse(BaseModel):
 class PaymentListResponse(BaseModel):
     """Schema for payment list responses"""
     payments: List[PaymentResponse]
-    total: int
-    page: int
+    total: Optional[int] = Field(None, description="Matching payments; omitted unless counted")
+    page: Optional[int] = Field(None, description="Page number; omitted for cursor requests")
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page; null on the last page")
 
 class PaymentGatewayListResponse(BaseModel):
     """Schema for payment gateway list responses"""
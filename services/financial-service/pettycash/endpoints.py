@@ -7,9 +7,9 @@ from typing import List, Optional
 from datetime import datetime, date
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, desc, asc, func
+from sqlalchemy import and_, or_, desc, asc, func, case
 
-from database import get_tenant_db, get_db, get_schema_from_tenant_id
+from database import get_tenant_db, get_tenant_read_db, get_db, get_schema_from_tenant_id
 from shared_auth import get_current_user, get_current_tenant, require_permission
 from .models import PettyCash, PettyCashTransaction
 from .schemas import (
@@ -662,7 +662,7 @@ async def get_petty_cash_summary(
     end_date: Optional[date] = Query(None, description="End date for summary"),
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
-    db: Session = Depends(get_tenant_db)
+    db: Session = Depends(get_tenant_read_db)
 ):
     """Get petty cash summary and statistics"""
     # Check permissions
@@ -737,10 +737,34 @@ async def get_petty_cash_summary(
             and_(PettyCash.deleted_at.is_(None), PettyCash.is_active == True)
         ).all()
 
+        # Per-fund totals in one grouped query instead of four queries per fund
+        fund_totals = {}
+        if funds:
+            totals_query = db.query(
+                PettyCashTransaction.petty_cash_id,
+                func.count(PettyCashTransaction.id).label('total_transactions'),
+                func.sum(case(
+                    (PettyCashTransaction.transaction_type.in_([
+                        PettyCashTransactionType.expense,
+                        PettyCashTransactionType.withdrawal
+                    ]), PettyCashTransaction.amount),
+                    else_=0
+                )).label('total_expenses'),
+                func.sum(case(
+                    (PettyCashTransaction.transaction_type.in_([
+                        PettyCashTransactionType.deposit,
+                        PettyCashTransactionType.reimbursement
+                    ]), PettyCashTransaction.amount),
+                    else_=0
+                )).label('total_deposits'),
+                func.max(PettyCashTransaction.transaction_date).label('last_transaction_date')
+            ).filter(
+                PettyCashTransaction.petty_cash_id.in_([fund.id for fund in funds])
+            ).group_by(PettyCashTransaction.petty_cash_id)
+            fund_totals = {row.petty_cash_id: row for row in totals_query.all()}
+
         for fund in funds:
-            last_transaction = db.query(PettyCashTransaction).filter(
-                PettyCashTransaction.petty_cash_id == fund.id
-            ).order_by(desc(PettyCashTransaction.transaction_date)).first()
+            totals = fund_totals.get(fund.id)
 
             days_since_reconciliation = None
             if fund.last_reconciled_date:
@@ -750,28 +774,10 @@ async def get_petty_cash_summary(
                 fund_id=fund.id,
                 fund_name=fund.fund_name,
                 current_balance=fund.current_balance,
-                total_transactions=db.query(PettyCashTransaction).filter(
-                    PettyCashTransaction.petty_cash_id == fund.id
-                ).count(),
-                total_expenses=db.query(func.sum(PettyCashTransaction.amount)).filter(
-                    and_(
-                        PettyCashTransaction.petty_cash_id == fund.id,
-                        PettyCashTransaction.transaction_type.in_([
-                            PettyCashTransactionType.expense,
-                            PettyCashTransactionType.withdrawal
-                        ])
-                    )
-                ).scalar() or 0,
-                total_deposits=db.query(func.sum(PettyCashTransaction.amount)).filter(
-                    and_(
-                        PettyCashTransaction.petty_cash_id == fund.id,
-                        PettyCashTransaction.transaction_type.in_([
-                            PettyCashTransactionType.deposit,
-                            PettyCashTransactionType.reimbursement
-                        ])
-                    )
-                ).scalar() or 0,
-                last_transaction_date=last_transaction.transaction_date if last_transaction else None,
+                total_transactions=totals.total_transactions if totals else 0,
+                total_expenses=(totals.total_expenses if totals else None) or 0,
+                total_deposits=(totals.total_deposits if totals else None) or 0,
+                last_transaction_date=totals.last_transaction_date if totals else None,
                 days_since_reconciliation=days_since_reconciliation
             ))
 
@@ -10,6 +10,9 @@ from sqlalchemy.pool import NullPool
 import os
 
 from models_all import Base
+from shared_search import setup_search, install_search_sources
+from invoices.search import INVOICE_SEARCH_SOURCE
+from voucher.search import VOUCHER_SEARCH_SOURCE
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -88,6 +91,11 @@ class SchemaManager:
             # Create all tables from models
             Base.metadata.create_all(bind=engine, checkfirst=True)
 
+            # create_all skips existing tables; add indexes introduced since the schema was created
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(bind=engine, checkfirst=True)
+
             logger.info(f"Financial tables created successfully for schema {schema_name}")
 
             # Dispose of the engine
@@ -103,6 +111,56 @@ class SchemaManager:
             logger.error(f"Failed to create tables for schema {schema_name}: {str(e)}")
             return False
 
+    def migrate_sort_keys(self, schema_name: str) -> bool:
+        """
+        One-off migration making created_at (the keyset sort key) NOT NULL
+
+        Schemas created since the column became NOT NULL already have the
+        constraint. Only tables whose column is still nullable in the database
+        are backfilled and altered, so re-running it takes no locks.
+
+        Args:
+            schema_name: Name of the tenant schema
+
+        Returns:
+            True if successful, False otherwise
+        """
+        sort_key_tables = {
+            table.name: table for table in Base.metadata.sorted_tables
+            if "created_at" in table.c
+            and not table.c.created_at.nullable
+            and table.c.created_at.server_default is not None
+        }
+
+        try:
+            with self.engine.begin() as conn:
+                nullable_tables = conn.execute(text("""
+                    SELECT table_name FROM information_schema.columns
+                    WHERE table_schema = :schema_name
+                    AND column_name = 'created_at'
+                    AND is_nullable = 'YES'
+                """), {"schema_name": schema_name}).scalars().all()
+
+                for table_name in nullable_tables:
+                    table = sort_key_tables.get(table_name)
+                    if table is None:
+                        continue
+                    backfill = "coalesce(updated_at, now())" if "updated_at" in table.c else "now()"
+                    conn.execute(text(
+                        f'UPDATE "{schema_name}".{table_name} SET created_at = {backfill} WHERE created_at IS NULL'
+                    ))
+                    conn.execute(text(
+                        f'ALTER TABLE "{schema_name}".{table_name} ALTER COLUMN created_at SET DEFAULT now(), '
+                        f'ALTER COLUMN created_at SET NOT NULL'
+                    ))
+                    logger.info(f"Made {schema_name}.{table_name}.created_at NOT NULL")
+
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to migrate sort keys for schema {schema_name}: {str(e)}")
+            return False
+
     def add_foreign_key_constraints(self, schema_name: str) -> bool:
         """
         Add foreign key constraints to Financial tables after they're created
@@ -247,6 +305,35 @@ class SchemaManager:
             logger.error(f"Failed to add foreign key constraints for schema {schema_name}: {str(e)}")
             return False
 
+    def register_search_sources(self, schema_name: str) -> bool:
+        """
+        Register invoices and vouchers with global search
+
+        Installs the triggers that keep their search documents current and
+        indexes the existing rows.
+
+        Args:
+            schema_name: Name of the tenant schema
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                if not setup_search(conn):
+                    return False
+
+                # Set search path
+                conn.execute(text(f"SET search_path TO {schema_name}"))
+
+                registered = install_search_sources(conn, [INVOICE_SEARCH_SOURCE, VOUCHER_SEARCH_SOURCE])
+                logger.info(f"Registered search sources for schema: {schema_name}")
+                return registered
+
+        except Exception as e:
+            logger.error(f"Failed to register search sources for schema {schema_name}: {str(e)}")
+            return False
+
     def initialize_tenant_schema(self, tenant_id: str, schema_name: str) -> Dict[str, Any]:
         """
         Initialize a complete tenant schema with all Financial tables
@@ -288,7 +375,11 @@ class SchemaManager:
             else:
                 logger.warning(f"Some foreign key constraints could not be added for schema {schema_name}")
 
-            # Step 5: Run any post-creation tasks
+            # Step 5: Register with global search
+            if not self.register_search_sources(schema_name):
+                logger.warning(f"Global search sources incomplete for schema {schema_name}")
+
+            # Step 6: Run any post-creation tasks
             self.run_post_creation_tasks(schema_name)
 
             result["status"] = "success"
@@ -483,6 +574,7 @@ if __name__ == "__main__":
         print("  drop <schema_name> - Drop a schema")
         print("  list <schema_name> - List tables in a schema")
         print("  info <schema_name> - Get schema information")
+        print("  migrate <schema_name> - Make created_at NOT NULL in an existing schema (one-off)")
         sys.exit(1)
 
     command = sys.argv[1]
@@ -528,6 +620,14 @@ if __name__ == "__main__":
             for table, count in info["table_counts"].items():
                 print(f"    - {table}: {count} rows")
 
+    elif command == "migrate":
+        if len(sys.argv) < 3:
+            print("Usage: python schema_manager.py migrate <schema_name>")
+            sys.exit(1)
+        schema_name = sys.argv[2]
+        success = manager.migrate_sort_keys(schema_name)
+        print(f"Schema migrated: {success}")
+
     else:
         print(f"Unknown command: {command}")
         sys.exit(1)
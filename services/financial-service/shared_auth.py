@@ -1,12 +1,27 @@
 """
 Shared authentication utilities for all microservices
 """
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
+from collections import OrderedDict
 from jose import JWTError, jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
+import json
+import time
+import hmac
+import base64
+import hashlib
+import threading
+
+try:
+    from shared_metrics import timed
+except ImportError:
+    from contextlib import nullcontext
+
+    def timed(component: str):
+        return nullcontext()
 
 # Configuration
 SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-in-production")
@@ -16,6 +31,127 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 # Security scheme
 security = HTTPBearer(auto_error=False)
 
+# Verified token cache configuration
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", 10000))
+TOKEN_CACHE_MAX_TTL = int(os.getenv("TOKEN_CACHE_MAX_TTL", 300))
+
+# Pre-verified claims signed by the API gateway on internal hops
+# (an empty INTERNAL_CLAIMS_SECRET falls back to the JWT key as well)
+INTERNAL_CLAIMS_SECRET = os.getenv("INTERNAL_CLAIMS_SECRET") or SECRET_KEY
+if not INTERNAL_CLAIMS_SECRET:
+    # An empty HMAC key would let anyone forge X-Verified-Claims
+    raise RuntimeError("INTERNAL_CLAIMS_SECRET or JWT_SECRET_KEY must be set")
+TRUST_GATEWAY_CLAIMS = os.getenv("TRUST_GATEWAY_CLAIMS", "true").lower() == "true"
+VERIFIED_CLAIMS_HEADER = "X-Verified-Claims"
+VERIFIED_CLAIMS_SIGNATURE_HEADER = "X-Verified-Claims-Signature"
+
+
+def token_digest(token: str) -> str:
+    """Digest used as cache key so raw tokens are never kept in memory"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache of verified token claims
+
+    Entries expire at the token's exp claim (capped by max_ttl) and the least
+    recently used entry is evicted once max_size is reached.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_MAX_SIZE, max_ttl: int = TOKEN_CACHE_MAX_TTL):
+        self.max_size = max_size
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Return cached claims for a token, or None if absent or expired"""
+        key = token_digest(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def set(self, token: str, claims: Dict[str, Any]):
+        """Cache verified claims until the token expires"""
+        now = time.time()
+        expires_at = now + self.max_ttl
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= now or self.max_size <= 0:
+            return
+
+        key = token_digest(token)
+        with self._lock:
+            self._entries[key] = (expires_at, dict(claims))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+token_cache = VerifiedTokenCache()
+
+
+def verify_forwarded_claims(token: str, headers) -> Optional[Dict[str, Any]]:
+    """
+    Return claims pre-verified and signed by the API gateway, if present and valid
+
+    The signed payload is bound to the token digest, so it is only accepted
+    together with the exact bearer token it was issued for.
+    """
+    if not TRUST_GATEWAY_CLAIMS:
+        return None
+
+    encoded = headers.get(VERIFIED_CLAIMS_HEADER)
+    signature = headers.get(VERIFIED_CLAIMS_SIGNATURE_HEADER)
+    if not encoded or not signature:
+        return None
+
+    expected = hmac.new(INTERNAL_CLAIMS_SECRET.encode("utf-8"), encoded.encode("ascii"), hashlib.sha256).hexdigest()
+    if not hmac.compare_digest(expected, signature):
+        return None
+
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+    except (ValueError, TypeError):
+        return None
+
+    claims = payload.get("claims")
+    if payload.get("token") != token_digest(token) or not isinstance(claims, dict):
+        return None
+
+    exp = claims.get("exp")
+    if isinstance(exp, (int, float)) and exp <= time.time():
+        return None
+
+    token_cache.set(token, claims)
+    return dict(claims)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -29,8 +165,13 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 def verify_token(token: str) -> Dict[str, Any]:
     """Verify and decode a JWT token"""
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        token_cache.set(token, payload)
         return payload
     except JWTError:
         raise HTTPException(
@@ -40,7 +181,8 @@ def verify_token(token: str) -> Dict[str, Any]:
         )
 
 async def get_current_user_from_token(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    request: Request = None
 ) -> Dict[str, Any]:
     """Extract current user from JWT token"""
     if not credentials:
@@ -53,7 +195,11 @@ async def get_current_user_from_token(
     token = credentials.credentials
 
     try:
-        payload = verify_token(token)
+        # Trusted internal hop: reuse the claims the gateway already verified
+        with timed("auth"):
+            payload = verify_forwarded_claims(token, request.headers) if request is not None else None
+            if payload is None:
+                payload = verify_token(token)
         user_id: str = payload.get("sub")
 
         if user_id is None:
@@ -89,14 +235,15 @@ async def get_current_user_from_token(
         )
 
 async def get_optional_user(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    request: Request = None
 ) -> Optional[Dict[str, Any]]:
     """Get current user if authenticated, otherwise return None"""
     if not credentials:
         return None
 
     try:
-        return await get_current_user_from_token(credentials)
+        return await get_current_user_from_token(credentials, request)
     except HTTPException:
         return None
 
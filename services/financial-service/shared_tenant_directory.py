@@ -0,0 +1,361 @@
+"""
+Shared tenant directory for all microservices
+Resolves a tenant id or slug to its schema, status and plan without a database
+round trip on the hot path: lookups hit a per-process TTL cache first, then
+the tenant records tenant-service keeps in Redis, and only then
+shared.tenants. tenant-service publishes an invalidation whenever a tenant is
+updated, suspended or deleted, and every process evicts its copy.
+"""
+from typing import Any, Callable, Dict, Optional, Tuple
+import os
+import json
+import time
+import logging
+import threading
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+TENANT_DIRECTORY_TTL = float(os.getenv("TENANT_DIRECTORY_TTL", 60))
+TENANT_DIRECTORY_MAX_SIZE = int(os.getenv("TENANT_DIRECTORY_MAX_SIZE", 10000))
+# Lifetime of the Redis records; the per-process TTL bounds staleness if a message is missed
+TENANT_DIRECTORY_REDIS_TTL = int(os.getenv("TENANT_DIRECTORY_REDIS_TTL", 3600))
+TENANT_DIRECTORY_CHANNEL = os.getenv("TENANT_DIRECTORY_CHANNEL", "tenants:invalidate")
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+
+# Seconds to skip Redis after a failure, so an outage costs one timeout, not one per request
+REDIS_RETRY_INTERVAL = 30.0
+
+# Fields every directory record carries
+TENANT_FIELDS = ("id", "slug", "schema_name", "status", "subscription_plan")
+
+
+def slug_key(slug: str) -> str:
+    """Redis key of a tenant record, shared with the gateway's plan lookup"""
+    return f"tenant:{slug}"
+
+
+def id_key(tenant_id: str) -> str:
+    return f"tenant:id:{tenant_id}"
+
+
+def _plain(value: Any) -> Any:
+    # Enum columns come back as Enum members from the ORM and as strings from text()
+    value = getattr(value, "value", value)
+    return str(value) if value is not None and not isinstance(value, str) else value
+
+
+def tenant_record(tenant: Any) -> Dict[str, Any]:
+    """Directory record for a Tenant model instance or a shared.tenants row"""
+    mapping = tenant if isinstance(tenant, dict) else None
+    return {
+        field: _plain(mapping.get(field) if mapping is not None else getattr(tenant, field, None))
+        for field in TENANT_FIELDS
+    }
+
+
+def load_tenant(db, tenant_id: Optional[str] = None, slug: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Read one tenant from shared.tenants by id or slug"""
+    column, value = ("id", tenant_id) if tenant_id is not None else ("slug", slug)
+    row = db.execute(
+        text(f"""
+            SELECT id, slug, schema_name, status, subscription_plan
+            FROM shared.tenants
+            WHERE {column} = :value
+        """),
+        {"value": str(value)}
+    ).mappings().first()
+    return tenant_record(dict(row)) if row else None
+
+
+class TenantDirectory:
+    """
+    Tenant lookups by id or slug
+
+    Only tenants that exist are cached, so a new tenant resolves immediately.
+    Records are dicts with TENANT_FIELDS; callers decide which statuses they
+    accept. Redis is optional: without it (or while it is down) lookups fall
+    through to the database and the local TTL alone bounds staleness.
+    """
+
+    def __init__(
+        self,
+        redis_url: str = REDIS_URL,
+        ttl: float = TENANT_DIRECTORY_TTL,
+        max_size: int = TENANT_DIRECTORY_MAX_SIZE,
+        channel: str = TENANT_DIRECTORY_CHANNEL,
+        redis_client=None
+    ):
+        self.redis_url = redis_url
+        self.ttl = ttl
+        self.max_size = max_size
+        self.channel = channel
+        self._redis = redis_client
+        self._redis_retry_at = 0.0
+        self._by_id: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._slug_to_id: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+        self.hits = 0
+        self.redis_hits = 0
+        self.db_loads = 0
+        self.invalidations = 0
+
+    # ---------------------------------------------
+    # Redis
+    # ---------------------------------------------
+
+    def _client(self):
+        if self._redis is None:
+            try:
+                import redis
+            except ImportError:
+                return None
+            self._redis = redis.Redis.from_url(
+                self.redis_url, socket_timeout=1.0, socket_connect_timeout=1.0, decode_responses=True
+            )
+        return self._redis
+
+    def _redis_call(self, action: str, call: Callable[[Any], Any]) -> Any:
+        if time.monotonic() < self._redis_retry_at:
+            return None
+        client = self._client()
+        if client is None:
+            return None
+        try:
+            return call(client)
+        except Exception as e:
+            logger.warning(f"Tenant directory Redis {action} failed: {str(e)}")
+            self._redis_retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+            return None
+
+    def _read_redis(self, key: str, slug: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        raw = self._redis_call("read", lambda client: client.get(key))
+        if not raw:
+            return None
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            return None
+        # Records written before the slug was included only carry it in the key
+        if slug and not record.get("slug"):
+            record["slug"] = slug
+        if not record.get("id") or not record.get("slug") or not record.get("schema_name"):
+            return None
+        return tenant_record(record)
+
+    def _write_redis(self, record: Dict[str, Any]):
+        payload = json.dumps(record)
+
+        def write(client):
+            pipe = client.pipeline()
+            pipe.setex(slug_key(record["slug"]), TENANT_DIRECTORY_REDIS_TTL, payload)
+            pipe.setex(id_key(record["id"]), TENANT_DIRECTORY_REDIS_TTL, payload)
+            pipe.execute()
+
+        self._redis_call("write", write)
+
+    # ---------------------------------------------
+    # Local cache
+    # ---------------------------------------------
+
+    def _cached(self, tenant_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        if tenant_id is None:
+            return None
+        with self._lock:
+            entry = self._by_id.get(tenant_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._forget(tenant_id)
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def _remember(self, record: Dict[str, Any]):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            if len(self._by_id) >= self.max_size and record["id"] not in self._by_id:
+                # Insertion order approximates age; drop the oldest entry
+                self._forget(next(iter(self._by_id)))
+            self._by_id[record["id"]] = (time.monotonic() + self.ttl, record)
+            self._slug_to_id[record["slug"]] = record["id"]
+
+    def _forget(self, tenant_id: str):
+        # Caller holds the lock
+        entry = self._by_id.pop(tenant_id, None)
+        if entry is not None and self._slug_to_id.get(entry[1]["slug"]) == tenant_id:
+            del self._slug_to_id[entry[1]["slug"]]
+
+    # ---------------------------------------------
+    # Lookups
+    # ---------------------------------------------
+
+    def get_by_id(self, tenant_id: str, db) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a tenant id
+
+        Args:
+            tenant_id: UUID of the tenant
+            db: Shared-schema session, only used on a cache miss
+
+        Returns:
+            Tenant record, or None if no such tenant exists
+        """
+        tenant_id = str(tenant_id)
+        self.ensure_listener()
+        record = self._cached(tenant_id)
+        if record is not None:
+            return record
+
+        record = self._read_redis(id_key(tenant_id))
+        if record is not None:
+            self.redis_hits += 1
+        else:
+            record = load_tenant(db, tenant_id=tenant_id)
+            if record is None:
+                return None
+            self.db_loads += 1
+            self._write_redis(record)
+        self._remember(record)
+        return record
+
+    def get_by_slug(self, slug: str, db) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a tenant slug
+
+        Args:
+            slug: Tenant slug (as carried in tokens and subdomains)
+            db: Shared-schema session, only used on a cache miss
+
+        Returns:
+            Tenant record, or None if no such tenant exists
+        """
+        self.ensure_listener()
+        record = self._cached(self._slug_to_id.get(slug))
+        if record is not None:
+            return record
+
+        record = self._read_redis(slug_key(slug), slug)
+        if record is not None:
+            self.redis_hits += 1
+        else:
+            record = load_tenant(db, slug=slug)
+            if record is None:
+                return None
+            self.db_loads += 1
+            self._write_redis(record)
+        self._remember(record)
+        return record
+
+    # ---------------------------------------------
+    # Invalidation
+    # ---------------------------------------------
+
+    def invalidate(self, tenant_id: Optional[str] = None, slug: Optional[str] = None):
+        """Drop one tenant from this process's cache, or everything when neither is given"""
+        with self._lock:
+            if tenant_id is None and slug is None:
+                self._by_id.clear()
+                self._slug_to_id.clear()
+                return
+            self.invalidations += 1
+            if tenant_id is None:
+                tenant_id = self._slug_to_id.get(slug)
+            if tenant_id is not None:
+                self._forget(str(tenant_id))
+            if slug is not None:
+                self._slug_to_id.pop(slug, None)
+
+    def publish(self, tenant: Any):
+        """
+        Store a changed tenant in Redis and tell every process to drop its copy
+
+        Called by tenant-service after committing a create, update, suspension
+        or plan change.
+        """
+        record = tenant_record(tenant)
+        self.invalidate(record["id"], record["slug"])
+        self._write_redis(record)
+        self._publish_invalidation(record["id"], record["slug"])
+
+    def remove(self, tenant_id: str, slug: str):
+        """Delete a tenant's Redis records and tell every process to drop its copy"""
+        tenant_id = str(tenant_id)
+        self.invalidate(tenant_id, slug)
+        self._redis_call("delete", lambda client: client.delete(slug_key(slug), id_key(tenant_id)))
+        self._publish_invalidation(tenant_id, slug)
+
+    def _publish_invalidation(self, tenant_id: str, slug: str):
+        message = json.dumps({"id": tenant_id, "slug": slug})
+        self._redis_call("publish", lambda client: client.publish(self.channel, message))
+
+    def handle_invalidation_message(self, data: Any):
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            logger.warning(f"Ignoring malformed tenant invalidation: {data!r}")
+            return
+        self.invalidate(message.get("id"), message.get("slug"))
+
+    def ensure_listener(self):
+        """Start the background pub/sub subscriber once per process"""
+        if self._listener is not None:
+            return
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = threading.Thread(target=self._listen, name="tenant-directory-listener", daemon=True)
+        self._listener.start()
+
+    def _listen(self):
+        try:
+            import redis
+        except ImportError:
+            logger.warning("redis package not installed; tenant directory relies on its TTL only")
+            return
+
+        backoff = 1.0
+        while True:
+            client = redis.Redis.from_url(self.redis_url, socket_connect_timeout=1.0, decode_responses=True)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(self.channel)
+                logger.info(f"Listening for tenant invalidations on {self.channel}")
+                backoff = 1.0
+                for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.handle_invalidation_message(message.get("data"))
+            except Exception as e:
+                logger.warning(f"Tenant invalidation listener error: {str(e)}")
+                # Messages may have been missed while disconnected
+                self.invalidate()
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                try:
+                    pubsub.close()
+                    client.close()
+                except Exception:
+                    pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._by_id)
+        return {
+            "size": size,
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "db_loads": self.db_loads,
+            "invalidations": self.invalidations,
+            "listening": self._listener is not None and self._listener.is_alive(),
+        }
+
+
+# Process-wide directory
+tenant_directory = TenantDirectory()
@@ -0,0 +1,148 @@
+"""
+Unit Tests for Keyset Pagination
+Tests cursor encoding and the page look-ahead of shared_pagination
+"""
+
+import pytest
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+
+from sqlalchemy import Date, DateTime, Integer, column, select, table
+from sqlalchemy.dialects import postgresql
+
+from shared_pagination import (
+    PaginationError, decode_cursor, encode_cursor, keyset_page, keyset_paginate, sort_columns
+)
+
+
+invoices = table(
+    "invoices",
+    column("id", Integer),
+    column("invoice_date", Date),
+    column("created_at", DateTime(timezone=True))
+)
+COLUMNS = [invoices.c.created_at, invoices.c.id]
+
+
+def rows(count):
+    """Rows ordered by created_at desc, id desc"""
+    return [
+        SimpleNamespace(id=count - i, created_at=datetime(2024, 1, 1, 12, count - i, tzinfo=timezone.utc))
+        for i in range(count)
+    ]
+
+
+@pytest.mark.unit
+class TestCursorEncoding:
+    """Test encode_cursor / decode_cursor"""
+
+    @pytest.mark.parametrize("value", [
+        date(2024, 2, 29),
+        datetime(2024, 2, 29, 23, 59, 59, 123456),
+        datetime(2024, 2, 29, 23, 59, 59, tzinfo=timezone.utc),
+        Decimal("1234.50"),
+        "INV-0001",
+    ])
+    def test_round_trip_keeps_value_and_type(self, value):
+        """Test every key type decodes to an equal value of the same type"""
+        cursor = encode_cursor("invoice_date", True, [value, 42])
+        decoded = decode_cursor(cursor, "invoice_date", True, 2)
+        assert decoded == [value, 42]
+        assert type(decoded[0]) is type(value)
+
+    def test_cursor_is_url_safe(self):
+        """Test cursors can be passed as a query parameter unescaped"""
+        cursor = encode_cursor("created_at", False, [datetime(2024, 1, 1), 10 ** 12])
+        assert "=" not in cursor
+        assert "+" not in cursor and "/" not in cursor
+
+    def test_rejects_cursor_of_another_sort_key(self):
+        """Test a cursor issued for one sort_by cannot page another"""
+        cursor = encode_cursor("invoice_date", True, [date(2024, 1, 1), 1])
+        with pytest.raises(PaginationError, match="different sort order"):
+            decode_cursor(cursor, "created_at", True, 2)
+
+    def test_rejects_cursor_of_another_direction(self):
+        """Test a descending cursor cannot page an ascending list"""
+        cursor = encode_cursor("invoice_date", True, [date(2024, 1, 1), 1])
+        with pytest.raises(PaginationError, match="different sort order"):
+            decode_cursor(cursor, "invoice_date", False, 2)
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", "", "e30", "!!!"])
+    def test_rejects_garbage(self, cursor):
+        """Test undecodable cursors raise PaginationError, not a 500"""
+        with pytest.raises(PaginationError):
+            decode_cursor(cursor, "invoice_date", True, 2)
+
+    def test_rejects_wrong_key_count(self):
+        """Test a cursor must carry one value per key column"""
+        cursor = encode_cursor("invoice_date", True, [date(2024, 1, 1)])
+        with pytest.raises(PaginationError):
+            decode_cursor(cursor, "invoice_date", True, 2)
+
+    def test_rejects_null_key(self):
+        """Test a NULL key value is refused, as it would match no row"""
+        cursor = encode_cursor("invoice_date", True, [None, 1])
+        with pytest.raises(PaginationError):
+            decode_cursor(cursor, "invoice_date", True, 2)
+
+
+@pytest.mark.unit
+class TestSortColumns:
+    """Test sort_columns"""
+
+    def test_appends_id_tie_breaker(self):
+        """Test the primary key is appended to the sort column"""
+        columns, descending = sort_columns({"invoice_date": invoices.c.invoice_date}, "invoice_date", "desc", invoices.c.id)
+        assert columns == [invoices.c.invoice_date, invoices.c.id]
+        assert descending is True
+
+    def test_rejects_unknown_sort_key(self):
+        """Test sorting by an unindexed column is refused"""
+        with pytest.raises(PaginationError):
+            sort_columns({"invoice_date": invoices.c.invoice_date}, "total_amount", "desc", invoices.c.id)
+
+    def test_rejects_unknown_direction(self):
+        """Test sort_order must be asc or desc"""
+        with pytest.raises(PaginationError):
+            sort_columns({"invoice_date": invoices.c.invoice_date}, "invoice_date", "sideways", invoices.c.id)
+
+
+@pytest.mark.unit
+class TestKeysetPage:
+    """Test keyset_paginate and keyset_page"""
+
+    def test_full_page_with_look_ahead_row_has_next_cursor(self):
+        """Test the extra row is dropped and the cursor points at the last kept row"""
+        page, next_cursor = keyset_page(rows(4), COLUMNS, "created_at", True, 3)
+        assert [row.id for row in page] == [4, 3, 2]
+        assert decode_cursor(next_cursor, "created_at", True, 2) == [page[-1].created_at, 2]
+
+    def test_last_page_has_no_cursor(self):
+        """Test a page without the look-ahead row is the last one"""
+        page, next_cursor = keyset_page(rows(3), COLUMNS, "created_at", True, 3)
+        assert len(page) == 3
+        assert next_cursor is None
+
+    def test_empty_page(self):
+        """Test an empty result is a last page"""
+        assert keyset_page([], COLUMNS, "created_at", True, 3) == ([], None)
+
+    def test_query_fetches_one_extra_row(self):
+        """Test keyset_paginate limits to page_size + 1"""
+        query = keyset_paginate(select(invoices), COLUMNS, "created_at", True, None, 20)
+        compiled = query.compile(dialect=postgresql.dialect())
+        assert "ORDER BY invoices.created_at DESC, invoices.id DESC" in str(compiled)
+        assert 21 in compiled.params.values()
+
+    @pytest.mark.parametrize("descending,operator", [(True, "<"), (False, ">")])
+    def test_query_continues_after_cursor(self, descending, operator):
+        """Test the cursor becomes a row comparison in the sort direction"""
+        last = rows(1)[0]
+        cursor = encode_cursor("created_at", descending, [last.created_at, last.id])
+        query = keyset_paginate(select(invoices), COLUMNS, "created_at", descending, cursor, 20)
+        compiled = query.compile(dialect=postgresql.dialect())
+        assert f"(invoices.created_at, invoices.id) {operator} (" in str(compiled)
+        assert last.created_at in compiled.params.values()
+        assert last.id in compiled.params.values()
@@ -0,0 +1,229 @@
+"""
+Unit Tests for the Tenant Directory
+Tests lookups, caching and invalidation of shared_tenant_directory against an
+in-memory shared.tenants table and an in-memory Redis double
+"""
+
+import json
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+import shared_tenant_directory
+from shared_tenant_directory import TenantDirectory, id_key, slug_key
+
+ACME_ID = "11111111-1111-1111-1111-111111111111"
+
+
+class FakeRedis:
+    """The subset of redis.Redis the directory uses, kept in a dict"""
+
+    def __init__(self):
+        self.values = {}
+        self.published = []
+        self.fail = False
+
+    def _check(self):
+        if self.fail:
+            raise ConnectionError("redis down")
+
+    def get(self, key):
+        self._check()
+        return self.values.get(key)
+
+    def setex(self, key, ttl, value):
+        self._check()
+        self.values[key] = value
+
+    def delete(self, *keys):
+        self._check()
+        for key in keys:
+            self.values.pop(key, None)
+
+    def publish(self, channel, message):
+        self._check()
+        self.published.append((channel, json.loads(message)))
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        self._check()
+
+
+@pytest.fixture
+def shared_db():
+    """Session with a shared.tenants table holding one active tenant"""
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+
+    @event.listens_for(engine, "connect")
+    def attach_shared(connection, _):
+        connection.execute("ATTACH DATABASE ':memory:' AS shared")
+
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE shared.tenants (
+                id TEXT PRIMARY KEY, slug TEXT, schema_name TEXT, status TEXT, subscription_plan TEXT
+            )
+        """))
+        conn.execute(text(
+            "INSERT INTO shared.tenants VALUES (:id, 'acme', 'tenant_acme', 'active', 'starter')"
+        ), {"id": ACME_ID})
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture
+def redis_client():
+    return FakeRedis()
+
+
+@pytest.fixture
+def directory(redis_client, monkeypatch):
+    tenant_directory = TenantDirectory(redis_client=redis_client, ttl=60, max_size=2)
+    # No pub/sub thread in unit tests; messages are delivered by hand
+    monkeypatch.setattr(tenant_directory, "ensure_listener", lambda: None)
+    return tenant_directory
+
+
+def rename_schema(db, schema_name):
+    db.execute(text("UPDATE shared.tenants SET schema_name = :schema_name"), {"schema_name": schema_name})
+    db.commit()
+
+
+@pytest.mark.unit
+class TestTenantLookups:
+    """Test the cache, Redis and database tiers"""
+
+    def test_miss_loads_from_database_and_fills_redis(self, directory, redis_client, shared_db):
+        """Test a first lookup reads shared.tenants and stores the record in Redis"""
+        record = directory.get_by_id(ACME_ID, shared_db)
+        assert record == {
+            "id": ACME_ID, "slug": "acme", "schema_name": "tenant_acme",
+            "status": "active", "subscription_plan": "starter",
+        }
+        assert directory.db_loads == 1
+        assert json.loads(redis_client.values[slug_key("acme")]) == record
+        assert json.loads(redis_client.values[id_key(ACME_ID)]) == record
+
+    def test_second_lookup_hits_local_cache(self, directory, shared_db):
+        """Test a cached tenant is served without Redis or the database"""
+        directory.get_by_id(ACME_ID, shared_db)
+        assert directory.get_by_slug("acme", None)["schema_name"] == "tenant_acme"
+        assert directory.hits == 1
+        assert directory.db_loads == 1
+
+    def test_redis_record_spares_the_database(self, directory, redis_client):
+        """Test another process's Redis record is used before the database"""
+        redis_client.values[slug_key("globex")] = json.dumps({"id": "g-1", "schema_name": "tenant_globex"})
+        record = directory.get_by_slug("globex", None)
+        assert record["slug"] == "globex"
+        assert directory.redis_hits == 1
+        assert directory.db_loads == 0
+
+    def test_unknown_tenant_is_not_cached(self, directory, shared_db):
+        """Test a tenant created after a failed lookup resolves at once"""
+        assert directory.get_by_slug("initech", shared_db) is None
+        shared_db.execute(text(
+            "INSERT INTO shared.tenants VALUES ('i-1', 'initech', 'tenant_initech', 'active', 'free')"
+        ))
+        assert directory.get_by_slug("initech", shared_db)["schema_name"] == "tenant_initech"
+
+    def test_expired_entry_is_reloaded(self, directory, redis_client, shared_db, monkeypatch):
+        """Test the local TTL bounds staleness when a message is missed"""
+        now = [1000.0]
+        monkeypatch.setattr(shared_tenant_directory.time, "monotonic", lambda: now[0])
+        directory.get_by_id(ACME_ID, shared_db)
+        rename_schema(shared_db, "tenant_acme_v2")
+        redis_client.values.clear()
+        assert directory.get_by_id(ACME_ID, shared_db)["schema_name"] == "tenant_acme"
+        now[0] += 61
+        assert directory.get_by_id(ACME_ID, shared_db)["schema_name"] == "tenant_acme_v2"
+
+    def test_redis_outage_falls_back_to_database(self, directory, redis_client, shared_db):
+        """Test lookups keep working while Redis is down"""
+        redis_client.fail = True
+        assert directory.get_by_slug("acme", shared_db)["id"] == ACME_ID
+        assert directory.db_loads == 1
+
+    def test_cache_is_bounded(self, directory, redis_client):
+        """Test the oldest entry is dropped at max_size"""
+        for index in range(3):
+            redis_client.values[slug_key(f"t{index}")] = json.dumps(
+                {"id": f"id-{index}", "slug": f"t{index}", "schema_name": f"tenant_t{index}"}
+            )
+            directory.get_by_slug(f"t{index}", None)
+        assert directory.stats()["size"] == 2
+        assert directory._cached("id-0") is None
+
+
+@pytest.mark.unit
+class TestTenantInvalidation:
+    """Test invalidation by id, slug, message and publish"""
+
+    def test_invalidate_by_id_forces_reload(self, directory, redis_client, shared_db):
+        """Test a dropped tenant is read again on next use"""
+        directory.get_by_id(ACME_ID, shared_db)
+        rename_schema(shared_db, "tenant_acme_v2")
+        redis_client.values.clear()
+        directory.invalidate(ACME_ID)
+        assert directory.get_by_slug("acme", shared_db)["schema_name"] == "tenant_acme_v2"
+        assert directory.invalidations == 1
+
+    def test_invalidate_by_slug(self, directory, shared_db):
+        """Test a slug alone is enough to drop a tenant"""
+        directory.get_by_id(ACME_ID, shared_db)
+        directory.invalidate(slug="acme")
+        assert directory._cached(ACME_ID) is None
+        assert directory.stats()["size"] == 0
+
+    def test_invalidate_all(self, directory, shared_db):
+        """Test a full flush, as after a lost pub/sub connection"""
+        directory.get_by_id(ACME_ID, shared_db)
+        directory.invalidate()
+        assert directory.stats()["size"] == 0
+        assert directory._slug_to_id == {}
+
+    def test_renamed_slug_is_not_served(self, directory, redis_client, shared_db):
+        """Test the old slug stops resolving after a slug change is published"""
+        directory.get_by_id(ACME_ID, shared_db)
+        directory.publish({
+            "id": ACME_ID, "slug": "acme-corp", "schema_name": "tenant_acme",
+            "status": "active", "subscription_plan": "starter",
+        })
+        assert "acme" not in directory._slug_to_id
+        assert json.loads(redis_client.values[slug_key("acme-corp")])["id"] == ACME_ID
+
+    def test_publish_stores_record_and_notifies(self, directory, redis_client, shared_db):
+        """Test publish refreshes Redis and broadcasts the change"""
+        directory.get_by_id(ACME_ID, shared_db)
+        directory.publish({
+            "id": ACME_ID, "slug": "acme", "schema_name": "tenant_acme",
+            "status": "suspended", "subscription_plan": "starter",
+        })
+        assert redis_client.published == [(directory.channel, {"id": ACME_ID, "slug": "acme"})]
+        assert directory.get_by_slug("acme", None)["status"] == "suspended"
+        assert directory.redis_hits == 1
+
+    def test_remove_deletes_redis_records(self, directory, redis_client, shared_db):
+        """Test a deleted tenant leaves neither Redis record behind"""
+        directory.get_by_id(ACME_ID, shared_db)
+        directory.remove(ACME_ID, "acme")
+        assert slug_key("acme") not in redis_client.values
+        assert id_key(ACME_ID) not in redis_client.values
+        assert redis_client.published[-1][1] == {"id": ACME_ID, "slug": "acme"}
+
+    def test_invalidation_message(self, directory, shared_db):
+        """Test a pub/sub message from another process drops the tenant"""
+        directory.get_by_id(ACME_ID, shared_db)
+        directory.handle_invalidation_message(json.dumps({"id": ACME_ID, "slug": "acme"}))
+        assert directory._cached(ACME_ID) is None
+
+    def test_malformed_message_is_ignored(self, directory, shared_db):
+        """Test garbage on the channel does not flush or break the cache"""
+        directory.get_by_id(ACME_ID, shared_db)
+        directory.handle_invalidation_message("not json")
+        directory.handle_invalidation_message(None)
+        assert directory._cached(ACME_ID) is not None
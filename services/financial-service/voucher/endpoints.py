@@ -3,7 +3,7 @@ Voucher Module Endpoints
 API endpoints for voucher management
 """
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime, date
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
@@ -11,6 +11,7 @@ from sqlalchemy import and_, or_, desc, asc, func
 
 from database import get_tenant_db, get_db, get_schema_from_tenant_id
 from shared_auth import get_current_user, get_current_tenant, require_permission
+from shared_pagination import PaginationError, sort_columns, keyset_paginate, keyset_page
 from .models import Voucher
 from .schemas import (
     VoucherCreate, VoucherUpdate, VoucherResponse, VoucherListResponse,
@@ -27,6 +28,9 @@ from .schemas import (
 
 router = APIRouter()
 
+# Keyset sort keys of the voucher list; each has an index on (column, id)
+VOUCHER_SORT_KEYS = {"voucher_date": Voucher.voucher_date, "created_at": Voucher.created_at}
+
 # ============================================
 # VOUCHER ENDPOINTS
 # ============================================
@@ -75,6 +79,10 @@ async def list_vouchers(
     accounting_period: Optional[str] = Query(None, description="Filter by accounting period"),
     is_approved: Optional[bool] = Query(None, description="Filter by approval status"),
     is_paid: Optional[bool] = Query(None, description="Filter by payment status"),
+    sort_by: str = Query("voucher_date", description="Sort key: voucher_date, created_at"),
+    sort_order: str = Query("desc", description="asc or desc"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; replaces skip"),
+    include_total: Optional[bool] = Query(None, description="Count all matching vouchers (default: only without a cursor)"),
     current_user=Depends(get_current_user),
     current_tenant=Depends(get_current_tenant),
     db: Session = Depends(get_tenant_db)
@@ -113,22 +121,30 @@ async def list_vouchers(
         if is_paid is not None:
             query = query.filter(Voucher.is_paid == is_paid)
 
-        # Get total count
-        total = query.count()
-
-        # Apply pagination and ordering
-        vouchers = query.order_by(desc(Voucher.voucher_date)).offset(skip).limit(limit).all()
+        # The total is optional: counting rescans the whole filtered set on every page
+        total = None
+        count_total = include_total if include_total is not None else cursor is None
+        if count_total:
+            total = query.count()
 
-        # Calculate pagination info
-        pages = (total + limit - 1) // limit
+        # Apply keyset pagination; without a cursor, skip still works as an offset
+        order, descending = sort_columns(VOUCHER_SORT_KEYS, sort_by, sort_order, Voucher.id)
+        page_query = keyset_paginate(query, order, sort_by, descending, cursor, limit)
+        if not cursor:
+            page_query = page_query.offset(skip)
+        rows = page_query.all()
+        vouchers, next_cursor = keyset_page(rows, order, sort_by, descending, limit)
 
         return VoucherListResponse(
             vouchers=vouchers,
             total=total,
-            page=(skip // limit) + 1,
+            page=None if cursor else (skip // limit) + 1,
             size=limit,
-            pages=pages
+            pages=(total + limit - 1) // limit if total is not None else None,
+            next_cursor=next_cursor
         )
+    except PaginationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -332,6 +348,15 @@ async def approve_voucher(
             detail=f"Error processing voucher approval: {str(e)}"
         )
 
+def load_vouchers(db: Session, voucher_ids: List[int]) -> Dict[int, Voucher]:
+    """Non-deleted vouchers among voucher_ids, by id, loaded in one query"""
+    if not voucher_ids:
+        return {}
+    vouchers = db.query(Voucher).filter(
+        and_(Voucher.id.in_(voucher_ids), Voucher.deleted_at.is_(None))
+    ).all()
+    return {voucher.id: voucher for voucher in vouchers}
+
 @router.post("/vouchers/bulk-approve", response_model=BulkVoucherApprovalResponse)
 async def bulk_approve_vouchers(
     approval_data: BulkVoucherApprovalRequest,
@@ -349,10 +374,10 @@ async def bulk_approve_vouchers(
     current_time = datetime.utcnow()
 
     try:
+        vouchers = load_vouchers(db, approval_data.voucher_ids)
+
         for voucher_id in approval_data.voucher_ids:
-            voucher = db.query(Voucher).filter(
-                and_(Voucher.id == voucher_id, Voucher.deleted_at.is_(None))
-            ).first()
+            voucher = vouchers.get(voucher_id)
 
             if not voucher:
                 failed_vouchers.append({
@@ -484,10 +509,10 @@ async def bulk_pay_vouchers(
     current_time = datetime.utcnow()
 
     try:
+        vouchers = load_vouchers(db, payment_data.voucher_ids)
+
         for voucher_id in payment_data.voucher_ids:
-            voucher = db.query(Voucher).filter(
-                and_(Voucher.id == voucher_id, Voucher.deleted_at.is_(None))
-            ).first()
+            voucher = vouchers.get(voucher_id)
 
             if not voucher:
                 failed_vouchers.append({
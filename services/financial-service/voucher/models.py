@@ -5,7 +5,7 @@ Payment voucher models for financial service
 
 from sqlalchemy import (
     Column, String, Integer, Boolean, DateTime, Text, ForeignKey,
-    Enum as SQLEnum, Date, JSON, Numeric, UniqueConstraint, Index
+    Enum as SQLEnum, Date, JSON, Numeric, UniqueConstraint, Index, func
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
@@ -87,14 +87,15 @@ class Voucher(Base):
     cancellation_reason = Column(Text, nullable=True)
 
     # Timestamps
-    created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, server_default=func.now())  # keyset sort key
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
     deleted_at = Column(DateTime(timezone=True), nullable=True)
 
     # Table arguments for indexes
     __table_args__ = (
         Index('idx_voucher_status', 'status'),
-        Index('idx_voucher_date', 'voucher_date'),
+        Index('idx_voucher_date_id', 'voucher_date', 'id'),
+        Index('idx_voucher_created_id', 'created_at', 'id'),
         Index('idx_voucher_type', 'voucher_type'),
         Index('idx_voucher_supplier', 'supplier_id'),
         Index('idx_voucher_paid', 'is_paid', 'paid_date'),
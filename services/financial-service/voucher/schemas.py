@@ -190,10 +190,11 @@ class VoucherPostingResponse(BaseModel):
 class VoucherListResponse(BaseModel):
     """Schema for voucher list responses"""
     vouchers: List[VoucherResponse]
-    total: int
-    page: int
+    total: Optional[int] = Field(None, description="Matching vouchers; omitted unless counted")
+    page: Optional[int] = Field(None, description="Page number; omitted for cursor requests")
     size: int
-    pages: int
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page; null on the last page")
 
 # ============================================
 # VOUCHER SUMMARY SCHEMAS
@@ -0,0 +1,17 @@
+"""
+Voucher search
+Voucher document of global search, found by voucher number, payee or
+payment reference
+"""
+
+# Global search document (see shared_search.install_search_sources)
+VOUCHER_SEARCH_SOURCE = {
+    "table": "vouchers",
+    "entity_type": "voucher",
+    "columns": "voucher_number, payee_name, payment_reference, check_number, status, deleted_at",
+    "title": "voucher_number",
+    "subtitle": "payee_name",
+    "category": "status",
+    "search_text": "concat_ws(' ', voucher_number, payee_name, payment_reference, check_number)",
+    "live": "deleted_at IS NULL",
+}
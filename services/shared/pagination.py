@@ -0,0 +1,227 @@
+"""
+Shared keyset (cursor) pagination for all microservices
+A page is the rows strictly after the last row of the previous page in the
+sort order, found with a row comparison on (sort column, id) that a composite
+index on the same columns answers directly. Unlike OFFSET, the cost of a page
+does not grow with its depth, and rows inserted meanwhile do not shift pages.
+
+Totals are computed in one of three count modes: exact (count(*)), capped
+(count at most COUNT_CAP rows and report "N+") or estimate (the planner's
+row estimate from EXPLAIN), so a list can show a total without a full scan.
+"""
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple
+from datetime import date, datetime
+from decimal import Decimal
+import os
+import json
+import base64
+import binascii
+
+from sqlalchemy import asc, bindparam, desc, func, select, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+# Rows counted at most in capped mode; also the size below which estimates are replaced by a count
+COUNT_CAP = int(os.getenv("COUNT_CAP", 1000))
+
+# count_mode query parameter of list endpoints
+CountMode = Literal["exact", "capped", "estimate"]
+
+
+class PaginationError(ValueError):
+    """A cursor or sort order a list request cannot be paged by (reported as 400)"""
+
+
+def sort_columns(sort_keys: Dict[str, Any], sort_by: str, sort_order: str, id_column) -> Tuple[List[Any], bool]:
+    """
+    Key columns and direction for a list request's sort_by / sort_order
+
+    Args:
+        sort_keys: Allowed sort_by values and their (non-null, indexed) columns
+        sort_by: Requested sort key
+        sort_order: "asc" or "desc"
+        id_column: Primary key, appended as the tie-breaker
+
+    Returns:
+        ([sort column, id column], descending)
+    """
+    if sort_by not in sort_keys:
+        raise PaginationError(f"sort_by must be one of: {', '.join(sort_keys)}")
+    if sort_order not in ("asc", "desc"):
+        raise PaginationError("sort_order must be asc or desc")
+    return [sort_keys[sort_by], id_column], sort_order == "desc"
+
+
+def _encode_value(value: Any) -> Any:
+    # JSON has no date, datetime or Decimal; tag them so they decode to the column's type
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"n": str(value)}
+    return getattr(value, "value", value)
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "n" in value:
+            return Decimal(value["n"])
+        raise PaginationError("Invalid cursor")
+    return value
+
+
+def encode_cursor(sort: str, descending: bool, values: Sequence[Any]) -> str:
+    """Opaque cursor positioned after a row with the given sort key values"""
+    payload = {"s": sort, "o": "desc" if descending else "asc", "k": [_encode_value(v) for v in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, descending: bool, size: int) -> List[Any]:
+    """
+    Sort key values of a cursor
+
+    Args:
+        cursor: Value of next_cursor from a previous page
+        sort: Sort key the current request uses
+        descending: Sort direction the current request uses
+        size: Number of key columns (sort column plus tie-breakers)
+
+    Returns:
+        Key values of the last row of the previous page
+
+    Raises:
+        PaginationError: If the cursor cannot be decoded or belongs to another sort order
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [_decode_value(value) for value in payload["k"]]
+        cursor_sort, cursor_order = payload["s"], payload["o"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError):
+        raise PaginationError("Invalid cursor")
+    if cursor_sort != sort or cursor_order != ("desc" if descending else "asc"):
+        raise PaginationError("Cursor was issued for a different sort order")
+    if len(values) != size or any(value is None for value in values):
+        raise PaginationError("Invalid cursor")
+    return values
+
+
+def keyset_paginate(query, columns: Sequence[Any], sort: str, descending: bool, cursor: Optional[str], page_size: int):
+    """
+    Order a select() or Query by columns and limit it to the page after cursor
+
+    columns must identify a row uniquely (end with the primary key) and hold
+    no NULLs, and should match a composite index. One extra row is fetched so
+    keyset_page() can tell whether another page follows.
+    """
+    direction = desc if descending else asc
+    if cursor:
+        values = decode_cursor(cursor, sort, descending, len(columns))
+        keys = tuple_(*columns)
+        after = tuple_(*[bindparam(None, value, type_=column.type) for column, value in zip(columns, values)])
+        condition = keys < after if descending else keys > after
+        query = query.where(condition)
+    return query.order_by(*[direction(column) for column in columns]).limit(page_size + 1)
+
+
+def keyset_page(rows: Sequence[Any], columns: Sequence[Any], sort: str, descending: bool, page_size: int) -> Tuple[List[Any], Optional[str]]:
+    """
+    Split the rows of keyset_paginate() into the page and the cursor of the next one
+
+    Returns:
+        (rows of this page, next_cursor or None on the last page)
+    """
+    rows = list(rows)
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, encode_cursor(sort, descending, [getattr(last, column.key) for column in columns])
+
+
+# ============================================
+# TOTALS
+# ============================================
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a statement, executed with the statement's own bind parameters"""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def _statement(query):
+    # ORM Query objects carry their select() as .statement; ordering is irrelevant to a count
+    return getattr(query, "statement", query).order_by(None)
+
+
+def count_statement(query, count_mode: str, cap: int = COUNT_CAP):
+    """
+    SELECT count(*) for a list query (select() or Query) in exact or capped mode
+
+    The capped form counts at most cap + 1 rows, so a result above cap means "cap+".
+    """
+    statement = _statement(query)
+    if count_mode == "capped":
+        statement = statement.limit(cap + 1)
+    return select(func.count()).select_from(statement.subquery())
+
+
+def _plan_rows(plan: Any) -> int:
+    # psycopg2 decodes json columns, asyncpg returns the text
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _count_result(count: int, count_mode: str, cap: int) -> Tuple[int, str]:
+    if count_mode == "capped" and count > cap:
+        return cap, "capped"
+    return count, "exact"
+
+
+def count_rows(db, query, count_mode: str = "exact", cap: int = COUNT_CAP) -> Tuple[int, str]:
+    """
+    Total rows of a list query on a sync Session
+
+    Args:
+        db: Session the list query runs on
+        query: The filtered list query, before ordering and pagination
+        count_mode: exact, capped or estimate
+        cap: Most rows counted in capped mode
+
+    Returns:
+        (total, mode that produced it); a capped total means "at least total".
+        Estimates at or below cap, and estimates off Postgres, are replaced by
+        a capped count.
+    """
+    if count_mode == "estimate":
+        if db.get_bind().dialect.name == "postgresql":
+            estimate = _plan_rows(db.execute(Explain(_statement(query))).scalar())
+            if estimate > cap:
+                return estimate, "estimate"
+        count_mode = "capped"
+    return _count_result(db.scalar(count_statement(query, count_mode, cap)), count_mode, cap)
+
+
+async def count_rows_async(db, query, count_mode: str = "exact", cap: int = COUNT_CAP) -> Tuple[int, str]:
+    """count_rows() for an AsyncSession"""
+    if count_mode == "estimate":
+        if db.get_bind().dialect.name == "postgresql":
+            estimate = _plan_rows(await db.scalar(Explain(_statement(query))))
+            if estimate > cap:
+                return estimate, "estimate"
+        count_mode = "capped"
+    return _count_result(await db.scalar(count_statement(query, count_mode, cap)), count_mode, cap)
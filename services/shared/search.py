@@ -0,0 +1,205 @@
+"""
+Shared text search support for all microservices
+Search endpoints match with pg_trgm trigram GIN indexes instead of
+unindexable ILIKE '%term%' scans. The extensions and the normalising
+function live in the public schema, once per database, so every tenant
+schema's expression indexes and queries refer to them schema-qualified.
+
+Global search reads one table per tenant schema, search_documents, with a
+row per searchable entity of any service. Each service registers its
+tables as search sources: row triggers keep the documents current on every
+insert, update and delete, so the index never needs a rebuild.
+"""
+from typing import Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Minimum and maximum length of a search term
+SEARCH_MIN_LENGTH = 2
+SEARCH_MAX_LENGTH = 100
+
+# pg_trgm for similarity / LIKE indexes, unaccent for accent-insensitive names.
+# unaccent() is only STABLE, so indexes use an IMMUTABLE wrapper with a fixed dictionary.
+SEARCH_SETUP_SQL: List[str] = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm SCHEMA public",
+    "CREATE EXTENSION IF NOT EXISTS unaccent SCHEMA public",
+    """
+    CREATE OR REPLACE FUNCTION public.search_normalize(value text)
+    RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, value)) $$
+    """,
+]
+
+
+def setup_search(conn) -> bool:
+    """
+    Install the search extensions and functions (idempotent)
+
+    Args:
+        conn: AUTOCOMMIT connection of a role allowed to create extensions
+
+    Returns:
+        True if everything is in place, False otherwise
+    """
+    try:
+        for statement in SEARCH_SETUP_SQL:
+            conn.exec_driver_sql(statement)
+        return True
+    except Exception as e:
+        logger.error(f"Could not install search extensions: {str(e)}")
+        return False
+
+
+def create_search_indexes(conn, statements: List[str]) -> bool:
+    """
+    Run CREATE INDEX statements in the connection's current schema, continuing past failures
+
+    Statements should be CREATE INDEX CONCURRENTLY IF NOT EXISTS so existing
+    tenants are indexed without blocking writes; that needs an AUTOCOMMIT
+    connection.
+    """
+    ok = True
+    for statement in statements:
+        try:
+            conn.exec_driver_sql(statement)
+        except Exception as e:
+            ok = False
+            logger.warning(f"Could not create search index: {str(e)}")
+    return ok
+
+
+def normalize_term(term: str) -> str:
+    """Collapse whitespace and lowercase a search term (accents are removed in SQL)"""
+    return " ".join(term.split()).lower()[:SEARCH_MAX_LENGTH]
+
+
+def like_escape(term: str) -> str:
+    """Escape LIKE wildcards so a term matches literally (LIKE's default escape is backslash)"""
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def like_prefix(term: str) -> str:
+    return like_escape(term) + "%"
+
+
+def like_contains(term: str) -> str:
+    return "%" + like_escape(term) + "%"
+
+
+# ============================================
+# GLOBAL SEARCH DOCUMENTS
+# ============================================
+
+# Created by every service that registers a search source (idempotent)
+SEARCH_DOCUMENTS_SQL: List[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS search_documents (
+        entity_type varchar(30) NOT NULL,
+        entity_id bigint NOT NULL,
+        title text NOT NULL,
+        subtitle text,
+        category varchar(50),
+        search_text text NOT NULL,
+        updated_at timestamptz NOT NULL DEFAULT now(),
+        PRIMARY KEY (entity_type, entity_id)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_search_documents_trgm "
+    "ON search_documents USING gin (search_text public.gin_trgm_ops)",
+]
+
+
+def search_document_select(source: Dict[str, str]) -> str:
+    """
+    SELECT producing a source's documents from rows aliased as its table
+
+    A source is a dict with:
+        table: Source table
+        entity_type: Type reported in search hits
+        columns: Comma-separated columns whose changes re-index a row
+        title, subtitle, category: SQL expressions over the row
+        search_text: SQL expression with everything the row is found by
+        live: Condition for a row to be searchable (e.g. "deleted_at IS NULL")
+    """
+    return f"""
+        SELECT '{source["entity_type"]}', id, coalesce({source["title"]}, ''), {source["subtitle"]},
+               ({source["category"]})::text, public.search_normalize({source["search_text"]})
+    """
+
+
+def _upsert(select_sql: str) -> str:
+    return f"""
+        INSERT INTO search_documents (entity_type, entity_id, title, subtitle, category, search_text)
+        {select_sql}
+        ON CONFLICT (entity_type, entity_id) DO UPDATE SET
+            title = EXCLUDED.title, subtitle = EXCLUDED.subtitle, category = EXCLUDED.category,
+            search_text = EXCLUDED.search_text, updated_at = now()
+    """
+
+
+def search_source_sql(source: Dict[str, str]) -> List[str]:
+    """
+    Trigger function and trigger that keep a source's documents current
+
+    The function runs with the search_path it was created under, so it
+    writes to the tenant schema of the table that fired it.
+    """
+    table, entity_type = source["table"], source["entity_type"]
+    select_sql = search_document_select(source) + f"FROM (SELECT NEW.*) AS {table} WHERE {source['live']}"
+    return [
+        f"""
+        CREATE OR REPLACE FUNCTION search_index_{table}() RETURNS trigger
+        LANGUAGE plpgsql SET search_path FROM CURRENT AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                DELETE FROM search_documents WHERE entity_type = '{entity_type}' AND entity_id = OLD.id;
+                RETURN NULL;
+            END IF;
+            {_upsert(select_sql)};
+            IF NOT FOUND THEN
+                DELETE FROM search_documents WHERE entity_type = '{entity_type}' AND entity_id = NEW.id;
+            END IF;
+            RETURN NULL;
+        END $$
+        """,
+        f"DROP TRIGGER IF EXISTS search_index ON {table}",
+        f"""
+        CREATE TRIGGER search_index
+        AFTER INSERT OR DELETE OR UPDATE OF {source["columns"]} ON {table}
+        FOR EACH ROW EXECUTE FUNCTION search_index_{table}()
+        """,
+    ]
+
+
+def search_backfill_sql(source: Dict[str, str]) -> str:
+    """Index every live row of a source (for tables that predate their trigger)"""
+    return _upsert(search_document_select(source) + f"FROM {source['table']} WHERE {source['live']}")
+
+
+def install_search_sources(conn, sources: List[Dict[str, str]]) -> bool:
+    """
+    Create search_documents and register sources in the connection's current schema
+
+    Each source gets its trigger and a backfill of its existing rows; a
+    failing source is logged and skipped, which needs an AUTOCOMMIT
+    connection. Run setup_search() first.
+    """
+    try:
+        for statement in SEARCH_DOCUMENTS_SQL:
+            conn.exec_driver_sql(statement)
+    except Exception as e:
+        logger.error(f"Could not create search documents: {str(e)}")
+        return False
+
+    ok = True
+    for source in sources:
+        try:
+            for statement in search_source_sql(source):
+                conn.exec_driver_sql(statement)
+            conn.exec_driver_sql(search_backfill_sql(source))
+        except Exception as e:
+            ok = False
+            logger.warning(f"Could not register search source {source['table']}: {str(e)}")
+    return ok
@@ -31,6 +31,8 @@ from shared_auth import (
 
 # Import database
 from database import engine, get_db, SessionLocal, verify_connection
+from shared_metrics import setup_metrics
+from shared_search import setup_search, install_search_sources
 
 # Import routers from modules
 from users.endpoints import (
@@ -47,6 +49,7 @@ from settings.endpoints import (
     get_audit_log
 )
 from tools.endpoints import router as tools_router
+from search.endpoints import router as search_router
 
 # Import models to register them with their respective Base
 from users.models import Base as UsersBase
@@ -168,6 +171,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request metrics (/metrics) and Server-Timing headers
+setup_metrics(app, "system-service")
+
 
 # ============================================================================
 # Health Check Endpoints
@@ -318,6 +324,16 @@ async def initialize_tenant_schema(
                 table.to_metadata(tools_metadata)
             tools_metadata.create_all(conn)
 
+        # Global search documents; the services owning the searched tables fill them.
+        # The connection goes back to the shared pool, so its search_path is reset.
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text(f"SET search_path TO {schema_name}"))
+            try:
+                if setup_search(conn):
+                    install_search_sources(conn, [])
+            finally:
+                conn.execute(text("RESET search_path"))
+
         # Create default roles and admin user
         from users.models import User, Role, Permission
         from common.enums import UserStatus, PermissionAction, ResourceType
@@ -812,6 +828,13 @@ app.include_router(
     tags=["Tools"]
 )
 
+# Search module - global search across every module of a tenant
+app.include_router(
+    search_router,
+    prefix="/api/v1/tenants/{tenant_slug}/search",
+    tags=["Search"]
+)
+
 
 # ============================================================================
 # Exception Handlers
@@ -0,0 +1,22 @@
+"""
+Search Module
+Exports the global search schemas and endpoints
+"""
+
+from .schemas import (
+    SearchEntityType,
+    SearchHit,
+    SearchResponse,
+)
+
+from .endpoints import router as search_router
+
+__all__ = [
+    # Schemas
+    "SearchEntityType",
+    "SearchHit",
+    "SearchResponse",
+
+    # Router
+    "search_router",
+]
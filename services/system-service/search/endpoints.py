@@ -0,0 +1,95 @@
+"""
+Search Module Endpoints
+Global search across bookings, passengers, CRM actors, invoices, vouchers and
+inbox conversations, over the tenant's search_documents table
+"""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import bindparam, text
+from typing import List, Optional
+
+from shared_auth import get_current_user, safe_tenant_session, validate_tenant_access
+from shared_search import SEARCH_MIN_LENGTH, SEARCH_MAX_LENGTH, normalize_term, like_contains
+from .schemas import SearchEntityType, SearchResponse
+
+router = APIRouter()
+
+
+# ============================================
+# Search Queries
+# ============================================
+
+def global_search_query(fuzzy: bool, typed: bool):
+    """
+    Ranked search_documents query
+
+    Documents match on a substring of the term, accents and case ignored;
+    with fuzzy they also match by trigram word similarity, which tolerates
+    typos. An exact title (e.g. a full booking or invoice number) ranks first.
+    """
+    condition = "search_text LIKE public.search_normalize(:contains)"
+    if fuzzy:
+        condition = f"({condition} OR public.search_normalize(:term) OPERATOR(public.<%) search_text)"
+    if typed:
+        condition += " AND entity_type IN :types"
+
+    query = text(f"""
+        SELECT entity_type, entity_id, title, subtitle, category,
+               CASE WHEN lower(title) = :term THEN 1.0
+                    ELSE public.word_similarity(public.search_normalize(:term), search_text) END AS score
+        FROM search_documents
+        WHERE {condition}
+        ORDER BY score DESC, updated_at DESC
+        LIMIT :limit
+    """)
+    if typed:
+        query = query.bindparams(bindparam("types", expanding=True))
+    return query
+
+
+# ============================================
+# Search Endpoints
+# ============================================
+
+@router.get("/", response_model=SearchResponse)
+def global_search(
+    tenant_slug: str,
+    q: str = Query(..., min_length=SEARCH_MIN_LENGTH, max_length=SEARCH_MAX_LENGTH, description="Search term"),
+    types: Optional[List[SearchEntityType]] = Query(None, description="Only these entity types"),
+    fuzzy: bool = Query(False, description="Also match misspelled terms"),
+    limit: int = Query(20, ge=1, le=100),
+    current_user = Depends(get_current_user)
+):
+    """
+    Search every module of a tenant at once
+
+    Returns ranked, typed hits (booking, passenger, actor, invoice, voucher,
+    conversation) from one indexed query. The documents are kept current by
+    triggers on the source tables, so new and edited rows are found at once.
+    """
+    # Validate tenant access first
+    validate_tenant_access(current_user, tenant_slug)
+
+    term = normalize_term(q)
+    params = {"term": term, "contains": like_contains(term), "limit": limit}
+    if types:
+        params["types"] = list(types)
+
+    with safe_tenant_session(tenant_slug) as db:
+        rows = db.execute(global_search_query(fuzzy, bool(types)), params).all()
+
+    return {
+        "query": q,
+        "fuzzy": fuzzy,
+        "items": [
+            {
+                "type": row.entity_type,
+                "id": row.entity_id,
+                "title": row.title,
+                "subtitle": row.subtitle,
+                "category": row.category,
+                "score": round(float(row.score), 4)
+            }
+            for row in rows
+        ]
+    }
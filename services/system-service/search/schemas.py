@@ -0,0 +1,30 @@
+"""
+Search Module Schemas
+Pydantic schemas for the global search API endpoint
+"""
+
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal
+
+
+# ============================================
+# Search Schemas
+# ============================================
+
+# Entity types registered with global search by their owning services
+SearchEntityType = Literal["booking", "passenger", "actor", "invoice", "voucher", "conversation"]
+
+
+class SearchHit(BaseModel):
+    type: str = Field(..., description="booking, passenger, actor, invoice, voucher or conversation")
+    id: int
+    title: str
+    subtitle: Optional[str] = None
+    category: Optional[str] = Field(None, description="Status, actor type or channel of the entity")
+    score: float = Field(..., description="Relevance between 0 and 1")
+
+
+class SearchResponse(BaseModel):
+    query: str
+    fuzzy: bool
+    items: List[SearchHit]
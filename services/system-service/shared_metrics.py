@@ -0,0 +1,565 @@
+"""
+Shared request metrics for all microservices
+Prometheus-style histograms, counters and gauges exposed on /metrics, plus a
+Server-Timing header that splits each response's latency into components
+(auth, db, db_wait, upstream, ...). SQL statements are also counted per
+request, so handlers that query in a loop (N+1) show up as warnings.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+import os
+import re
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Configuration
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_PATH = os.getenv("METRICS_PATH", "/metrics")
+# Tenants beyond this many distinct values are reported as "other" to bound cardinality
+METRICS_MAX_TENANTS = int(os.getenv("METRICS_MAX_TENANTS", 500))
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+
+# Per-request SQL budget: statements, seconds of SQL time, executions of one statement shape
+SQL_QUERY_THRESHOLD = int(os.getenv("SQL_QUERY_THRESHOLD", 50))
+SQL_TIME_THRESHOLD = float(os.getenv("SQL_TIME_THRESHOLD", 1.0))
+SQL_REPEAT_THRESHOLD = int(os.getenv("SQL_REPEAT_THRESHOLD", 10))
+# off | warn | raise (raise fails the offending request; meant for test runs)
+SQL_CHECK_MODE = os.getenv("SQL_CHECK_MODE", "warn").lower()
+# Add x-sql-count / x-sql-time-ms / x-sql-max-repeat response headers
+SQL_DEBUG_HEADERS = os.getenv("SQL_DEBUG_HEADERS", os.getenv("DEBUG", "false")).lower() == "true"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Distinct statement shapes tracked per request; later shapes are only counted in the total
+MAX_SQL_SHAPES = 200
+
+SERVICE_NAME = os.getenv("SERVICE_NAME", "unknown")
+
+
+# ============================================
+# METRIC TYPES
+# ============================================
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, key)} {value}" for key, value in items
+        ]
+
+
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, key)} {value}" for key, value in items
+        ]
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = [0] * (len(self.buckets) + 1) + [0.0]
+                self._values[key] = series
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._values.items()]
+        lines = self.header()
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            labels = _format_labels(self.label_names, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> Any:
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("service", "method", "route")
+)
+REQUESTS_TOTAL = registry.counter(
+    "http_requests_total", "HTTP requests by route and status", ("service", "method", "route", "status")
+)
+REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", ("service",)
+)
+TENANT_REQUEST_DURATION = registry.histogram(
+    "tenant_request_duration_seconds", "HTTP request latency by tenant", ("service", "tenant")
+)
+UPSTREAM_DURATION = registry.histogram(
+    "upstream_request_duration_seconds", "Time to upstream response headers", ("service", "upstream", "status")
+)
+DB_POOL_WAIT = registry.histogram(
+    "db_pool_wait_seconds", "Time spent acquiring a database connection from the pool", ("service",)
+)
+DB_QUERY_DURATION = registry.histogram(
+    "db_query_duration_seconds", "SQL statement execution time", ("service",)
+)
+DB_REPLICA_LAG = registry.gauge(
+    "db_replica_lag_seconds", "Replication lag of the read replica", ("service",)
+)
+DB_REPLICA_UP = registry.gauge(
+    "db_replica_up", "Whether the read replica answered its last lag check", ("service",)
+)
+DB_READ_ROUTING = registry.counter(
+    "db_read_routing_total", "Read-only sessions by target database and reason", ("service", "target", "reason")
+)
+DB_STATEMENTS_PER_REQUEST = registry.histogram(
+    "db_statements_per_request", "SQL statements executed per HTTP request", ("service", "route"), STATEMENT_BUCKETS
+)
+DB_QUERY_BUDGET_EXCEEDED = registry.counter(
+    "db_query_budget_exceeded_total", "Requests over the per-request SQL budget", ("service", "route", "reason")
+)
+
+
+# ============================================
+# SQL STATEMENT SHAPES
+# ============================================
+
+_SQL_STRING = re.compile(r"'(?:[^']|'')*'")
+_SQL_PARAM = re.compile(r"%\(\w+\)s|%s|\$\d+|\?")
+_SQL_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SQL_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_SQL_WHITESPACE = re.compile(r"\s+")
+
+
+def sql_shape(statement: str) -> str:
+    """
+    A statement with literals and bind parameters replaced by ?
+
+    Executions that differ only in their values share a shape, and expanded
+    IN lists collapse to IN (?) whatever their length, so the same query run
+    in a loop is counted as one repeated shape.
+    """
+    shape = _SQL_STRING.sub("?", statement)
+    shape = _SQL_PARAM.sub("?", shape)
+    shape = _SQL_NUMBER.sub("?", shape)
+    shape = _SQL_IN_LIST.sub("IN (?)", shape)
+    return _SQL_WHITESPACE.sub(" ", shape).strip()[:500]
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised in SQL_CHECK_MODE=raise when a request goes over its SQL budget"""
+
+
+# ============================================
+# PER-REQUEST TIMING
+# ============================================
+
+class RequestTiming:
+    """Latency components accumulated while serving one request"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.components: Dict[str, float] = {}
+        self.route: Optional[str] = None
+        self.tenant: Optional[str] = None
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.sql_shapes: Dict[str, int] = {}
+        self.budget_raised = False
+
+    def add(self, component: str, seconds: float):
+        self.components[component] = self.components.get(component, 0.0) + seconds
+
+    def record_sql(self, statement: str, seconds: float):
+        """Count one executed statement and its shape"""
+        self.sql_count += 1
+        self.sql_time += seconds
+        # search_path is set at the start of every tenant transaction; not a repeat worth reporting
+        if not statement.lstrip()[:4].upper() == "SET ":
+            shape = sql_shape(statement)
+            if shape in self.sql_shapes or len(self.sql_shapes) < MAX_SQL_SHAPES:
+                self.sql_shapes[shape] = self.sql_shapes.get(shape, 0) + 1
+        if SQL_CHECK_MODE == "raise" and not self.budget_raised:
+            violations = self.budget_violations()
+            if violations:
+                # Once per request, so error handling that queries again is not interrupted
+                self.budget_raised = True
+                raise QueryBudgetExceeded(self.budget_message(violations))
+
+    def max_repeat(self) -> Tuple[int, Optional[str]]:
+        """Executions of the most repeated statement shape, and that shape"""
+        if not self.sql_shapes:
+            return 0, None
+        shape = max(self.sql_shapes, key=self.sql_shapes.get)
+        return self.sql_shapes[shape], shape
+
+    def budget_violations(self) -> List[str]:
+        """Which per-request SQL thresholds this request has crossed (statements, time, repeated)"""
+        violations = []
+        if SQL_QUERY_THRESHOLD > 0 and self.sql_count > SQL_QUERY_THRESHOLD:
+            violations.append("statements")
+        if SQL_TIME_THRESHOLD > 0 and self.sql_time > SQL_TIME_THRESHOLD:
+            violations.append("time")
+        if SQL_REPEAT_THRESHOLD > 0 and self.max_repeat()[0] >= SQL_REPEAT_THRESHOLD:
+            violations.append("repeated")
+        return violations
+
+    def budget_message(self, violations: List[str], where: Optional[str] = None) -> str:
+        repeats, shape = self.max_repeat()
+        message = (
+            f"SQL budget exceeded ({', '.join(violations)}) on {where or self.route or 'request'}: "
+            f"{self.sql_count} statements, {self.sql_time * 1000:.1f}ms"
+        )
+        if "repeated" in violations:
+            message += f", {repeats}x {shape}"
+        return message
+
+    def sql_headers(self) -> List[Tuple[bytes, bytes]]:
+        return [
+            (b"x-sql-count", str(self.sql_count).encode("latin-1")),
+            (b"x-sql-time-ms", f"{self.sql_time * 1000:.1f}".encode("latin-1")),
+            (b"x-sql-max-repeat", str(self.max_repeat()[0]).encode("latin-1")),
+        ]
+
+    def server_timing(self) -> str:
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.components.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.started_at) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current_timing: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+def record_timing(component: str, seconds: float):
+    """Add time to a Server-Timing component of the current request (no-op outside requests)"""
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.add(component, seconds)
+
+
+@contextmanager
+def timed(component: str):
+    """Time a block as a Server-Timing component of the current request"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(component, time.perf_counter() - started)
+
+
+def set_request_labels(route: Optional[str] = None, tenant: Optional[str] = None):
+    """Override the route and/or tenant label recorded for the current request"""
+    timing = _current_timing.get()
+    if timing is not None:
+        if route is not None:
+            timing.route = route
+        if tenant is not None:
+            timing.tenant = tenant
+
+
+def observe_upstream(upstream: str, seconds: float, status: Any):
+    """Record an upstream call (used by the API gateway)"""
+    UPSTREAM_DURATION.observe(seconds, service=SERVICE_NAME, upstream=upstream, status=status)
+    record_timing("upstream", seconds)
+
+
+def set_replica_lag(seconds: Optional[float]):
+    """Export the read replica's lag; None marks it unreachable"""
+    DB_REPLICA_UP.set(0 if seconds is None else 1, service=SERVICE_NAME)
+    if seconds is not None:
+        DB_REPLICA_LAG.set(seconds, service=SERVICE_NAME)
+
+
+def observe_read_routing(target: str, reason: str):
+    """Count a read-only session sent to the replica or back to the primary"""
+    DB_READ_ROUTING.inc(service=SERVICE_NAME, target=target, reason=reason)
+
+
+# ============================================
+# MIDDLEWARE
+# ============================================
+
+_seen_tenants: set = set()
+_route_templates: Dict[Any, str] = {}
+
+
+def _tenant_label(tenant: Optional[str]) -> str:
+    if not tenant:
+        return "none"
+    if tenant in _seen_tenants:
+        return tenant
+    if len(_seen_tenants) >= METRICS_MAX_TENANTS:
+        return "other"
+    _seen_tenants.add(tenant)
+    return tenant
+
+
+def _route_template(scope: Dict[str, Any]) -> str:
+    """The matched route's path template, so labels do not explode with path parameters"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    template = _route_templates.get(endpoint)
+    if template is None:
+        app = scope.get("app")
+        for route in getattr(app, "routes", []):
+            if getattr(route, "endpoint", None) is endpoint:
+                template = route.path
+                break
+        template = template or "unknown"
+        _route_templates[endpoint] = template
+    return template
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request metrics and adding Server-Timing
+
+    Written as plain ASGI so streamed responses pass through untouched;
+    Server-Timing reflects the time until response headers were sent.
+    """
+
+    def __init__(self, app, service_name: str):
+        self.app = app
+        self.service_name = service_name
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == METRICS_PATH:
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _current_timing.set(timing)
+        status_code = 500
+        REQUESTS_IN_FLIGHT.inc(service=self.service_name)
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING_ENABLED or SQL_DEBUG_HEADERS:
+                    headers = list(message.get("headers", []))
+                    if SERVER_TIMING_ENABLED:
+                        headers.append((b"server-timing", timing.server_timing().encode("latin-1")))
+                    if SQL_DEBUG_HEADERS:
+                        headers.extend(timing.sql_headers())
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            duration = time.perf_counter() - timing.started_at
+            REQUESTS_IN_FLIGHT.dec(service=self.service_name)
+            route = timing.route or _route_template(scope)
+            method = scope.get("method", "")
+            REQUEST_DURATION.observe(duration, service=self.service_name, method=method, route=route)
+            REQUESTS_TOTAL.inc(service=self.service_name, method=method, route=route, status=status_code)
+            if timing.sql_count:
+                DB_STATEMENTS_PER_REQUEST.observe(timing.sql_count, service=self.service_name, route=route)
+                self._check_sql_budget(timing, method, route)
+
+            path_params = scope.get("path_params") or {}
+            tenant = timing.tenant or path_params.get("tenant_slug") or path_params.get("tenant_id")
+            TENANT_REQUEST_DURATION.observe(duration, service=self.service_name, tenant=_tenant_label(tenant))
+            _current_timing.reset(token)
+
+    def _check_sql_budget(self, timing: RequestTiming, method: str, route: str):
+        if SQL_CHECK_MODE == "off":
+            return
+        violations = timing.budget_violations()
+        if not violations:
+            return
+        for reason in violations:
+            DB_QUERY_BUDGET_EXCEEDED.inc(service=self.service_name, route=route, reason=reason)
+        logger.warning(timing.budget_message(violations, f"{method} {route}"))
+
+
+def setup_metrics(app, service_name: str):
+    """
+    Install the metrics middleware and the /metrics endpoint on a FastAPI app
+
+    Call right after creating the app so /metrics is registered before any
+    catch-all routes.
+    """
+    global SERVICE_NAME
+    SERVICE_NAME = service_name
+    if not METRICS_ENABLED:
+        return
+
+    from fastapi.responses import PlainTextResponse
+
+    async def metrics_endpoint():
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+    app.add_api_route(METRICS_PATH, metrics_endpoint, methods=["GET"], include_in_schema=False)
+    app.add_middleware(MetricsMiddleware, service_name=service_name)
+
+
+# ============================================
+# DATABASE INSTRUMENTATION
+# ============================================
+
+def instrument_engine(engine):
+    """
+    Record pool wait and SQL execution time for a SQLAlchemy engine
+
+    Both are added to the current request's Server-Timing (db_wait, db) and to
+    the db_pool_wait_seconds / db_query_duration_seconds histograms. Each
+    statement is also counted against the request's SQL budget.
+    """
+    if not METRICS_ENABLED or getattr(engine, "_metrics_instrumented", False):
+        return engine
+
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("_query_started")
+        if started:
+            elapsed = time.perf_counter() - started.pop()
+            DB_QUERY_DURATION.observe(elapsed, service=SERVICE_NAME)
+            timing = _current_timing.get()
+            if timing is not None:
+                timing.add("db", elapsed)
+                if SQL_CHECK_MODE != "off" or SQL_DEBUG_HEADERS:
+                    timing.record_sql(statement, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("_query_started"):
+            conn.info["_query_started"].pop()
+
+    # Connection checkout: Connection() calls engine.raw_connection(), which
+    # blocks while the pool is exhausted
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return raw_connection(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            DB_POOL_WAIT.observe(elapsed, service=SERVICE_NAME)
+            record_timing("db_wait", elapsed)
+
+    engine.raw_connection = timed_raw_connection
+    engine._metrics_instrumented = True
+    return engine
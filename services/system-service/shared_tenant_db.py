@@ -0,0 +1,260 @@
+"""
+Shared tenant session routing for all microservices
+Tenant sessions check connections out of the service's single pool and scope
+them to the tenant schema with SET LOCAL search_path at the start of every
+transaction, so the number of Postgres connections is bounded by the pool
+size instead of growing with the number of tenants.
+"""
+from typing import Any, Awaitable, Callable, Dict, Iterable
+from collections import OrderedDict
+from contextlib import contextmanager, asynccontextmanager
+import os
+import re
+import time
+import logging
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker, Session
+
+logger = logging.getLogger(__name__)
+
+# Per-schema state is kept in a bounded LRU; entries idle past the TTL are dropped
+TENANT_SCHEMA_CACHE_SIZE = int(os.getenv("TENANT_SCHEMA_CACHE_SIZE", 1000))
+TENANT_SCHEMA_CACHE_TTL = float(os.getenv("TENANT_SCHEMA_CACHE_TTL", 300))
+
+# Session.info key holding the search_path applied to each transaction
+SEARCH_PATH_KEY = "tenant_search_path"
+
+# Unquoted Postgres identifiers, as created by the schema managers
+SCHEMA_NAME_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]{0,62}$")
+
+
+def async_database_url(database_url: str) -> str:
+    """The asyncpg form of a postgresql:// (or postgresql+psycopg2://) URL"""
+    scheme, sep, rest = database_url.partition("://")
+    if sep and scheme.split("+")[0] in ("postgres", "postgresql"):
+        return f"postgresql+asyncpg://{rest}"
+    return database_url
+
+
+def validate_schema_name(schema_name: str) -> str:
+    """
+    Check that a schema name is a plain identifier before it is put into SQL
+
+    Raises:
+        ValueError: If the name could not have been created as an unquoted schema
+    """
+    if not isinstance(schema_name, str) or not SCHEMA_NAME_PATTERN.match(schema_name):
+        raise ValueError(f"Invalid tenant schema name: {schema_name!r}")
+    return schema_name
+
+
+class SchemaCache:
+    """
+    Bounded LRU of tenant schemas known to exist
+
+    Only positive results are cached, so a newly created tenant is usable
+    immediately. The least recently used schema is evicted once max_size is
+    reached, and schemas not used for ttl seconds are pruned on access.
+    """
+
+    def __init__(self, max_size: int = TENANT_SCHEMA_CACHE_SIZE, ttl: float = TENANT_SCHEMA_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _prune(self, now: float):
+        # Entries are ordered by last use, so idle ones are at the front
+        while self._entries:
+            schema_name, last_used = next(iter(self._entries.items()))
+            if now - last_used < self.ttl:
+                break
+            del self._entries[schema_name]
+            self.expirations += 1
+
+    def _lookup(self, schema_name: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            if schema_name in self._entries:
+                self._entries[schema_name] = now
+                self._entries.move_to_end(schema_name)
+                self.hits += 1
+                return True
+            self.misses += 1
+            return False
+
+    def _store(self, schema_name: str):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[schema_name] = time.monotonic()
+            self._entries.move_to_end(schema_name)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def exists(self, schema_name: str, check: Callable[[str], bool]) -> bool:
+        """Return whether a schema exists, calling check() only on a cache miss"""
+        if self._lookup(schema_name):
+            return True
+        found = check(schema_name)
+        if found:
+            self._store(schema_name)
+        return found
+
+    async def exists_async(self, schema_name: str, check: Callable[[str], Awaitable[bool]]) -> bool:
+        """exists() for an async check, e.g. a query on an AsyncSession"""
+        if self._lookup(schema_name):
+            return True
+        found = await check(schema_name)
+        if found:
+            self._store(schema_name)
+        return found
+
+    def invalidate(self, schema_name: str):
+        """Forget a schema, e.g. after it was dropped"""
+        with self._lock:
+            self._entries.pop(schema_name, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._prune(time.monotonic())
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+class TenantSessionFactory:
+    """
+    Tenant-scoped sessions on one shared engine
+
+    Every transaction a tenant session begins first runs
+    SET LOCAL search_path TO <schema>[, <extra schemas>]. The setting ends with
+    the transaction, so a connection returned to the pool carries no tenant
+    state and may serve any tenant next.
+    """
+
+    def __init__(self, engine: Engine, extra_schemas: Iterable[str] = (), autoflush: bool = False):
+        self.engine = engine
+        self.extra_schemas = tuple(validate_schema_name(schema) for schema in extra_schemas)
+        self._sessionmaker = sessionmaker(autocommit=False, autoflush=autoflush, bind=engine)
+        event.listen(self._sessionmaker, "after_begin", self._apply_search_path)
+        self.schemas = SchemaCache()
+        self.sessions_opened = 0
+
+    @staticmethod
+    def _apply_search_path(session: Session, transaction, connection):
+        search_path = session.info.get(SEARCH_PATH_KEY)
+        if search_path:
+            connection.exec_driver_sql(f"SET LOCAL search_path TO {search_path}")
+
+    def search_path(self, schema_name: str) -> str:
+        return ", ".join((validate_schema_name(schema_name),) + self.extra_schemas)
+
+    def session(self, schema_name: str) -> Session:
+        """New session whose transactions run inside the tenant schema; the caller closes it"""
+        session = self._sessionmaker(info={SEARCH_PATH_KEY: self.search_path(schema_name)})
+        self.sessions_opened += 1
+        return session
+
+    def schema_exists(self, schema_name: str, check: Callable[[str], bool]) -> bool:
+        """Cached schema existence check; check() runs the actual query"""
+        return self.schemas.exists(schema_name, check)
+
+    @contextmanager
+    def connect(self, schema_name: str):
+        """Connection with an open transaction scoped to the tenant schema, committed on exit"""
+        with self.engine.begin() as conn:
+            conn.exec_driver_sql(f"SET LOCAL search_path TO {self.search_path(schema_name)}")
+            yield conn
+
+    def stats(self) -> Dict[str, Any]:
+        """Shared pool usage (bounded by pool size plus overflow) and schema cache counters"""
+        stats: Dict[str, Any] = {"sessions_opened": self.sessions_opened}
+        stats["schema_cache"] = self.schemas.stats()
+        stats.update(pool_stats(self.engine))
+        return stats
+
+
+class AsyncTenantSessionFactory:
+    """
+    Tenant-scoped AsyncSessions on one shared AsyncEngine (asyncpg)
+
+    Same contract as TenantSessionFactory: every transaction starts with
+    SET LOCAL search_path, so pooled connections carry no tenant state.
+    Sessions do not expire objects on commit; lazy loading is not available
+    under asyncio, so handlers load the relationships they return up front.
+    """
+
+    def __init__(self, engine, extra_schemas: Iterable[str] = (), autoflush: bool = False):
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        self.engine = engine
+        self.extra_schemas = tuple(validate_schema_name(schema) for schema in extra_schemas)
+        # A Session subclass per factory keeps the hook off every other session
+        sync_session_class = type("AsyncTenantSession", (Session,), {})
+        event.listen(sync_session_class, "after_begin", TenantSessionFactory._apply_search_path)
+        self._sessionmaker = async_sessionmaker(
+            engine,
+            sync_session_class=sync_session_class,
+            autoflush=autoflush,
+            expire_on_commit=False
+        )
+        self.schemas = SchemaCache()
+        self.sessions_opened = 0
+
+    def search_path(self, schema_name: str) -> str:
+        return ", ".join((validate_schema_name(schema_name),) + self.extra_schemas)
+
+    def session(self, schema_name: str):
+        """New AsyncSession whose transactions run inside the tenant schema; the caller closes it"""
+        session = self._sessionmaker(info={SEARCH_PATH_KEY: self.search_path(schema_name)})
+        self.sessions_opened += 1
+        return session
+
+    async def schema_exists(self, schema_name: str, check: Callable[[str], Awaitable[bool]]) -> bool:
+        """Cached schema existence check; check() is awaited on a miss"""
+        return await self.schemas.exists_async(schema_name, check)
+
+    @asynccontextmanager
+    async def connect(self, schema_name: str):
+        """AsyncConnection with an open transaction scoped to the tenant schema, committed on exit"""
+        async with self.engine.begin() as conn:
+            await conn.exec_driver_sql(f"SET LOCAL search_path TO {self.search_path(schema_name)}")
+            yield conn
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"sessions_opened": self.sessions_opened}
+        stats["schema_cache"] = self.schemas.stats()
+        stats.update(pool_stats(self.engine.sync_engine))
+        return stats
+
+
+def pool_stats(engine: Engine) -> Dict[str, Any]:
+    """Pool class, size, checked in/out connections, overflow and the connection ceiling"""
+    pool = engine.pool
+    stats: Dict[str, Any] = {"pool": pool.__class__.__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    max_overflow = getattr(pool, "_max_overflow", None)
+    if "size" in stats and max_overflow is not None and max_overflow >= 0:
+        stats["max_connections"] = stats["size"] + max_overflow
+    return stats
@@ -17,6 +17,7 @@ import os
 
 from database import get_db
 from models import Tenant, SubscriptionHistory
+from shared_tenant_directory import tenant_directory
 
 logger = logging.getLogger(__name__)
 
@@ -324,26 +325,8 @@ async def create_tenant_v2(
         db.add(subscription_history)
         db.commit()
 
-        # Cache tenant info in Redis (optional)
-        try:
-            import redis
-            redis_client = redis.Redis(
-                host=os.getenv("REDIS_HOST", "redis"),
-                port=int(os.getenv("REDIS_PORT", 6379)),
-                decode_responses=True
-            )
-            import json
-            redis_client.setex(
-                f"tenant:{new_tenant.slug}",
-                3600,
-                json.dumps({
-                    "id": tenant_id,
-                    "schema_name": schema_name,
-                    "status": new_tenant.status
-                })
-            )
-        except:
-            pass  # Redis caching is optional
+        # Publish to the tenant directory (Redis failures are logged and ignored)
+        tenant_directory.publish(new_tenant)
 
         logger.info(f"Successfully created tenant {tenant_data.slug} with admin user {tenant_data.owner_username}")
 
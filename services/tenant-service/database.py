@@ -6,6 +6,8 @@ import os
 import logging
 from contextlib import contextmanager
 from typing import Generator
+from shared_metrics import instrument_engine
+from shared_tenant_db import TenantSessionFactory
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -28,6 +30,7 @@ engine = create_engine(
         "application_name": "tenant-service"
     }
 )
+instrument_engine(engine)
 
 # Create session factory
 SessionLocal = sessionmaker(
@@ -82,6 +85,7 @@ class DatabaseManager:
     def __init__(self):
         self.engine = engine
         self.SessionLocal = SessionLocal
+        self.tenant_sessions = TenantSessionFactory(engine, extra_schemas=("shared", "public"))
 
     def create_tenant_schema(self, schema_name: str) -> bool:
         """
@@ -120,24 +124,8 @@ class DatabaseManager:
         """
         Get a database session for a specific tenant schema
         """
-        # Create a new engine with the tenant's schema in search_path
-        tenant_engine = create_engine(
-            DATABASE_URL,
-            poolclass=NullPool,
-            echo=False,
-            connect_args={
-                "options": f"-csearch_path={schema_name},shared,public"
-            }
-        )
-
-        # Create session for tenant
-        TenantSession = sessionmaker(
-            autocommit=False,
-            autoflush=False,
-            bind=tenant_engine
-        )
-
-        return TenantSession()
+        # Shares the main pool; search_path is set at the start of each transaction
+        return self.tenant_sessions.session(schema_name)
 
     def check_schema_exists(self, schema_name: str) -> bool:
         """
@@ -19,6 +19,8 @@ logger = logging.getLogger(__name__)
 
 # Import database and models
 from database import get_db, engine, Base, db_manager
+from shared_metrics import setup_metrics
+from shared_tenant_directory import tenant_directory
 from models import Tenant, TenantUser, User, SubscriptionHistory, TenantFeature, FeatureFlag
 from auth_middleware import verify_token, get_current_user, require_super_admin, require_tenant_admin
 from tasks import provision_tenant_resources, cleanup_tenant_resources
@@ -58,6 +60,9 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Request metrics (/metrics) and Server-Timing headers
+setup_metrics(app, "tenant-service")
+
 # Pydantic models
 class TenantCreate(BaseModel):
     name: str = Field(..., min_length=3, max_length=255)
@@ -407,16 +412,8 @@ async def create_tenant(
         # Temporarily disabled due to Redis serialization issue
         # background_tasks.add_task(provision_tenant_resources, new_tenant.id, schema_name)
 
-        # Cache tenant info in Redis
-        redis_client.setex(
-            f"tenant:{new_tenant.slug}",
-            3600,
-            json.dumps({
-                "id": str(new_tenant.id),
-                "schema_name": schema_name,
-                "status": new_tenant.status
-            })
-        )
+        # Publish to the tenant directory
+        tenant_directory.publish(new_tenant)
 
         return TenantResponse(
             id=str(new_tenant.id),
@@ -581,16 +578,8 @@ async def update_tenant(
     db.commit()
     db.refresh(tenant)
 
-    # Update cache
-    redis_client.setex(
-        f"tenant:{tenant.slug}",
-        3600,
-        json.dumps({
-            "id": tenant.id,
-            "schema_name": tenant.schema_name,
-            "status": tenant.status
-        })
-    )
+    # Update the directory; other services drop their cached copy
+    tenant_directory.publish(tenant)
 
     user_count = db.query(TenantUser).filter(TenantUser.tenant_id == tenant.id).count()
 
@@ -635,8 +624,8 @@ async def delete_tenant(
         db.delete(tenant)
         db.commit()
 
-        # Clear cache
-        redis_client.delete(f"tenant:{tenant.slug}")
+        # Remove from the directory
+        tenant_directory.remove(tenant_id, tenant.slug)
 
         # Schedule cleanup tasks
         background_tasks.add_task(cleanup_tenant_resources, tenant_id)
@@ -729,6 +718,9 @@ async def update_subscription(
     db.add(history)
     db.commit()
 
+    # Update the directory so the gateway applies the new plan's rate limits
+    tenant_directory.publish(tenant)
+
     return {
         "message": f"Subscription updated to {new_plan}",
         "tenant_id": tenant_id,